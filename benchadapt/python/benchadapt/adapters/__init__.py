@@ -1,4 +1,4 @@
-from ._adapter import BenchmarkAdapter
+from ._adapter import BenchmarkAdapter, PostResultsError
 from .archery import ArcheryAdapter
 from .asvbench import AsvBenchmarkAdapter
 from .callable import CallableAdapter
@@ -11,5 +11,6 @@ __all__ = [
     "CallableAdapter",
     "FollyAdapter",
     "GoogleBenchmarkAdapter",
+    "PostResultsError",
     "AsvBenchmarkAdapter",
 ]
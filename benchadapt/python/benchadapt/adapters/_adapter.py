@@ -1,12 +1,11 @@
 import abc
-import datetime
 import logging
 import subprocess
 import uuid
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
-import requests
 from benchclients.conbench import ConbenchClient
+from benchclients.http import RetryingHTTPClientNonRetryableResponse
 from benchclients.logging import fatal_and_log
 
 from ..result import BenchmarkResult
@@ -24,6 +23,35 @@ logging.basicConfig(
 )
 
 
+class PostResultsError(Exception):
+    """
+    Raised by `BenchmarkAdapter.post_results()` when some results could not be
+    submitted.
+
+    Attributes
+    ----------
+    errors : Dict[int, Any]
+        For each failed result (by its index in the adapter's ``results``),
+        the exception or the error status object returned by the API
+    responses : list
+        The API responses for all results (see ``post_results()``), errors
+        included
+    """
+
+    def __init__(self, errors: Dict[int, Any], responses: list) -> None:
+        self.errors = errors
+        self.responses = responses
+        details = "; ".join(
+            f"result {ix}: {err}" for ix, err in sorted(errors.items())[:5]
+        )
+        if len(errors) > 5:
+            details += f"; and {len(errors) - 5} more"
+        super().__init__(
+            f"{len(errors)} of {len(responses)} results could not be posted: "
+            f"{details}"
+        )
+
+
 class BenchmarkAdapter(abc.ABC):
     """
     An abstract class to run benchmarks, transform results into conbench form,
@@ -165,46 +193,146 @@ class BenchmarkAdapter(abc.ABC):
 
         return result
 
-    def post_results(self) -> list:
+    def post_results(
+        self,
+        client: Optional[ConbenchClient] = None,
+        max_workers: int = 8,
+        batch_size: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> list:
         """
         Post results of run to conbench
+
+        Parameters
+        ----------
+        client : ConbenchClient
+            Client to use for posting. By default, a new one is created
+            (configured via environment variables).
+        max_workers : int
+            Maximum number of results posted concurrently (one request per
+            result). Ignored if ``batch_size`` is set. Results are posted
+            sequentially with benchclients versions before ``post_many()``.
+        batch_size : int
+            If set, submit up to this many results per request to the batch
+            (NDJSON) endpoint of the Conbench API. Falls back to one request
+            per result if the server does not provide that endpoint (or the
+            installed benchclients version does not support it).
+        progress : Callable[[int, int], None]
+            Called after each completed request with the number of results
+            processed so far and the total number of results.
+
+        Returns a list with one API response per result, in the order of
+        ``self.results``: the response body for results posted one by one, the
+        status object for results submitted in batches.
+
+        All results are attempted even if some of them fail. Raises
+        `PostResultsError` (holding all errors) at the end if any failed.
         """
         if not self.results:
             fatal_and_log(
                 "No results attribute to post! Was `run()` called on this instance?"
             )
 
-        log.info("Initializing conbench client")
-        client = ConbenchClient()
-
-        log.info("Posting results to conbench")
-        res_list = []
-        error = None
-        for result in self.results:
-            result_dict = result.to_publishable_dict()
-
-            try:
-                res = client.post(path="/benchmarks/", json=result_dict)
-            except requests.exceptions.ReadTimeout as e:
-                error_time = datetime.datetime.utcnow()
-                log.info(f"{error_time} POST timed out: {repr(e)}. Retrying...")
+        if client is None:
+            log.info("Initializing conbench client")
+            client = ConbenchClient()
+
+        result_dicts = [result.to_publishable_dict() for result in self.results]
+        n_total = len(result_dicts)
+        res_list: List[Any] = [None] * n_total
+        errors: Dict[int, Any] = {}
+
+        log.info("Posting %s results to conbench", n_total)
+        start = 0
+        if batch_size is not None:
+            if hasattr(client, "post_ndjson"):
+                start = self._post_results_batched(
+                    client, result_dicts, batch_size, res_list, errors, progress
+                )
+            else:
+                log.info("client does not support batches, posting results one by one")
+
+        if start < n_total and not hasattr(client, "post_many"):
+            # Older benchclients versions.
+            for ix in range(start, n_total):
                 try:
-                    res = client.post(path="/benchmarks/", json=result_dict)
-                except requests.exceptions.ReadTimeout as ee:
-                    error_time2 = datetime.datetime.utcnow()
-                    log.warning(
-                        (
-                            f"{error_time2} POST timed out again: {repr(ee)}. "
-                            "Skipping and continuing to other results."
-                        )
-                    )
-                    error = ee
-
-            res_list.append(res)
-
-        if error:
-            log.error(f"POST at {error_time} timed out twice:")
-            raise error
+                    res_list[ix] = client.post("/benchmarks/", json=result_dicts[ix])
+                except Exception as exc:
+                    errors[ix] = res_list[ix] = exc
+                if progress:
+                    progress(ix + 1, n_total)
+
+        elif start < n_total:
+            # Use one key per result for all attempts to submit it, so that a
+            # retry after a timeout does not create a duplicate result if the
+            # first attempt was in fact processed by the server.
+            responses = client.post_many(
+                "/benchmarks/",
+                result_dicts[start:],
+                headers=[
+                    {"Idempotency-Key": uuid.uuid4().hex} for _ in range(start, n_total)
+                ],
+                max_workers=max_workers,
+                progress=(
+                    (lambda done, _: progress(start + done, n_total))
+                    if progress
+                    else None
+                ),
+                return_exceptions=True,
+            )
+            for ix, res in enumerate(responses, start=start):
+                res_list[ix] = res
+                if isinstance(res, Exception):
+                    errors[ix] = res
+
+        if errors:
+            raise PostResultsError(errors, res_list)
 
         log.info("All results sent to conbench")
         return res_list
+
+    def _post_results_batched(
+        self,
+        client: ConbenchClient,
+        result_dicts: List[dict],
+        batch_size: int,
+        res_list: List[Any],
+        errors: Dict[int, Any],
+        progress: Optional[Callable[[int, int], None]],
+    ) -> int:
+        """
+        Submit results in batches to the NDJSON endpoint, filling in `res_list`
+        and `errors`. Return the number of results processed: less than
+        ``len(result_dicts)`` if the server does not provide the endpoint.
+        """
+        n_total = len(result_dicts)
+        for start in range(0, n_total, batch_size):
+            end = min(start + batch_size, n_total)
+            batch = result_dicts[start:end]
+            try:
+                statuses = client.post_ndjson("/benchmark-results/ndjson/", batch)
+            except Exception as exc:
+                if isinstance(
+                    exc, RetryingHTTPClientNonRetryableResponse
+                ) and exc.error_response.status_code in (404, 405):
+                    log.info("batch endpoint not available, posting results one by one")
+                    return start
+                log.warning("submitting results %s+ failed: %s", start, exc)
+                statuses = []
+                for ix in range(start, end):
+                    errors[ix] = res_list[ix] = exc
+
+            for status in statuses:
+                if "line" not in status:
+                    # Trailing summary object.
+                    continue
+                # Status objects refer to the (1-based) line of the batch.
+                ix = start + status["line"] - 1
+                res_list[ix] = status
+                if status.get("status") != 201:
+                    errors[ix] = status
+
+            if progress:
+                progress(end, n_total)
+
+        return n_total
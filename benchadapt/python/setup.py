@@ -18,6 +18,13 @@ install_requires = [
     .read_text()
     .splitlines()
 ]
+dev_requires = [
+    line.strip()
+    for line in pathlib.Path(__file__)
+    .parent.joinpath("requirements-dev.txt")
+    .read_text()
+    .splitlines()
+]
 
 setuptools.setup(
     name="benchadapt",
@@ -35,4 +42,5 @@ setuptools.setup(
     maintainer_email="conbench@voltrondata.com",
     url="https://github.com/conbench/conbench/tree/main/benchadapt",
     install_requires=install_requires,
+    extras_require={"dev": dev_requires},
 )
@@ -1,9 +1,14 @@
+import json
 from pathlib import Path
 from typing import List
 
-from benchadapt.adapters import BenchmarkAdapter
+import pytest
+from benchadapt.adapters import BenchmarkAdapter, PostResultsError
+from pytest_httpserver import HTTPServer
+from werkzeug.wrappers import Request, Response
 
 from benchadapt import BenchmarkResult
+from benchclients import ConbenchClient
 
 RESULTS_DICT = {
     "run_name": "very-real-benchmark",
@@ -36,6 +41,53 @@ class FakeAdapter(BenchmarkAdapter):
         return [BenchmarkResult(**RESULTS_DICT)]
 
 
+class ManyResultsAdapter(BenchmarkAdapter):
+    def _transform_results(self) -> List[BenchmarkResult]:
+        return [
+            BenchmarkResult(**{**RESULTS_DICT, "tags": {"name": f"bm-{i}"}})
+            for i in range(12)
+        ]
+
+
+def _result_index(doc: dict) -> int:
+    return int(doc["tags"]["name"].split("-")[1])
+
+
+def _post_handler(request: Request) -> Response:
+    assert request.headers["Idempotency-Key"]
+    ix = _result_index(json.loads(request.data))
+    if ix in (3, 7):
+        return Response("bad", status=400)
+    return Response(json.dumps({"ix": ix}), status=201)
+
+
+def _ndjson_handler(request: Request) -> Response:
+    statuses = []
+    for n, line in enumerate(request.get_data().splitlines(), start=1):
+        ix = _result_index(json.loads(line))
+        if ix == 7:
+            statuses.append({"line": n, "status": 400, "error": "bad"})
+        else:
+            statuses.append({"line": n, "status": 201, "id": str(ix)})
+    statuses.append({"summary": {"lines": len(statuses)}})
+    return Response(
+        "\n".join(json.dumps(s) for s in statuses) + "\n",
+        status=200,
+        content_type="application/x-ndjson",
+    )
+
+
+class OldClient:
+    """A client as of benchclients versions without post_many() / post_ndjson()."""
+
+    def post(self, path: str, json: dict = None) -> dict:
+        assert path == "/benchmarks/"
+        ix = _result_index(json)
+        if ix in (3, 7):
+            raise RuntimeError("bad")
+        return {"ix": ix}
+
+
 class TestBenchmarkAdapter:
     def test_transform_results(self) -> None:
         fake_adapter = FakeAdapter(command=["echo", "hello"])
@@ -76,3 +128,96 @@ class TestBenchmarkAdapter:
             **RESULTS_DICT["tags"],
             **results_fields_append["tags"],
         }
+
+
+class TestPostResults:
+    @pytest.fixture
+    def adapter(self):
+        adapter = ManyResultsAdapter(command=["echo", "hello"])
+        adapter.transform_results()
+        return adapter
+
+    @pytest.fixture
+    def client(self, httpserver: HTTPServer, monkeypatch):
+        monkeypatch.setenv("CONBENCH_URL", httpserver.url_for("/"))
+        monkeypatch.delenv("CONBENCH_EMAIL", raising=False)
+        return ConbenchClient()
+
+    def test_post_results_concurrently(self, adapter, client, httpserver) -> None:
+        httpserver.expect_request(
+            "/api/benchmarks/", method="POST"
+        ).respond_with_handler(_post_handler)
+        progress = []
+
+        with pytest.raises(PostResultsError, match="2 of 12 results") as excinfo:
+            adapter.post_results(
+                client=client,
+                max_workers=4,
+                progress=lambda done, total: progress.append((done, total)),
+            )
+
+        err = excinfo.value
+        assert sorted(err.errors) == [3, 7]
+        assert [r["ix"] for r in err.responses if isinstance(r, dict)] == [
+            0,
+            1,
+            2,
+            4,
+            5,
+            6,
+            8,
+            9,
+            10,
+            11,
+        ]
+        assert progress[-1] == (12, 12)
+
+    def test_post_results_batched(self, adapter, client, httpserver) -> None:
+        httpserver.expect_request(
+            "/api/benchmark-results/ndjson/", method="POST"
+        ).respond_with_handler(_ndjson_handler)
+        progress = []
+
+        with pytest.raises(PostResultsError, match="1 of 12 results") as excinfo:
+            adapter.post_results(
+                client=client,
+                batch_size=5,
+                progress=lambda done, total: progress.append((done, total)),
+            )
+
+        err = excinfo.value
+        assert err.errors == {7: {"line": 3, "status": 400, "error": "bad"}}
+        assert [r["id"] for ix, r in enumerate(err.responses) if ix != 7] == [
+            str(ix) for ix in range(12) if ix != 7
+        ]
+        assert progress == [(5, 12), (10, 12), (12, 12)]
+
+    def test_post_results_batch_endpoint_unavailable(
+        self, adapter, client, httpserver
+    ) -> None:
+        httpserver.expect_request(
+            "/api/benchmark-results/ndjson/", method="POST"
+        ).respond_with_data("not found", status=404)
+        httpserver.expect_request(
+            "/api/benchmarks/", method="POST"
+        ).respond_with_handler(_post_handler)
+
+        with pytest.raises(PostResultsError) as excinfo:
+            adapter.post_results(client=client, batch_size=5)
+
+        assert sorted(excinfo.value.errors) == [3, 7]
+        assert excinfo.value.responses[11] == {"ix": 11}
+
+    def test_post_results_old_client(self, adapter) -> None:
+        progress = []
+
+        with pytest.raises(PostResultsError, match="2 of 12 results") as excinfo:
+            adapter.post_results(
+                client=OldClient(),
+                batch_size=5,
+                progress=lambda done, total: progress.append((done, total)),
+            )
+
+        assert sorted(excinfo.value.errors) == [3, 7]
+        assert excinfo.value.responses[11] == {"ix": 11}
+        assert progress[-1] == (12, 12)
@@ -0,0 +1,473 @@
+"""
+asyncio-native counterparts of RetryingHTTPClient and ConbenchClient, based on
+aiohttp (install with `pip install benchclients[async]`).
+
+Same retrying behavior (per-request retrying until a deadline), login handling,
+exception types and logging as the synchronous clients. Use as an async
+context manager (or call `close()`) to release pooled connections:
+
+    async with AsyncConbenchClient() as conbench:
+        async for run in conbench.iter_all("/runs/"):
+            ...
+"""
+
+import asyncio
+import json as jsonlib
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+try:
+    import aiohttp
+except ImportError as exc:  # pragma: no cover
+    raise ImportError(
+        "benchclients.aio requires aiohttp: pip install 'benchclients[async]'"
+    ) from exc
+
+from .conbench import _ConbenchClientMixin
+from .http import (
+    RetryingHTTPClientBadCredentials,
+    RetryingHTTPClientDeadlineReached,
+    RetryingHTTPClientLoginError,
+    RetryingHTTPClientNonRetryableResponse,
+    TypeHTTPMethods,
+)
+
+log = logging.getLogger(__name__)
+
+
+class AsyncResponse:
+    """
+    An HTTP response (status, headers, complete body), with the attributes of
+    `requests.Response` that are commonly used by callers, e.g. on
+    `RetryingHTTPClientNonRetryableResponse.error_response`.
+    """
+
+    def __init__(self, status_code: int, headers: Mapping[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return jsonlib.loads(self.content)
+
+
+class AsyncRetryingHTTPClient(ABC):
+    """
+    asyncio counterpart of RetryingHTTPClient (see there).
+
+    An instance uses a single aiohttp session (connection pool, cookies),
+    created on first use. Instances can be used from many tasks concurrently
+    (see post_many()), but only within one event loop.
+    """
+
+    default_retry_for_seconds: float
+    timeout_login_request: Tuple[float, float]
+    timeout_long_running_requests: Tuple[float, float]
+
+    # The maximum number of open connections (i.e. of requests in flight).
+    pool_maxsize: int = 16
+
+    def __init__(self) -> None:
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Created on first use (within the event loop).
+        self._login_lock: Optional[asyncio.Lock] = None
+        # Incremented with each login, see _make_request().
+        self._login_count = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_maxsize),
+                # Also keep cookies for hosts given as IP address.
+                cookie_jar=aiohttp.CookieJar(unsafe=True),
+            )
+        return self._session
+
+    @property
+    @abstractmethod
+    def _base_url(self) -> str:
+        """Base URL. Child class must implement this."""
+
+    @abstractmethod
+    async def _login_or_raise(self) -> None:
+        """
+        Perform login, see RetryingHTTPClient._login_or_raise(). Persist
+        authentication state in self.session (cookies).
+        """
+
+    def _abs_url_from_path(self, path) -> str:
+        assert path.startswith("/")
+        return self._base_url.rstrip("/") + path
+
+    async def get(self, path: str, params: Optional[dict] = None) -> Union[Dict, List]:
+        """
+        Make GET request. Expect response with status code 200, expect a JSON
+        document in the response body.
+
+        Return the deserialized JSON document or raise an exception.
+        """
+        resp = await self._make_request(
+            "GET", self._abs_url_from_path(path), 200, params=params
+        )
+        return resp.json()
+
+    async def put(self, path: str, json: Dict) -> Optional[Union[Dict, List]]:
+        """
+        Make PUT request, see RetryingHTTPClient.put().
+        """
+        resp = await self._make_request(
+            "PUT", self._abs_url_from_path(path), 201, json=json or {}
+        )
+        return resp.json() if resp.content else None
+
+    async def post(
+        self,
+        path: str,
+        json: Optional[dict] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Optional[Union[Dict, List]]:
+        """
+        Make POST request, see RetryingHTTPClient.post().
+        """
+        json = json or {}
+        resp = await self._make_request(
+            "POST", self._abs_url_from_path(path), 201, json=json, headers=headers
+        )
+        return resp.json() if resp.content else None
+
+    async def post_many(
+        self,
+        path: str,
+        jsons: Sequence[dict],
+        headers: Optional[Sequence[Optional[Dict[str, str]]]] = None,
+        max_workers: int = 8,
+        progress: Optional[Callable[[int, int], None]] = None,
+        return_exceptions: bool = False,
+    ) -> List:
+        """
+        Make one POST request per JSON document, up to `max_workers` at a
+        time. Same semantics as RetryingHTTPClient.post_many().
+        """
+        if headers is not None and len(headers) != len(jsons):
+            raise ValueError("`headers` must have the same length as `jsons`")
+
+        n_total = len(jsons)
+        results: List = [None] * n_total
+        errors: Dict[int, Exception] = {}
+        n_done = 0
+        semaphore = asyncio.Semaphore(max_workers)
+
+        log.info(
+            "POST %s documents to %s, up to %s concurrently", n_total, path, max_workers
+        )
+
+        async def _post(ix: int) -> None:
+            nonlocal n_done
+            async with semaphore:
+                if errors:
+                    # Do not start any more requests.
+                    return
+                try:
+                    results[ix] = await self.post(
+                        path, jsons[ix], headers[ix] if headers else None
+                    )
+                except Exception as exc:
+                    log.info("POST of document %s failed: %s", ix, exc)
+                    if return_exceptions:
+                        results[ix] = exc
+                    else:
+                        errors[ix] = exc
+
+            n_done += 1
+            if progress is not None:
+                progress(n_done, n_total)
+
+        await asyncio.gather(*(_post(ix) for ix in range(n_total)))
+
+        if errors:
+            raise errors[min(errors)]
+
+        return results
+
+    async def _make_request(
+        self,
+        method: TypeHTTPMethods,
+        url: str,
+        expected_status_code: int,
+        **kwargs,
+    ) -> AsyncResponse:
+        """
+        Emit HTTP request with persistent retrying, and with login (again)
+        upon a 401 response. See RetryingHTTPClient._make_request().
+        """
+        login_count = self._login_count
+        result = await self._make_request_retry_until_deadline(
+            method, url, expected_status_code, **kwargs
+        )
+
+        if result != "401":
+            return result
+
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+
+        async with self._login_lock:
+            # Another task may have logged in again in the meantime.
+            if self._login_count == login_count:
+                log.info("got a 401 response during non-login request, login (again)")
+                await self._login_or_raise()
+                self._login_count += 1
+                log.info("login succeeded")
+
+        log.info("repeat earlier request")
+        result = await self._make_request_retry_until_deadline(
+            method, url, expected_status_code, **kwargs
+        )
+        if result != "401":
+            return result
+
+        raise RetryingHTTPClientLoginError(
+            "retried request after successful (re)login, but failed -- give up"
+        )
+
+    async def _make_request_retry_until_deadline(
+        self,
+        method: TypeHTTPMethods,
+        url: str,
+        expected_status_code: int,
+        **kwargs,
+    ) -> Union[Literal["401"], AsyncResponse]:
+        """
+        The outer retry loop with deadline control, see
+        RetryingHTTPClient._make_request_retry_until_deadline().
+
+        Remaining keyword arguments are passed through to
+        aiohttp.ClientSession.request(...)
+        """
+        t0 = time.monotonic()
+        deadline = t0 + self.default_retry_for_seconds
+        cycle: int = 0
+
+        log.info("try: %s to %s", method, url)
+
+        while time.monotonic() < deadline:
+            cycle += 1
+
+            result = await self._make_request_retry_guts(
+                method, url, expected_status_code, **kwargs
+            )
+
+            if result != "retry":
+                return result
+
+            # Same backoff as for the synchronous client.
+            wait_seconds = min((2**cycle) / 3.0, 60)
+            log.info(
+                "cycle %s failed, wait for %.1f s, deadline in %.1f min",
+                cycle,
+                wait_seconds,
+                (deadline - time.monotonic()) / 60.0,
+            )
+
+            # Would the next wait exceed the deadline?
+            if (time.monotonic() + wait_seconds) > deadline:
+                break
+
+            await asyncio.sleep(wait_seconds)
+
+        # Give up after retrying.
+        raise RetryingHTTPClientDeadlineReached(
+            f"{method} request to {url}: giving up after {time.monotonic() - t0:.3f} s"
+        )
+
+    async def _make_request_retry_guts(
+        self,
+        method: TypeHTTPMethods,
+        url: str,
+        expected_status_code: int,
+        **kwargs,
+    ) -> Union[Literal["401"], Literal["retry"], AsyncResponse]:
+        """
+        A single request/response cycle, see
+        RetryingHTTPClient._make_request_retry_guts().
+        """
+        connect_timeout, read_timeout = kwargs.pop(
+            "timeout", self.timeout_long_running_requests
+        )
+        kwargs["timeout"] = aiohttp.ClientTimeout(
+            sock_connect=connect_timeout, sock_read=read_timeout
+        )
+
+        t0 = time.monotonic()
+
+        # DNS, TCP and timeout errors before or while sending the request or
+        # receiving the response: treat as transient (retryable).
+        try:
+            async with self.session.request(method=method, url=url, **kwargs) as r:
+                resp = AsyncResponse(r.status, r.headers, await r.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            log.info(
+                "error during request/response cycle (treat as retryable, retry soon): %r",
+                exc,
+            )
+            return "retry"
+
+        log.info(
+            "%s request to %s: took %.4f s, response status code: %s",
+            method,
+            url,
+            time.monotonic() - t0,
+            resp.status_code,
+        )
+
+        if resp.status_code == expected_status_code:
+            return resp
+
+        retryable_code = self._retryable_status_code(resp.status_code)
+
+        log.info(
+            "unexpected response. code: %s%s, body bytes: <%s ...>",
+            resp.status_code,
+            " (retryable)" if retryable_code else "",
+            resp.text[:400],
+        )
+
+        if retryable_code:
+            return "retry"
+
+        if resp.status_code == 401:
+            return "401"
+
+        msg = (
+            f"{method} request to {url}: unexpected HTTP response. Expected code "
+            f"{expected_status_code}, got {resp.status_code}. Leading bytes of body: <{resp.text[:150]} ...>"
+        )
+
+        raise RetryingHTTPClientNonRetryableResponse(
+            message=msg, error_response=resp  # type: ignore[arg-type]
+        )
+
+    def _retryable_status_code(self, code: int) -> bool:
+        """See RetryingHTTPClient._retryable_status_code()."""
+        return code == 429 or str(code).startswith("5")
+
+
+class AsyncConbenchClient(_ConbenchClientMixin, AsyncRetryingHTTPClient):
+    """
+    asyncio counterpart of ConbenchClient, with the same configuration
+    (parameters, environment variables).
+
+    Login (if credentials are set) happens with the first request, not at
+    construction time. Call `login()` to log in right away.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+        default_retry_for_seconds=None,
+    ):
+        self._configure(url, email, password, default_retry_for_seconds)
+        super().__init__()
+        log.info("%s: initialized", self.__class__.__name__)
+
+    async def login(self) -> None:
+        """Log in (again) using the configured credentials."""
+        await self._login_or_raise()
+        self._login_count += 1
+
+    async def _make_request(self, method, url, expected_status_code, **kwargs):
+        if self._email and self._login_count == 0:
+            # See ConbenchClient: anticipate that login is needed.
+            if self._login_lock is None:
+                self._login_lock = asyncio.Lock()
+            async with self._login_lock:
+                if self._login_count == 0:
+                    await self.login()
+
+        return await super()._make_request(method, url, expected_status_code, **kwargs)
+
+    async def _login_or_raise(self) -> None:
+        """
+        Perform login, see ConbenchClient._login_or_raise().
+        """
+        log.info("try to perform login")
+        creds = self._login_credentials()
+
+        # Drop previous authentication state.
+        self.session.cookie_jar.clear()
+
+        login_result = await self._make_request_retry_until_deadline(
+            method="POST",
+            # Trailing slash is important so that we do not get redirected.
+            url=self._base_url + "/login/",
+            json=creds,
+            expected_status_code=204,
+            timeout=self.timeout_login_request,
+        )
+
+        if login_result == "401":
+            raise RetryingHTTPClientBadCredentials(
+                "bad credentials: got 401 status code in response to login request"
+            )
+
+        if isinstance(login_result, AsyncResponse):
+            return
+
+        raise RetryingHTTPClientLoginError("login failed (see logs), giving up")
+
+    async def iter_all(
+        self, path: str, params: Optional[dict] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Make GET requests to a paginated Conbench endpoint (see
+        ConbenchClient.get_all()), yield the items of each page as soon as
+        the page was received.
+        """
+        params = dict(params or {})
+        while True:
+            resp_json = await self.get(path, params)
+            assert isinstance(resp_json, dict)
+            for item in resp_json["data"]:
+                yield item
+            cursor = resp_json["metadata"]["next_page_cursor"]
+            if not cursor:
+                return
+            params["cursor"] = cursor
+
+    async def get_all(self, path: str, params: Optional[dict] = None) -> List[dict]:
+        """
+        Like iter_all(), but return all items of all pages as a list.
+        """
+        return [item async for item in self.iter_all(path, params)]
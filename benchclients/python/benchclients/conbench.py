@@ -1,6 +1,10 @@
+import gzip
 import logging
 import os
-from typing import List, Optional
+import uuid
+from json import dumps as jsondumps
+from json import loads as jsonloads
+from typing import Dict, Iterable, List, Optional
 
 import requests
 
@@ -19,22 +23,11 @@ class ConbenchClientException(Exception):
     """
 
 
-class ConbenchClient(RetryingHTTPClient):
+class _ConbenchClientMixin:
     """
-    HTTP client abstraction for interacting with a Conbench HTTP API server.
-
-    Environment variables
-    ---------------------
-    CONBENCH_URL
-        Required. Base URL of the Conbench API server. Must not end with /api.
-    CONBENCH_EMAIL
-        The email address to use for Conbench login. Required for submitting
-        data.
-    CONBENCH_PASSWORD
-        The password to use for Conbench login. Required for submitting data.
-
-    Credentials can be left undefined when only reading state from a 'public
-    mode' API server.
+    Configuration shared by ConbenchClient and the asyncio-based
+    AsyncConbenchClient (see aio.py): base URL, credentials, timeout
+    constants.
     """
 
     # We want each request to be retried for up to ~30 minutes, also
@@ -57,13 +50,13 @@ class ConbenchClient(RetryingHTTPClient):
 
     timeout_login_request = (3.5, 10)
 
-    def __init__(
+    def _configure(
         self,
-        url: Optional[str] = None,
-        email: Optional[str] = None,
-        password: Optional[str] = None,
-        default_retry_for_seconds=None,
-    ):
+        url: Optional[str],
+        email: Optional[str],
+        password: Optional[str],
+        default_retry_for_seconds,
+    ) -> None:
         # If this library is embedded into a Python program that has stdlib
         # logging not set up yet (no root logger configured) then this call
         # sets up a root logger with handlers. This is a noop if the calling
@@ -84,8 +77,6 @@ class ConbenchClient(RetryingHTTPClient):
         # like https://conbench.ursa.dev/api
         self._url = url + "/api"
 
-        super().__init__()
-
         if default_retry_for_seconds:
             assert isinstance(default_retry_for_seconds, (float, int))
             self.default_retry_for_seconds = default_retry_for_seconds
@@ -96,18 +87,7 @@ class ConbenchClient(RetryingHTTPClient):
             password if password is not None else os.environ.get("CONBENCH_PASSWORD")
         )
 
-        if self._email:
-            # The logic would attempt to perform login automatically after
-            # receiving the first 401 response. When this env var is set,
-            # anticipate that login is needed (this might do more harm than
-            # use)
-            self._login_or_raise()
-        else:
-            log.info("Conbench email not specified, skipping login")
-
-        log.info("%s: initialized", self.__class__.__name__)
-
-    # This method is required by parent class
+    # This method is required by the client base classes
     @property
     def _base_url(self) -> str:
         return self._url
@@ -139,6 +119,74 @@ class ConbenchClient(RetryingHTTPClient):
 
         return url
 
+    def _login_credentials(self) -> Dict[str, Optional[str]]:
+        """
+        Return the credentials for the login request. Raise
+        ConbenchClientException if they are not set.
+        """
+        creds = {
+            "email": self._email,
+            "password": self._password,
+        }
+
+        for k, v in creds.items():
+            if not v:
+                log.error("not set: %s", k)
+                raise ConbenchClientException(
+                    "credentials not set via parameters or the environment"
+                )
+
+        return creds
+
+
+class ConbenchClient(_ConbenchClientMixin, RetryingHTTPClient):
+    """
+    HTTP client abstraction for interacting with a Conbench HTTP API server.
+
+    Environment variables
+    ---------------------
+    CONBENCH_URL
+        Required. Base URL of the Conbench API server. Must not end with /api.
+    CONBENCH_EMAIL
+        The email address to use for Conbench login. Required for submitting
+        data.
+    CONBENCH_PASSWORD
+        The password to use for Conbench login. Required for submitting data.
+
+    Credentials can be left undefined when only reading state from a 'public
+    mode' API server.
+
+    With `compress_requests`, JSON request bodies larger than 1 KiB are sent
+    gzip-compressed. This requires a Conbench server that accepts
+    `Content-Encoding: gzip` request bodies.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+        default_retry_for_seconds=None,
+        compress_requests: bool = False,
+    ):
+        self._configure(url, email, password, default_retry_for_seconds)
+
+        if compress_requests:
+            self.gzip_min_bytes = 1024
+
+        super().__init__()
+
+        if self._email:
+            # The logic would attempt to perform login automatically after
+            # receiving the first 401 response. When this env var is set,
+            # anticipate that login is needed (this might do more harm than
+            # use)
+            self._login_or_raise()
+        else:
+            log.info("Conbench email not specified, skipping login")
+
+        log.info("%s: initialized", self.__class__.__name__)
+
     def _login_or_raise(self) -> None:
         """
         Perform login.
@@ -156,19 +204,9 @@ class ConbenchClient(RetryingHTTPClient):
         # in Cookie, persisted in requests Session).
         log.info("try to perform login")
 
-        creds = {
-            "email": self._email,
-            "password": self._password,
-        }
-
-        for k, v in creds.items():
-            if not v:
-                log.error("not set: %s", k)
-                raise ConbenchClientException(
-                    "credentials not set via parameters or the environment"
-                )
+        creds = self._login_credentials()
 
-        self.session = requests.Session()
+        self.session = self._new_session()
 
         login_result = self._make_request_retry_until_deadline(
             method="POST",
@@ -214,3 +252,45 @@ class ConbenchClient(RetryingHTTPClient):
             resp_json = super().get(path, params)
             data += resp_json["data"]
         return data
+
+    def post_ndjson(
+        self,
+        path: str,
+        jsons: Iterable[dict],
+        params: Optional[dict] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Submit many JSON documents in a single POST request with an NDJSON
+        body (one document per line), e.g. to `/benchmark-results/ndjson/`.
+        Expect response with status code 200 and an NDJSON body with one
+        status object per line (and a trailing summary object).
+
+        Return the deserialized status objects (including the summary) or
+        raise an exception. Per-document errors are reported in the status
+        objects, they do not raise.
+
+        The request is sent with an `Idempotency-Key` header (generated if not
+        given) so that it can be retried as a whole: documents that were
+        committed by a previous attempt are not inserted again.
+        """
+        body = b"".join(
+            jsondumps(doc, allow_nan=False).encode("utf-8") + b"\n" for doc in jsons
+        )
+        headers: Dict[str, str] = {
+            "Content-Type": "application/x-ndjson",
+            "Idempotency-Key": idempotency_key or uuid.uuid4().hex,
+        }
+        if self.gzip_min_bytes is not None and len(body) >= self.gzip_min_bytes:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+
+        resp = self._make_request(
+            "POST",
+            self._abs_url_from_path(path),
+            200,
+            data=body,
+            headers=headers,
+            params=params,
+        )
+        return [jsonloads(line) for line in resp.iter_lines() if line]
@@ -1,10 +1,24 @@
+import concurrent.futures
+import gzip
 import logging
+import threading
 import time
 from abc import ABC, abstractmethod
 from json import dumps as jsondumps
-from typing import Dict, List, Literal, Optional, Tuple, Union
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import requests
+import requests.adapters
 
 log = logging.getLogger(__name__)
 
@@ -58,17 +72,44 @@ class RetryingHTTPClient(ABC):
     - focus on persistent retrying
     - detailed logging along the request/response retrying lifecycle
     - handle 401 response with re-login
+
+    Instances can be used from multiple threads (see post_many()).
     """
 
     default_retry_for_seconds: float
     timeout_login_request: Tuple[float, float]
     timeout_long_running_requests: Tuple[float, float]
 
+    # The number of connections kept open (for re-use) per host. Should not be
+    # smaller than the number of concurrent requests (see post_many()).
+    pool_maxsize: int = 16
+
+    # Compress JSON request bodies of at least this many bytes with gzip
+    # (`Content-Encoding: gzip`). Requires server support. `None`: never
+    # compress.
+    gzip_min_bytes: Optional[int] = None
+
     def __init__(self) -> None:
         # This is to retain state across request, mainly authentication state.
         # self._login_or_raise() has to persist its authentication state here,
         # via e.g. cookies.
-        self.session = requests.Session()
+        self.session = self._new_session()
+        # Only one thread (re-)logs in at a time.
+        self._login_lock = threading.Lock()
+
+    def _new_session(self) -> requests.Session:
+        """
+        Return a new requests.Session with a connection pool sized according
+        to `pool_maxsize`. Retrying is done by this client; the transport does
+        not retry on its own.
+        """
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=4, pool_maxsize=self.pool_maxsize, max_retries=0
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
     @property
     @abstractmethod
@@ -84,7 +125,7 @@ class RetryingHTTPClient(ABC):
         """
         Perform login.
 
-        Is expected to set self.session to an instance of requests.Session.
+        Is expected to set self.session to a new session, see _new_session().
 
         Persist authentication state in self.session.
 
@@ -115,6 +156,35 @@ class RetryingHTTPClient(ABC):
         )
         return resp.json()
 
+    def download(
+        self,
+        path: str,
+        fileobj: BinaryIO,
+        params: Optional[dict] = None,
+        chunk_size: int = 1024 * 1024,
+    ) -> int:
+        """
+        Make GET request. Expect response with status code 200, write the
+        response body to `fileobj` while it is being received (it does not
+        need to fit into memory).
+
+        Return the number of bytes written or raise an exception.
+
+        Retrying covers the request until the response starts. An error while
+        receiving the response body (e.g. a connection reset) is raised as
+        `requests.exceptions.RequestException`: by then, parts of the body
+        have been written already.
+        """
+        resp = self._make_request(
+            "GET", self._abs_url_from_path(path), 200, params=params, stream=True
+        )
+        n_bytes = 0
+        with resp:
+            for chunk in resp.iter_content(chunk_size=chunk_size):
+                fileobj.write(chunk)
+                n_bytes += len(chunk)
+        return n_bytes
+
     def put(self, path: str, json: Dict) -> Optional[Union[Dict, List]]:
         """
         Make PUT request. Send a JSON document in the request body. Expect
@@ -131,7 +201,9 @@ class RetryingHTTPClient(ABC):
         """
         json = json or {}
 
-        resp = self._make_request("PUT", self._abs_url_from_path(path), 201, json=json)
+        resp = self._make_request(
+            "PUT", self._abs_url_from_path(path), 201, **self._json_body_kwargs(json)
+        )
 
         if resp.content:
             return resp.json()
@@ -139,7 +211,10 @@ class RetryingHTTPClient(ABC):
         return None
 
     def post(
-        self, path: str, json: Optional[dict] = None
+        self,
+        path: str,
+        json: Optional[dict] = None,
+        headers: Optional[Dict[str, str]] = None,
     ) -> Optional[Union[Dict, List]]:
         """
         Make POST request. Send a JSON document in the request body. Expect
@@ -152,6 +227,9 @@ class RetryingHTTPClient(ABC):
 
         Return the deserialized JSON document or raise an exception.
 
+        `headers` are sent with each attempt (including retries). This can be
+        used to e.g. set an `Idempotency-Key` header.
+
         Interface inherited from previous lib.
         """
         json = json or {}
@@ -161,13 +239,113 @@ class RetryingHTTPClient(ABC):
         else:
             log.debug("POST request without body. Hm.")
 
-        resp = self._make_request("POST", self._abs_url_from_path(path), 201, json=json)
+        resp = self._make_request(
+            "POST",
+            self._abs_url_from_path(path),
+            201,
+            **self._json_body_kwargs(json, headers),
+        )
 
         if resp.content:
             return resp.json()
 
         return None
 
+    def post_many(
+        self,
+        path: str,
+        jsons: Sequence[dict],
+        headers: Optional[Sequence[Optional[Dict[str, str]]]] = None,
+        max_workers: int = 8,
+        progress: Optional[Callable[[int, int], None]] = None,
+        return_exceptions: bool = False,
+    ) -> List:
+        """
+        Make one POST request per JSON document in `jsons` (see post()), with
+        up to `max_workers` requests in flight at a time. Each request is
+        retried on its own, with its own deadline.
+
+        Return the deserialized response bodies, in the order of `jsons`.
+
+        `headers`, if given, holds the headers for each request (same length
+        as `jsons`, items can be `None`).
+
+        `progress`, if given, is called (in the calling thread) after each
+        finished request, with the number of finished requests and the total
+        number of requests.
+
+        If a request fails (see _make_request() for the exceptions): with
+        `return_exceptions`, put the exception into the returned list in place
+        of the response body and carry on. Otherwise do not start any more
+        requests, wait for the requests in flight and then raise the exception
+        (the one for the earliest document, if several failed).
+        """
+        if headers is not None and len(headers) != len(jsons):
+            raise ValueError("`headers` must have the same length as `jsons`")
+
+        n_total = len(jsons)
+        results: List = [None] * n_total
+        errors: Dict[int, Exception] = {}
+        n_done = 0
+
+        log.info(
+            "POST %s documents to %s, up to %s concurrently", n_total, path, max_workers
+        )
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="post_many"
+        ) as executor:
+            futures = {
+                executor.submit(
+                    self.post, path, json, headers[ix] if headers else None
+                ): ix
+                for ix, json in enumerate(jsons)
+            }
+            for fut in concurrent.futures.as_completed(futures):
+                ix = futures[fut]
+                try:
+                    results[ix] = fut.result()
+                except concurrent.futures.CancelledError:
+                    continue
+                except Exception as exc:
+                    log.info("POST of document %s failed: %s", ix, exc)
+                    if return_exceptions:
+                        results[ix] = exc
+                    else:
+                        if not errors:
+                            for f in futures:
+                                f.cancel()
+                        errors[ix] = exc
+
+                n_done += 1
+                if progress is not None:
+                    progress(n_done, n_total)
+
+        if errors:
+            raise errors[min(errors)]
+
+        return results
+
+    def _json_body_kwargs(
+        self, json: Union[Dict, List], headers: Optional[Dict[str, str]] = None
+    ) -> dict:
+        """
+        Return the keyword arguments for sending `json` as request body (and
+        `headers`), see _make_request(). Compress the body if configured (see
+        `gzip_min_bytes`). The body is serialized once, also when the request
+        is retried.
+        """
+        if self.gzip_min_bytes is None:
+            return {"json": json, "headers": headers}
+
+        # Like requests does it for `json=...`.
+        body = jsondumps(json, allow_nan=False).encode("utf-8")
+        headers = {**(headers or {}), "Content-Type": "application/json"}
+        if len(body) >= self.gzip_min_bytes:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        return {"data": body, "headers": headers}
+
     def _make_request(
         self,
         method: TypeHTTPMethods,
@@ -202,6 +380,7 @@ class RetryingHTTPClient(ABC):
         handling).
         """
         # Assume that authentication state is good (it might not be).
+        session = self.session
         result = self._make_request_retry_until_deadline(
             method, url, expected_status_code, **kwargs
         )
@@ -212,10 +391,14 @@ class RetryingHTTPClient(ABC):
         # The other end just told us that authentication proof was not provided
         # or that that presented authentication proof was bad (e.g., expired).
         # Trigger machinery for obtaining fresh authentication proof.
-        log.info("got a 401 response during non-login request, login (again)")
-        self._login_or_raise()
-
-        log.info("login succeeded, repeat earlier request")
+        with self._login_lock:
+            # Another thread may have logged in again in the meantime.
+            if self.session is session:
+                log.info("got a 401 response during non-login request, login (again)")
+                self._login_or_raise()
+                log.info("login succeeded")
+
+        log.info("repeat earlier request")
         result = self._make_request_retry_until_deadline(
             method, url, expected_status_code, **kwargs
         )
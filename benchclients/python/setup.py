@@ -41,5 +41,5 @@ setuptools.setup(
     maintainer_email="conbench@voltrondata.com",
     url="https://github.com/conbench/conbench/tree/main/benchclients",
     install_requires=base_requirements,
-    extras_require={"dev": dev_requirements},
+    extras_require={"async": ["aiohttp"], "dev": dev_requirements},
 )
@@ -0,0 +1,211 @@
+import asyncio
+import contextlib
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from benchclients.aio import AsyncConbenchClient
+from benchclients.conbench import ConbenchClientException
+from benchclients.http import (
+    RetryingHTTPClientBadCredentials,
+    RetryingHTTPClientDeadlineReached,
+    RetryingHTTPClientNonRetryableResponse,
+)
+
+CREDS = {"email": "e@example.com", "password": "pw"}
+
+
+class StubConbench:
+    """
+    A local stub of the Conbench HTTP API: login via cookie, a protected
+    endpoint, a paginated endpoint, and endpoints with error responses.
+    """
+
+    def __init__(self):
+        self.logins = 0
+        self.posted = []
+        self.flaky_attempts = 0
+        self.app = web.Application()
+        self.app.add_routes(
+            [
+                web.post("/api/login/", self.login),
+                web.get("/api/protected/", self.protected),
+                web.get("/api/items/", self.items),
+                web.post("/api/results/", self.results),
+                web.post("/api/flaky/", self.flaky),
+                web.get("/api/always-500/", self.always_500),
+            ]
+        )
+
+    async def login(self, request):
+        if await request.json() != CREDS:
+            return web.Response(status=401)
+        self.logins += 1
+        resp = web.Response(status=204)
+        resp.set_cookie("session", f"s{self.logins}")
+        return resp
+
+    def _authenticated(self, request) -> bool:
+        return request.cookies.get("session") == f"s{self.logins}"
+
+    async def protected(self, request):
+        if not self._authenticated(request):
+            return web.Response(status=401)
+        return web.json_response({"ok": True})
+
+    async def items(self, request):
+        page = int(request.query.get("cursor", "0"))
+        data = [{"i": i} for i in range(page * 3, page * 3 + 3)]
+        cursor = str(page + 1) if page < 2 else None
+        return web.json_response(
+            {"data": data, "metadata": {"next_page_cursor": cursor}}
+        )
+
+    async def results(self, request):
+        if not self._authenticated(request):
+            return web.Response(status=401)
+        doc = await request.json()
+        if doc.get("bad"):
+            return web.json_response({"description": "bad"}, status=400)
+        self.posted.append(doc)
+        # Let requests overlap.
+        await asyncio.sleep(0.01)
+        return web.json_response({"i": doc["i"]}, status=201)
+
+    async def flaky(self, request):
+        self.flaky_attempts += 1
+        if self.flaky_attempts < 3:
+            return web.Response(status=503)
+        return web.json_response({"attempts": self.flaky_attempts}, status=201)
+
+    async def always_500(self, request):
+        return web.Response(status=500)
+
+
+@contextlib.asynccontextmanager
+async def stub_server():
+    stub = StubConbench()
+    server = TestServer(stub.app)
+    await server.start_server()
+    try:
+        yield stub, str(server.make_url("/"))
+    finally:
+        await server.close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_missing_url(monkeypatch):
+    monkeypatch.delenv("CONBENCH_URL", raising=False)
+    with pytest.raises(ConbenchClientException, match="CONBENCH_URL"):
+        AsyncConbenchClient()
+
+
+def test_login_on_first_request():
+    async def main():
+        async with stub_server() as (stub, url):
+            async with AsyncConbenchClient(url=url, **CREDS) as c:
+                assert stub.logins == 0
+                assert await c.get("/protected/") == {"ok": True}
+                assert await c.get("/protected/") == {"ok": True}
+                assert stub.logins == 1
+
+    run(main())
+
+
+def test_login_again_after_401():
+    async def main():
+        async with stub_server() as (stub, url):
+            async with AsyncConbenchClient(url=url, **CREDS) as c:
+                await c.login()
+                # Invalidate the session cookie (e.g. server-side expiry).
+                stub.logins += 1
+                assert await c.get("/protected/") == {"ok": True}
+                assert stub.logins == 3
+
+    run(main())
+
+
+def test_bad_credentials():
+    async def main():
+        async with stub_server() as (_, url):
+            async with AsyncConbenchClient(
+                url=url, email="e@example.com", password="wrong"
+            ) as c:
+                with pytest.raises(RetryingHTTPClientBadCredentials):
+                    await c.get("/protected/")
+
+    run(main())
+
+
+def test_401_without_credentials(monkeypatch):
+    monkeypatch.delenv("CONBENCH_EMAIL", raising=False)
+    monkeypatch.delenv("CONBENCH_PASSWORD", raising=False)
+
+    async def main():
+        async with stub_server() as (_, url):
+            async with AsyncConbenchClient(url=url) as c:
+                with pytest.raises(ConbenchClientException, match="credentials"):
+                    await c.get("/protected/")
+
+    run(main())
+
+
+def test_iter_all():
+    async def main():
+        async with stub_server() as (_, url):
+            async with AsyncConbenchClient(url=url) as c:
+                items = [item async for item in c.iter_all("/items/")]
+                assert items == [{"i": i} for i in range(9)]
+                assert await c.get_all("/items/") == items
+
+    run(main())
+
+
+def test_retry_until_success():
+    async def main():
+        async with stub_server() as (stub, url):
+            async with AsyncConbenchClient(url=url) as c:
+                assert await c.post("/flaky/", json={"a": 1}) == {"attempts": 3}
+
+    run(main())
+
+
+def test_deadline_reached():
+    async def main():
+        async with stub_server() as (_, url):
+            async with AsyncConbenchClient(url=url, default_retry_for_seconds=3) as c:
+                with pytest.raises(RetryingHTTPClientDeadlineReached):
+                    await c.get("/always-500/")
+
+    run(main())
+
+
+def test_post_many():
+    async def main():
+        async with stub_server() as (stub, url):
+            async with AsyncConbenchClient(url=url, **CREDS) as c:
+                docs = [{"i": i} for i in range(30)]
+                progress = []
+                results = await c.post_many(
+                    "/results/",
+                    docs,
+                    max_workers=5,
+                    progress=lambda done, total: progress.append((done, total)),
+                )
+                assert results == docs
+                assert progress[-1] == (30, 30)
+                assert stub.logins == 1
+
+                docs[4] = {"i": 4, "bad": True}
+                results = await c.post_many("/results/", docs, return_exceptions=True)
+                assert isinstance(results[4], RetryingHTTPClientNonRetryableResponse)
+                assert results[4].error_response.status_code == 400
+                assert results[5] == {"i": 5}
+
+                with pytest.raises(RetryingHTTPClientNonRetryableResponse):
+                    await c.post_many("/results/", docs)
+
+    run(main())
@@ -1,11 +1,17 @@
+import gzip
+import io
+import json
 import os
 
 import pytest
 from benchclients.conbench import ConbenchClientException
-from benchclients.http import RetryingHTTPClientDeadlineReached
+from benchclients.http import (
+    RetryingHTTPClientDeadlineReached,
+    RetryingHTTPClientNonRetryableResponse,
+)
 from pytest_httpserver import HTTPServer
 from pytest_httpserver.httpserver import HandlerType
-from werkzeug.wrappers import Response
+from werkzeug.wrappers import Request, Response
 
 from benchclients import ConbenchClient
 
@@ -52,6 +58,20 @@ def test_cc_get_all(httpserver: HTTPServer):
     assert c.get_all("/foobar") == [{"a": 1}, {"b": 2}, {"c": 3}]
 
 
+def test_cc_download(httpserver: HTTPServer):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient()
+    body = bytes(range(256)) * 1000
+    httpserver.expect_request(
+        "/api/export/", query_string={"format": "arrow"}
+    ).respond_with_data(body, content_type="application/octet-stream")
+    buf = io.BytesIO()
+    assert c.download(
+        "/export/", buf, params={"format": "arrow"}, chunk_size=100
+    ) == len(body)
+    assert buf.getvalue() == body
+
+
 @pytest.mark.parametrize("respjson", [[1, 2], {"1": "2"}])
 def test_cc_post(httpserver: HTTPServer, respjson):
     set_cb_base_url(httpserver)
@@ -160,3 +180,125 @@ def test_cc_get_500(httpserver: HTTPServer):
     httpserver.expect_request("/api/foobar").respond_with_response(Response(500))
     with pytest.raises(RetryingHTTPClientDeadlineReached, match="giving up after"):
         assert c.get("/foobar") == [1, 2]
+
+
+def test_cc_post_many(httpserver: HTTPServer):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient()
+
+    def handler(request: Request):
+        doc = json.loads(request.data)
+        assert request.headers["Idempotency-Key"] == f"key-{doc['i']}"
+        return Response(json.dumps({"id": doc["i"]}), status=201)
+
+    httpserver.expect_request("/api/foobar", method="POST").respond_with_handler(
+        handler
+    )
+    docs = [{"i": i} for i in range(20)]
+    headers = [{"Idempotency-Key": f"key-{i}"} for i in range(20)]
+    progress = []
+
+    results = c.post_many(
+        "/foobar",
+        docs,
+        headers=headers,
+        max_workers=4,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+    assert results == [{"id": i} for i in range(20)]
+    assert progress[-1] == (20, 20)
+    assert len(httpserver.log) == 20
+
+
+def test_cc_post_many_errors(httpserver: HTTPServer):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient()
+
+    def handler(request: Request):
+        doc = json.loads(request.data)
+        if doc["i"] in (3, 5):
+            return Response("bad", status=400)
+        return Response(json.dumps({"id": doc["i"]}), status=201)
+
+    httpserver.expect_request("/api/foobar", method="POST").respond_with_handler(
+        handler
+    )
+    docs = [{"i": i} for i in range(8)]
+
+    results = c.post_many("/foobar", docs, max_workers=2, return_exceptions=True)
+    assert [r["id"] for ix, r in enumerate(results) if ix not in (3, 5)] == [
+        0,
+        1,
+        2,
+        4,
+        6,
+        7,
+    ]
+    assert isinstance(results[3], RetryingHTTPClientNonRetryableResponse)
+    assert isinstance(results[5], RetryingHTTPClientNonRetryableResponse)
+
+    with pytest.raises(RetryingHTTPClientNonRetryableResponse, match="got 400"):
+        c.post_many("/foobar", docs, max_workers=2)
+
+
+def test_cc_post_gzip(httpserver: HTTPServer):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient(compress_requests=True)
+    small = {"ql": "biz"}
+    large = {"ql": "biz" * 1000}
+
+    def handler(request: Request):
+        body = request.get_data()
+        if request.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        assert request.headers["Content-Type"] == "application/json"
+        return Response(
+            json.dumps(
+                {
+                    "gzip": request.headers.get("Content-Encoding") == "gzip",
+                    "body": json.loads(body),
+                }
+            ),
+            status=201,
+        )
+
+    httpserver.expect_request("/api/foobar", method="POST").respond_with_handler(
+        handler
+    )
+    assert c.post("/foobar", json=small) == {"gzip": False, "body": small}
+    assert c.post("/foobar", json=large) == {"gzip": True, "body": large}
+
+
+def test_cc_post_ndjson(httpserver: HTTPServer):
+    set_cb_base_url(httpserver)
+    c = ConbenchClient(compress_requests=True)
+    docs = [{"i": i, "pad": "x" * 100} for i in range(20)]
+
+    def handler(request: Request):
+        assert request.headers["Content-Encoding"] == "gzip"
+        assert request.headers["Idempotency-Key"] == "abc"
+        assert request.args["chunk_size"] == "5"
+        lines = gzip.decompress(request.get_data()).splitlines()
+        statuses = [
+            {"line": n, "status": 201, "id": json.loads(line)["i"]}
+            for n, line in enumerate(lines, start=1)
+        ]
+        statuses.append({"summary": {"lines": len(lines)}})
+        return Response(
+            "\n".join(json.dumps(s) for s in statuses) + "\n",
+            status=200,
+            content_type="application/x-ndjson",
+        )
+
+    httpserver.expect_request(
+        "/api/benchmark-results/ndjson/", method="POST"
+    ).respond_with_handler(handler)
+
+    statuses = c.post_ndjson(
+        "/benchmark-results/ndjson/",
+        docs,
+        params={"chunk_size": 5},
+        idempotency_key="abc",
+    )
+    assert [s["id"] for s in statuses[:-1]] == list(range(20))
+    assert statuses[-1] == {"summary": {"lines": 20}}
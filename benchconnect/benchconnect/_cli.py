@@ -4,6 +4,7 @@ import click
 from benchclients.logging import log
 
 import benchconnect._augment as _augment
+import benchconnect._export as _export
 import benchconnect._finish as _finish
 import benchconnect._post as _post
 import benchconnect._start as _start
@@ -56,3 +57,11 @@ def finish():
 
 
 finish.add_command(_finish.finish_run, name="run")
+
+
+@cli.group(help="Export data from a Conbench API" + ENV_VAR_HELP)
+def export():
+    pass
+
+
+export.add_command(_export.export_results, name="results")
@@ -0,0 +1,104 @@
+from typing import Optional, Tuple
+
+import click
+from benchclients.conbench import ConbenchClient
+from benchclients.logging import log
+
+from .utils import ENV_VAR_HELP
+
+
+def exporter(
+    output: str,
+    fmt: str,
+    earliest_timestamp: Optional[str],
+    latest_timestamp: Optional[str],
+    run_reason: Optional[str],
+    history_fingerprints: Tuple[str, ...],
+    benchmark_name: Optional[str],
+) -> int:
+    "Download a bulk export of benchmark results to `output`"
+    params = {
+        "format": fmt,
+        "earliest_timestamp": earliest_timestamp,
+        "latest_timestamp": latest_timestamp,
+        "run_reason": run_reason,
+        "history_fingerprint": ",".join(history_fingerprints) or None,
+        "benchmark_name": benchmark_name,
+    }
+    client = ConbenchClient()
+    with open(output, "wb") as f:
+        n_bytes = client.download(
+            "/benchmark-results/export/",
+            f,
+            params={k: v for k, v in params.items() if v is not None},
+        )
+    log.info("wrote %s bytes to %s", n_bytes, output)
+    return n_bytes
+
+
+@click.command(
+    help="""
+Export benchmark results from a Conbench API to a local file
+
+The output is an Arrow IPC stream (read it with e.g.
+`pyarrow.ipc.open_stream()`) or a Parquet file, with one row per benchmark
+result. It is written while being downloaded; exports of many results do not
+need to fit into memory.
+"""
+    + ENV_VAR_HELP
+)
+@click.option(
+    "--output",
+    "-o",
+    required=True,
+    type=click.Path(dir_okay=False, writable=True, resolve_path=True),
+    help="Path of the file to write",
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["arrow", "parquet"]),
+    default="arrow",
+    show_default=True,
+    help="Output format",
+)
+@click.option(
+    "--earliest-timestamp",
+    default=None,
+    help="Only export results with a timestamp at or after this (ISO 8601) time",
+)
+@click.option(
+    "--latest-timestamp",
+    default=None,
+    help="Only export results with a timestamp at or before this (ISO 8601) time",
+)
+@click.option(
+    "--run-reason", default=None, help="Only export results of this run reason"
+)
+@click.option(
+    "--history-fingerprint",
+    "history_fingerprints",
+    multiple=True,
+    help="Only export results with this history fingerprint. Can be repeated.",
+)
+@click.option(
+    "--benchmark-name", default=None, help="Only export results of this benchmark"
+)
+def export_results(
+    output: str,
+    fmt: str,
+    earliest_timestamp: Optional[str],
+    latest_timestamp: Optional[str],
+    run_reason: Optional[str],
+    history_fingerprints: Tuple[str, ...],
+    benchmark_name: Optional[str],
+) -> None:
+    exporter(
+        output=output,
+        fmt=fmt,
+        earliest_timestamp=earliest_timestamp,
+        latest_timestamp=latest_timestamp,
+        run_reason=run_reason,
+        history_fingerprints=history_fingerprints,
+        benchmark_name=benchmark_name,
+    )
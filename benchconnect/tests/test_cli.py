@@ -1,12 +1,12 @@
 import pytest
 from click.testing import CliRunner
 
-from benchconnect._cli import augment, cli, finish, post, start, submit
+from benchconnect._cli import augment, cli, export, finish, post, start, submit
 
 runner = CliRunner()
 
 
-@pytest.mark.parametrize("command", [cli, augment, post, start, submit, finish])
+@pytest.mark.parametrize("command", [cli, augment, post, start, submit, finish, export])
 @pytest.mark.parametrize("args", [[], ["--help"]])
 def test_help(command, args: list) -> None:
     res = runner.invoke(command, args=args)
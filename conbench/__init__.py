@@ -110,7 +110,12 @@ def _init_flask_application(app):
     from .api import api
     from .app import app as blueprint_app
     from .config import Config
-    from .db import configure_engine, create_all, session_maker
+    from .db import (
+        configure_engine,
+        configure_replica_engine,
+        create_all,
+        session_maker,
+    )
 
     # Note(JP): maybe this bootstrap extension doesn't do too much work for us.
     # We use `quick_form()` here and there, and that is tied to bootstrap 3.
@@ -127,6 +132,7 @@ def _init_flask_application(app):
         config={"app_name": Config.APPLICATION_NAME},
     )
     configure_engine(app.config["SQLALCHEMY_DATABASE_URI"])
+    configure_replica_engine(app.config["SQLALCHEMY_REPLICA_DATABASE_URI"])
 
     # This is a tiny helper that manages a per-request SQLAlchemy session which
     # can be obtained via `current_session` (from flask_sqlalchemy_session
@@ -152,6 +158,10 @@ def _init_flask_application(app):
 
     _init_api_docs(app)
 
+    from .api._req import reject_unsupported_content_encoding
+
+    app.before_request(reject_unsupported_content_encoding)
+
     @app.before_request
     def deny_common_bots():
         """
@@ -16,6 +16,7 @@ from .auth import *  # noqa
 from .commits import *  # noqa
 from .compare import *  # noqa
 from .contexts import *  # noqa
+from .export import *  # noqa
 from .hardware import *  # noqa
 from .history import *  # noqa
 from .index import *  # noqa
@@ -69,6 +69,9 @@ spec.components.response("302", {"description": "Found"})
 spec.components.response("400", _error("Bad Request", ex.API_400, "ErrorBadRequest"))
 spec.components.response("401", _error("Unauthorized", ex.API_401, "Error"))
 spec.components.response("404", _error("Not Found", ex.API_404, "Error"))
+spec.components.response(
+    "422", _error("Unprocessable Entity", ex.API_422, "ErrorBadRequest")
+)
 spec.components.response("Ping", _200_ok(ex.API_PING, "Ping"))
 spec.components.response("Index", _200_ok(ex.API_INDEX))
 spec.components.response("BenchmarkEntity", _200_ok(ex.BENCHMARK_ENTITY))
@@ -91,6 +94,7 @@ spec.components.response(
     "HistoryList",
     _200_ok({"data": [ex.HISTORY_ENTITY], "metadata": {"next_page_cursor": None}}),
 )
+spec.components.response("HistoryAggregate", _200_ok(ex.HISTORY_AGGREGATE))
 spec.components.response("InfoEntity", _200_ok(ex.INFO_ENTITY))
 spec.components.response("HardwareEntity", _200_ok(ex.HARDWARE_ENTITY))
 spec.components.response("HardwareList", _200_ok([ex.HARDWARE_ENTITY]))
@@ -1,11 +1,13 @@
 import functools
 import logging
 import os
+from typing import Optional
 
 import flask as f
 import flask.views
 import flask_login
 import marshmallow
+import pandas as pd
 
 log = logging.getLogger(__name__)
 
@@ -25,17 +27,26 @@ def maybe_login_required(func):
     return maybe
 
 
+def blank_strings_to_none(data):
+    """
+    Return a shallow copy of `data` with first-level whitespace-only string
+    values replaced by None.
+    """
+    # Note(JP): replace first-level zero-length string values with
+    # None? So that users can pass "" instead of null | non-exist?
+    munged = data.copy() if data else data
+    for field, value in data.items():
+        if isinstance(value, str) and not value.strip():
+            munged[field] = None
+    return munged
+
+
 class ApiEndpoint(flask.views.MethodView):
     def validate(self, schema):
         # Emits a 400 response if req does not have expected Content-Type set.
         data = f.request.get_json()
 
-        # Note(JP): replace first-level zero-length string values with
-        # None? So that users can pass "" instead of null | non-exist?
-        munged = data.copy() if data else data
-        for field, value in data.items():
-            if isinstance(value, str) and not value.strip():
-                munged[field] = None
+        munged = blank_strings_to_none(data)
 
         try:
             # `schema.load()` (instead of only `schema.validate()`) implies
@@ -64,6 +75,24 @@ class ApiEndpoint(flask.views.MethodView):
             message = {"_errors": [message]}
         f.abort(400, description=message)
 
+    def timestamp_arg(self, name: str) -> Optional[pd.Timestamp]:
+        """
+        Parse the query parameter `name` as a timestamp (naive, UTC). Return
+        None if not given, emit a 400 response if invalid.
+        """
+        arg = f.request.args.get(name)
+        if arg is None:
+            return None
+        try:
+            ts = pd.Timestamp(arg)
+            assert ts is not pd.NaT
+        except (ValueError, AssertionError):
+            self.abort_400_bad_request(f"{name}: invalid timestamp")
+        # Timestamps are stored as naive UTC.
+        if ts.tzinfo is not None:
+            ts = ts.tz_convert("UTC").tz_localize(None)
+        return ts
+
     def abort_404_not_found(self):
         f.abort(404)
 
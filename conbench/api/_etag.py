@@ -0,0 +1,194 @@
+"""
+Conditional GET: ETag response headers, and `304 Not Modified` responses for
+requests carrying a matching `If-None-Match` header.
+
+The ETag for a resource is derived from cheap-to-query version information
+(instead of from the response body): so that a 304 response can be emitted
+before loading and serializing the resource.
+
+- Strong ETags are derived from the PostgreSQL row version (the `xmin` system
+  column, which changes with every update of the row) of all rows the
+  response is built from.
+- Weak ETags (history, compare, runs: responses that also contain analysis
+  results depending on many other rows) are derived from the change counter
+  of the involved history fingerprint(s), see HistoryFingerprintVersion.
+
+The Conbench build (commit) is part of each ETag: a new version of Conbench
+may serialize the same data differently. So are the query parameters and the
+`Accept` request header: they select between representations of the same
+resource (e.g. `fields`, `threshold`, pagination).
+"""
+
+import functools
+import hashlib
+from typing import Callable, Optional, Sequence
+
+import flask as f
+import sqlalchemy as s
+
+from ..buildinfo import BUILD_INFO
+from ..dbsession import current_session
+
+TETagParts = Optional[Sequence[object]]
+
+
+def _etag(parts: Sequence[object]) -> str:
+    h = hashlib.sha1(BUILD_INFO.commit.encode("utf-8"))
+    for p in parts:
+        h.update(b"\0")
+        h.update(str(p).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _representation_parts() -> Sequence[object]:
+    # Order matters for repeated parameters only.
+    args = sorted(f.request.args.items(multi=True), key=lambda kv: kv[0])
+    return (args, f.request.headers.get("Accept", ""))
+
+
+def conditional_get(etag_parts: Callable[..., TETagParts], weak: bool = False):
+    """
+    Decorator for a GET handler method. Call `etag_parts` with the handler's
+    (URL path) arguments, expect a sequence of values identifying the
+    version of the resource, or None if the resource does not exist (then
+    the handler is called as usual, e.g. for emitting a 404 response).
+
+    Emit a 304 response right away if the resulting ETag matches the
+    `If-None-Match` request header. Otherwise call the handler and set the
+    ETag header on its (200) response.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            # Flask passes URL path parameters as keyword arguments.
+            parts = etag_parts(*args, *kwargs.values())
+            if parts is None:
+                return func(self, *args, **kwargs)
+
+            etag = _etag((*parts, *_representation_parts()))
+            # If-None-Match uses the weak comparison function (RFC 9110,
+            # section 13.1.2).
+            if f.request.if_none_match.contains_weak(etag):
+                resp = f.Response(status=304)
+                resp.set_etag(etag, weak=weak)
+                return resp
+
+            resp = f.make_response(func(self, *args, **kwargs))
+            if resp.status_code == 200:
+                resp.set_etag(etag, weak=weak)
+            return resp
+
+        return wrapper
+
+    return decorator
+
+
+def _first_row(sql: str, **params) -> TETagParts:
+    row = current_session.execute(s.text(sql), params).first()
+    return None if row is None else tuple(row)
+
+
+def row_version_etag_parts(table: str) -> Callable[[str], TETagParts]:
+    """
+    Return a function that, given a primary key, returns the row version of
+    the row in `table` (for entities that are not built from other rows).
+    """
+
+    def parts(id: str) -> TETagParts:
+        return _first_row(f'SELECT xmin::text FROM "{table}" WHERE id = :id', id=id)
+
+    return parts
+
+
+def benchmark_result_etag_parts(benchmark_result_id: str) -> TETagParts:
+    # The result object embeds the commit object.
+    return _first_row(
+        "SELECT br.xmin::text, c.xmin::text FROM benchmark_result br "
+        "LEFT JOIN commit c ON c.id = br.commit_id WHERE br.id = :id",
+        id=benchmark_result_id,
+    )
+
+
+def commit_etag_parts(commit_id: str) -> TETagParts:
+    # The commit object links to the parent commit (if known).
+    return _first_row(
+        "SELECT c.xmin::text, (SELECT p.xmin::text FROM commit p "
+        "WHERE p.sha = c.parent AND p.repository = c.repository LIMIT 1) "
+        "FROM commit c WHERE c.id = :id",
+        id=commit_id,
+    )
+
+
+# The results of a run (number, IDs and row versions), the run's commit, and
+# the change counters of all history fingerprints of the run. The latter
+# change when e.g. new candidate baseline results arrive. Lists are ordered
+# (and hashed, they may be long), not summed up: sums may collide.
+_RUNS_ETAG_SQL = """
+WITH r AS (
+    SELECT id, xmin::text AS v, commit_id, history_fingerprint
+    FROM benchmark_result WHERE run_id IN :run_ids
+)
+SELECT
+    (SELECT count(*) FROM r),
+    (SELECT md5(string_agg(id || ':' || v, ',' ORDER BY id)) FROM r),
+    (SELECT string_agg(c.xmin::text, ',' ORDER BY c.id) FROM commit c
+        WHERE c.id IN (SELECT commit_id FROM r)),
+    (SELECT md5(string_agg(
+            hfv.history_fingerprint || ':' || hfv.version::text, ','
+            ORDER BY hfv.history_fingerprint
+        ))
+        FROM history_fingerprint_version hfv
+        WHERE hfv.history_fingerprint IN (SELECT history_fingerprint FROM r))
+"""
+
+
+def runs_etag_parts(*run_ids: str) -> TETagParts:
+    row = current_session.execute(
+        s.text(_RUNS_ETAG_SQL).bindparams(s.bindparam("run_ids", expanding=True)),
+        {"run_ids": list(run_ids)},
+    ).one()
+    if row[0] == 0:
+        return None
+    return (*run_ids, *row)
+
+
+def run_etag_parts(run_id: str) -> TETagParts:
+    return runs_etag_parts(run_id)
+
+
+def benchmark_results_history_etag_parts(*benchmark_result_ids: str) -> TETagParts:
+    """
+    Row versions of the given results and the change counters of their
+    history fingerprints. Return None if any of the results does not exist.
+    """
+    rows = current_session.execute(
+        s.text(
+            "SELECT br.id, br.xmin::text, hfv.version FROM benchmark_result br "
+            "LEFT JOIN history_fingerprint_version hfv "
+            "ON hfv.history_fingerprint = br.history_fingerprint "
+            "WHERE br.id IN :ids"
+        ).bindparams(s.bindparam("ids", expanding=True)),
+        {"ids": list(benchmark_result_ids)},
+    ).all()
+    if len(rows) != len(set(benchmark_result_ids)):
+        return None
+    return tuple(sorted(tuple(r) for r in rows))
+
+
+def _compare_ids_etag_parts(
+    func: Callable[..., TETagParts]
+) -> Callable[[str], TETagParts]:
+    def parts(compare_ids: str) -> TETagParts:
+        if "..." not in compare_ids:
+            # Let the handler emit the error response.
+            return None
+        return func(*compare_ids.split("...", 1))
+
+    return parts
+
+
+compare_benchmark_results_etag_parts = _compare_ids_etag_parts(
+    benchmark_results_history_etag_parts
+)
+compare_runs_etag_parts = _compare_ids_etag_parts(runs_etag_parts)
@@ -616,6 +616,28 @@ HISTORY_ENTITY = _api_history_entity(
     "some-hexdigest",
     "2021-02-25T01:02:51",
 )
+HISTORY_AGGREGATE = {
+    "data": [
+        {
+            "history_fingerprint": "some-hexdigest",
+            "benchmark_name": "file-write",
+            "unit": "s",
+            "buckets": [
+                {
+                    "start": "2021-02-22T09:13:02Z",
+                    "end": "2021-02-25T01:02:51Z",
+                    "count": 12,
+                    "mean": 0.036369,
+                    "min": 0.004733,
+                    "max": 0.071134,
+                    "p50": 0.035121,
+                    "p90": 0.061512,
+                }
+            ],
+        }
+    ],
+    "metadata": {"bucket": "week", "svs_type": "best"},
+}
 INFO_ENTITY = _api_info_entity("some-info-uuid-1")
 HARDWARE_ENTITY = _api_hardware_entity("some-machine-uuid-1", "some-machine-name")
 RUN_ENTITY_WITH_BASELINES = _api_run_entity(
@@ -653,6 +675,13 @@ API_400 = {
         ],
     },
 }
+API_422 = {
+    "code": 422,
+    "name": "Unprocessable Entity",
+    "description": {
+        "_errors": ["Idempotency-Key was already used for a different request body"],
+    },
+}
 
 API_PING = {
     "alembic_version": "0d4e564b1876",
@@ -0,0 +1,137 @@
+"""
+Sparse fieldsets: support for the `fields` query parameter.
+
+`fields` is a comma-separated list of (dot-separated) paths into the JSON
+objects returned by an endpoint, e.g. `fields=id,stats.mean,timestamp`. Only
+the selected keys are returned. Endpoints also use the selection to avoid
+loading (and serializing) data that is not needed for building these keys.
+
+Each endpoint declares the set of valid paths via a schema: a dictionary
+mapping keys to either
+- None: a leaf, no deeper path allowed
+- ANY: deeper paths allowed, but not validated (e.g. `commit.sha`)
+- another schema dictionary
+"""
+
+from typing import Dict, Mapping, Optional
+
+import flask as f
+
+ANY = object()
+
+# Values: None, ANY, or another TFieldsSchema.
+TFieldsSchema = Mapping[str, object]
+
+# Path segment -> subtree. An empty subtree means: the whole value.
+TFieldTree = Dict[str, "TFieldTree"]
+
+
+class FieldsArgError(Exception):
+    pass
+
+
+class FieldSelection:
+    def __init__(self, tree: TFieldTree):
+        self.tree = tree
+
+    @classmethod
+    def parse(cls, arg: str, schema: TFieldsSchema) -> "FieldSelection":
+        """
+        Parse the value of the `fields` query parameter. Raise FieldsArgError
+        for paths not allowed by `schema`.
+        """
+        tree: TFieldTree = {}
+        unknown = []
+
+        for path in (p.strip() for p in arg.split(",")):
+            if not path:
+                continue
+
+            segments = path.split(".")
+            if not _path_allowed(segments, schema):
+                unknown.append(path)
+                continue
+
+            node = tree
+            for seg in segments:
+                if seg in node and not node[seg]:
+                    # A parent path is selected entirely already.
+                    break
+                node = node.setdefault(seg, {})
+            else:
+                # This path selects the whole value, even if child paths
+                # were given before.
+                node.clear()
+
+        if unknown:
+            raise FieldsArgError(f"unknown field(s) in `fields`: {', '.join(unknown)}")
+
+        if not tree:
+            raise FieldsArgError("`fields` must name at least one field")
+
+        return cls(tree)
+
+    def __contains__(self, path: object) -> bool:
+        """
+        Return True if the value at `path` (dot-separated) is (at least
+        partially) selected.
+        """
+        if not isinstance(path, str):
+            return False
+
+        node = self.tree
+        for seg in path.split("."):
+            if not node:
+                return True
+            if seg not in node:
+                return False
+            node = node[seg]
+        return True
+
+    def subselection(self, path: str) -> Optional["FieldSelection"]:
+        """
+        Return the selection relative to `path`, or None if the value at
+        `path` is selected entirely. `path` must be selected.
+        """
+        node = self.tree
+        for seg in path.split("."):
+            if not node:
+                return None
+            node = node[seg]
+        return FieldSelection(node) if node else None
+
+    def prune(self, obj: dict) -> dict:
+        return _prune(obj, self.tree)
+
+
+def _path_allowed(segments, schema) -> bool:
+    node = schema
+    for seg in segments:
+        if node is ANY:
+            return True
+        if not isinstance(node, dict) or seg not in node:
+            return False
+        node = node[seg]
+    return True
+
+
+def _prune(obj, tree: TFieldTree):
+    if not tree or not isinstance(obj, dict):
+        return obj
+    return {k: _prune(obj[k], sub) for k, sub in tree.items() if k in obj}
+
+
+def fields_from_request(schema: TFieldsSchema) -> Optional[FieldSelection]:
+    """
+    Return the selection given via the `fields` query parameter of the
+    current request, or None if that parameter was not provided (meaning:
+    all fields). Abort with a 400 response for invalid values.
+    """
+    arg = f.request.args.get("fields")
+    if arg is None:
+        return None
+
+    try:
+        return FieldSelection.parse(arg, schema)
+    except FieldsArgError as exc:
+        f.abort(400, description={"_errors": [str(exc)]})
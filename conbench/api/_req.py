@@ -0,0 +1,120 @@
+"""
+Request body decoding: accept request bodies sent with `Content-Encoding:
+gzip` (e.g. by benchclients' ConbenchClient with `compress_requests`) on the
+benchmark result submission endpoints. This reduces upload volume for large
+JSON / NDJSON submissions considerably.
+
+Decoding happens in the view function (after authentication), so that
+unauthenticated clients cannot make the server decompress anything. Request
+bodies with a content coding are rejected on all other endpoints.
+"""
+
+import functools
+import io
+import zlib
+
+import flask as f
+import werkzeug.exceptions
+
+from ..config import Config
+
+_READ_CHUNK_BYTES = 64 * 1024
+
+
+class _GzipDecodingStream(io.RawIOBase):
+    """
+    Read-only file-like object: decompress the gzip data read from `raw`
+    while it is being read (the request body does not need to be held in
+    memory as a whole, e.g. for NDJSON streams).
+    """
+
+    def __init__(self, raw, max_bytes: int):
+        self._raw = raw
+        self._max_bytes = max_bytes
+        self._decomp = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._pending = b""
+        self._n_bytes = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._pending:
+            if self._decomp.eof:
+                return 0
+
+            data = self._decomp.unconsumed_tail
+            if not data:
+                data = self._raw.read(_READ_CHUNK_BYTES)
+                if not data:
+                    raise werkzeug.exceptions.BadRequest(
+                        "gzip request body: unexpected end of data"
+                    )
+            try:
+                # Bound the amount of memory needed per step.
+                self._pending = self._decomp.decompress(data, _READ_CHUNK_BYTES)
+            except zlib.error as exc:
+                raise werkzeug.exceptions.BadRequest(f"gzip request body: {exc}")
+
+            self._n_bytes += len(self._pending)
+            if self._n_bytes > self._max_bytes:
+                raise werkzeug.exceptions.RequestEntityTooLarge(
+                    f"decompressed request body exceeds {self._max_bytes} bytes"
+                )
+
+        n = min(len(b), len(self._pending))
+        b[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+def accepts_gzip_request_body(view_method):
+    """
+    Decorator for a view method: decompress a gzip-encoded request body while
+    the view reads it (via `request.stream`, `request.get_data()`,
+    `request.get_json()`, ...).
+
+    Apply it below `login_required`, so that decoding only starts for
+    authenticated requests.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(*args, **kwargs):
+        if _content_encoding() == "gzip":
+            # The raw body, limited to Content-Length.
+            raw = f.request.stream
+            f.request.stream = io.BufferedReader(  # type: ignore[misc]
+                _GzipDecodingStream(raw, Config.MAX_DECOMPRESSED_REQUEST_BYTES),
+                _READ_CHUNK_BYTES,
+            )
+        return view_method(*args, **kwargs)
+
+    # Inspected by reject_unsupported_content_encoding() (copied over by
+    # functools.wraps() in decorators applied on top of this one).
+    wrapper.accepts_gzip_request_body = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+def reject_unsupported_content_encoding():
+    """
+    `before_request` handler: respond with 415 to request bodies with a
+    content coding, unless the view method handling the request decodes it
+    (see accepts_gzip_request_body()).
+    """
+    encoding = _content_encoding()
+    if encoding in ("", "identity"):
+        return
+
+    view_func = f.current_app.view_functions.get(f.request.endpoint)
+    view_class = getattr(view_func, "view_class", None)
+    view_method = getattr(view_class, f.request.method.lower(), None)
+    if encoding == "gzip" and getattr(view_method, "accepts_gzip_request_body", False):
+        return
+
+    raise werkzeug.exceptions.UnsupportedMediaType(
+        f"unsupported request Content-Encoding: {encoding}"
+    )
+
+
+def _content_encoding() -> str:
+    return f.request.headers.get("Content-Encoding", "").strip().lower()
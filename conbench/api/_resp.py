@@ -1,4 +1,27 @@
+import logging
+import zlib
+from typing import Any, Iterable, Iterator, Optional
+
 import flask
+import orjson
+
+from ..dbsession import keep_session_choice
+
+try:
+    # Standard library as of Python 3.14.
+    from compression import zstd  # type: ignore[import-not-found]
+except ImportError:
+    try:
+        # Backport, installed as a dependency of Flask-Compress.
+        from backports import zstd  # type: ignore[import-not-found,no-redef]
+    except ImportError:
+        zstd = None
+
+log = logging.getLogger(__name__)
+
+# Serialized items are collected into chunks of about this size before being
+# (compressed and) handed to the WSGI server.
+STREAM_CHUNK_BYTES = 64 * 1024
 
 
 def resp400(description: str) -> flask.Response:
@@ -29,3 +52,105 @@ def json_response_for_byte_sequence(data: bytes, status_code: int) -> flask.Resp
     return flask.make_response(
         (data, status_code, {"content-type": "application/json"})
     )
+
+
+def _negotiate_encoding() -> Optional[str]:
+    # Respects the q-values in the client's Accept-Encoding header. For
+    # equal quality, prefer zstd.
+    offered = ["zstd", "gzip"] if zstd is not None else ["gzip"]
+    return flask.request.accept_encodings.best_match(offered)
+
+
+def _compress_chunks(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    # Flush the compressor after each chunk so that the client can start
+    # decoding before the response is complete.
+    if encoding == "zstd":
+        zc = zstd.ZstdCompressor(level=3)
+        for chunk in chunks:
+            yield zc.compress(chunk, zc.FLUSH_BLOCK)
+        yield zc.flush(zc.FLUSH_FRAME)
+        return
+
+    gz = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        yield gz.compress(chunk) + gz.flush(zlib.Z_SYNC_FLUSH)
+    yield gz.flush()
+
+
+def _json_list_chunks(items: Iterable[Any], metadata: dict) -> Iterator[bytes]:
+    # Same layout as flask.jsonify(): keys sorted (by default), indented in
+    # debug mode.
+    json_provider = flask.current_app.json
+    option = orjson.OPT_SERIALIZE_NUMPY
+    if getattr(json_provider, "sort_keys", True):
+        option |= orjson.OPT_SORT_KEYS
+    compact = getattr(json_provider, "compact", None)
+    indent = compact is False or (compact is None and flask.current_app.debug)
+    if indent:
+        option |= orjson.OPT_INDENT_2
+
+    def dumps(obj, level: int) -> bytes:
+        out = orjson.dumps(obj, option=option)
+        return out.replace(b"\n", b"\n" + b"  " * level) if indent else out
+
+    nl = b"\n" if indent else b""
+    sep = b": " if indent else b":"
+
+    buf = bytearray(b"{" + nl + (b'  "data"' if indent else b'"data"') + sep + b"[")
+    count = 0
+    try:
+        for item in items:
+            buf += (b"," if count else b"") + nl + b"    " * indent + dumps(item, 2)
+            count += 1
+            if len(buf) >= STREAM_CHUNK_BYTES:
+                yield bytes(buf)
+                buf.clear()
+        trailer_key, trailer = b'"metadata"', dumps(metadata, 1)
+    except Exception:
+        # The status code (200) has been sent already. Instead of metadata,
+        # emit an error object, so that clients do not take the truncated
+        # list for the complete one.
+        log.exception("error while streaming JSON response")
+        error = {
+            "code": 500,
+            "name": "Internal Server Error",
+            "description": "error while generating response, data is incomplete",
+        }
+        trailer_key, trailer = b'"error"', dumps(error, 1)
+
+    buf += (nl + b"  " if count and indent else b"") + b"],"
+    buf += nl + b"  " * indent + trailer_key + sep + trailer + nl + b"}\n"
+    yield bytes(buf)
+
+
+def json_response_for_item_stream(
+    items: Iterable[Any], metadata: dict, status_code: int = 200
+) -> flask.Response:
+    """
+    Emit a JSON response of the shape `{"data": [...], "metadata": {...}}`
+    while consuming `items` (e.g. a generator building one JSON-serializable
+    object per item): the response body is never fully materialized in
+    memory, and the first bytes are sent before the last item was built.
+
+    The body is compressed with zstd or gzip if the client accepts that (as
+    a stream: Flask-Compress leaves responses with a Content-Encoding header
+    alone).
+
+    If consuming `items` raises an exception, the list is terminated and an
+    `error` object is emitted instead of `metadata`.
+
+    The request context stays active while the response is being streamed,
+    i.e. `items` may use the database session (the same one as the handler,
+    also for `read_from_replica` handlers).
+    """
+    chunks = _json_list_chunks(keep_session_choice(items), metadata)
+    headers = {"content-type": "application/json", "vary": "Accept-Encoding"}
+
+    encoding = _negotiate_encoding()
+    if encoding is not None:
+        chunks = _compress_chunks(chunks, encoding)
+        headers["content-encoding"] = encoding
+
+    return flask.Response(
+        flask.stream_with_context(chunks), status=status_code, headers=headers
+    )
@@ -2,6 +2,7 @@ import flask as f
 
 from ..api import rule
 from ..api._endpoint import ApiEndpoint, maybe_login_required
+from ..api._etag import commit_etag_parts, conditional_get
 from ..entities._entity import NotFound
 from ..entities.commit import Commit, CommitSerializer
 
@@ -39,6 +40,7 @@ class CommitEntityAPI(ApiEndpoint):
         return commit
 
     @maybe_login_required
+    @conditional_get(commit_etag_parts)
     def get(self, commit_id):
         """
         ---
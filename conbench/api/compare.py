@@ -3,22 +3,31 @@ import logging
 import math
 import threading
 from contextlib import contextmanager
-from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 import flask as f
 import sqlalchemy as s
 
 import conbench.units
-from conbench.dbsession import current_session
+from conbench.dbsession import current_session, read_from_replica
 from conbench.numstr import numstr
 from conbench.types import THistFingerprint
 
 from ..api import rule
 from ..api._endpoint import ApiEndpoint, maybe_login_required
-from ..api._resp import resp429
+from ..api._etag import (
+    compare_benchmark_results_etag_parts,
+    compare_runs_etag_parts,
+    conditional_get,
+)
+from ..api._fields import ANY, FieldSelection, fields_from_request
+from ..api._resp import json_response_for_item_stream, resp429
+from ..api.results import BENCHMARK_RESULT_FIELDS_SCHEMA_NO_JOINS
+from ..entities._entity import NotFound
 from ..entities.benchmark_result import BenchmarkResult
 from ..entities.commit import Commit
 from ..entities.history import set_z_scores
+from ..entities.run import Run
 from ..hacks import set_display_benchmark_name, set_display_case_permutation
 
 log = logging.getLogger(__name__)
@@ -37,6 +46,10 @@ DEFAULT_Z_SCORE_THRESHOLD = 5.0
 # constants.
 _semaphore_compare_get = threading.BoundedSemaphore(1)
 
+# When comparing runs: the number of history fingerprints whose results are
+# loaded (and analyzed) at a time while streaming the response.
+COMPARE_RUNS_BATCH_FINGERPRINTS = 100
+
 
 @contextmanager
 def _sem_acquire(sem: threading.BoundedSemaphore, timeout: float):
@@ -52,6 +65,17 @@ def _sem_acquire(sem: threading.BoundedSemaphore, timeout: float):
             sem.release()
 
 
+def _release_once(sem: threading.BoundedSemaphore) -> Callable[[], None]:
+    """Return a function that releases `sem` upon its first call only."""
+    once = threading.Lock()
+
+    def release() -> None:
+        if once.acquire(blocking=False):
+            sem.release()
+
+    return release
+
+
 def _parse_two_ids_or_abort(compare_ids: str) -> Tuple[str, str]:
     """Split a string of the form "<id>...<id>" into two strings, or abort if it's
     not of the correct form.
@@ -105,27 +129,52 @@ def _round(value: float) -> Optional[float]:
     return None if math.isnan(value) else float(numstr(value, sigfigs=4))
 
 
-if TYPE_CHECKING:
-
-    class AugmentedBenchmarkResult(BenchmarkResult):
-        """For type hints only. This represents a BenchmarkResult that has been
-        augmented in-place with the following augmentation functions, as is done in this
-        module:
+class UnmatchingUnitsError(Exception):
+    pass
 
-        - set_z_scores()
-        - set_display_benchmark_name()
-        - set_display_case_permutation()
 
-        TODO: remove this and replace with actual BenchmarkResult properties.
-        """
+_RESULT_INFO_FIELDS_SCHEMA = {
+    "benchmark_result_id": None,
+    "benchmark_name": None,
+    "case_permutation": None,
+    "language": None,
+    "single_value_summary": None,
+    "error": None,
+    "batch_id": None,
+    "run_id": None,
+    "tags": ANY,
+    "result": BENCHMARK_RESULT_FIELDS_SCHEMA_NO_JOINS,
+}
+
+# Valid values for the `fields` query parameter, see conbench/api/_fields.py.
+COMPARE_FIELDS_SCHEMA = {
+    "unit": None,
+    "history_fingerprint": None,
+    "less_is_better": None,
+    "baseline": _RESULT_INFO_FIELDS_SCHEMA,
+    "contender": _RESULT_INFO_FIELDS_SCHEMA,
+    "analysis": {"pairwise": ANY, "lookback_z_score": ANY},
+}
+
+# Columns needed for comparing two results, regardless of the requested
+# fields (single value summary, failure state, display name, ...).
+_COMPARE_REQUIRED_COLUMNS = (
+    "id",
+    "run_id",
+    "batch_id",
+    "history_fingerprint",
+    "timestamp",
+    "case_id",
+    "context_id",
+    "unit",
+    "data",
+    "mean",
+    "error",
+)
 
-        display_bmname: str
-        display_case_perm: str
-        z_score: Optional[float]
 
-
-class UnmatchingUnitsError(Exception):
-    pass
+def _want_z_scores(fields: Optional[FieldSelection]) -> bool:
+    return fields is None or "analysis.lookback_z_score" in fields
 
 
 class BenchmarkResultComparator:
@@ -134,10 +183,11 @@ class BenchmarkResultComparator:
     def __init__(
         self,
         history_fingerprint: Optional[THistFingerprint],
-        baseline: Optional["AugmentedBenchmarkResult"],
-        contender: Optional["AugmentedBenchmarkResult"],
+        baseline: Optional[BenchmarkResult],
+        contender: Optional[BenchmarkResult],
         threshold: Optional[float],
         threshold_z: Optional[float],
+        fields: Optional[FieldSelection] = None,
     ) -> None:
         # What do we know here? Is one of baseline and contender guaranteed
         # to not be None?
@@ -196,6 +246,8 @@ class BenchmarkResultComparator:
         self.threshold_z = (
             float(threshold_z) if threshold_z is not None else DEFAULT_Z_SCORE_THRESHOLD
         )
+        # Only build the parts of the JSON representation that were asked for.
+        self.fields = fields
 
     @property
     def less_is_better(self) -> Optional[bool]:
@@ -207,11 +259,14 @@ class BenchmarkResultComparator:
         return conbench.units.less_is_better(self.unit)
 
     @staticmethod
-    def result_info(result: Optional["AugmentedBenchmarkResult"]) -> Optional[dict]:
+    def result_info(
+        result: Optional[BenchmarkResult],
+        fields: Optional[FieldSelection] = None,
+    ) -> Optional[dict]:
         if not result:
             return None
 
-        return {
+        info = {
             "benchmark_result_id": result.id,
             "benchmark_name": result.display_bmname,
             "case_permutation": result.display_case_perm,
@@ -223,8 +278,13 @@ class BenchmarkResultComparator:
             "batch_id": result.batch_id,
             "run_id": result.run_id,
             "tags": result.case.tags,
-            "result": result.to_dict_for_json_api(include_joins=False),
         }
+        if fields is None or "result" in fields:
+            info["result"] = result.to_dict_for_json_api(
+                include_joins=False,
+                fields=fields.subselection("result") if fields else None,
+            )
+        return info
 
     @property
     def pairwise_analysis(self) -> Optional[dict]:
@@ -282,37 +342,114 @@ class BenchmarkResultComparator:
 
     @property
     def _dict_for_api_json(self) -> dict:
-        return {
-            # How is 'unit' here specified? Let's specify it: If both results
-            # are not failed and have the same unit then this here is the unit
-            # symbol. Else it's null/None.
-            "unit": self.unit,
-            "history_fingerprint": self.history_fingerprint,
-            "less_is_better": self.less_is_better,
-            "baseline": self.result_info(self.baseline),
-            "contender": self.result_info(self.contender),
-            "analysis": {
-                "pairwise": self.pairwise_analysis,
-                # Watch out: self.lookback_z_score_analysis can be dict or
-                # None, and both needs to be handled in the UI (for now).
-                "lookback_z_score": self.lookback_z_score_analysis,
-            },
-        }
+        fields = self.fields
+        if fields is None:
+            return {
+                # How is 'unit' here specified? Let's specify it: If both results
+                # are not failed and have the same unit then this here is the unit
+                # symbol. Else it's null/None.
+                "unit": self.unit,
+                "history_fingerprint": self.history_fingerprint,
+                "less_is_better": self.less_is_better,
+                "baseline": self.result_info(self.baseline),
+                "contender": self.result_info(self.contender),
+                "analysis": {
+                    "pairwise": self.pairwise_analysis,
+                    # Watch out: self.lookback_z_score_analysis can be dict or
+                    # None, and both needs to be handled in the UI (for now).
+                    "lookback_z_score": self.lookback_z_score_analysis,
+                },
+            }
+
+        out: dict = {}
+        if "unit" in fields:
+            out["unit"] = self.unit
+        if "history_fingerprint" in fields:
+            out["history_fingerprint"] = self.history_fingerprint
+        if "less_is_better" in fields:
+            out["less_is_better"] = self.less_is_better
+        for role, result in (
+            ("baseline", self.baseline),
+            ("contender", self.contender),
+        ):
+            if role in fields:
+                out[role] = self.result_info(result, fields.subselection(role))
+        if "analysis" in fields:
+            out["analysis"] = {}
+            if "analysis.pairwise" in fields:
+                out["analysis"]["pairwise"] = self.pairwise_analysis
+            if "analysis.lookback_z_score" in fields:
+                out["analysis"]["lookback_z_score"] = self.lookback_z_score_analysis
+        return fields.prune(out)
+
+
+def _get_a_result(benchmark_result_id: str) -> BenchmarkResult:
+    """Get a benchmark result by ID, or raise NotFound if it doesn't exist."""
+    benchmark_result = BenchmarkResult.get(benchmark_result_id)
+    if not benchmark_result:
+        raise NotFound(f"no benchmark result found with ID: '{benchmark_result_id}'")
+    return benchmark_result
+
+
+def compare_benchmark_results(
+    baseline_result_id: str,
+    contender_result_id: str,
+    threshold: Optional[float] = None,
+    threshold_z: Optional[float] = None,
+    fields: Optional[FieldSelection] = None,
+) -> dict:
+    """
+    Compare two benchmark results and return the API representation of the
+    comparison (the response body of `GET
+    /api/compare/benchmark-results/<baseline_id>...<contender_id>/`).
 
+    Raise `NotFound` if either result does not exist, and
+    `UnmatchingUnitsError` if the results cannot be compared.
+    """
+    baseline_result = _get_a_result(baseline_result_id)
+    contender_result = _get_a_result(contender_result_id)
 
-class CompareBenchmarkResultsAPI(ApiEndpoint):
-    @staticmethod
-    def _get_a_result(benchmark_result_id: str) -> BenchmarkResult:
-        """Get a benchmark result by ID, or abort if it doesn't exist."""
-        benchmark_result = BenchmarkResult.get(benchmark_result_id)
-        if not benchmark_result:
-            f.abort(
-                404,
-                description=f"no benchmark result found with ID: '{benchmark_result_id}'",
-            )
-        return benchmark_result
+    baseline_commit = baseline_result.commit
 
+    if baseline_commit and _want_z_scores(fields):
+        set_z_scores(
+            contender_benchmark_results=[contender_result],
+            baseline_commit=baseline_commit,
+            history_fingerprints=[contender_result.history_fingerprint],
+        )
+    else:
+        # If the baseline run is not associated with a commit (or if the
+        # analysis was not requested), skip z-scores. The
+        # ["analysis"]["lookback_z_score"] dict will then be null in the response.
+        contender_result.z_score = None
+
+    # TODO: define dynamic properties on BenchmarkResult instead of mutating these
+    # objects here in-place.
+    set_display_case_permutation(baseline_result)
+    set_display_case_permutation(contender_result)
+    set_display_benchmark_name(baseline_result)
+    set_display_benchmark_name(contender_result)
+
+    if baseline_result.history_fingerprint != contender_result.history_fingerprint:
+        fingerprint = None
+    else:
+        fingerprint = baseline_result.history_fingerprint
+
+    comparator = BenchmarkResultComparator(
+        history_fingerprint=fingerprint,
+        baseline=baseline_result,
+        contender=contender_result,
+        threshold=threshold,
+        threshold_z=threshold_z,
+        fields=fields,
+    )
+    return comparator._dict_for_api_json
+
+
+class CompareBenchmarkResultsAPI(ApiEndpoint):
     @maybe_login_required
+    @read_from_replica
+    @conditional_get(compare_benchmark_results_etag_parts, weak=True)
     def get(self, compare_ids: str) -> f.Response:
         """
         ---
@@ -372,6 +509,15 @@ class CompareBenchmarkResultsAPI(ApiEndpoint):
             name: threshold_z
             schema:
               type: number
+          - in: query
+            name: fields
+            schema:
+              type: string
+            description: |
+                A comma-separated list of the fields to return, e.g.
+                `baseline.single_value_summary,contender.result.stats.mean,analysis`.
+                Use dot notation for nested fields. By default, all fields are
+                returned. The lookback z-score analysis is only computed if requested.
         tags:
           - Comparisons
         """
@@ -387,46 +533,21 @@ class CompareBenchmarkResultsAPI(ApiEndpoint):
     def _get(self, compare_ids: str) -> f.Response:
         baseline_result_id, contender_result_id = _parse_two_ids_or_abort(compare_ids)
         threshold, threshold_z = _get_threshold_args_from_request()
-        baseline_result = self._get_a_result(baseline_result_id)
-        contender_result = self._get_a_result(contender_result_id)
-
-        baseline_commit = baseline_result.commit
-
-        if baseline_commit:
-            set_z_scores(
-                contender_benchmark_results=[contender_result],
-                baseline_commit=baseline_commit,
-                history_fingerprints=[contender_result.history_fingerprint],
-            )
-        else:
-            # If the baseline run is not associated with a commit, skip z-scores. The
-            # ["analysis"]["lookback_z_score"] dict will then be null in the response.
-            contender_result.z_score = None
-
-        # TODO: define dynamic properties on BenchmarkResult instead of mutating these
-        # objects here in-place.
-        set_display_case_permutation(baseline_result)
-        set_display_case_permutation(contender_result)
-        set_display_benchmark_name(baseline_result)
-        set_display_benchmark_name(contender_result)
-
-        if baseline_result.history_fingerprint != contender_result.history_fingerprint:
-            fingerprint = None
-        else:
-            fingerprint = baseline_result.history_fingerprint
-
+        fields = fields_from_request(COMPARE_FIELDS_SCHEMA)
         try:
-            comparator = BenchmarkResultComparator(
-                history_fingerprint=fingerprint,
-                baseline=baseline_result,
-                contender=contender_result,
+            comparison = compare_benchmark_results(
+                baseline_result_id,
+                contender_result_id,
                 threshold=threshold,
                 threshold_z=threshold_z,
+                fields=fields,
             )
+        except NotFound as e:
+            f.abort(404, description=str(e))
         except UnmatchingUnitsError as e:
             f.abort(400, description=str(e))
 
-        return f.jsonify(comparator._dict_for_api_json)
+        return f.jsonify(comparison)
 
 
 # from filprofiler.api import profile as filprofile
@@ -436,11 +557,7 @@ class CompareRunsAPI(ApiEndpoint):
     @staticmethod
     def _check_run_exists(run_id: str) -> None:
         """Quickly check if a run exists, or abort if it doesn't."""
-        query = (
-            s.select(BenchmarkResult.run_id)
-            .where(BenchmarkResult.run_id == run_id)
-            .limit(1)
-        )
+        query = s.select(Run.id).where(Run.id == run_id)
         result = current_session.scalars(query).first()
         if not result:
             f.abort(
@@ -454,10 +571,8 @@ class CompareRunsAPI(ApiEndpoint):
         """
         query = (
             s.select(Commit)
-            .select_from(BenchmarkResult)
-            .join(Commit)
-            .where(BenchmarkResult.run_id == run_id)
-            .limit(1)
+            .join(Run, Run.commit_id == Commit.id)
+            .where(Run.id == run_id)
         )
         result = current_session.scalars(query).first()
         return result
@@ -484,16 +599,47 @@ class CompareRunsAPI(ApiEndpoint):
 
     @staticmethod
     def _get_all_results_for_a_run(
-        run_id: str, history_fingerprints: List[THistFingerprint]
+        run_id: str,
+        history_fingerprints: List[THistFingerprint],
+        fields: Optional[FieldSelection] = None,
     ) -> List[BenchmarkResult]:
-        """Get all benchmark results for a run with the given history_fingerprints."""
+        """Get all benchmark results for a run with the given history_fingerprints.
+
+        If `fields` is given, only load what is needed for building these.
+        """
         query = s.select(BenchmarkResult).where(
             BenchmarkResult.run_id == run_id,
             BenchmarkResult.history_fingerprint.in_(history_fingerprints),
         )
+        if fields is not None:
+            query = query.options(*CompareRunsAPI._loader_options(fields))
         result = current_session.scalars(query).all()
         return list(result)
 
+    @staticmethod
+    def _loader_options(fields: FieldSelection) -> list:
+        options = [
+            s.orm.lazyload(BenchmarkResult.commit),
+            s.orm.lazyload(BenchmarkResult.hardware),
+            s.orm.lazyload(BenchmarkResult.info),
+        ]
+
+        columns = set(_COMPARE_REQUIRED_COLUMNS)
+        for role in ("baseline", "contender"):
+            path = f"{role}.result"
+            if path not in fields:
+                continue
+            sub = fields.subselection(path)
+            if sub is None:
+                # The complete result object was requested.
+                return options
+            columns |= BenchmarkResult.columns_for_json_api(sub)
+
+        options.append(
+            s.orm.load_only(*(getattr(BenchmarkResult, c) for c in sorted(columns)))
+        )
+        return options
+
     @staticmethod
     def _join_results(
         baseline_results: List[BenchmarkResult],
@@ -537,6 +683,8 @@ class CompareRunsAPI(ApiEndpoint):
         return joined_results
 
     @maybe_login_required
+    @read_from_replica
+    @conditional_get(compare_runs_etag_parts, weak=True)
     def get(self, compare_ids: str) -> f.Response:
         """
         ---
@@ -627,17 +775,31 @@ class CompareRunsAPI(ApiEndpoint):
             description: |
                 The max number of unique fingerprints to return per page for pagination
                 (see `cursor`). Default 100. Max 1000.
+          - in: query
+            name: fields
+            schema:
+              type: string
+            description: |
+                A comma-separated list of the fields to return for each comparison
+                object, e.g. `history_fingerprint,contender.single_value_summary`. Use
+                dot notation for nested fields. By default, all fields are returned.
+                The lookback z-score analysis is only computed if requested, and only
+                the requested parts of `baseline.result` and `contender.result` are
+                loaded from the database.
         tags:
           - Comparisons
         """
-        # Note(JP): a threading.BoundedSemaphore acquired and released with a
-        # context manager. Assumes the web application to be deployed in a
-        # model with N request-handling threads per process. Wait in line for
-        # a small number of seconds
-        with _sem_acquire(_semaphore_compare_get, 0.1) as acquired:
-            if not acquired:
-                return resp429("doing other /compare work, retry soon")
+        # Note(JP): a threading.BoundedSemaphore. Assumes the web application
+        # to be deployed in a model with N request-handling threads per
+        # process. Wait in line for a small number of seconds. The comparison
+        # objects are built while streaming the response: release the
+        # semaphore only after that (or when the response is closed without
+        # having been streamed).
+        if not _semaphore_compare_get.acquire(timeout=0.1):
+            return resp429("doing other /compare work, retry soon")
+        release = _release_once(_semaphore_compare_get)
 
+        try:
             page_size_arg = f.request.args.get("page_size", 100)
             try:
                 page_size = int(page_size_arg)
@@ -651,11 +813,28 @@ class CompareRunsAPI(ApiEndpoint):
             cursor = None if cursor_arg == "null" else cursor_arg
 
             threshold, threshold_z = _get_threshold_args_from_request()
+            fields = fields_from_request(COMPARE_FIELDS_SCHEMA)
 
-            response = self._get_response_as_dict(
-                compare_ids, cursor, page_size, threshold, threshold_z
+            comparators, next_page_cursor = self._get_page(
+                compare_ids, cursor, page_size, threshold, threshold_z, fields
             )
-            return f.jsonify(response)
+
+            def items():
+                try:
+                    for c in comparators:
+                        yield c._dict_for_api_json
+                finally:
+                    release()
+
+            resp = json_response_for_item_stream(
+                items(), metadata={"next_page_cursor": next_page_cursor}
+            )
+        except BaseException:
+            release()
+            raise
+
+        resp.call_on_close(release)
+        return resp
 
     def _get_response_as_dict(
         self,
@@ -664,7 +843,32 @@ class CompareRunsAPI(ApiEndpoint):
         page_size: Optional[int],
         threshold: Optional[float],
         threshold_z: Optional[float],
+        fields: Optional[FieldSelection] = None,
     ) -> dict:
+        comparators, next_page_cursor = self._get_page(
+            compare_ids, cursor, page_size, threshold, threshold_z, fields
+        )
+        return {
+            "data": [c._dict_for_api_json for c in comparators],
+            "metadata": {"next_page_cursor": next_page_cursor},
+        }
+
+    def _get_page(
+        self,
+        compare_ids: str,
+        cursor: Optional[str],
+        page_size: Optional[int],
+        threshold: Optional[float],
+        threshold_z: Optional[float],
+        fields: Optional[FieldSelection] = None,
+    ) -> Tuple[Iterator[BenchmarkResultComparator], Optional[str]]:
+        """
+        Return the comparators for one page of history fingerprints, and the
+        cursor for the next page.
+
+        The comparators are built while the returned iterator is consumed,
+        see _iter_comparators().
+        """
         baseline_run_id, contender_run_id = _parse_two_ids_or_abort(compare_ids)
         self._check_run_exists(baseline_run_id)
         self._check_run_exists(contender_run_id)
@@ -672,63 +876,6 @@ class CompareRunsAPI(ApiEndpoint):
         history_fingerprints = self._get_page_of_history_fingerprints(
             [baseline_run_id, contender_run_id], cursor, page_size
         )
-        if not history_fingerprints:
-            return {"data": [], "metadata": {"next_page_cursor": None}}
-
-        baseline_results = self._get_all_results_for_a_run(
-            baseline_run_id, history_fingerprints
-        )
-        contender_results = self._get_all_results_for_a_run(
-            contender_run_id, history_fingerprints
-        )
-
-        # All baseline results share a run (and therefore a commit).
-        baseline_commit = self._get_commit(baseline_run_id)
-
-        if baseline_commit:
-            set_z_scores(
-                contender_benchmark_results=contender_results,
-                baseline_commit=baseline_commit,
-                history_fingerprints=history_fingerprints,
-            )
-        else:
-            # If the baseline run is not associated with a commit, skip z-scores. The
-            # ["analysis"]["lookback_z_score"] dict will then be null in the response.
-            for result in contender_results:
-                result.z_score = None
-
-        for benchmark_result in baseline_results:
-            # TODO: define dynamic properties on BenchmarkResult instead of
-            # mutating these objects here in-place.
-            set_display_benchmark_name(benchmark_result)
-            set_display_case_permutation(benchmark_result)
-
-        for benchmark_result in contender_results:
-            set_display_benchmark_name(benchmark_result)
-            set_display_case_permutation(benchmark_result)
-
-        comparators: List[BenchmarkResultComparator] = []
-        for fingerprint, baseline_result, contender_result in self._join_results(
-            baseline_results, contender_results
-        ):
-            try:
-                comparators.append(
-                    BenchmarkResultComparator(
-                        history_fingerprint=fingerprint,
-                        baseline=baseline_result,
-                        contender=contender_result,
-                        threshold=threshold,
-                        threshold_z=threshold_z,
-                    )
-                )
-            except UnmatchingUnitsError:
-                # Don't return comparisons if their units mismatch.
-                pass
-
-        data = sorted(
-            [comparator._dict_for_api_json for comparator in comparators],
-            key=lambda x: x["history_fingerprint"],
-        )
 
         if len(history_fingerprints) == page_size:
             next_page_cursor = history_fingerprints[-1]
@@ -742,7 +889,96 @@ class CompareRunsAPI(ApiEndpoint):
             # should be empty
             next_page_cursor = None
 
-        return {"data": data, "metadata": {"next_page_cursor": next_page_cursor}}
+        comparators = self._iter_comparators(
+            baseline_run_id,
+            contender_run_id,
+            history_fingerprints,
+            threshold,
+            threshold_z,
+            fields,
+        )
+        return comparators, next_page_cursor
+
+    def _iter_comparators(
+        self,
+        baseline_run_id: str,
+        contender_run_id: str,
+        history_fingerprints: List[THistFingerprint],
+        threshold: Optional[float],
+        threshold_z: Optional[float],
+        fields: Optional[FieldSelection],
+    ) -> Iterator[BenchmarkResultComparator]:
+        """
+        Yield the comparators for the given history fingerprints (sorted by
+        fingerprint). Load and analyze the results of
+        COMPARE_RUNS_BATCH_FINGERPRINTS fingerprints at a time: memory usage
+        does not grow with the page size.
+        """
+        if not history_fingerprints:
+            return
+
+        # All baseline results share a run (and therefore a commit).
+        baseline_commit = (
+            self._get_commit(baseline_run_id) if _want_z_scores(fields) else None
+        )
+
+        n = COMPARE_RUNS_BATCH_FINGERPRINTS
+        for start in range(0, len(history_fingerprints), n):
+            end = start + n
+            batch = history_fingerprints[start:end]
+            baseline_results = self._get_all_results_for_a_run(
+                baseline_run_id, batch, fields
+            )
+            contender_results = self._get_all_results_for_a_run(
+                contender_run_id, batch, fields
+            )
+
+            if baseline_commit:
+                set_z_scores(
+                    contender_benchmark_results=contender_results,
+                    baseline_commit=baseline_commit,
+                    history_fingerprints=batch,
+                )
+            else:
+                # If the baseline run is not associated with a commit, skip
+                # z-scores. The ["analysis"]["lookback_z_score"] dict will then
+                # be null in the response.
+                for result in contender_results:
+                    result.z_score = None
+
+            for benchmark_result in baseline_results:
+                # TODO: define dynamic properties on BenchmarkResult instead of
+                # mutating these objects here in-place.
+                set_display_benchmark_name(benchmark_result)
+                set_display_case_permutation(benchmark_result)
+
+            for benchmark_result in contender_results:
+                set_display_benchmark_name(benchmark_result)
+                set_display_case_permutation(benchmark_result)
+
+            comparators: List[BenchmarkResultComparator] = []
+            for fingerprint, baseline_result, contender_result in self._join_results(
+                baseline_results, contender_results
+            ):
+                try:
+                    comparators.append(
+                        BenchmarkResultComparator(
+                            history_fingerprint=fingerprint,
+                            baseline=baseline_result,
+                            contender=contender_result,
+                            threshold=threshold,
+                            threshold_z=threshold_z,
+                            fields=fields,
+                        )
+                    )
+                except UnmatchingUnitsError:
+                    # Don't return comparisons if their units mismatch.
+                    pass
+
+            # Sort by fingerprint (which may not be part of the output). Batches
+            # are in fingerprint order.
+            comparators.sort(key=lambda c: c.history_fingerprint or "")
+            yield from comparators
 
 
 compare_benchmark_results_view = CompareBenchmarkResultsAPI.as_view(
@@ -1,5 +1,6 @@
 from ..api import rule
 from ..api._endpoint import ApiEndpoint, maybe_login_required
+from ..api._etag import conditional_get, row_version_etag_parts
 from ..entities._entity import NotFound
 from ..entities.context import Context, ContextSerializer
 
@@ -33,6 +34,7 @@ class ContextEntityAPI(ApiEndpoint):
         return context
 
     @maybe_login_required
+    @conditional_get(row_version_etag_parts("context"))
     def get(self, context_id):
         """
         ---
@@ -0,0 +1,294 @@
+import io
+import logging
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+import flask as f
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import sqlalchemy as s
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import InstrumentedAttribute
+
+from conbench.dbsession import current_read_session
+
+from ..api import rule
+from ..api._endpoint import ApiEndpoint, maybe_login_required
+from ..entities.benchmark_result import BenchmarkResult
+from ..entities.case import Case
+from ..entities.commit import Commit
+from ..entities.context import Context
+from ..entities.hardware import Hardware
+
+log = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor (and emitted as one record batch /
+# Parquet row group) at a time. This bounds the memory used per export.
+EXPORT_BATCH_ROWS = 10000
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+_TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+# Output column name, Arrow type, SQL expression. Columns with values repeating
+# across many rows (including the ones from joined tables: case, context,
+# hardware, commit) are dictionary-encoded. JSON objects are exported as JSON
+# text.
+_COLUMNS: List[
+    Tuple[str, pa.DataType, Union[s.ColumnElement[Any], InstrumentedAttribute[Any]]]
+] = [
+    ("id", pa.string(), BenchmarkResult.id),
+    ("run_id", _DICT, BenchmarkResult.run_id),
+    ("batch_id", _DICT, BenchmarkResult.batch_id),
+    ("run_reason", _DICT, BenchmarkResult.run_reason),
+    ("run_tags", _DICT, s.cast(BenchmarkResult.run_tags, s.Text)),
+    ("timestamp", _TIMESTAMP, BenchmarkResult.timestamp),
+    ("history_fingerprint", _DICT, BenchmarkResult.history_fingerprint),
+    ("benchmark_name", _DICT, Case.name),
+    ("case_permutation", _DICT, s.cast(Case.tags, s.Text)),
+    ("context", _DICT, s.cast(Context.tags, s.Text)),
+    ("hardware_name", _DICT, Hardware.name),
+    ("hardware_type", _DICT, Hardware.type),
+    ("hardware_hash", _DICT, Hardware.hash),
+    ("commit_repository", _DICT, BenchmarkResult.commit_repo_url),
+    ("commit_sha", _DICT, Commit.sha),
+    ("commit_branch", _DICT, Commit.branch),
+    ("commit_timestamp", _TIMESTAMP, Commit.timestamp),
+    ("unit", _DICT, BenchmarkResult.unit),
+    ("time_unit", _DICT, BenchmarkResult.time_unit),
+    ("iterations", pa.int64(), BenchmarkResult.iterations),
+    *(
+        (name, pa.float64(), s.cast(getattr(BenchmarkResult, name), s.Float))
+        for name in ("mean", "min", "max", "median", "stdev", "q1", "q3", "iqr")
+    ),
+    (
+        "data",
+        pa.list_(pa.float64()),
+        s.cast(BenchmarkResult.data, postgresql.ARRAY(s.Float)),
+    ),
+    (
+        "times",
+        pa.list_(pa.float64()),
+        s.cast(BenchmarkResult.times, postgresql.ARRAY(s.Float)),
+    ),
+    ("error", pa.string(), s.cast(BenchmarkResult.error, s.Text)),
+    ("validation", pa.string(), s.cast(BenchmarkResult.validation, s.Text)),
+    (
+        "change_annotations",
+        pa.string(),
+        s.cast(BenchmarkResult.change_annotations, s.Text),
+    ),
+    (
+        "optional_benchmark_info",
+        pa.string(),
+        s.cast(BenchmarkResult.optional_benchmark_info, s.Text),
+    ),
+]
+
+EXPORT_SCHEMA = pa.schema([(name, typ) for name, typ, _ in _COLUMNS])
+
+EXPORT_FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file object collecting what the Arrow/Parquet writer emits, to
+    be taken out (and sent to the client) after each record batch.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def take(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def _record_batch(rows: Sequence[s.Row[Any]]) -> pa.RecordBatch:
+    columns = list(zip(*rows))
+    arrays = []
+    for (_, typ, _), values in zip(_COLUMNS, columns):
+        if typ == _DICT:
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=typ))
+    return pa.RecordBatch.from_arrays(arrays, schema=EXPORT_SCHEMA)
+
+
+def export_query(
+    earliest_timestamp: Optional[pd.Timestamp] = None,
+    latest_timestamp: Optional[pd.Timestamp] = None,
+    run_reason: Optional[str] = None,
+    history_fingerprints: Optional[List[str]] = None,
+    benchmark_name: Optional[str] = None,
+) -> s.Select:
+    query = (
+        s.select(*(expr.label(name) for name, _, expr in _COLUMNS))
+        .join(Case, Case.id == BenchmarkResult.case_id)
+        .join(Context, Context.id == BenchmarkResult.context_id)
+        .join(Hardware, Hardware.id == BenchmarkResult.hardware_id)
+        .outerjoin(Commit, Commit.id == BenchmarkResult.commit_id)
+        # Uses the timestamp index (per partition), no sort step.
+        .order_by(BenchmarkResult.timestamp)
+    )
+    # Time range filters allow for partition pruning.
+    if earliest_timestamp is not None:
+        query = query.where(BenchmarkResult.timestamp >= earliest_timestamp)
+    if latest_timestamp is not None:
+        query = query.where(BenchmarkResult.timestamp <= latest_timestamp)
+    if run_reason is not None:
+        query = query.where(BenchmarkResult.run_reason == run_reason)
+    if history_fingerprints:
+        query = query.where(
+            BenchmarkResult.history_fingerprint.in_(history_fingerprints)
+        )
+    if benchmark_name is not None:
+        query = query.where(Case.name == benchmark_name)
+    return query
+
+
+def generate_export(query: s.Select, fmt: str) -> Iterator[bytes]:
+    """
+    Run `query` with a server-side cursor and yield the Arrow IPC stream or
+    Parquet file in pieces, one record batch at a time.
+    """
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, EXPORT_SCHEMA, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(
+            sink, EXPORT_SCHEMA, options=pa.ipc.IpcWriteOptions(compression="zstd")
+        )
+
+    n_rows = 0
+    # `yield_per` makes SQLAlchemy use a server-side (named) cursor.
+    result = current_read_session.execute(
+        query, execution_options={"yield_per": EXPORT_BATCH_ROWS}
+    )
+    try:
+        for rows in result.partitions():
+            writer.write_batch(_record_batch(rows))
+            n_rows += len(rows)
+            yield sink.take()
+        writer.close()
+        yield sink.take()
+    finally:
+        result.close()
+        log.info("export (%s): emitted %s rows", fmt, n_rows)
+
+
+class BenchmarkResultExportAPI(ApiEndpoint):
+    @maybe_login_required
+    def get(self) -> f.Response:
+        """
+        ---
+        description: |
+            Export benchmark results in bulk, in a columnar format: as an Arrow
+            IPC stream (default) or as a Parquet file.
+
+            The response body is streamed while results are read from the
+            database, in record batches (Parquet row groups) of 10000 results,
+            ordered by benchmark result timestamp. This is meant for exporting
+            large numbers of results for offline analysis; use filters to
+            limit the export.
+
+            Properties of the benchmark case, context, hardware and commit are
+            included as dictionary-encoded columns. JSON objects (e.g. the case
+            permutation, context, or error) are exported as JSON text.
+        responses:
+            "200": "200"
+            "400": "400"
+            "401": "401"
+        parameters:
+          - in: query
+            name: format
+            schema:
+              type: string
+              enum: [arrow, parquet]
+            description: The output format. Default `arrow`.
+          - in: query
+            name: earliest_timestamp
+            schema:
+              type: string
+              format: date-time
+            description: The earliest (least recent) benchmark result timestamp to export.
+          - in: query
+            name: latest_timestamp
+            schema:
+              type: string
+              format: date-time
+            description: The latest (most recent) benchmark result timestamp to export.
+          - in: query
+            name: run_reason
+            schema:
+              type: string
+            description: Only export results with this `run_reason`.
+          - in: query
+            name: history_fingerprint
+            schema:
+              type: string
+            description: |
+                Only export results with one of these history fingerprints
+                (comma-separated).
+          - in: query
+            name: benchmark_name
+            schema:
+              type: string
+            description: Only export results for this benchmark name.
+        tags:
+          - Benchmarks
+        """
+        fmt = f.request.args.get("format", "arrow")
+        if fmt not in EXPORT_FORMATS:
+            self.abort_400_bad_request(
+                f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+            )
+
+        fingerprints_arg = f.request.args.get("history_fingerprint")
+        query = export_query(
+            earliest_timestamp=self.timestamp_arg("earliest_timestamp"),
+            latest_timestamp=self.timestamp_arg("latest_timestamp"),
+            run_reason=f.request.args.get("run_reason"),
+            history_fingerprints=(
+                [fp.strip() for fp in fingerprints_arg.split(",") if fp.strip()]
+                if fingerprints_arg
+                else None
+            ),
+            benchmark_name=f.request.args.get("benchmark_name"),
+        )
+
+        return f.Response(
+            f.stream_with_context(generate_export(query, fmt)),
+            status=200,
+            mimetype=EXPORT_FORMATS[fmt],
+            headers={
+                "content-disposition": "attachment; "
+                f"filename=conbench-benchmark-results.{fmt}"
+            },
+        )
+
+
+benchmark_result_export_view = BenchmarkResultExportAPI.as_view(
+    "benchmark-results-export"
+)
+
+rule(
+    "/benchmark-results/export/",
+    view_func=benchmark_result_export_view,
+    methods=["GET"],
+)
@@ -3,23 +3,32 @@ import functools
 from io import BytesIO
 from typing import List
 
-import orjson
+import flask as f
 import pandas as pd
 from flask import send_file
 
 import conbench.numstr
 from conbench.buildinfo import BUILD_INFO
 from conbench.config import Config
+from conbench.dbsession import read_from_replica
 
 from ..api import rule
 from ..api._endpoint import ApiEndpoint, maybe_login_required
+from ..api._etag import benchmark_results_history_etag_parts, conditional_get
 from ..entities._entity import NotFound
-from ..entities.history import HistorySample, get_history_for_benchmark
-from ._resp import json_response_for_byte_sequence
+from ..entities.history import (
+    HISTORY_BUCKET_TYPES,
+    HistorySample,
+    get_history_buckets,
+    get_history_for_benchmark,
+)
+from ._resp import json_response_for_item_stream
 
 
 class HistoryEntityAPI(ApiEndpoint):
     @maybe_login_required
+    @read_from_replica
+    @conditional_get(benchmark_results_history_etag_parts, weak=True)
     def get(self, benchmark_result_id):
         """
         ---
@@ -54,18 +63,15 @@ class HistoryEntityAPI(ApiEndpoint):
         except NotFound:
             self.abort_404_not_found()
 
-        jsonbytes: bytes = orjson.dumps(
-            {
-                "data": [s._dict_for_api_json() for s in samples],
-                "metadata": {"next_page_cursor": None},
-            },
-            option=orjson.OPT_INDENT_2,
+        return json_response_for_item_stream(
+            (s._dict_for_api_json() for s in samples),
+            metadata={"next_page_cursor": None},
         )
-        return json_response_for_byte_sequence(jsonbytes, 200)
 
 
 class HistoryDownloadAPI(ApiEndpoint):
     @maybe_login_required
+    @read_from_replica
     def get(self, benchmark_result_id):
         """
         ---
@@ -103,8 +109,122 @@ class HistoryDownloadAPI(ApiEndpoint):
         )
 
 
+class HistoryAggregateAPI(ApiEndpoint):
+    @maybe_login_required
+    @read_from_replica
+    def get(self):
+        """
+        ---
+        description: |
+            Get the history of one or more benchmark series aggregated into
+            time buckets, for drawing long-range trends without transferring
+            every single benchmark result.
+
+            The series are selected either by history fingerprint, or by
+            benchmark name (then all history fingerprints of that benchmark
+            are included). As for the history endpoint, only error-free
+            benchmark results on the default branch are considered.
+
+            Results are bucketed by the timestamp of their commit: per calendar
+            day or week (UTC), or per `commits_per_bucket` consecutive commits.
+            For each bucket, the number of results and the mean, min, max,
+            median (`p50`) and 90th percentile (`p90`) of the results' single
+            value summaries are returned, along with the first and last commit
+            timestamp in the bucket. Buckets are sorted by time.
+        responses:
+            "200": "HistoryAggregate"
+            "400": "400"
+            "401": "401"
+        parameters:
+          - in: query
+            name: history_fingerprint
+            schema:
+              type: string
+            description: |
+                A history fingerprint or a comma-separated list of history
+                fingerprints. Either this or `benchmark_name` is required.
+          - in: query
+            name: benchmark_name
+            schema:
+              type: string
+            description: Aggregate all series of this benchmark.
+          - in: query
+            name: bucket
+            schema:
+              type: string
+              enum: [day, week, commits]
+            description: The bucket type. Default `week`.
+          - in: query
+            name: commits_per_bucket
+            schema:
+              type: integer
+              minimum: 1
+            description: The number of commits per bucket for `bucket=commits`. Default 10.
+          - in: query
+            name: earliest_timestamp
+            schema:
+              type: string
+              format: date-time
+            description: Only consider results with a commit timestamp at or after this time.
+          - in: query
+            name: latest_timestamp
+            schema:
+              type: string
+              format: date-time
+            description: Only consider results with a commit timestamp at or before this time.
+        tags:
+          - History
+        """
+        fingerprints_arg = f.request.args.get("history_fingerprint")
+        history_fingerprints = (
+            [fp.strip() for fp in fingerprints_arg.split(",") if fp.strip()]
+            if fingerprints_arg
+            else None
+        )
+        benchmark_name = f.request.args.get("benchmark_name")
+        if not history_fingerprints and not benchmark_name:
+            self.abort_400_bad_request(
+                "history_fingerprint or benchmark_name is required"
+            )
+
+        bucket_type = f.request.args.get("bucket", "week")
+        if bucket_type not in HISTORY_BUCKET_TYPES:
+            self.abort_400_bad_request(
+                f"bucket must be one of: {', '.join(HISTORY_BUCKET_TYPES)}"
+            )
+
+        msg = "commits_per_bucket must be a positive integer"
+        try:
+            commits_per_bucket = int(f.request.args.get("commits_per_bucket", 10))
+        except ValueError:
+            self.abort_400_bad_request(msg)
+        if commits_per_bucket < 1:
+            self.abort_400_bad_request(msg)
+
+        series = get_history_buckets(
+            bucket_type,
+            history_fingerprints=history_fingerprints,
+            benchmark_name=benchmark_name,
+            commits_per_bucket=commits_per_bucket,
+            earliest_commit_timestamp=self.timestamp_arg("earliest_timestamp"),
+            latest_commit_timestamp=self.timestamp_arg("latest_timestamp"),
+        )
+
+        return {
+            "data": [sr._dict_for_api_json() for sr in series],
+            "metadata": {"bucket": bucket_type, "svs_type": Config.SVS_TYPE},
+        }
+
+
 history_entity_view = HistoryEntityAPI.as_view("history")
 history_download_endpoint = HistoryDownloadAPI.as_view("history-download")
+history_aggregate_view = HistoryAggregateAPI.as_view("history-aggregate")
+
+rule(
+    "/history/aggregate/",
+    view_func=history_aggregate_view,
+    methods=["GET"],
+)
 
 rule(
     "/history/download/<benchmark_result_id>/",
@@ -1,5 +1,6 @@
 from ..api import rule
 from ..api._endpoint import ApiEndpoint, maybe_login_required
+from ..api._etag import conditional_get, row_version_etag_parts
 from ..entities._entity import NotFound
 from ..entities.info import Info, InfoSerializer
 
@@ -33,6 +34,7 @@ class InfoEntityAPI(ApiEndpoint):
         return info
 
     @maybe_login_required
+    @conditional_get(row_version_etag_parts("info"))
     def get(self, info_id):
         """
         ---
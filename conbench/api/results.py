@@ -1,10 +1,13 @@
 import logging
+from typing import List, Optional, Sequence, Tuple
 
 import flask as f
 import flask_login
+import marshmallow
 import orjson
 import pandas as pd
-from sqlalchemy import select
+import sqlalchemy.exc
+from sqlalchemy import ColumnElement, select
 from uuid_extensions import uuid7
 
 import conbench.metrics
@@ -12,24 +15,140 @@ from conbench.dbsession import current_session
 
 from ..api import rule
 from ..api._docs import spec
-from ..api._endpoint import ApiEndpoint, maybe_login_required
+from ..api._endpoint import ApiEndpoint, blank_strings_to_none, maybe_login_required
+from ..api._etag import benchmark_result_etag_parts, conditional_get
 from ..entities._entity import NotFound
 from ..entities.benchmark_result import (
+    JSON_API_KEYS,
+    JSON_API_STATS_KEYS,
     BenchmarkResult,
     BenchmarkResultFacadeSchema,
+    BenchmarkResultIdempotencyKey,
     BenchmarkResultSerializer,
     BenchmarkResultValidationError,
+    IdempotencyKeyMismatch,
+    to_dicts_for_json_api,
 )
+from ._fields import ANY, FieldSelection, fields_from_request
+from ._req import accepts_gzip_request_body
 from ._resp import json_response_for_byte_sequence, resp400
 
 log = logging.getLogger(__name__)
 
 
+# Valid values for the `fields` query parameter, see conbench/api/_fields.py.
+BENCHMARK_RESULT_FIELDS_SCHEMA_NO_JOINS = {
+    **{k: None for k in JSON_API_KEYS},
+    "stats": {k: None for k in JSON_API_STATS_KEYS},
+}
+BENCHMARK_RESULT_FIELDS_SCHEMA = {
+    **BENCHMARK_RESULT_FIELDS_SCHEMA_NO_JOINS,
+    "tags": ANY,
+    "commit": ANY,
+    "hardware": ANY,
+    "links": ANY,
+}
+
+
+def list_benchmark_results(
+    page_size: int,
+    run_id: Optional[str] = None,
+    batch_id: Optional[str] = None,
+    filters: Sequence[ColumnElement[bool]] = (),
+    fields: Optional[FieldSelection] = None,
+) -> Tuple[Sequence[BenchmarkResult], Optional[str]]:
+    """
+    Return (at most `page_size`) benchmark results matching `run_id`,
+    `batch_id` and all of `filters`, most recent first, and the cursor for the
+    next page (`None` if there is no next page).
+
+    Unless filtering by `run_id` or `batch_id`, only results from after
+    2023-06-03 are considered (see below).
+
+    Only the columns and related entities needed for `fields` are loaded.
+    """
+    filters = list(filters)
+    if run_id is not None or batch_id is not None:
+        # It's assumed that the number of benchmark results corresponding to
+        # one run_id (or batch_id) won't increase unbounded over time (since
+        # runs end at some point). So we don't have to filter out "old"
+        # results.
+        if run_id is not None:
+            filters.append(BenchmarkResult.run_id == run_id)
+        if batch_id is not None:
+            filters.append(BenchmarkResult.batch_id == batch_id)
+    else:
+        # All Conbench instances used a non-UUID7 primary key for benchmark
+        # results before this date. We need to filter those out or they will
+        # be mixed in to the results here, which will mess up the ordering.
+        # This filter also excludes the legacy partition from the query
+        # (partition pruning, see conbench/partitions.py).
+        filters.append(BenchmarkResult.timestamp >= "2023-06-03")
+
+    query = (
+        select(BenchmarkResult)
+        .filter(*filters)
+        .order_by(BenchmarkResult.id.desc())
+        .limit(page_size)
+        .options(*BenchmarkResult.loader_options_for_json_api(fields))
+    )
+    benchmark_results = current_session.scalars(query).all()
+
+    if len(benchmark_results) == page_size:
+        next_page_cursor = benchmark_results[-1].id
+        # There's an edge case here where the last page happens to have exactly
+        # page_size results. So the client will grab one more (empty) page. The
+        # alternative would be to query the DB here, every single time, to *make
+        # sure* the next page will contain results... but that feels very expensive.
+    else:
+        # If there were fewer than page_size results, the next page should be empty
+        next_page_cursor = None
+
+    return benchmark_results, next_page_cursor
+
+
 class BenchmarkValidationMixin:
     def validate_benchmark(self, schema):
         return self.validate(schema)
 
 
+IDEMPOTENCY_KEY_MAX_LENGTH = 200
+
+
+class IdempotencyKeyMixin:
+    def idempotency_key_from_request(self) -> Optional[str]:
+        """
+        Return the value of the `Idempotency-Key` request header, or None if
+        the header was not set. Emit a 400 response for a bad value.
+        """
+        key = f.request.headers.get("Idempotency-Key")
+        if key is None:
+            return None
+
+        key = key.strip()
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            self.abort_400_bad_request(  # type: ignore[attr-defined]
+                "Idempotency-Key header must be a non-empty string of at most "
+                f"{IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+            )
+        return key
+
+    def previous_submission(
+        self, key: str, body_hash: str
+    ) -> Optional[BenchmarkResult]:
+        """
+        Return the benchmark result previously submitted by the current user
+        with idempotency key `key`, or None. Emit a 422 response if the key
+        was used for a different request body.
+        """
+        try:
+            return BenchmarkResultIdempotencyKey.lookup(
+                flask_login.current_user.id, key, body_hash
+            )
+        except IdempotencyKeyMismatch as exc:
+            f.abort(422, description={"_errors": [str(exc)]})
+
+
 class BenchmarkEntityAPI(ApiEndpoint, BenchmarkValidationMixin):
     serializer = BenchmarkResultSerializer()
     schema = BenchmarkResultFacadeSchema()
@@ -42,6 +161,7 @@ class BenchmarkEntityAPI(ApiEndpoint, BenchmarkValidationMixin):
         return benchmark_result
 
     @maybe_login_required
+    @conditional_get(benchmark_result_etag_parts)
     def get(self, benchmark_result_id):
         """
         ---
@@ -110,7 +230,7 @@ class BenchmarkEntityAPI(ApiEndpoint, BenchmarkValidationMixin):
         return self.response_204_no_content()
 
 
-class BenchmarkListAPI(ApiEndpoint, BenchmarkValidationMixin):
+class BenchmarkListAPI(ApiEndpoint, BenchmarkValidationMixin, IdempotencyKeyMixin):
     serializer = BenchmarkResultSerializer()
     schema = BenchmarkResultFacadeSchema()
 
@@ -200,22 +320,22 @@ class BenchmarkListAPI(ApiEndpoint, BenchmarkValidationMixin):
               type: string
               format: date-time
             description: The latest (most recent) benchmark result timestamp to return.
+          - in: query
+            name: fields
+            schema:
+              type: string
+            description: |
+                A comma-separated list of the fields to return for each benchmark
+                result, e.g. `id,history_fingerprint,stats.mean,timestamp`. Use dot
+                notation for nested fields. By default, all fields are returned.
+                Requesting only the fields you need makes the response smaller and
+                faster to generate.
         tags:
           - Benchmarks
         """
+        fields = fields_from_request(BENCHMARK_RESULT_FIELDS_SCHEMA)
         filters = []
 
-        if run_id_arg := f.request.args.get("run_id"):
-            # It's assumed that the number of benchmark results corresponding to one
-            # run_id won't increase unbounded over time (since runs end at some point).
-            # So we don't have to filter out "old" results.
-            filters.append(BenchmarkResult.run_id == run_id_arg)
-        else:
-            # All Conbench instances used a non-UUID7 primary key for benchmark results
-            # before this date. We need to filter those out or they will be mixed in to
-            # the results here, which will mess up the ordering.
-            filters.append(BenchmarkResult.timestamp >= "2023-06-03")
-
         if earliest_timestamp_arg := f.request.args.get("earliest_timestamp"):
             filters.append(BenchmarkResult.timestamp >= earliest_timestamp_arg)
             # Speed up the query by also filtering out results that were inserted into
@@ -244,30 +364,22 @@ class BenchmarkListAPI(ApiEndpoint, BenchmarkValidationMixin):
                 "page_size must be a positive integer no greater than 1000"
             )
 
-        query = (
-            select(BenchmarkResult)
-            .filter(*filters)
-            .order_by(BenchmarkResult.id.desc())
-            .limit(page_size)
+        benchmark_results, next_page_cursor = list_benchmark_results(
+            page_size,
+            run_id=f.request.args.get("run_id") or None,
+            filters=filters,
+            fields=fields,
         )
-        benchmark_results = current_session.scalars(query).all()
-
-        if len(benchmark_results) == page_size:
-            next_page_cursor = benchmark_results[-1].id
-            # There's an edge case here where the last page happens to have exactly
-            # page_size results. So the client will grab one more (empty) page. The
-            # alternative would be to query the DB here, every single time, to *make
-            # sure* the next page will contain results... but that feels very expensive.
-        else:
-            # If there were fewer than page_size results, the next page should be empty
-            next_page_cursor = None
+        data = to_dicts_for_json_api(benchmark_results, fields)
+        if fields is not None:
+            data = [fields.prune(d) for d in data]
 
         # See https://github.com/conbench/conbench/issues/999 -- for rather
         # typical queries, using orjson instead of stdlib can significantly
         # cut JSON serialization time.
         jsonbytes: bytes = orjson.dumps(
             {
-                "data": [r.to_dict_for_json_api() for r in benchmark_results],
+                "data": data,
                 "metadata": {"next_page_cursor": next_page_cursor},
             },
             option=orjson.OPT_INDENT_2,
@@ -276,6 +388,7 @@ class BenchmarkListAPI(ApiEndpoint, BenchmarkValidationMixin):
         return json_response_for_byte_sequence(jsonbytes, 200)
 
     @flask_login.login_required
+    @accepts_gzip_request_body
     def post(self) -> f.Response:
         """
         ---
@@ -287,10 +400,29 @@ class BenchmarkListAPI(ApiEndpoint, BenchmarkValidationMixin):
             request. If the Run ID matches an existing run, then the rest of
             the fields describing the Run (such as name, hardware info, ...}
             are silently ignored.
+
+            If the `Idempotency-Key` request header is set and a benchmark
+            result was previously submitted by the same user with the same
+            key, then that result is returned (without processing the request
+            body any further) and the response carries the
+            `Idempotent-Replayed` header (value `true`). If the key was used
+            before for a different request body, a 422 response is emitted.
         responses:
             "201": "BenchmarkResultCreated"
             "400": "400"
             "401": "401"
+            "422": "422"
+        parameters:
+          - in: header
+            name: Idempotency-Key
+            schema:
+              type: string
+              maxLength: 200
+            description: |
+                Optional. A client-generated unique string (e.g. a random UUID)
+                identifying this submission. Use the same key when retrying
+                the same submission to prevent the creation of a duplicate
+                benchmark result.
         requestBody:
             content:
                 application/json:
@@ -298,14 +430,46 @@ class BenchmarkListAPI(ApiEndpoint, BenchmarkValidationMixin):
         tags:
           - Benchmarks
         """
+        idempotency_key = self.idempotency_key_from_request()
+        body_hash = None
+        if idempotency_key is not None:
+            # Cheap path for a repeated submission: skip validation, related
+            # entity lookups and the commit info fetch.
+            body_hash = BenchmarkResultIdempotencyKey.body_hash_for(
+                f.request.get_json()
+            )
+            previous = self.previous_submission(idempotency_key, body_hash)
+            if previous is not None:
+                return self._response_replayed(previous)
+
         # Here it should be easy to make `data` have a precise type (that mypy
         # can use) based on the schema that we validate against.
         data = self.validate_benchmark(self.schema.create)
 
         try:
-            benchmark_result = BenchmarkResult.create(data)
+            benchmark_result = BenchmarkResult.create(data, save=False)
+            current_session.add(benchmark_result)
+            if idempotency_key is not None and body_hash is not None:
+                # Assign the primary key.
+                current_session.flush()
+                BenchmarkResultIdempotencyKey.add_for(
+                    flask_login.current_user.id,
+                    idempotency_key,
+                    body_hash,
+                    benchmark_result,
+                )
+            current_session.commit()
         except BenchmarkResultValidationError as exc:
             return resp400(str(exc))
+        except sqlalchemy.exc.IntegrityError:
+            # A concurrent request with the same idempotency key won the race.
+            current_session.rollback()
+            if idempotency_key is None or body_hash is None:
+                raise
+            previous = self.previous_submission(idempotency_key, body_hash)
+            if previous is None:
+                raise
+            return self._response_replayed(previous)
 
         # Rely on the idea that the lookup
         # `benchmark_result.commit_repo_url` always succeeds
@@ -314,9 +478,265 @@ class BenchmarkListAPI(ApiEndpoint, BenchmarkValidationMixin):
         ).inc()
         return self.response_201_created(self.serializer.one.dump(benchmark_result))
 
+    def _response_replayed(self, benchmark_result: BenchmarkResult):
+        log.info(
+            "idempotency key matched, return existing result %s", benchmark_result.id
+        )
+        body, status, headers = self.response_201_created(
+            self.serializer.one.dump(benchmark_result)
+        )
+        headers["Idempotent-Replayed"] = "true"
+        return body, status, headers
+
+
+class BenchmarkResultNDJSONAPI(ApiEndpoint, IdempotencyKeyMixin):
+    schema = BenchmarkResultFacadeSchema()
+
+    @flask_login.login_required
+    @accepts_gzip_request_body
+    def post(self) -> f.Response:
+        """
+        ---
+        description: |
+            Submit many benchmark results in a single request, as
+            newline-delimited JSON (one `BenchmarkResultCreate` object per
+            line).
+
+            The request body is consumed incrementally; it does not need to
+            fit into memory on either side. Lines are validated one by one and
+            valid results are written to the database in transactions of
+            `chunk_size` results each.
+
+            The response body is newline-delimited JSON as well, and is
+            streamed back while the request body is being processed: one status
+            object per non-empty input line (in input order, emitted after the
+            corresponding chunk was committed), for example
+            `{"line": 1, "status": 201, "id": "..."}` or
+            `{"line": 2, "status": 400, "error": {...}}`. The last line is a
+            summary object: `{"summary": {"lines": ..., "created": ...,
+            "failed": ...}}`.
+
+            A malformed line does not abort processing of the remaining lines.
+            If the connection breaks mid-stream, chunks that were already
+            committed are kept, the chunk in progress is discarded.
+
+            If the `Idempotency-Key` request header is set then each line gets
+            the idempotency key `<key>:<line number>`. When the same stream is
+            submitted again with the same key (e.g. after a broken
+            connection), lines that were already committed are not inserted
+            again. Their status object refers to the existing result and has
+            `"replayed": true` set. Keys are scoped per user. A line that
+            re-uses a key for a different document gets a 422 status object.
+        responses:
+            "200": "200"
+            "400": "400"
+            "401": "401"
+        parameters:
+          - in: header
+            name: Idempotency-Key
+            schema:
+              type: string
+              maxLength: 200
+            description: |
+                Optional. A client-generated unique string identifying this
+                stream. See above.
+          - in: query
+            name: chunk_size
+            schema:
+              type: integer
+              minimum: 1
+              maximum: 1000
+            description: |
+                The number of benchmark results to insert per database
+                transaction. Default 100. Max 1000.
+        requestBody:
+            content:
+                application/x-ndjson:
+                    schema: BenchmarkResultCreate
+        tags:
+          - Benchmarks
+        """
+        if f.request.mimetype != "application/x-ndjson":
+            self.abort_400_bad_request("Content-Type must be application/x-ndjson")
+
+        chunk_size = f.request.args.get("chunk_size", 100)
+        try:
+            chunk_size = int(chunk_size)
+            assert 1 <= chunk_size <= 1000
+        except Exception:
+            self.abort_400_bad_request(
+                "chunk_size must be a positive integer no greater than 1000"
+            )
+
+        idempotency_key = self.idempotency_key_from_request()
+
+        lines = f.request.stream
+        return f.Response(
+            f.stream_with_context(self._ingest(lines, chunk_size, idempotency_key)),
+            status=200,
+            mimetype="application/x-ndjson",
+        )
+
+    def _ingest(self, lines, chunk_size: int, idempotency_key: Optional[str]):
+        """
+        Generator: consume NDJSON lines, yield NDJSON status lines.
+
+        Each chunk is written in one database transaction (each line in a
+        savepoint of its own, see _process_line()). Status objects for a chunk
+        are held back until that chunk has been committed, so that a 201 status
+        is never emitted for a result that could still be rolled back.
+        """
+        # Status dicts for the chunk in progress, in input order. The ones
+        # for valid lines reference the not-yet-committed BenchmarkResult.
+        chunk: List[Tuple[dict, Optional[BenchmarkResult]]] = []
+        n_pending = 0
+        counts = {"lines": 0, "created": 0, "replayed": 0, "failed": 0}
+
+        def _flush():
+            nonlocal n_pending
+            results = [bmr for _, bmr in chunk if bmr is not None]
+            if results:
+                try:
+                    current_session.commit()
+                except Exception as exc:
+                    log.exception("ndjson ingest: chunk commit failed: %s", exc)
+                    current_session.rollback()
+                    for status, bmr in chunk:
+                        if bmr is not None:
+                            status.update(
+                                status=500,
+                                error=f"commit failed: {type(exc).__name__}",
+                            )
+            out = []
+            for status, bmr in chunk:
+                if bmr is not None and status["status"] == 201:
+                    status["id"] = bmr.id
+                    counts["created"] += 1
+                    conbench.metrics.COUNTER_BENCHMARK_RESULTS_INGESTED.labels(
+                        repourl=bmr.commit_repo_url
+                    ).inc()
+                elif status.get("replayed"):
+                    counts["replayed"] += 1
+                else:
+                    counts["failed"] += 1
+                out.append(orjson.dumps(status) + b"\n")
+            chunk.clear()
+            n_pending = 0
+            return b"".join(out)
+
+        try:
+            for lineno, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+
+                counts["lines"] += 1
+                status, bmr = self._process_line(
+                    lineno,
+                    line,
+                    f"{idempotency_key}:{lineno}" if idempotency_key else None,
+                )
+                chunk.append((status, bmr))
+                if bmr is not None:
+                    n_pending += 1
+
+                if len(chunk) >= chunk_size:
+                    yield _flush()
+
+            yield _flush()
+            yield orjson.dumps({"summary": counts}) + b"\n"
+
+        except GeneratorExit:
+            # The HTTP client went away (or the server is shutting down the
+            # response). Everything committed so far stays in the database;
+            # discard the chunk in progress.
+            log.info(
+                "ndjson ingest: stream closed early after %s lines, "
+                "discarding %s uncommitted result(s)",
+                counts["lines"],
+                n_pending,
+            )
+            current_session.rollback()
+            raise
+
+    def _process_line(
+        self, lineno: int, line: bytes, idempotency_key: Optional[str]
+    ) -> Tuple[dict, Optional[BenchmarkResult]]:
+        try:
+            obj = orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            return {
+                "line": lineno,
+                "status": 400,
+                "error": f"invalid JSON: {exc}",
+            }, None
+
+        if not isinstance(obj, dict) or not obj:
+            return {
+                "line": lineno,
+                "status": 400,
+                "error": "expected a non-empty JSON object",
+            }, None
+
+        body_hash = BenchmarkResultIdempotencyKey.body_hash_for(obj)
+        if idempotency_key is not None:
+            replayed = self._replayed_status(lineno, idempotency_key, body_hash)
+            if replayed is not None:
+                return replayed, None
+
+        try:
+            userres = self.schema.create.load(blank_strings_to_none(obj))
+        except marshmallow.ValidationError as exc:
+            return {"line": lineno, "status": 400, "error": exc.messages}, None
+
+        try:
+            # One savepoint per line: a bad line does not affect the other
+            # lines of the chunk. Within the savepoint, related entities (Case,
+            # Commit, ...) are only flushed, not committed (see
+            # commit_unless_nested()): the whole chunk is committed at once.
+            with current_session.begin_nested():
+                bmr = BenchmarkResult.create(userres, save=False)
+                current_session.add(bmr)
+                if idempotency_key is not None:
+                    current_session.flush()
+                    BenchmarkResultIdempotencyKey.add_for(
+                        flask_login.current_user.id, idempotency_key, body_hash, bmr
+                    )
+        except BenchmarkResultValidationError as exc:
+            return {"line": lineno, "status": 400, "error": str(exc)}, None
+        except sqlalchemy.exc.IntegrityError:
+            # A concurrent request with the same idempotency key won the race.
+            replayed = (
+                self._replayed_status(lineno, idempotency_key, body_hash)
+                if idempotency_key is not None
+                else None
+            )
+            if replayed is None:
+                raise
+            return replayed, None
+
+        return {"line": lineno, "status": 201}, bmr
+
+    def _replayed_status(
+        self, lineno: int, idempotency_key: str, body_hash: str
+    ) -> Optional[dict]:
+        """
+        Return the status object for a line that was submitted before (by
+        the same user, with the same idempotency key), or None.
+        """
+        try:
+            previous = BenchmarkResultIdempotencyKey.lookup(
+                flask_login.current_user.id, idempotency_key, body_hash
+            )
+        except IdempotencyKeyMismatch as exc:
+            return {"line": lineno, "status": 422, "error": str(exc)}
+        if previous is None:
+            return None
+        return {"line": lineno, "status": 201, "id": previous.id, "replayed": True}
+
 
 benchmark_entity_view = BenchmarkEntityAPI.as_view("benchmark")
 benchmark_list_view = BenchmarkListAPI.as_view("benchmarks")
+benchmark_ndjson_view = BenchmarkResultNDJSONAPI.as_view("benchmark-results-ndjson")
 
 # Phase these out, at some point.
 # https://github.com/conbench/conbench/issues/972
@@ -338,6 +758,11 @@ rule(
     view_func=benchmark_list_view,
     methods=["GET", "POST"],
 )
+rule(
+    "/benchmark-results/ndjson/",
+    view_func=benchmark_ndjson_view,
+    methods=["POST"],
+)
 rule(
     "/benchmark-results/<benchmark_result_id>/",
     view_func=benchmark_entity_view,
@@ -1,20 +1,27 @@
 import dataclasses
+import datetime
 import functools
-from typing import Dict, Optional, Sequence, Set
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 import flask as f
 import sqlalchemy as s
 
 from ..api import rule
 from ..api._endpoint import ApiEndpoint, maybe_login_required
-from ..dbsession import current_session
+from ..api._etag import conditional_get, run_etag_parts
+from ..api._fields import ANY, FieldSelection, fields_from_request
+from ..dbsession import current_session, outside_request_context
 from ..entities._entity import EntitySerializer
 from ..entities.benchmark_result import BenchmarkResult
 from ..entities.commit import CantFindAncestorCommitsError, Commit, CommitSerializer
-from ..entities.hardware import HardwareSerializer
+from ..entities.hardware import Hardware, HardwareSerializer
+from ..entities.run import Run
 from ..types import THistFingerprint
 from ..util import short_commit_msg, tznaive_dt_to_aware_iso8601_for_api
 
+log = logging.getLogger(__name__)
+
 
 @dataclasses.dataclass
 class RunAggregate:
@@ -61,8 +68,16 @@ class _CandidateBaselineSearchResult:
     # The commit hashes that were skipped during the search, if the search succeeded.
     commits_skipped: Optional[Sequence[str]] = None
 
+    # The commit hashes the search looked at (not part of the API response):
+    # the result may change when runs on these commits change.
+    commits_searched: List[str] = dataclasses.field(default_factory=list)
+
     def _dict_for_api_json(self) -> dict:
-        return dataclasses.asdict(self)
+        return {
+            "error": self.error,
+            "baseline_run_id": self.baseline_run_id,
+            "commits_skipped": self.commits_skipped,
+        }
 
 
 def _search_for_baseline_run(
@@ -85,9 +100,10 @@ def _search_for_baseline_run(
     matches, prefer a baseline run with the same reason as the contender run, and then
     use the baseline run with the most-recent commit, finally tiebreaking by choosing
     the baseline run with the latest BenchmarkResult.timestamp.
-    """
-    from ..entities.benchmark_result import BenchmarkResult
 
+    Candidate runs are looked up in the `run` table (by commit); the benchmark
+    results table is only probed for the fingerprint match of each candidate.
+    """
     if not baseline_commit:
         return _CandidateBaselineSearchResult(
             error="this baseline commit type does not exist for this run"
@@ -99,7 +115,8 @@ def _search_for_baseline_run(
         ).limit(commit_limit)
     except CantFindAncestorCommitsError as e:
         return _CandidateBaselineSearchResult(
-            error=f"could not find the baseline commit's ancestry because {e}"
+            error=f"could not find the baseline commit's ancestry because {e}",
+            commits_searched=[baseline_commit.sha],
         )
 
     commits = commit_query.all()
@@ -107,41 +124,49 @@ def _search_for_baseline_run(
     commit_hashes = [commit.ancestor_hash for commit in commits]
     earliest_commit_timestamp = commits[-1].ancestor_timestamp
 
-    baseline_run_query = (
-        s.select(BenchmarkResult.run_id, BenchmarkResult.commit_id)
-        .select_from(BenchmarkResult)
-        .join(Commit, Commit.id == BenchmarkResult.commit_id)
-        .filter(
+    has_matching_result = (
+        s.select(BenchmarkResult.id)
+        .where(
+            BenchmarkResult.run_id == Run.id,
             BenchmarkResult.history_fingerprint.in_(contender_history_fingerprints),
-            BenchmarkResult.run_id != contender_run_id,
-            BenchmarkResult.commit_id.in_(commit_ids),
             BenchmarkResult.timestamp >= earliest_commit_timestamp,  # a nice speedup
         )
+        .exists()
+    )
+    baseline_run_query = (
+        s.select(Run.id, Run.commit_id)
+        .join(Commit, Commit.id == Run.commit_id)
+        .filter(
+            Run.id != contender_run_id,
+            Run.commit_id.in_(commit_ids),
+            has_matching_result,
+        )
         .order_by(
             # Prefer this Run's run_reason,
-            s.desc(BenchmarkResult.run_reason == contender_run_reason),
+            s.desc(Run.reason == contender_run_reason),
             # then latest commit,
             s.desc(Commit.sha != Commit.fork_point_sha),
             Commit.timestamp.desc(),
             # then latest BenchmarkResult timestamp
-            BenchmarkResult.timestamp.desc(),
+            Run.last_timestamp.desc(),
         )
         .limit(1)
     )
-    matching_benchmark_result = current_session.execute(baseline_run_query).first()
+    matching_run = current_session.execute(baseline_run_query).first()
 
-    if not matching_benchmark_result:
+    if not matching_run:
         return _CandidateBaselineSearchResult(
-            error="no matching baseline run was found"
+            error="no matching baseline run was found", commits_searched=commit_hashes
         )
 
     # Figure out a list of commits that were skipped in the search for a baseline
-    index_of_baseline = commit_ids.index(matching_benchmark_result.commit_id)
+    index_of_baseline = commit_ids.index(matching_run.commit_id)
     commits_skipped = commit_hashes[:index_of_baseline]
 
     return _CandidateBaselineSearchResult(
-        baseline_run_id=matching_benchmark_result.run_id,
+        baseline_run_id=matching_run.id,
         commits_skipped=commits_skipped,
+        commits_searched=commit_hashes,
     )
 
 
@@ -155,18 +180,33 @@ def _get_history_fingerprints_for_run(run_id: str) -> Set[THistFingerprint]:
     )
 
 
-def get_candidate_baseline_runs(
-    contender_benchmark_result: "BenchmarkResult",
-) -> Dict[str, dict]:
-    """Given a benchmark result from a contender run, return information about a few
-    different candidate baseline runs, including on the parent commit, fork-point
-    commit, and head-of-default-branch commit.
+def _get_latest_default_commit(repo_url: str) -> Optional[Commit]:
+    """The latest commit on the default branch that Conbench knows about."""
+    query = (
+        s.select(Commit)
+        .filter(
+            Commit.sha == Commit.fork_point_sha,
+            Commit.repository == repo_url,
+        )
+        .order_by(s.desc(Commit.timestamp))
+        .limit(1)
+    )
+    return current_session.scalars(query).first()
 
-    See docstring of _search_for_baseline_run() for how these are found.
+
+def _search_for_candidate_baseline_runs(
+    contender_run: Run, latest_commit: Optional[Commit]
+) -> Tuple[Dict[str, _CandidateBaselineSearchResult], Set[str]]:
     """
-    contender_commit = contender_benchmark_result.commit
+    Search for the candidate baseline runs of `contender_run`, see
+    get_candidate_baseline_runs(). Also return the hashes of all commits that
+    the search looked at, including those of baseline commits that are not
+    known (yet).
+    """
+    contender_commit = contender_run.commit
     contender_history_fingerprints = set()  # to be cached and reused in this function
     candidates: Dict[str, _CandidateBaselineSearchResult] = {}
+    commits_searched: Set[str] = set()
 
     # The direct, single parent in the git graph
     if not contender_commit:
@@ -175,12 +215,15 @@ def get_candidate_baseline_runs(
         )
     else:
         contender_history_fingerprints = _get_history_fingerprints_for_run(
-            contender_benchmark_result.run_id
+            contender_run.id
         )
+        parent_commit = contender_commit.get_parent_commit()
+        if parent_commit is None and contender_commit.parent:
+            commits_searched.add(contender_commit.parent)
         candidates["parent"] = _search_for_baseline_run(
-            baseline_commit=contender_commit.get_parent_commit(),
-            contender_run_id=contender_benchmark_result.run_id,
-            contender_run_reason=contender_benchmark_result.run_reason,
+            baseline_commit=parent_commit,
+            contender_run_id=contender_run.id,
+            contender_run_reason=contender_run.reason,
             contender_history_fingerprints=contender_history_fingerprints,
         )
 
@@ -196,70 +239,227 @@ def get_candidate_baseline_runs(
     else:
         if not contender_history_fingerprints:
             contender_history_fingerprints = _get_history_fingerprints_for_run(
-                contender_benchmark_result.run_id
+                contender_run.id
             )
+        fork_point_commit = contender_commit.get_fork_point_commit()
+        if fork_point_commit is None and contender_commit.fork_point_sha:
+            commits_searched.add(contender_commit.fork_point_sha)
         candidates["fork_point"] = _search_for_baseline_run(
-            baseline_commit=contender_commit.get_fork_point_commit(),
-            contender_run_id=contender_benchmark_result.run_id,
-            contender_run_reason=contender_benchmark_result.run_reason,
+            baseline_commit=fork_point_commit,
+            contender_run_id=contender_run.id,
+            contender_run_reason=contender_run.reason,
             contender_history_fingerprints=contender_history_fingerprints,
         )
 
     # The latest commit on the default branch that Conbench knows about
-    query = (
-        s.select(Commit)
-        .filter(
-            Commit.sha == Commit.fork_point_sha,
-            Commit.repository == contender_benchmark_result.commit_repo_url,
-        )
-        .order_by(s.desc(Commit.timestamp))
-        .limit(1)
-    )
-
-    latest_commit = current_session.scalars(query).first()
     if not contender_history_fingerprints:
         contender_history_fingerprints = _get_history_fingerprints_for_run(
-            contender_benchmark_result.run_id
+            contender_run.id
         )
     candidates["latest_default"] = _search_for_baseline_run(
         baseline_commit=latest_commit,
-        contender_run_id=contender_benchmark_result.run_id,
-        contender_run_reason=contender_benchmark_result.run_reason,
+        contender_run_id=contender_run.id,
+        contender_run_reason=contender_run.reason,
         contender_history_fingerprints=contender_history_fingerprints,
     )
 
-    return {
+    for candidate in candidates.values():
+        commits_searched.update(candidate.commits_searched)
+    return candidates, commits_searched
+
+
+def get_candidate_baseline_runs(
+    contender_run: Run, store: bool = False
+) -> Dict[str, dict]:
+    """Given a contender run, return information about a few different candidate
+    baseline runs, including on the parent commit, fork-point commit, and
+    head-of-default-branch commit.
+
+    See docstring of _search_for_baseline_run() for how these are found.
+
+    A stored search result (see Run.baseline_candidates) is reused as long as
+    it is up to date, i.e. as long as no run on any of the searched commits
+    changed (see _update_runs() in benchmark_result.py) and the latest
+    default-branch commit is the same. Set `store` to store the result of a
+    new search. That is only done from the background job (see
+    precompute_candidate_baseline_runs()), so that read requests do not write
+    to the database.
+    """
+    latest_commit = _get_latest_default_commit(contender_run.commit_repo_url)
+    latest_commit_id = latest_commit.id if latest_commit else None
+
+    stored = contender_run.baseline_candidates
+    if stored is not None and stored["latest_default_commit_id"] == latest_commit_id:
+        return stored["candidates"]
+
+    version = _run_row_version(contender_run.id) if store else None
+    candidates, commits_searched = _search_for_candidate_baseline_runs(
+        contender_run, latest_commit
+    )
+    result = {
         candidate_type: candidate._dict_for_api_json()
         for candidate_type, candidate in candidates.items()
     }
+    if store:
+        _store_candidate_baseline_runs(
+            contender_run.id,
+            version,
+            {"candidates": result, "latest_default_commit_id": latest_commit_id},
+            commits_searched,
+        )
+    return result
+
+
+def _run_row_version(run_id: str) -> Optional[str]:
+    return current_session.execute(
+        s.text("SELECT xmin::text FROM run WHERE id = :id"), {"id": run_id}
+    ).scalar()
+
+
+def _store_candidate_baseline_runs(
+    run_id: str, version: Optional[str], doc: dict, commits_searched: Set[str]
+) -> None:
+    """
+    Store the search result with the run (on the primary database, in a
+    transaction of its own).
+
+    Do not store it if the run row changed since the search started (e.g.
+    when new results of the run arrived in the meantime, dropping the stored
+    candidates): the next reader searches again.
+    """
+    # Avoid circular import.
+    import conbench.db
+
+    if version is None:
+        return
+
+    assert conbench.db.engine is not None
+    try:
+        with conbench.db.engine.begin() as conn:
+            # Best effort: do not wait for e.g. an ingesting transaction.
+            conn.execute(s.text("SET LOCAL lock_timeout = '1s'"))
+            conn.execute(
+                s.update(Run)
+                .where(Run.id == run_id, s.text("xmin::text = :version"))
+                .values(
+                    baseline_candidates=doc,
+                    baseline_commit_shas=sorted(commits_searched),
+                ),
+                {"version": version},
+            )
+    except s.exc.OperationalError as exc:
+        log.info("could not store baseline candidates of run %s: %s", run_id, exc)
+
+
+# Candidate baseline runs of runs whose latest result is older than this are
+# searched for in the background; the results of more recent runs are
+# probably still arriving (which drops the stored candidates again).
+BASELINE_CANDIDATES_QUIET_PERIOD = datetime.timedelta(minutes=5)
+# For older runs, the search is done on each read (unless a stored result is
+# still up to date).
+BASELINE_CANDIDATES_HORIZON = datetime.timedelta(days=2)
+
+
+def precompute_candidate_baseline_runs(ctx) -> int:
+    """
+    Job function (see conbench.job): search for and store the candidate
+    baseline runs of recent runs that do not have up-to-date ones (once their
+    results stopped arriving), i.e. that have none stored or stored ones
+    searched before the latest default-branch commit arrived. Return the number of runs processed.
+    """
+    now = datetime.datetime.utcnow()
+    # A new commit on the default branch does not drop stored candidates (see
+    # _update_runs() in benchmark_result.py): also pick up runs whose stored
+    # candidates refer to an older latest default-branch commit.
+    latest_default_commit_id = (
+        s.select(Commit.id)
+        .where(
+            Commit.sha == Commit.fork_point_sha,
+            Commit.repository == Run.commit_repo_url,
+        )
+        .order_by(s.desc(Commit.timestamp))
+        .limit(1)
+        .correlate(Run)
+        .scalar_subquery()
+    )
+    with outside_request_context():
+        run_ids = current_session.scalars(
+            s.select(Run.id)
+            .where(
+                s.or_(
+                    Run.baseline_candidates.is_(None),
+                    Run.baseline_candidates[
+                        "latest_default_commit_id"
+                    ].astext.is_distinct_from(latest_default_commit_id),
+                ),
+                Run.last_timestamp < now - BASELINE_CANDIDATES_QUIET_PERIOD,
+                Run.last_timestamp > now - BASELINE_CANDIDATES_HORIZON,
+            )
+            .order_by(Run.last_timestamp.desc())
+            .limit(200)
+        ).all()
+
+        for run_id in run_ids:
+            ctx.check_cancelled()
+            run = Run.first(id=run_id)
+            if run is not None:
+                get_candidate_baseline_runs(run, store=True)
+            # Do not keep the read transaction open.
+            current_session.rollback()
+
+    if run_ids:
+        log.info("stored candidate baseline runs of %s run(s)", len(run_ids))
+    return len(run_ids)
+
+
+# Valid values for the `fields` query parameter, see conbench/api/_fields.py.
+RUN_FIELDS_SCHEMA = {
+    "id": None,
+    "tags": ANY,
+    "reason": None,
+    "timestamp": None,
+    "commit": ANY,
+    "hardware": ANY,
+}
 
 
 class _Serializer(EntitySerializer):
     def _dump(
-        self, benchmark_result: "BenchmarkResult", get_baseline_runs: bool = False
+        self,
+        run: Run,
+        get_baseline_runs: bool = False,
+        fields: Optional[FieldSelection] = None,
     ):
-        if benchmark_result.commit:
-            commit_dict = CommitSerializer().one.dump(benchmark_result.commit)
-            commit_dict.pop("links", None)
-        else:
-            commit_dict = None
-
-        hardware_dict = HardwareSerializer().one.dump(benchmark_result.hardware)
-        hardware_dict.pop("links", None)
-        out_dict = {
-            "id": benchmark_result.run_id,
-            "tags": benchmark_result.run_tags,
-            "reason": benchmark_result.run_reason,
-            "timestamp": tznaive_dt_to_aware_iso8601_for_api(
-                benchmark_result.timestamp
-            ),
-            "commit": commit_dict,
-            "hardware": hardware_dict,
-        }
-        if get_baseline_runs:
-            out_dict["candidate_baseline_runs"] = get_candidate_baseline_runs(
-                benchmark_result
+        out_dict: Dict[str, Any] = {}
+        if fields is None or "id" in fields:
+            out_dict["id"] = run.id
+        if fields is None or "tags" in fields:
+            out_dict["tags"] = run.tags
+        if fields is None or "reason" in fields:
+            out_dict["reason"] = run.reason
+        if fields is None or "timestamp" in fields:
+            out_dict["timestamp"] = tznaive_dt_to_aware_iso8601_for_api(
+                run.first_timestamp
             )
+
+        if fields is None or "commit" in fields:
+            if run.commit:
+                commit_dict = CommitSerializer().one.dump(run.commit)
+                commit_dict.pop("links", None)
+            else:
+                commit_dict = None
+            out_dict["commit"] = commit_dict
+
+        if fields is None or "hardware" in fields:
+            hardware_dict = HardwareSerializer().one.dump(run.hardware)
+            hardware_dict.pop("links", None)
+            out_dict["hardware"] = hardware_dict
+
+        if get_baseline_runs:
+            out_dict["candidate_baseline_runs"] = get_candidate_baseline_runs(run)
+
+        if fields is not None:
+            out_dict = fields.prune(out_dict)
         return out_dict
 
 
@@ -268,10 +468,20 @@ class RunSerializer:
     many = _Serializer(many=True)
 
 
-class RunEntityAPI(ApiEndpoint):
-    serializer = RunSerializer()
+def run_dict_for_display(run: Run, get_baseline_runs: bool = False) -> dict:
+    """
+    Return the representation of `run` as emitted by `GET /api/runs/<id>/`.
+    Used by that endpoint and by the UI.
+
+    Set `get_baseline_runs` to include the candidate baseline runs (see
+    get_candidate_baseline_runs()).
+    """
+    return RunSerializer.one._dump(run, get_baseline_runs=get_baseline_runs)
+
 
+class RunEntityAPI(ApiEndpoint):
     @maybe_login_required
+    @conditional_get(run_etag_parts, weak=True)
     def get(self, run_id):
         """
         ---
@@ -319,26 +529,64 @@ class RunEntityAPI(ApiEndpoint):
         tags:
           - Runs
         """
-        any_result = BenchmarkResult.first(run_id=run_id)
-        if not any_result:
+        run = Run.first(id=run_id)
+        if not run:
             self.abort_404_not_found()
-        return self.serializer.one._dump(any_result, get_baseline_runs=True)
+        return run_dict_for_display(run, get_baseline_runs=True)
 
 
 class RunListAPI(ApiEndpoint):
     serializer = RunSerializer()
 
+    @staticmethod
+    def _loader_options(fields: FieldSelection) -> list:
+        """
+        Only load the columns and related entities needed for `fields`.
+        """
+        columns = [Run.id, Run.first_timestamp]
+        options = []
+        for key, column in (
+            ("tags", Run.tags),
+            ("reason", Run.reason),
+        ):
+            if key in fields:
+                columns.append(column)
+        for key, column, rel in (
+            ("commit", Run.commit_id, Run.commit),
+            ("hardware", Run.hardware_id, Run.hardware),
+        ):
+            if key in fields:
+                columns.append(column)
+            else:
+                options.append(s.orm.lazyload(rel))
+
+        options.append(s.orm.load_only(*columns))
+        return options
+
+    @staticmethod
+    def _parse_keyset_cursor(cursor: str) -> Tuple[datetime.datetime, str]:
+        # `<first_timestamp in ISO 8601>_<run_id>`; timestamps do not
+        # contain underscores.
+        timestamp, run_id = cursor.split("_", 1)
+        return datetime.datetime.fromisoformat(timestamp), run_id
+
     @maybe_login_required
     def get(self):
         """
         ---
         description: |
-            Get a list of runs associated with a commit hash or hashes.
+            Get a list of runs, either associated with a commit hash or hashes
+            (`commit_hash`), or the most recent runs first.
+
+            Runs can be filtered by repository, hardware, run reason and time
+            range (the run timestamp is the timestamp of its earliest benchmark
+            result).
 
             This endpoint implements pagination; see the `cursor` and `page_size` query
             parameters for how it works.
         responses:
             "200": "RunList"
+            "400": "400"
             "401": "401"
         parameters:
           - in: query
@@ -346,15 +594,43 @@ class RunListAPI(ApiEndpoint):
             schema:
               type: string
             description: |
-                Required. A commit hash or a comma-separated list of commit hashes.
+                A commit hash or a comma-separated list of commit hashes. If given,
+                runs are returned in alphabetical order by `run_id`. Otherwise, runs
+                are returned most recent first (by timestamp, then by `run_id`).
+          - in: query
+            name: repository
+            schema:
+              type: string
+            description: Only return runs for this repository URL.
+          - in: query
+            name: hardware_hash
+            schema:
+              type: string
+            description: Only return runs on hardware with this hash.
+          - in: query
+            name: reason
+            schema:
+              type: string
+            description: Only return runs with this run reason.
+          - in: query
+            name: earliest_timestamp
+            schema:
+              type: string
+              format: date-time
+            description: Only return runs with a timestamp at or after this time.
+          - in: query
+            name: latest_timestamp
+            schema:
+              type: string
+              format: date-time
+            description: Only return runs with a timestamp at or before this time.
           - in: query
             name: cursor
             schema:
               type: string
               nullable: true
             description: |
-                A cursor for pagination through matching runs in alphabetical order by
-                `run_id`.
+                A cursor for pagination through matching runs.
 
                 To get the first page of runs, leave out this query parameter or submit
                 `null`. The response's `metadata` key will contain a `next_page_cursor`
@@ -362,23 +638,22 @@ class RunListAPI(ApiEndpoint):
                 order to get the next page. (If there is expected to be no data in the
                 next page, the `next_page_cursor` will be `null`.)
 
-                The first page will contain the `page_size` runs associated with the
-                given commit hash(es) that are first alphabetically by `run_id`. Each
-                subsequent page will have up to `page_size` runs, continuing
-                alphabetically, until there are no more matching runs.
+                Without `commit_hash`, the cursor is the timestamp and ID of the last
+                run of the current page (keyset pagination): each page costs the same
+                regardless of how far back it is, and runs created during a client's
+                request loop do not shift subsequent pages.
 
+                With `commit_hash`, the first page will contain the `page_size` runs
+                associated with the given commit hash(es) that are first alphabetically
+                by `run_id`. Each subsequent page will have up to `page_size` runs,
+                continuing alphabetically, until there are no more matching runs.
                 Implementation detail: currently, the next page's cursor value is equal
-                to the latest `run_id` alphabetically in the current page. A page of
-                runs is therefore defined as the `page_size` matching runs with an ID
-                alphabetically later than the given cursor value.
-
-                Note that this means that if a run is created DURING a client's request
-                loop with an ID that is alphabetically earlier than the cursor value, it
-                will not be included in the next page. This is a known limitation of the
-                current implementation, and it is not expected to be a problem in
-                practice. This is because the number of runs per commit hash is expected
-                to be much less than the page size, and runs are added quite
-                infrequently.
+                to the latest `run_id` alphabetically in the current page. Note that
+                this means that if a run is created DURING a client's request loop with
+                an ID that is alphabetically earlier than the cursor value, it will not
+                be included in the next page. This is not expected to be a problem in
+                practice, because the number of runs per commit hash is expected to be
+                much less than the page size.
           - in: query
             name: page_size
             schema:
@@ -387,19 +662,34 @@ class RunListAPI(ApiEndpoint):
               maximum: 1000
             description: |
                 The size of pages for pagination (see `cursor`). Default 100. Max 1000.
+          - in: query
+            name: fields
+            schema:
+              type: string
+            description: |
+                A comma-separated list of the fields to return for each run, e.g.
+                `id,timestamp,commit.sha`. Use dot notation for nested fields. By
+                default, all fields are returned.
         tags:
           - Runs
         """
+        fields = fields_from_request(RUN_FIELDS_SCHEMA)
         filters = []
 
-        commit_hash_arg: Optional[str] = f.request.args.get("commit_hash")
-        if not commit_hash_arg:
-            self.abort_400_bad_request("commit_hash is required")
-        filters.append(Commit.sha.in_(commit_hash_arg.split(",")))
-
-        cursor_arg: Optional[str] = f.request.args.get("cursor")
-        if cursor_arg and cursor_arg != "null":
-            filters.append(BenchmarkResult.run_id > cursor_arg)
+        if repository_arg := f.request.args.get("repository"):
+            filters.append(Run.commit_repo_url == repository_arg)
+        if hardware_hash_arg := f.request.args.get("hardware_hash"):
+            filters.append(
+                Run.hardware_id.in_(
+                    s.select(Hardware.id).where(Hardware.hash == hardware_hash_arg)
+                )
+            )
+        if reason_arg := f.request.args.get("reason"):
+            filters.append(Run.reason == reason_arg)
+        if (earliest := self.timestamp_arg("earliest_timestamp")) is not None:
+            filters.append(Run.first_timestamp >= earliest)
+        if (latest := self.timestamp_arg("latest_timestamp")) is not None:
+            filters.append(Run.first_timestamp <= latest)
 
         page_size_arg = f.request.args.get("page_size", 100)
         try:
@@ -410,22 +700,49 @@ class RunListAPI(ApiEndpoint):
                 "page_size must be a positive integer no greater than 1000"
             )
 
-        query = (
-            s.select(BenchmarkResult)
-            .join(Commit)
-            .where(*filters)
-            .distinct(BenchmarkResult.run_id)
-            .order_by(BenchmarkResult.run_id)
-            .limit(page_size)
-        )
+        cursor_arg: Optional[str] = f.request.args.get("cursor")
+        if cursor_arg == "null":
+            cursor_arg = None
 
+        commit_hash_arg: Optional[str] = f.request.args.get("commit_hash")
+        if commit_hash_arg:
+            query = (
+                s.select(Run)
+                .join(Commit, Commit.id == Run.commit_id)
+                .where(Commit.sha.in_(commit_hash_arg.split(",")))
+                .order_by(Run.id)
+            )
+            if cursor_arg:
+                query = query.where(Run.id > cursor_arg)
+        else:
+            # Keyset pagination; uses the (..., first_timestamp, id) indexes.
+            query = s.select(Run).order_by(Run.first_timestamp.desc(), Run.id.desc())
+            if cursor_arg:
+                try:
+                    cursor = self._parse_keyset_cursor(cursor_arg)
+                except ValueError:
+                    self.abort_400_bad_request("cursor: invalid value")
+                query = query.where(
+                    s.tuple_(Run.first_timestamp, Run.id) < s.tuple_(*cursor)
+                )
+
+        query = query.where(*filters).limit(page_size)
+        if fields is not None:
+            query = query.options(*self._loader_options(fields))
+
+        runs = current_session.scalars(query).all()
         data = [
-            self.serializer.one._dump(result, get_baseline_runs=False)
-            for result in current_session.scalars(query).all()
+            self.serializer.one._dump(run, get_baseline_runs=False, fields=fields)
+            for run in runs
         ]
 
-        if len(data) == page_size:
-            next_page_cursor = data[-1]["id"]
+        if len(runs) == page_size:
+            last = runs[-1]
+            if commit_hash_arg:
+                next_page_cursor = last.id
+            else:
+                # The timestamp column is always loaded (ordering key).
+                next_page_cursor = f"{last.first_timestamp.isoformat()}_{last.id}"
             # There's an edge case here where the last page happens to have exactly
             # page_size runs. So the client will grab one more (empty) page. The
             # alternative would be to query the DB here, every single time, to *make
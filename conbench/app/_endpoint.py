@@ -155,15 +155,11 @@ class AppEndpoint(flask.views.MethodView):
         client = self._get_client()
         return client.delete(f.url_for(endpoint, **kwargs))
 
-    def api_get(self, endpoint, **kwargs):
-        client = self._get_client()
-        return client.get(f.url_for(endpoint, **kwargs))
-
-    def api_get_url(self, url):
-        client = self._get_client()
-        return client.get(url)
-
     def _get_client(self):
+        # Used for form submissions (writes) only, which go through API input
+        # validation. For reading data, views query the entities and use the
+        # API serializers where they need the API representation, instead of
+        # dispatching a request through the app.
         # TODO: is there any reason not to use test_client in prod?
         client = f.current_app.test_client()
         if flask_login.current_user.is_authenticated:
@@ -2,16 +2,35 @@ import collections
 import json
 import logging
 import math
-from typing import Dict, List, Literal, Optional, Tuple, no_type_check
+from typing import (
+    Dict,
+    Hashable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    no_type_check,
+)
 
 import bokeh.events
 import bokeh.models
 import bokeh.plotting
+import numpy as np
+from sqlalchemy import select
 
+import conbench.invalidation
 import conbench.units
 from conbench import util
 from conbench.api.history import get_history_for_benchmark
-from conbench.entities.benchmark_result import BenchmarkResult
+from conbench.cachetools import LRUCacheWithTTL
+from conbench.config import Config
+from conbench.dbsession import current_session
+from conbench.entities.benchmark_result import (
+    BenchmarkResult,
+    HistoryFingerprintVersion,
+)
 from conbench.entities.history import HistorySample, HistorySampleZscoreStats
 from conbench.numstr import numstr
 from conbench.types import TBenchmarkName
@@ -69,6 +88,7 @@ class TimeSeriesPlotMixin:
         run,
         plot_index_for_html=0,
         highlight_other_result: Optional[HighlightInHistPlot] = None,
+        full_resolution: bool = False,
     ) -> BokehPlotJSONOrError:
         """
         Generate JSON string for inclusion in HTML doc or a reason for why the
@@ -80,7 +100,41 @@ class TimeSeriesPlotMixin:
         will be the newest one in the plot (right-most on time axis).
 
         `run`: TODO
+
+        Long histories are downsampled to about HISTORY_PLOT_MAX_POINTS
+        results (see `downsample_history()`), unless `full_resolution` is set.
+
+        The return value is cached, see `_history_plot_cache_key()`.
         """
+        cache_key = (
+            _history_plot_cache_key(
+                current_benchmark_result,
+                run,
+                plot_index_for_html,
+                highlight_other_result,
+            ),
+            full_resolution,
+        )
+        plotinfo = _history_plot_cache.get(cache_key)
+        if plotinfo is None:
+            plotinfo = self._build_history_plot(
+                current_benchmark_result,
+                run,
+                plot_index_for_html,
+                highlight_other_result,
+                full_resolution,
+            )
+            _history_plot_cache.set(cache_key, plotinfo)
+        return plotinfo
+
+    def _build_history_plot(
+        self,
+        current_benchmark_result: BenchmarkResult,
+        run,
+        plot_index_for_html: int,
+        highlight_other_result: Optional[HighlightInHistPlot],
+        full_resolution: bool,
+    ) -> BokehPlotJSONOrError:
         samples = get_history_for_benchmark(
             benchmark_result_id=current_benchmark_result.id
         )
@@ -124,6 +178,13 @@ class TimeSeriesPlotMixin:
             )
 
         assert isinstance(samples[0], HistorySample)
+        n_results = len(samples)
+        if not full_resolution:
+            keep_ids = {current_benchmark_result.id}
+            if highlight_other is not None:
+                keep_ids.add(highlight_other[0].benchmark_result_id)
+            samples = downsample_history(samples, HISTORY_PLOT_MAX_POINTS, keep_ids)
+
         jsondoc = json.dumps(
             bokeh.embed.json_item(
                 time_series_plot(
@@ -131,11 +192,72 @@ class TimeSeriesPlotMixin:
                     current_benchmark_result=current_benchmark_result,
                     run=run,
                     highlight_result_in_hist=highlight_other,
+                    n_results_total=n_results,
                 ),
                 f"plot-history-{plot_index_for_html}",  # type: ignore
             )
         )
-        return BokehPlotJSONOrError(jsondoc, None)
+        return BokehPlotJSONOrError(
+            jsondoc, None, n_results_not_shown=n_results - len(samples)
+        )
+
+
+# Rendered history plots. Building the bokeh document and serializing it
+# takes O(100 ms) per plot; pages may show dozens of plots. Items do not need
+# to be invalidated explicitly: the key contains the change counter of the
+# history fingerprint (bumped with every insert/update/delete of a result in
+# that history, including change annotations). The TTL bounds how long other
+# (rarely changing) inputs such as commit metadata may be stale.
+_history_plot_cache = LRUCacheWithTTL(maxsize=Config.HISTORY_PLOT_CACHE_SIZE, ttl=3600)
+
+
+def _evict_history_plots(event: conbench.invalidation.InvalidationEvent) -> None:
+    # Items for an older version of a fingerprint are never returned again (see
+    # above), free their memory right away.
+    if event.everything:
+        _history_plot_cache.clear()
+    elif event.history_fingerprints:
+        _history_plot_cache.discard_if(
+            lambda key: key[0][0] in event.history_fingerprints
+        )
+
+
+conbench.invalidation.subscribe(_evict_history_plots)
+
+
+def _history_plot_cache_key(
+    current_benchmark_result: BenchmarkResult,
+    run,
+    plot_index_for_html: int,
+    highlight_other_result: Optional[HighlightInHistPlot],
+) -> Hashable:
+    fingerprint = current_benchmark_result.history_fingerprint
+    version = (
+        current_session.scalar(
+            select(HistoryFingerprintVersion.version).where(
+                HistoryFingerprintVersion.history_fingerprint == fingerprint
+            )
+        )
+        or 0
+    )
+    # The run's commit is shown for the current result.
+    run_commit = run.get("commit") if run else None
+    return (
+        fingerprint,
+        version,
+        current_benchmark_result.id,
+        plot_index_for_html,
+        (
+            (highlight_other_result.bmrid, highlight_other_result.highlight_name)
+            if highlight_other_result
+            else None
+        ),
+        (
+            (run_commit["sha"], run_commit["timestamp"], run_commit["message"])
+            if run_commit
+            else None
+        ),
+    )
 
 
 def fmt_number_and_unit(value: float, unit: str):
@@ -260,6 +382,81 @@ def _truncate_commit_msg(msg: str) -> str:
     return msg
 
 
+# Beyond this number of results, history plots are downsampled (unless the
+# full history is requested explicitly). That is about one data point per
+# pixel column for the default plot width.
+HISTORY_PLOT_MAX_POINTS = 800
+
+
+def lttb_indices(x: Sequence[float], y: Sequence[float], n_out: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets downsampling (Steinarsson, 2013). Return
+    the indices of `n_out` points of the series (`x` ascending) that preserve
+    its visual shape, including the first and last point.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return list(range(n))
+
+    xs = np.asarray(x, dtype=float)
+    ys = np.asarray(y, dtype=float)
+    bucket_size = (n - 2) / (n_out - 2)
+
+    indices = [0]
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        # The average of the next bucket is the third triangle vertex (for
+        # the last bucket: the last point).
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = xs[end:next_end].mean()
+        avg_y = ys[end:next_end].mean()
+
+        areas = np.abs(
+            (xs[a] - avg_x) * (ys[start:end] - ys[a])
+            - (xs[a] - xs[start:end]) * (avg_y - ys[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices.append(a)
+
+    indices.append(n - 1)
+    return indices
+
+
+def downsample_history(
+    samples: List[HistorySample], max_points: int, keep_ids: Set[str]
+) -> List[HistorySample]:
+    """
+    Return at most about `max_points` of `samples` (sorted by commit time),
+    picked via LTTB on the single value summary.
+
+    Always keep the results with IDs in `keep_ids` (e.g. current and
+    highlighted result), outliers, and results beginning a distribution
+    change, so that these still show in the plot.
+    """
+    if len(samples) <= max_points:
+        return samples
+
+    samples = sorted(samples, key=lambda s: s.commit_timestamp)
+    must_keep = {
+        ix
+        for ix, s in enumerate(samples)
+        if s.benchmark_result_id in keep_ids
+        or s.zscorestats.is_outlier
+        or s.zscorestats.begins_distribution_change
+    }
+    picked = lttb_indices(
+        [
+            (s.commit_timestamp - samples[0].commit_timestamp).total_seconds()
+            for s in samples
+        ],
+        [s.svs for s in samples],
+        max(max_points - len(must_keep), 3),
+    )
+    return [samples[ix] for ix in sorted(must_keep.union(picked))]
+
+
 @no_type_check
 def _source(
     samples: List[HistorySample],
@@ -560,9 +757,13 @@ def time_series_plot(
     height=420,
     width=800,
     highlight_result_in_hist: Optional[Tuple[HistorySample, str]] = None,
+    n_results_total: Optional[int] = None,
 ):
     """
     The `run` argument's purpose is unclear, document or remove.
+
+    `n_results_total`: the number of results in the history if `samples` is
+    a downsampled subset of it.
     """
     # log.info(
     #     "Time series plot for:\n%s",
@@ -873,6 +1074,10 @@ def time_series_plot(
 
     p.legend.title_text_color = "darkgray"
     p.legend.title = f"number of results: {len(samples)}"
+    if n_results_total is not None and n_results_total > len(samples):
+        p.legend.title = (
+            f"number of results: {n_results_total} (downsampled: {len(samples)})"
+        )
     p.legend.location = "top_left"
     p.legend.label_text_font_size = "12px"
 
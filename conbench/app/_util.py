@@ -28,12 +28,12 @@ def error_page(msg="", alert_level="danger", subtitle="") -> str:
     )
 
 
-def augment(benchmark, contexts=None):
+def augment(benchmark, context=None):
     set_display_benchmark_name(benchmark)
     set_display_time(benchmark)
     set_display_case_permutation(benchmark)
     set_display_mean(benchmark)
-    set_display_language(benchmark, contexts)
+    set_display_language(benchmark, context)
     set_display_error(benchmark)
     tags = benchmark["tags"]
     if "dataset" in tags:
@@ -56,10 +56,9 @@ def display_time(t: str):
     return t.replace("T", " ").replace("Z", " UTC")
 
 
-def set_display_language(benchmark, contexts):
-    if contexts is not None and benchmark["links"]["context"] in contexts:
-        url = benchmark["links"]["context"]
-        benchmark["display_language"] = contexts[url]["benchmark_language"]
+def set_display_language(benchmark, context):
+    if context is not None:
+        benchmark["display_language"] = context.tags["benchmark_language"]
     else:
         benchmark["display_language"] = "unknown"
 
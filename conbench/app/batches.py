@@ -4,12 +4,14 @@ import json
 import bokeh
 import flask as f
 
+from ..api.results import list_benchmark_results
 from ..app import rule
 from ..app._endpoint import AppEndpoint, authorize_or_terminate
 from ..app._plots import simple_bar_plot
 from ..app._util import augment
 from ..app.results import ContextMixin
 from ..config import Config
+from ..entities.benchmark_result import to_dicts_for_json_api
 
 
 class BatchPlot(AppEndpoint, ContextMixin):
@@ -29,7 +31,7 @@ class BatchPlot(AppEndpoint, ContextMixin):
             title="Batch",
             resources=bokeh.resources.CDN.render(),
             # Note(JP): `raw` seems to be the ungrouped list of benchmarks as
-            # obtained below via `self._get_benchmarks(batch_id)`
+            # obtained below via `list_benchmark_results()`
             benchmarks=raw,
             plots=plots,
             search_value=f.request.args.get("search"),
@@ -40,34 +42,26 @@ class BatchPlot(AppEndpoint, ContextMixin):
     def get(self, batch_id):
         # This will only return 1000 results. This page isn't linked from anywhere.
         # How useful is this page?
-        benchmarks, response = self._get_benchmarks(batch_id)
-        if response.status_code != 200:
-            self.flash("Error getting benchmarks.")
-            return self.redirect("app.index")
-
-        benchmarks = benchmarks["data"]
+        benchmark_results, _ = list_benchmark_results(page_size=1000, batch_id=batch_id)
 
         group_by_key = "dataset"  # TODO: move to GRAPHS
         by_group = collections.defaultdict(list)
-        contexts = self.get_contexts(benchmarks)
-        for benchmark in benchmarks:
+        contexts = self.get_contexts(benchmark_results)
+        benchmarks = to_dicts_for_json_api(benchmark_results)
+        for result, benchmark in zip(benchmark_results, benchmarks):
             # Note(JP): This, among others, sets
             #
             #   benchmark["display_batch"] = batch
             #
             # whereas `batch` here is not the batch_id, but a per-benchmark
             # result (suite) name derived from benchmark result tags
-            augment(benchmark, contexts)
+            augment(benchmark, contexts.get(result.context_id))
             tags = benchmark["tags"]
             key = f'{tags["name"]}-{tags.get(group_by_key, "")}'
             by_group[key].append(benchmark)
 
         return self.page(by_group, batch_id)
 
-    def _get_benchmarks(self, batch_id):
-        response = self.api_get("api.benchmarks", batch_id=batch_id, page_size=1000)
-        return response.json, response
-
 
 rule(
     "/batches/<batch_id>/",
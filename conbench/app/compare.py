@@ -8,7 +8,11 @@ import bokeh
 import flask as f
 from werkzeug.exceptions import HTTPException
 
-from ..api.compare import CompareRunsAPI
+from ..api.compare import (
+    CompareRunsAPI,
+    UnmatchingUnitsError,
+    compare_benchmark_results,
+)
 from ..app import rule
 from ..app._endpoint import AppEndpoint, authorize_or_terminate
 from ..app._plots import TimeSeriesPlotMixin, simple_bar_plot
@@ -16,6 +20,7 @@ from ..app._util import error_page
 from ..app.results import BenchmarkResultMixin, RunMixin
 from ..app.types import HighlightInHistPlot
 from ..config import Config
+from ..entities._entity import NotFound
 from ..entities.benchmark_result import BenchmarkResult
 
 log = logging.getLogger(__name__)
@@ -58,9 +63,11 @@ class Compare(AppEndpoint, BenchmarkResultMixin, RunMixin, TimeSeriesPlotMixin):
             baseline_run_id, contender_run_id = baseline_id, contender_id
 
         elif comparisons and self.type == "benchmark-result":
-            baseline = self.get_display_benchmark(baseline_id)
-            # TODO: fetch directly from db, no indirection through API.
-            contender = self.get_display_benchmark(contender_id)
+            # Both results exist: they were just compared.
+            baseline_benchmark_result = BenchmarkResult.one(id=baseline_id)
+            contender_benchmark_result = BenchmarkResult.one(id=contender_id)
+            baseline = self.get_display_benchmark(baseline_benchmark_result)
+            contender = self.get_display_benchmark(contender_benchmark_result)
             # I think this is a bar chart showing two bars. One for each
             # benchmark result's mean value. Don't need a plot for that.
             # plot = self._get_plot(baseline, contender)
@@ -74,13 +81,6 @@ class Compare(AppEndpoint, BenchmarkResultMixin, RunMixin, TimeSeriesPlotMixin):
             contender_run = self.get_display_run(contender_run_id)
 
         if comparisons and self.type == "benchmark-result":
-            # `contender` is a dictionary representing the benchmark result.
-            # Also inject the 'proper' benchmark result object  into
-            # get_history_plot(). This is a mad way to deal with madness.
-            # We (really!) need to remove this API layer indirection:
-            # https://github.com/conbench/conbench/issues/968
-            contender_benchmark_result = BenchmarkResult.one(id=contender["id"])
-            baseline_benchmark_result = BenchmarkResult.one(id=baseline["id"])
             contender_hardware_checksum = contender_benchmark_result.hardware.hash
             baseline_hardware_checksum = baseline_benchmark_result.hardware.hash
 
@@ -244,28 +244,11 @@ class CompareBenchmarkResults(Compare):
     def get_comparisons(
         self, baseline_id: str, contender_id: str
     ) -> Tuple[List[dict], Optional[str]]:
-        # Re-assemble the stringified input argument for the virtual API
-        # endpoint, carrying both baseline and contender ID
-        params = {"compare_ids": f"{baseline_id}...{contender_id}"}
-        response = self.api_get("api.compare-benchmark-results", **params)
-
-        if response.status_code == 200:
-            return [response.json], None
-
-        log.error(
-            "processing req to %s -- unexpected response for virtual request: %s, %s",
-            f.request.url,
-            response.status_code,
-            response.text,
-        )
-        # poor-mans error propagation, until we remove the API
-        # layer indirection.
-        errmsg = response.text
         try:
-            errmsg = response.json["description"]
-        except Exception:
-            pass
-        return [], errmsg
+            return [compare_benchmark_results(baseline_id, contender_id)], None
+        except (NotFound, UnmatchingUnitsError) as exc:
+            log.info("processing req to %s -- cannot compare: %s", f.request.url, exc)
+            return [], str(exc)
 
 
 class CompareRuns(Compare):
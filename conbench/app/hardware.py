@@ -4,6 +4,9 @@ import flask_login
 from ..app import rule
 from ..app._endpoint import AppEndpoint
 from ..config import Config
+from ..entities._entity import NotFound
+from ..entities.hardware import Hardware as HardwareEntity
+from ..entities.hardware import HardwareSerializer
 
 
 class Hardware(AppEndpoint):
@@ -19,16 +22,13 @@ class Hardware(AppEndpoint):
         if not flask_login.current_user.is_authenticated:
             return self.redirect("app.login")
 
-        hardware, response = self._get_hardware(hardware_id)
-        if response.status_code != 200:
+        try:
+            hardware = HardwareEntity.one(id=hardware_id)
+        except NotFound:
             self.flash("Error getting hardware.")
             return self.redirect("app.index")
 
-        return self.page(hardware)
-
-    def _get_hardware(self, hardware_id):
-        response = self.api_get("api.hardware", hardware_id=hardware_id)
-        return response.json, response
+        return self.page(HardwareSerializer().one.dump(hardware))
 
 
 class HardwareList(AppEndpoint):
@@ -45,16 +45,8 @@ class HardwareList(AppEndpoint):
         if not flask_login.current_user.is_authenticated:
             return self.redirect("app.login")
 
-        hardwares, response = self._get_hardwares()
-        if response.status_code != 200:
-            self.flash("Error getting hardwares.")
-            return self.redirect("app.index")
-
-        return self.page(hardwares)
-
-    def _get_hardwares(self):
-        response = self.api_get("api.hardwares")
-        return response.json, response
+        hardwares = HardwareEntity.all(order_by=HardwareEntity.name.asc(), limit=500)
+        return self.page([HardwareSerializer().one.dump(h) for h in hardwares])
 
 
 rule(
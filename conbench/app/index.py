@@ -6,15 +6,16 @@ from urllib.parse import urlparse
 
 import flask
 
-from conbench.bmrt import bmrt_cache
+import conbench.invalidation
 from conbench.cachetools import lru_cache_with_ttl
 
 from ..app import rule
 from ..app._endpoint import AppEndpoint, authorize_or_terminate
 from ..app.results import RunMixin
 from ..config import Config
-from ..entities.benchmark_result import fetch_one_result_per_each_of_n_recent_runs
 from ..entities.commit import Commit
+from ..entities.run import fetch_recent_runs
+from ..util import short_commit_msg
 
 log = logging.getLogger(__name__)
 
@@ -48,9 +49,10 @@ class Index(AppEndpoint, RunMixin):
         if resp is not None:
             return resp
 
-        # _get_recent_runs() uses a return value cache base don the stdlib LRU
-        # cache module. Clear that cache during testing; the lru_cache
-        # decorator has added a `cache_clear()` method to the func object.
+        # _get_recent_runs() uses a return value cache based on the stdlib LRU
+        # cache module. Clear that cache during testing (the test suite also
+        # removes runs bypassing the ORM); the lru_cache decorator has added a
+        # `cache_clear()` method to the func object.
         if Config.TESTING:
             _get_recent_runs.cache_clear()
         runs_for_display = _get_recent_runs()
@@ -100,81 +102,40 @@ def repo_url_to_display_name(url: Optional[str]) -> str:
     return p.strip("/")
 
 
-# Cache the return value for the last few minutes minutes. See docstring for
-# discussion. In local dev with only few results / runs in the database this
-# cache reduces landing page response generation time from 300 ms to 10 ms.
-# This cache applies to all request-serving threads in this gunicorn worker
-# process (each single-process container replica maintains its own cache).
-@lru_cache_with_ttl(ttl=300)
+# Cache the return value for a short while. This cache applies to all
+# request-serving threads in this gunicorn worker process (each single-process
+# container replica maintains its own cache). It is cleared when any process
+# commits a change to benchmark results (see _clear_recent_runs_cache()); the
+# TTL bounds staleness when invalidation events are missed.
+@lru_cache_with_ttl(ttl=30)
 def _get_recent_runs() -> List["RunForDisplay"]:
     """
-    As of the time of writing, the UI landing page wants to show the "N most
-    recent CI runs". Since removal of the Run table we still want retain that.
-
-    For now, we do this by getting (any) one result for all of the N most
-    recently seen run IDs (each CI run may be associated with O(10**3) results;
-    it is therefore not feasible to fetch all last-bigN-run-related
-    BenchmarkResult objects each time we render the landing page).
-
-    Ideally, with the "one result row per run" approach, a single small-ish DB
-    query response yields _all_ data necessary to display information about the
-    N most recently seen CI runs. However, there are limitations to this
-    approach.
-
-    -  The one result-per-run that we get from the DB is not necessarily the
-       earliest result. It may be, as of the current implementation, but this
-       isn't guaranteed for now. The meaning of "time" for a Run is a bit
-       ambiguous (albeit, still useful). Assumption: around the time where this
-       one result was submitted, all other results for the same run were
-       submitted, too.
-
-    -  As of the DB query used we cannot answer if "any result in this run
-       failed?". That is, the notion of "a failed run" is not currently on the
-       UI landing page anymore. We discussed that this is okay; an expected
-       outcome as of not representing each CI run in its own DB table anymore.
-
-    -  Letting the DB count results-per-run easily is too much work. Also see
-       https://github.com/conbench/conbench/issues/977. However, the BMRT cache
-       (built for other purpose) knows a per-run result count estimate for many
-       of the most recent runs. Feed that per-run result count from there. For
-       the last few runs (or all of them; depends on usage pattern) the data is
-       is mostly a small number of minutes out of date. At the cache boundary,
-       the per-run count is permanently wrong (single run partially represented
-       in BMRT cache, true for probably just one of many runs). All that is
-       fine, the UI does not claim real time truth in that regard. In the vast
-       majority of the cases we want a ~correct result count per run only for
-       the last ~10 runs, and that is provided by this approach.
-
-    -  The result count from the BMRT cache is built as of today using only
-       non-errored results.
-
-    -  At the time of writing, per-result hardware and commit information still
-       requires reaching out to other DB tables. Attribute lookups result in
-       O(N) SELECT statements being issued. It makes therefore sense to cache
-       the return value of this function for a small number of minutes.
-    """
+    Return information about the N most recent runs for the UI landing page.
 
-    # Get one result per run from DB. Expect results to be sorted in time, most
-    # recent first.
-    bmrs = fetch_one_result_per_each_of_n_recent_runs()
+    This reads from the `run` table which is maintained as benchmark results
+    are inserted, i.e. a single query (joining commit and hardware) yields all
+    data needed here, including the exact per-run result and failed-result
+    counts.
 
+    The time shown for a run is the timestamp of its earliest benchmark
+    result.
+    """
     runs_for_display: List[RunForDisplay] = []
 
-    for bmr in bmrs:
-        result_count = "n/a"
-        if bmr.run_id in bmrt_cache["by_run_id"]:
-            result_count = str(len(bmrt_cache["by_run_id"][bmr.run_id]))
-
+    for run in fetch_recent_runs():
         runs_for_display.append(
             RunForDisplay(
-                run_id=bmr.run_id,
-                time_for_table=bmr.timestamp.strftime("%Y-%m-%d %H:%M:%S UTC"),
-                repo_url=bmr.commit_repo_url,
-                commit_message_short=bmr.ui_commit_short_msg,
-                result_count=result_count,
-                commit=bmr.commit,  # this may emit a DB query
-                run_reason=bmr.run_reason if bmr.run_reason else "n/a",
-                hardware_name=bmr.hardware.name,  # this may emit a DB query
+                run_id=run.id,
+                time_for_table=run.first_timestamp.strftime("%Y-%m-%d %H:%M:%S UTC"),
+                repo_url=run.commit_repo_url,
+                commit_message_short=(
+                    short_commit_msg(run.commit.message) if run.commit else "n/a"
+                ),
+                result_count=run.result_count,
+                error_count=run.error_count,
+                commit=run.commit,
+                run_reason=run.reason if run.reason else "n/a",
+                hardware_name=run.hardware.name,
             )
         )
 
@@ -191,13 +152,22 @@ class RunForDisplay:
     time_for_table: str
     commit_message_short: str
     repo_url: str
-    # result count is str because it may also be "n/a"
-    result_count: str
+    result_count: int
+    # The number of failed results.
+    error_count: int
     hardware_name: str
     run_reason: str
     commit: Optional[Commit]
 
 
+def _clear_recent_runs_cache(event: conbench.invalidation.InvalidationEvent) -> None:
+    if event.everything or event.run_ids:
+        _get_recent_runs.cache_clear()
+
+
+conbench.invalidation.subscribe(_clear_recent_runs_cache)
+
+
 view = Index.as_view("index")
 rule("/", view_func=view, methods=["GET"])
 rule("/index/", view_func=view, methods=["GET"])
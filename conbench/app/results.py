@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence
 
 import bokeh
 import flask as f
@@ -10,13 +10,18 @@ import wtforms as w
 
 import conbench.util
 
+from ..api.results import list_benchmark_results
+from ..api.runs import run_dict_for_display
 from ..app import rule
 from ..app._endpoint import AppEndpoint, authorize_or_terminate
 from ..app._plots import TimeSeriesPlotMixin
 from ..app._util import augment, display_time
 from ..config import Config
 from ..entities._entity import NotFound
-from ..entities.benchmark_result import BenchmarkResult
+from ..entities.benchmark_result import BenchmarkResult, to_dicts_for_json_api
+from ..entities.context import Context, ContextSerializer
+from ..entities.info import InfoSerializer
+from ..entities.run import Run
 from .types import BokehPlotJSONOrError, HighlightInHistPlot
 
 log = logging.getLogger(__name__)
@@ -49,88 +54,59 @@ class BenchmarkResultDeleteForm(flask_wtf.FlaskForm):
 
 
 class ContextMixin:
-    def get_contexts(self, benchmarks):
-        context_urls, contexts = set(), {}
-        for benchmark in benchmarks:
-            context_urls.add(benchmark["links"]["context"])
-
-        for context_url in context_urls:
-            response = self.api_get_url(context_url)
-            if response.status_code == 200:
-                contexts[context_url] = response.json
-
-        return contexts
+    def get_contexts(
+        self, benchmark_results: Sequence[BenchmarkResult]
+    ) -> Dict[str, Context]:
+        """
+        Return the contexts of `benchmark_results` (in a single query), keyed
+        by context ID.
+        """
+        context_ids = {r.context_id for r in benchmark_results}
+        contexts = Context.all(filter_args=[Context.id.in_(context_ids)])
+        return {c.id: c for c in contexts}
 
 
 class BenchmarkResultMixin:
-    def get_display_benchmark(self, benchmark_result_id):
-        # this gets a benchmark _result_, we need more renaming.
-        benchmark, response = self._get_benchmark(benchmark_result_id)
-
-        if response.status_code == 404:
-            self.flash(f"unknown benchmark result ID: {benchmark_result_id}", "info")
-
-        if response.status_code != 200:
-            # Note(JP): quick band-aid to at least not swallow err detail, need
-            # to do better err handling
-            log.info(
-                "get_display_benchmark(): internal api resp with code %s: %s",
-                response.status_code,
-                response.text,
-            )
-            self.flash("Error getting benchmark", "info")
+    def get_benchmark_result(
+        self, benchmark_result_id: str
+    ) -> Optional[BenchmarkResult]:
+        try:
+            return BenchmarkResult.one(id=benchmark_result_id)
+        except NotFound:
+            self.flash(f"unknown benchmark result ID: {benchmark_result_id}", "info")  # type: ignore
             return None
 
+    def get_display_benchmark(self, benchmark_result: BenchmarkResult) -> dict:
+        """
+        Return the API representation of the benchmark result, augmented for
+        display and with its context and info.
+        """
+        benchmark = benchmark_result.to_dict_for_json_api()
         augment(benchmark)
-        context = self._get_context(benchmark)
+        context = ContextSerializer().one.dump(benchmark_result.context)
         context.pop("links", None)
         benchmark["context"] = context
-        info = self._get_info(benchmark)
+        info = InfoSerializer().one.dump(benchmark_result.info)
         info.pop("links", None)
         benchmark["info"] = info
 
         return benchmark
 
-    # this gets a benchmark result, we need more renaming.
-    def _get_benchmark(self, benchmark_result_id):
-        # TODO: remove re-serialization indirection.
-        response = self.api_get(
-            "api.benchmark",
-            benchmark_result_id=benchmark_result_id,
-        )
-        return response.json, response
-
-    def _get_context(self, benchmark):
-        response = self.api_get_url(benchmark["links"]["context"])
-        if response.status_code != 200:
-            self.flash("Error getting context.")
-            return {}
-        return response.json
-
-    def _get_info(self, benchmark):
-        response = self.api_get_url(benchmark["links"]["info"])
-        if response.status_code != 200:
-            self.flash("Error getting info.")
-            return {}
-        return response.json
-
 
 class RunMixin:
-    def get_display_run(self, run_id) -> Optional[dict]:
-        run, response = self._get_run(run_id)
+    def get_display_run(self, run_id, get_baseline_runs=False) -> Optional[dict]:
+        """
+        Return the API representation of the run, augmented for display.
 
-        if response.status_code == 404:
+        Set `get_baseline_runs` to also search for candidate baseline runs.
+        """
+        try:
+            run_obj = Run.one(id=run_id)
+        except NotFound:
             self.flash(f"Run ID unknown: {run_id}", "info")  # type: ignore
             return None
 
-        if response.status_code != 200:
-            log.warning(
-                "virtual http request failed. response: %s, %s",
-                response.status_code,
-                response.text,
-            )
-            self.flash(f"Error getting run with ID: {run_id}")  # type: ignore
-            return None
+        run = run_dict_for_display(run_obj, get_baseline_runs=get_baseline_runs)
 
         self._augment(run)
         return run
@@ -188,10 +164,6 @@ class RunMixin:
         else:
             obj[f"display_{field}"] = ""
 
-    def _get_run(self, run_id):
-        response = self.api_get("api.run", run_id=run_id)
-        return response.json, response
-
 
 class BenchmarkResultView(
     AppEndpoint, BenchmarkResultMixin, RunMixin, TimeSeriesPlotMixin
@@ -204,6 +176,7 @@ class BenchmarkResultView(
         delete_form,
         update_form,
         highlight_other_result: Optional[HighlightInHistPlot] = None,
+        full_history: bool = False,
     ) -> str:
         if result_dict is None:
             return self.redirect("app.index")
@@ -230,6 +203,7 @@ class BenchmarkResultView(
                 result_obj,
                 run,
                 highlight_other_result=highlight_other_result,
+                full_resolution=full_history,
             )
         else:
             plotinfo = BokehPlotJSONOrError(
@@ -237,6 +211,16 @@ class BenchmarkResultView(
                 "no benchmark result defined",
             )
 
+        # The current URL, asking for the plot with all history results. Query
+        # arguments must not clash with the URL path arguments.
+        endpoint = f.request.endpoint
+        assert endpoint is not None
+        full_history_url_args = {
+            **f.request.args,
+            "full-history": "true",
+            **(f.request.view_args or {}),
+        }
+
         return self.render_template(
             "benchmark-result.html",
             application=Config.APPLICATION_NAME,
@@ -249,6 +233,7 @@ class BenchmarkResultView(
             update_form=update_form,
             resources=bokeh.resources.CDN.render(),
             history_plot_info=plotinfo,
+            full_history_url=f.url_for(endpoint, **full_history_url_args),
             update_button_color=update_button_color,
         )
 
@@ -273,6 +258,7 @@ class BenchmarkResultView(
             BenchmarkResultDeleteForm(),
             BenchmarkResultUpdateForm(),
             highlight_other_result=highlight_other,
+            full_history=f.request.args.get("full-history") == "true",
         )
 
     def post(self, benchmark_result_id):
@@ -296,10 +282,13 @@ class BenchmarkResultView(
 
         elif update_form.validate_on_submit():
             # toggle_distribution_change button pressed
-            benchmark, _ = self._get_benchmark(benchmark_result_id)
-            update_form.toggle_distribution_change.data = benchmark[
-                "change_annotations"
-            ].get("begins_distribution_change", False)
+            benchmark_result = self.get_benchmark_result(benchmark_result_id)
+            if benchmark_result is None:
+                return self.redirect("app.index")
+            change_annotations = benchmark_result.change_annotations or {}
+            update_form.toggle_distribution_change.data = change_annotations.get(
+                "begins_distribution_change", False
+            )
 
             update_response = self.api_put(
                 "api.benchmark", update_form, benchmark_result_id=benchmark_result_id
@@ -333,28 +322,16 @@ class BenchmarkResultView(
             return {"change_annotations": {"begins_distribution_change": True}}
 
     def _get_benchmark_and_run(self, benchmark_result_id):
-        # Intermediate: get straight form DB, w/o API indirection
-        try:
-            benchmark_result_obj = BenchmarkResult.one(id=benchmark_result_id)
-        except NotFound:
-            benchmark_result_obj = None
-
-        result_dict = self.get_display_benchmark(benchmark_result_id)
-        run = None
-        if result_dict is not None:
-            run = self.get_display_run(result_dict["run_id"])
-        return result_dict, run, benchmark_result_obj
+        result_dict, run = None, None
+        benchmark_result = self.get_benchmark_result(benchmark_result_id)
+        if benchmark_result is not None:
+            result_dict = self.get_display_benchmark(benchmark_result)
+            run = self.get_display_run(benchmark_result.run_id)
+        return result_dict, run, benchmark_result
 
 
 class BenchmarkResultList(AppEndpoint, ContextMixin):
     def page(self, benchmarks):
-        # Note(JP): What type is benchmarks? As of `response =
-        # self.api_get("api.benchmarks")` down below it's seemingly the result
-        # of JSON-decoding, i.e. not the DB model type.
-        contexts = self.get_contexts(benchmarks)
-        for benchmark in benchmarks:
-            augment(benchmark, contexts)
-
         return self.render_template(
             "benchmark-list.html",
             application=Config.APPLICATION_NAME,
@@ -368,19 +345,13 @@ class BenchmarkResultList(AppEndpoint, ContextMixin):
     def get(self):
         # This will only return 1000 results. This page isn't linked from anywhere.
         # How useful is this page?
-        benchmarks, response = self._get_benchmarks()
-        if response.status_code != 200:
-            self.flash("Error getting benchmarks.")
-            return self.redirect("app.index")
-
-        benchmarks = benchmarks["data"]
-
+        benchmark_results, _ = list_benchmark_results(page_size=1000)
+        contexts = self.get_contexts(benchmark_results)
+        benchmarks = to_dicts_for_json_api(benchmark_results)
+        for result, benchmark in zip(benchmark_results, benchmarks):
+            augment(benchmark, contexts.get(result.context_id))
         return self.page(benchmarks)
 
-    def _get_benchmarks(self):
-        response = self.api_get("api.benchmarks", page_size=1000)
-        return response.json, response
-
 
 rule(
     "/benchmark-results/",
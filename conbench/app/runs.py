@@ -8,11 +8,19 @@ from sqlalchemy import select
 from ..app import rule
 from ..app._endpoint import AppEndpoint, authorize_or_terminate
 from ..app._plots import TimeSeriesPlotMixin
-from ..app._util import augment, error_page
-from ..app.results import ContextMixin, RunMixin
+from ..app._util import (
+    error_page,
+    set_display_error,
+    set_display_mean,
+    set_display_time,
+)
+from ..app.results import RunMixin
 from ..config import Config
 from ..dbsession import current_session
 from ..entities.benchmark_result import BenchmarkResult
+from ..entities.case import Case
+from ..hacks import set_display_benchmark_name, set_display_case_permutation
+from ..util import tznaive_dt_to_aware_iso8601_for_api
 
 
 @dataclasses.dataclass
@@ -39,25 +47,101 @@ _default_hyperlink_text = {
 }
 
 
-class ViewRun(AppEndpoint, ContextMixin, RunMixin, TimeSeriesPlotMixin):
-    def page(self, benchmark_results, rundict):
+class ViewRun(AppEndpoint, RunMixin):
+    """
+    The run page. This renders a shell: run details and a (lightweight) table
+    of the run's results, built from a single projected query. Candidate
+    baseline runs (see RunComparisons) and per-result history plots (see
+    RunHistoryPlots) are fetched by the browser after page load, so that the
+    time to render this page does not depend on that (expensive) work.
+    """
+
+    def page(self, results, rundict):
+        return self.render_template(
+            "run.html",
+            application=Config.APPLICATION_NAME,
+            title="Run",
+            benchmarks=results,
+            run=rundict,
+            resources=bokeh.resources.CDN.render(),
+            history_plots_batch_size=HISTORY_PLOTS_MAX_IDS,
+        )
+
+    @authorize_or_terminate
+    def get(self, run_id):
+        rundict = self.get_display_run(run_id)
+
+        if rundict is None:
+            # Rely on get_display_run to have set flash msg state (err msg for
+            # user). Show that msg by rendering the err page templ
+            return error_page()
+
+        return self.page(self._get_results(run_id), rundict)
+
+    def _get_results(self, run_id) -> List[dict]:
+        """
+        Return the run's results with the (few) properties shown in the results
+        table. Only the required columns are loaded.
+        """
+        query = (
+            select(
+                BenchmarkResult.id,
+                BenchmarkResult.timestamp,
+                BenchmarkResult.mean,
+                BenchmarkResult.unit,
+                BenchmarkResult.error,
+                Case.name,
+                Case.tags,
+            )
+            .join(Case, Case.id == BenchmarkResult.case_id)
+            .where(BenchmarkResult.run_id == run_id)
+        )
+
+        results = []
+        for row in current_session.execute(query):
+            result = {
+                "id": row.id,
+                "timestamp": tznaive_dt_to_aware_iso8601_for_api(row.timestamp),
+                "tags": {**row.tags, "name": row.name},
+                "stats": {"mean": row.mean, "unit": row.unit},
+                "error": row.error,
+            }
+            set_display_benchmark_name(result)
+            set_display_case_permutation(result)
+            set_display_time(result)
+            set_display_mean(result)
+            set_display_error(result)
+            results.append(result)
+        return results
+
+
+class RunComparisons(AppEndpoint, RunMixin):
+    """
+    HTML fragment with links comparing the run to its candidate baseline runs.
+    Fetched by the run page after page load.
+    """
+
+    @authorize_or_terminate
+    def get(self, run_id):
+        rundict = self.get_display_run(run_id, get_baseline_runs=True)
+        if rundict is None:
+            f.abort(404)
+
         # For each candidate baseline type, if a baseline run exists for this contender
         # run, store information to fill in the HTML hyperlink for that comparison.
         comparison_info: Dict[str, _RunComparisonLinker] = {}
 
-        # Why would that ever be called without rundict being defined?
-        if rundict:
-            for key in ["parent", "fork_point", "latest_default"]:
-                baseline_id = rundict["candidate_baseline_runs"][key]["baseline_run_id"]
-                if baseline_id:
-                    comparison_info[key] = _RunComparisonLinker(
-                        url=f.url_for(
-                            "app.compare-runs",
-                            compare_ids=f"{baseline_id}...{rundict['id']}",
-                        ),
-                        text=_default_hyperlink_text[key],
-                        recommended=False,
-                    )
+        for key in ["parent", "fork_point", "latest_default"]:
+            baseline_id = rundict["candidate_baseline_runs"][key]["baseline_run_id"]
+            if baseline_id:
+                comparison_info[key] = _RunComparisonLinker(
+                    url=f.url_for(
+                        "app.compare-runs",
+                        compare_ids=f"{baseline_id}...{rundict['id']}",
+                    ),
+                    text=_default_hyperlink_text[key],
+                    recommended=False,
+                )
 
         if len(comparison_info) > 1:
             # Figure out which baseline is "recommended".
@@ -76,37 +160,49 @@ class ViewRun(AppEndpoint, ContextMixin, RunMixin, TimeSeriesPlotMixin):
                 comparison_info["latest_default"].recommended = True
 
         return self.render_template(
-            "run.html",
-            application=Config.APPLICATION_NAME,
-            title="Run",
-            benchmarks=benchmark_results,
+            "run-comparisons.html",
             comparisons=sorted(
                 comparison_info.values(), key=lambda x: x.recommended, reverse=True
             ),
-            run=rundict,
-            resources=bokeh.resources.CDN.render(),
         )
 
+
+# The maximum number of history plots built for one request to RunHistoryPlots.
+HISTORY_PLOTS_MAX_IDS = 10
+
+
+class RunHistoryPlots(AppEndpoint, RunMixin, TimeSeriesPlotMixin):
+    """
+    History plots for a batch of the run's results (query parameter `ids`,
+    comma-separated result IDs). Fetched by the run page for the results that
+    are scrolled into view.
+
+    Responds with a JSON object mapping each result ID (of this run) to an
+    object with the keys `jsondoc` (bokeh JSON item) and `reason_why_no_plot`,
+    see BokehPlotJSONOrError.
+    """
+
     @authorize_or_terminate
     def get(self, run_id):
-        rundict = self.get_display_run(run_id)
+        ids = [i for i in f.request.args.get("ids", "").split(",") if i]
+        if len(ids) > HISTORY_PLOTS_MAX_IDS:
+            f.abort(400, description=f"at most {HISTORY_PLOTS_MAX_IDS} IDs are allowed")
 
+        rundict = self.get_display_run(run_id)
         if rundict is None:
-            # Rely on get_display_run to have set flash msg state (err msg for
-            # user). Show that msg by rendering the err page templ
-            return error_page()
+            f.abort(404)
 
-        benchmark_results = self._get_results(run_id)
+        results = current_session.scalars(
+            select(BenchmarkResult).where(
+                BenchmarkResult.run_id == run_id, BenchmarkResult.id.in_(ids)
+            )
+        ).all()
 
-        contexts = self.get_contexts(benchmark_results)
-        for r in benchmark_results:
-            augment(r, contexts)
-
-        return self.page(benchmark_results, rundict)
-
-    def _get_results(self, run_id) -> List[dict]:
-        query = select(BenchmarkResult).filter(BenchmarkResult.run_id == run_id)
-        return [r.to_dict_for_json_api() for r in current_session.scalars(query).all()]
+        plots = {}
+        for result in results:
+            plotinfo = self.get_history_plot(result, rundict)
+            plots[result.id] = dataclasses.asdict(plotinfo)
+        return f.jsonify(plots)
 
 
 rule(
@@ -114,3 +210,13 @@ rule(
     view_func=ViewRun.as_view("run"),
     methods=["GET"],
 )
+rule(
+    "/runs/<run_id>/comparisons/",
+    view_func=RunComparisons.as_view("run-comparisons"),
+    methods=["GET"],
+)
+rule(
+    "/runs/<run_id>/history-plots/",
+    view_func=RunHistoryPlots.as_view("run-history-plots"),
+    methods=["GET"],
+)
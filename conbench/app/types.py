@@ -16,3 +16,5 @@ class BokehPlotJSONOrError:
     # The following two properties are meant to be mutually exclusive
     jsondoc: Optional[str]
     reason_why_no_plot: Optional[str]
+    # The number of history results left out of the plot (downsampling).
+    n_results_not_shown: int = 0
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import flask as f
 import flask_login
 import flask_wtf
@@ -7,6 +9,9 @@ import wtforms.validators as v
 from ..app import rule
 from ..app._endpoint import AppEndpoint
 from ..config import Config
+from ..entities._entity import NotFound
+from ..entities.user import User as UserEntity
+from ..entities.user import UserSerializer
 
 
 class DeleteForm(flask_wtf.FlaskForm):
@@ -50,8 +55,8 @@ class User(AppEndpoint):
         if not flask_login.current_user.is_authenticated:
             return self.redirect("app.login")
 
-        user, response = self._get_user(user_id)
-        if response.status_code != 200:
+        user = self._get_user(user_id)
+        if user is None:
             self.flash("Error getting user.")
             return self.redirect("app.index")
 
@@ -87,7 +92,10 @@ class User(AppEndpoint):
         if delete_form.errors == csrf:
             self.flash("The CSRF token is missing.")
 
-        user, response = self._get_user(user_id)
+        user = self._get_user(user_id)
+        if user is None:
+            self.flash("Error getting user.")
+            return self.redirect("app.index")
         return self.page(user, form)
 
     def data(self, form):
@@ -96,9 +104,12 @@ class User(AppEndpoint):
             "email": form.email.data,
         }
 
-    def _get_user(self, user_id):
-        response = self.api_get("api.user", user_id=user_id)
-        return response.json, response
+    def _get_user(self, user_id) -> Optional[dict]:
+        try:
+            user = UserEntity.one(id=user_id)
+        except NotFound:
+            return None
+        return UserSerializer().one.dump(user)
 
 
 class UserList(AppEndpoint):
@@ -116,16 +127,7 @@ class UserList(AppEndpoint):
         if not flask_login.current_user.is_authenticated:
             return self.redirect("app.login")
 
-        users, response = self._get_users()
-        if response.status_code != 200:
-            self.flash("Error getting users.")
-            return self.redirect("app.index")
-
-        return self.page(users)
-
-    def _get_users(self):
-        response = self.api_get("api.users")
-        return response.json, response
+        return self.page([UserSerializer().one.dump(u) for u in UserEntity.all()])
 
 
 class UserCreate(AppEndpoint):
@@ -31,21 +31,26 @@ Current implementation properties:
 import dataclasses
 import hashlib
 import logging
+import math
+import os
+import tempfile
 import threading
 import time
 from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, TypedDict, cast
+from typing import Dict, List, Optional, Tuple, TypedDict, cast
 
+import orjson
 import pandas as pd
 import sqlalchemy
+import sqlalchemy.exc
 import sqlalchemy.orm
 
-import conbench.job
+import conbench.db
+import conbench.invalidation
 import conbench.metrics
 import conbench.util
 from conbench.config import Config
-from conbench.db import session_maker
 from conbench.entities.benchmark_result import (
     BenchmarkResult,
     ui_mean_and_uncertainty,
@@ -90,7 +95,7 @@ class BMRTBenchmarkResult:
     svs: float
     svs_type: str
     unit: str
-    benchmark_name: str
+    benchmark_name: TBenchmarkName
     # POSIX timestamp
     started_at: float
     hardware_checksum: str
@@ -220,9 +225,26 @@ def wait_for_first_bmrt_cache_population(timeout=20):
 def _fetch_and_cache_most_recent_results() -> None:
     # https://docs.sqlalchemy.org/en/20/orm/session_api.html#sqlalchemy.orm.sessionmaker.begin
 
+    # Prefer the read replica (if configured and not lagging behind too much):
+    # this is a long-running read which should not compete with ingest.
+    smaker = conbench.db.read_session_maker()
+    try:
+        _fetch_and_cache_most_recent_results_with(smaker)
+    except sqlalchemy.exc.OperationalError as exc:
+        if smaker is conbench.db.session_maker:
+            raise
+        # For example, a query on a hot standby can get canceled because of
+        # a conflict with WAL replay.
+        log.warning("BMRT cache: query on read replica failed, use primary: %s", exc)
+        _fetch_and_cache_most_recent_results_with(conbench.db.session_maker)
+
+
+def _fetch_and_cache_most_recent_results_with(
+    smaker: sqlalchemy.orm.sessionmaker,
+) -> None:
     # This pattern is weird, see https://github.com/sqlalchemy/sqlalchemy/issues/6519
     # not trivial!
-    dbsession = session_maker()
+    dbsession = smaker()
     with dbsession:
         with dbsession.begin():
             _fetch_and_cache_most_recent_results_guts(dbsession)
@@ -256,10 +278,8 @@ def _fetch_and_cache_most_recent_results_guts(
     # fetches the first chunk?).
     result_rows_iterator = dbsession.scalars(query_statement)
 
-    by_id_dict: Dict[str, BMRTBenchmarkResult] = {}
-    by_name_dict: Dict[TBenchmarkName, List[BMRTBenchmarkResult]] = defaultdict(list)
-    by_case_id_dict: Dict[str, List[BMRTBenchmarkResult]] = defaultdict(list)
-    by_run_id_dict: Dict[str, List[BMRTBenchmarkResult]] = defaultdict(list)
+    # Newest first.
+    bmrs: List[BMRTBenchmarkResult] = []
 
     first_result = None
     last_result = None
@@ -352,18 +372,11 @@ def _fetch_and_cache_most_recent_results_guts(
             run_reason=result.run_reason if result.run_reason else "n/a",
         )
 
-        by_id_dict[str(result.id)] = bmr
-        by_name_dict[benchmark_name].append(bmr)
-        by_run_id_dict[str(result.run_id)].append(bmr)
-
-        # Add a property on the Case object, on the fly.
-        # Build the textual representation of this case which should also
-        # uniquely / unambiguously define/identify this specific case.
-        by_case_id_dict[str(result.case_id)].append(bmr)
+        bmrs.append(bmr)
 
     t1 = time.monotonic()
 
-    if len(by_name_dict) == 0:
+    if not bmrs:
         log.info("BMRT cache: no results")
         return
 
@@ -371,6 +384,45 @@ def _fetch_and_cache_most_recent_results_guts(
     assert first_result
     assert last_result
 
+    _set_cache_contents(
+        bmrs,
+        CacheUpdateMetaInfo(
+            newest_result_time_str=first_result.ui_time_started_at,
+            covered_timeframe_days_approx=str(
+                (first_result.timestamp - last_result.timestamp).days
+            ),
+            oldest_result_time_str=last_result.ui_time_started_at,
+            n_results=len(bmrs),
+        ),
+    )
+
+    conbench.metrics.GAUGE_BMRT_CACHE_LAST_UPDATE_SECONDS.set(t1 - t0)
+
+    log.info(
+        ("BMRT cache population done (%s results, took %.3f s)"),
+        len(bmrt_cache["by_id"]),
+        t1 - t0,
+    )
+
+
+def _set_cache_contents(
+    bmrs: List[BMRTBenchmarkResult], meta: CacheUpdateMetaInfo
+) -> None:
+    """
+    Build the cache lookup tables for `bmrs` (newest first) and replace the
+    cache contents with them.
+    """
+    by_id_dict: Dict[str, BMRTBenchmarkResult] = {}
+    by_name_dict: Dict[TBenchmarkName, List[BMRTBenchmarkResult]] = defaultdict(list)
+    by_case_id_dict: Dict[str, List[BMRTBenchmarkResult]] = defaultdict(list)
+    by_run_id_dict: Dict[str, List[BMRTBenchmarkResult]] = defaultdict(list)
+
+    for bmr in bmrs:
+        by_id_dict[bmr.id] = bmr
+        by_name_dict[bmr.benchmark_name].append(bmr)
+        by_run_id_dict[bmr.run_id].append(bmr)
+        by_case_id_dict[bmr.case_id].append(bmr)
+
     # Group all benchmark results into timeseries
     dict4tdf, bmrlist_by_4tuple = _generate_tsdf_per_4tuple(by_name_dict)
 
@@ -386,80 +438,219 @@ def _fetch_and_cache_most_recent_results_guts(
     bmrt_cache["by_4t_df"] = dict4tdf
     bmrt_cache["by_4t_list"] = bmrlist_by_4tuple
     bmrt_cache["by_run_id"] = by_run_id_dict
-    bmrt_cache["meta"] = CacheUpdateMetaInfo(
-        newest_result_time_str=first_result.ui_time_started_at,
-        covered_timeframe_days_approx=str(
-            (first_result.timestamp - last_result.timestamp).days
-        ),
-        oldest_result_time_str=last_result.ui_time_started_at,
-        n_results=len(by_id_dict),
-    )
+    bmrt_cache["meta"] = meta
 
-    conbench.metrics.GAUGE_BMRT_CACHE_LAST_UPDATE_SECONDS.set(t1 - t0)
 
+# Set when benchmark results were changed since the last cache refresh
+# started (by any process, see conbench/invalidation.py).
+_RESULTS_CHANGED = threading.Event()
+_RESULTS_CHANGED.set()
+_last_refresh_monotonic: Optional[float] = None
+
+# Refresh after this long even without seen changes: results age out of the
+# covered time window, and events may be missed.
+BMRT_MAX_AGE_SECONDS = 3600
+
+
+def _note_results_changed(event: conbench.invalidation.InvalidationEvent) -> None:
+    _RESULTS_CHANGED.set()
+
+
+conbench.invalidation.subscribe(_note_results_changed)
+
+
+def refresh_bmrt_cache(ctx) -> bool:
+    """
+    Job function (see conbench.job): (re)populate the BMRT cache.
+
+    Skip the (expensive) refresh when no benchmark result was changed since
+    the last one, as far as this process can tell (the invalidation listener is
+    running). Return True if the cache was refreshed.
+    """
+    global _last_refresh_monotonic
+
+    try:
+        if (
+            conbench.invalidation.is_listening()
+            and not _RESULTS_CHANGED.is_set()
+            and _last_refresh_monotonic is not None
+            and time.monotonic() - _last_refresh_monotonic < BMRT_MAX_AGE_SECONDS
+        ):
+            log.info("BMRT cache: no changes since last refresh, skip")
+            return False
+
+        # Changes committed from here on are picked up by the next refresh
+        # (at the latest).
+        _RESULTS_CHANGED.clear()
+        t0 = time.monotonic()
+        try:
+            # filprofile(lambda: _fetch_and_cache_most_recent_results(), "fil-result")
+            # yappi.start()
+            _fetch_and_cache_most_recent_results()
+            # yappi.stop()
+            # yappi_print_threads_stats()
+        except Exception:
+            _RESULTS_CHANGED.set()
+            raise
+        _last_refresh_monotonic = t0
+        return True
+    finally:
+        # Also signal waiters after a failed attempt: the cache is then
+        # empty, not pending.
+        _FIRST_REFRESH_DONE_EVENT.set()
+
+
+# Snapshot file support, for when a separate worker process populates the
+# cache (see Config.JOBS_IN_WORKER): the worker writes the cache contents to a
+# file after each refresh, the web application processes load it when it
+# changed. The file contains the cached benchmark results as JSON; the lookup
+# tables are rebuilt from those when loading. The file is only loaded if it is
+# owned by the user running this process and not accessible to others.
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Stored once per case/context in the snapshot, not with each result.
+_SNAPSHOT_RESULT_FIELDS = tuple(
+    f.name
+    for f in dataclasses.fields(BMRTBenchmarkResult)
+    if f.name not in ("case_dict", "context_dict")
+)
+
+
+def write_bmrt_snapshot(path: str) -> None:
+    """
+    Write the current cache contents to `path`, atomically (readers see
+    either the previous or the new snapshot, never a partial one).
+    """
+    t0 = time.monotonic()
+    bmrs = list(bmrt_cache["by_id"].values())
+    doc = {
+        "version": SNAPSHOT_FORMAT_VERSION,
+        "meta": dataclasses.asdict(bmrt_cache["meta"]),
+        "case_dicts": {r.case_id: r.case_dict for r in bmrs},
+        "context_dicts": {r.context_id: r.context_dict for r in bmrs},
+        # Note that orjson serializes NaN (e.g. the svs of a failed result) as
+        # null.
+        "results": [{k: getattr(r, k) for k in _SNAPSHOT_RESULT_FIELDS} for r in bmrs],
+    }
+
+    dirname = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(
+        dir=dirname, prefix=".bmrt-snapshot-", delete=False
+    ) as f:
+        try:
+            # mkstemp() already creates the file with mode 0600; be explicit,
+            # this is checked when loading.
+            os.fchmod(f.fileno(), 0o600)
+            f.write(orjson.dumps(doc))
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
     log.info(
-        ("BMRT cache population done (%s results, took %.3f s)"),
-        len(bmrt_cache["by_id"]),
-        t1 - t0,
+        "BMRT cache: wrote snapshot to %s (%s results, took %.3f s)",
+        path,
+        len(bmrs),
+        time.monotonic() - t0,
     )
 
 
-def periodically_fetch_last_n_benchmark_results() -> threading.Thread:
+# Modification time (ns) of the snapshot file last seen by this process.
+_snapshot_seen_mtime_ns = 0
+
+
+def _snapshot_file_trusted(path: str, st: os.stat_result) -> bool:
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        log.error(
+            "BMRT cache: ignore snapshot %s: owned by uid %s with mode %o "
+            "(expected: owned by uid %s, not accessible to others)",
+            path,
+            st.st_uid,
+            st.st_mode & 0o777,
+            os.getuid(),
+        )
+        return False
+    return True
+
+
+def load_bmrt_snapshot_if_changed(path: str) -> bool:
     """
-    Return right after having spawned a thread that triggers periodic action.
+    Replace the cache contents with those in the snapshot file at `path`, if
+    it changed since the last call. Return True if a snapshot was loaded.
     """
-    first_sleep_seconds = 3
-    min_delay_between_runs_seconds = 120
+    global _snapshot_seen_mtime_ns
 
-    if Config.TESTING:
-        first_sleep_seconds = 0
-        min_delay_between_runs_seconds = 20
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        log.debug("BMRT cache: no snapshot at %s (yet)", path)
+        return False
 
-    def _run_forever():
-        delay_s = first_sleep_seconds
+    if mtime_ns == _snapshot_seen_mtime_ns:
+        return False
+    # Do not retry (and log) for the same file if it cannot be loaded.
+    _snapshot_seen_mtime_ns = mtime_ns
 
-        while True:
-            # Build responsive sleep loop that inspects SHUTDOWN often.
-            deadline = time.monotonic() + delay_s
-            while time.monotonic() < deadline:
-                if conbench.job.SHUTDOWN:
-                    log.debug("_run_forever: shut down")
-                    return
+    t0 = time.monotonic()
+    with open(path, "rb") as f:
+        # Check the file that was opened (not the path, which may have been
+        # replaced in the meantime).
+        if not _snapshot_file_trusted(path, os.fstat(f.fileno())):
+            return False
+        doc = orjson.loads(f.read())
+
+    if doc.get("version") != SNAPSHOT_FORMAT_VERSION:
+        log.warning(
+            "BMRT cache: ignore snapshot %s: format version %s (expected %s)",
+            path,
+            doc.get("version"),
+            SNAPSHOT_FORMAT_VERSION,
+        )
+        return False
+
+    case_dicts, context_dicts = doc["case_dicts"], doc["context_dicts"]
+    bmrs = []
+    for r in doc["results"]:
+        if r["svs"] is None:
+            r["svs"] = math.nan
+        bmrs.append(
+            BMRTBenchmarkResult(
+                **r,
+                case_dict=case_dicts[r["case_id"]],
+                context_dict=context_dicts[r["context_id"]],
+            )
+        )
 
-                time.sleep(0.01)
+    _set_cache_contents(bmrs, CacheUpdateMetaInfo(**doc["meta"]))
 
-            t0 = time.monotonic()
+    log.info(
+        "BMRT cache: loaded snapshot from %s (%s results, took %.3f s)",
+        path,
+        len(bmrs),
+        time.monotonic() - t0,
+    )
+    return True
 
-            # yappi.start()
 
-            try:
-                # filprofile(lambda: _fetch_and_cache_most_recent_results(), "fil-result")
-                _fetch_and_cache_most_recent_results()
-            except Exception as exc:
-                # For now, log all error detail. (but handle all exceptions; do
-                # some careful log-reading after rolling this out).
-                log.exception("BMRT cache: exception during update: %s", exc)
+def refresh_bmrt_cache_and_write_snapshot(ctx) -> None:
+    """
+    Job function for the worker process: populate the cache, then publish it
+    for the web application processes.
+    """
+    assert Config.BMRT_SNAPSHOT_PATH is not None
+    if refresh_bmrt_cache(ctx):
+        ctx.check_cancelled()
+        write_bmrt_snapshot(Config.BMRT_SNAPSHOT_PATH)
 
-            # yappi.stop()
-            # yappi_print_threads_stats()
 
-            _FIRST_REFRESH_DONE_EVENT.set()
-            last_call_duration_s = time.monotonic() - t0
-
-            # Goal: spend the majority of the time _not_ doing this thing here.
-            # So, if the last iteration lasted for e.g. ~60 seconds, then keep
-            # waiting for ~five minutes until triggering the next run.
-            delay_s = max(min_delay_between_runs_seconds, 5 * last_call_duration_s)
-            log.info("BMRT cache: trigger next fetch in %.3f s", delay_s)
-
-    t = threading.Thread(target=_run_forever, name="bmrt-cache-refresh")
-    t.start()
-    return t
-    # GOal: terminate thread cleanly as part of gunicorn's worker process
-    # shutdown. For that, we use signal handler-based logic below which injects
-    # a shutdown signal into the thread, after which it is 'known' / assumed to
-    # quickly terminate. The returned thread object can be used to explicitly
-    # join the thread.
+def load_bmrt_snapshot(ctx) -> None:
+    """
+    Job function for the web application processes (when the worker process
+    populates the cache).
+    """
+    assert Config.BMRT_SNAPSHOT_PATH is not None
+    if load_bmrt_snapshot_if_changed(Config.BMRT_SNAPSHOT_PATH):
+        _FIRST_REFRESH_DONE_EVENT.set()
 
 
 def _generate_tsdf_per_4tuple(
@@ -1,5 +1,8 @@
+import threading
 import time
+from collections import OrderedDict
 from functools import lru_cache, wraps
+from typing import Any, Callable, Hashable, Optional, Tuple
 
 
 def lru_cache_with_ttl(maxsize=None, typed=False, ttl=60):
@@ -37,3 +40,58 @@ def lru_cache_with_ttl(maxsize=None, typed=False, ttl=60):
         return wrapper
 
     return decorator
+
+
+class LRUCacheWithTTL:
+    """
+    A thread-safe mapping with a bounded number of items (least recently used
+    ones are evicted) and an expiration time per item.
+
+    For caching values that cannot be computed from hashable function
+    arguments alone (see lru_cache_with_ttl() for the simple case). Make the
+    key represent all inputs to the cached value (e.g. include a version
+    counter), so that stale items are never returned.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, deadline = item
+            if deadline < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + self.ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def discard_if(self, predicate: Callable[[Any], bool]) -> int:
+        """Remove the items whose key matches `predicate`, return their number."""
+        with self._lock:
+            keys = [k for k in self._items if predicate(k)]
+            for k in keys:
+                del self._items[k]
+            return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,60 @@
+"""
+The `conbench` command (see setup.py). Subcommands for operating a Conbench
+deployment; the web application itself is run with gunicorn (see
+gunicorn-conf.py).
+"""
+
+import sys
+from typing import Optional
+
+import click
+
+
+@click.group()
+def conbench():
+    """Operate a Conbench deployment."""
+
+
+@conbench.command()
+@click.option(
+    "--once",
+    is_flag=True,
+    help="Run each job once and exit (non-zero exit code if any job failed).",
+)
+@click.option(
+    "--metrics-port",
+    type=int,
+    default=None,
+    help="Expose Prometheus metrics (e.g. job metrics) via HTTP on this port.",
+)
+def worker(once: bool, metrics_port: Optional[int]) -> None:
+    """
+    Run the periodic background jobs (BMRT cache population, partition
+    maintenance, candidate baseline run search) in this process, separate from
+    the web application processes.
+
+    Set CONBENCH_JOBS_IN_WORKER=true for the web application processes so
+    that they do not run these jobs themselves, and point
+    CONBENCH_BMRT_SNAPSHOT_PATH (required) for both to the same file, on
+    storage shared by both and only accessible to the user running them.
+    """
+    import prometheus_client
+
+    import conbench.job
+    import conbench.logger
+    from conbench.config import Config
+
+    conbench.logger.setup(
+        level_stderr=Config.LOG_LEVEL_STDERR,
+        level_file=Config.LOG_LEVEL_FILE,
+        level_sqlalchemy=Config.LOG_LEVEL_SQLALCHEMY,
+    )
+
+    if not Config.BMRT_SNAPSHOT_PATH:
+        sys.exit("CONBENCH_BMRT_SNAPSHOT_PATH is required for the worker")
+
+    if metrics_port is not None:
+        prometheus_client.start_http_server(metrics_port)
+
+    if not conbench.job.run_worker(once=once):
+        sys.exit(1)
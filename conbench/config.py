@@ -17,6 +17,22 @@ class ConfigClass:
         f"postgresql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
 
+    # Optional: a read replica (hot standby) of the database above. Same
+    # database name and credentials. When set, heavy read-only work (BMRT cache
+    # population, history and compare endpoints) is routed to the replica as
+    # long as its replication lag is below DB_REPLICA_MAX_LAG_SECONDS;
+    # otherwise (or when the replica is unreachable) the primary is used.
+    DB_REPLICA_HOST = os.environ.get("DB_REPLICA_HOST")
+    DB_REPLICA_PORT = os.environ.get("DB_REPLICA_PORT", DB_PORT)
+    SQLALCHEMY_REPLICA_DATABASE_URI = (
+        f"postgresql://{DB_USERNAME}:{DB_PASSWORD}@{DB_REPLICA_HOST}:{DB_REPLICA_PORT}/{DB_NAME}"
+        if DB_REPLICA_HOST
+        else None
+    )
+    DB_REPLICA_MAX_LAG_SECONDS = float(
+        os.environ.get("DB_REPLICA_MAX_LAG_SECONDS", "30")
+    )
+
     # When this appears to be `true` then the application initialization phase
     # executes code that _attempts_ to create all database tables. That code
     # does not error out when it finds that the database tables already exist.
@@ -36,6 +52,26 @@ class ConfigClass:
     # - "mean": Use the mean.
     SVS_TYPE = os.environ.get("SVS_TYPE") or "best"
 
+    # The number of rendered history plots (bokeh JSON documents) cached per
+    # web application process. Set to 0 to disable the cache.
+    HISTORY_PLOT_CACHE_SIZE = int(os.environ.get("HISTORY_PLOT_CACHE_SIZE", 2000))
+
+    # Upper bound for the decompressed size of a gzip-encoded request body
+    # (only accepted by the benchmark result submission endpoints). Larger
+    # bodies are rejected with a 413 response.
+    MAX_DECOMPRESSED_REQUEST_BYTES = int(
+        os.environ.get("CONBENCH_MAX_DECOMPRESSED_REQUEST_BYTES", 50 * 1024**2)
+    )
+
+    # When `true`, the web application processes do not run the heavy periodic
+    # jobs (BMRT cache population, partition maintenance, candidate baseline
+    # run search); a separate `conbench worker` process is expected to run
+    # them. Web processes then load the BMRT cache from the snapshot file
+    # written by the worker (see BMRT_SNAPSHOT_PATH, which must point to
+    # storage shared by both, and only accessible to the user running them).
+    JOBS_IN_WORKER = os.environ.get("CONBENCH_JOBS_IN_WORKER", "false") == "true"
+    BMRT_SNAPSHOT_PATH: Optional[str] = os.environ.get("CONBENCH_BMRT_SNAPSHOT_PATH")
+
     LOG_LEVEL_STDERR = os.environ.get("CONBENCH_LOG_LEVEL_STDERR", "INFO")
     LOG_LEVEL_FILE = None
     LOG_LEVEL_SQLALCHEMY = "WARNING"
@@ -58,6 +94,12 @@ class ConfigClass:
         self.INTENDED_BASE_URL = self._get_intended_base_url_from_env_or_exit()
         self.OIDC_ISSUER_URL = self._get_oidc_issuer_url_from_env_or_exit()
 
+        if self.JOBS_IN_WORKER and not self.BMRT_SNAPSHOT_PATH:
+            sys.exit(
+                "CONBENCH_BMRT_SNAPSHOT_PATH is required when "
+                "CONBENCH_JOBS_IN_WORKER is set"
+            )
+
     def _get_intended_base_url_from_env_or_exit(self) -> str:
         """
         If this function returns then the output is guaranteed to start with 'http'
@@ -1,14 +1,19 @@
 import functools
 import logging
 import sys
+import time
+from typing import Optional
 
 import orjson
 import psycopg2
 import sqlalchemy.exc
 import sqlalchemy.orm
+import sqlalchemy.pool
 import tenacity
 from sqlalchemy import create_engine
 
+from . import metrics
+from .cachetools import lru_cache_with_ttl
 from .config import Config
 
 engine = None
@@ -19,6 +24,13 @@ session_maker = sqlalchemy.orm.sessionmaker()
 # context.
 _session = sqlalchemy.orm.scoped_session(session_maker)
 
+# Optional read replica. `replica_engine` stays `None` if not configured. Do
+# not use `replica_session_maker` directly, but `read_session_maker()`, which
+# falls back to the primary.
+replica_engine = None
+replica_session_maker = sqlalchemy.orm.sessionmaker()
+_replica_session = sqlalchemy.orm.scoped_session(replica_session_maker)
+
 
 log = logging.getLogger(__name__)
 
@@ -33,11 +45,44 @@ if "pytest" in sys.modules:
 
 
 def configure_engine(url):
-    global engine, session_maker
+    global engine
 
     logfunc("create sqlalchemy DB engine")
-    engine = create_engine(
+    engine = _create_engine(url, "primary")
+    logfunc("bind engine to session")
+    session_maker.configure(bind=engine)
+
+
+def configure_replica_engine(url: Optional[str]):
+    """
+    Set up (or, with `url` being `None`, tear down) the engine for the
+    optional read replica.
+    """
+    global replica_engine
+
+    if replica_engine is not None:
+        _replica_session.remove()
+        replica_engine.dispose()
+        replica_engine = None
+        uninstrument_pool("replica")
+
+    replica_lag_seconds.cache_clear()
+
+    if url is None:
+        return
+
+    logfunc("create sqlalchemy DB engine for read replica")
+    replica_engine = _create_engine(url, "replica")
+    replica_session_maker.configure(bind=replica_engine)
+
+
+def _create_engine(url, name: str):
+    eng = create_engine(
         url,
+        poolclass=_InstrumentedQueuePool,
+        # Also used as the `pool` label of the pool metrics. Survives
+        # `engine.dispose()` (the new pool inherits it).
+        pool_logging_name=name,
         echo=False,
         pool_pre_ping=True,
         # As of today some requests take a (too) long while to generate a
@@ -68,8 +113,132 @@ def configure_engine(url):
         # parser.
         json_deserializer=orjson.loads,  # pylint: disable=E1101
     )
-    logfunc("bind engine to session")
-    session_maker.configure(bind=engine)
+    instrument_engine(eng, name)
+    return eng
+
+
+class _InstrumentedQueuePool(sqlalchemy.pool.QueuePool):
+    """
+    QueuePool (the default for PostgreSQL) that records how long each
+    checkout took. Pool events only fire once a connection has been checked
+    out, that is why this times the public `connect()` method.
+    """
+
+    def connect(self):
+        t0 = time.monotonic()
+        try:
+            return super().connect()
+        finally:
+            metrics.HISTOGRAM_DB_POOL_CHECKOUT_WAIT_SECONDS.labels(
+                pool=self.logging_name
+            ).observe(time.monotonic() - t0)
+
+
+# The pool logs via a logger named after its class (plus the logging name).
+# Keep it as quiet as SQLAlchemy's own loggers are by default.
+logging.getLogger(f"{__name__}.{_InstrumentedQueuePool.__name__}").setLevel(
+    logging.WARNING
+)
+
+
+def instrument_engine(eng, name: str) -> None:
+    """
+    Emit Prometheus metrics for DB queries and for the connection pool of
+    engine `eng`, see conbench/metrics.py.
+    """
+
+    @sqlalchemy.event.listens_for(eng, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, params, context, many):
+        # A stack: cursor executions may nest (e.g. in event handlers).
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+        metrics.count_db_query()
+
+    @sqlalchemy.event.listens_for(eng, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, params, context, many):
+        t0 = conn.info["query_start_time"].pop()
+        metrics.HISTOGRAM_DB_QUERY_DURATION_SECONDS.labels(
+            statement=metrics.statement_fingerprint(statement),
+            http_handler_name=metrics.current_http_handler_name(),
+        ).observe(time.perf_counter() - t0)
+
+    @sqlalchemy.event.listens_for(eng, "handle_error")
+    def _handle_error(ctx):
+        # after_cursor_execute does not fire for failed queries.
+        if ctx.connection is not None and ctx.connection.info.get("query_start_time"):
+            ctx.connection.info["query_start_time"].pop()
+
+    # Read the current state when scraped. Look up `eng.pool` each time: it
+    # is replaced upon `eng.dispose()`.
+    metrics.GAUGE_DB_POOL_CHECKED_OUT.labels(pool=name).set_function(
+        lambda: eng.pool.checkedout()
+    )
+    metrics.GAUGE_DB_POOL_OVERFLOW.labels(pool=name).set_function(
+        lambda: eng.pool.overflow()
+    )
+
+
+def uninstrument_pool(name: str) -> None:
+    for gauge in (metrics.GAUGE_DB_POOL_CHECKED_OUT, metrics.GAUGE_DB_POOL_OVERFLOW):
+        try:
+            gauge.remove(name)
+        except KeyError:
+            pass
+
+
+# Replication lag as seen by the replica: zero if the replica has replayed all
+# WAL that it received and is connected to the primary. Otherwise the age of
+# the last replayed transaction (this over-estimates lag when the primary is
+# idle, which is fine: erring on the side of caution). Not in recovery (i.e.
+# not a standby at all): zero.
+_REPLICA_LAG_QUERY = sqlalchemy.text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+            AND EXISTS (
+                SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming'
+            ) THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+# Do not query the replica for each HTTP request.
+@lru_cache_with_ttl(ttl=5)
+def replica_lag_seconds() -> Optional[float]:
+    """
+    Return the replication lag of the read replica in seconds, or `None` if
+    no replica is configured or if the lag cannot be determined (e.g. replica
+    not reachable).
+    """
+    if replica_engine is None:
+        return None
+
+    try:
+        with replica_engine.connect() as conn:
+            lag = conn.execute(_REPLICA_LAG_QUERY).scalar()
+    except sqlalchemy.exc.SQLAlchemyError as exc:
+        log.warning("read replica: cannot determine replication lag: %s", exc)
+        return None
+
+    return None if lag is None else float(lag)
+
+
+def replica_usable() -> bool:
+    lag = replica_lag_seconds()
+    return lag is not None and lag <= Config.DB_REPLICA_MAX_LAG_SECONDS
+
+
+def read_session_maker() -> sqlalchemy.orm.sessionmaker:
+    """
+    Return the session factory to use for read-only work that tolerates
+    slightly stale data: bound to the read replica if configured and not
+    lagging behind too much, otherwise bound to the primary.
+    """
+    if replica_usable():
+        return replica_session_maker
+    return session_maker
 
 
 # compute this only once.
@@ -82,7 +251,7 @@ def get_tables_in_cleanup_order():
 
     tables = delarative_base.metadata.sorted_tables
 
-    sort_by_name = ["benchmark_result"]
+    sort_by_name = ["benchmark_result_idempotency_key", "benchmark_result", "run"]
 
     tabledict = {t.name: t for t in tables}
     sorted_tables = []
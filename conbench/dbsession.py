@@ -10,23 +10,69 @@ Provides an SQLAlchemy scoped session that creates unique sessions per Flask
 request.
 """
 
+import contextlib
+import functools
 import os
+import threading
+from typing import Iterable, Iterator, TypeVar
 
-from flask import current_app
+from flask import current_app, g, has_app_context
 from sqlalchemy.orm import scoped_session
 from werkzeug.local import LocalProxy
 
 # This is the SQLAlchemy session object which is meant to be used outside
 # HTTP request context.
 from conbench.db import _session as out_of_req_context_db_session
+from conbench.db import session_maker
 
-__all__ = ["current_session", "flask_scoped_session"]
+__all__ = [
+    "current_session",
+    "current_read_session",
+    "flask_scoped_session",
+    "keep_session_choice",
+    "outside_request_context",
+    "read_from_replica",
+]
 
 # Plan for only using threading.
 from threading import get_ident as get_cur_thread
 
+T = TypeVar("T")
+
 
 def _get_session():
+    # Within a request handler decorated with `read_from_replica`, all DB
+    # interaction goes through the read session (entity code uses
+    # `current_session` all over the place).
+    if has_app_context() and g.get("_db_read_from_replica"):
+        return _get_read_session()
+    return _get_primary_session()
+
+
+_thread_state = threading.local()
+_outside_request_session = scoped_session(session_maker, scopefunc=get_cur_thread)
+
+
+@contextlib.contextmanager
+def outside_request_context():
+    """
+    Let `current_session` resolve to a thread-scoped session (not bound to a
+    Flask app context) in this thread, for the duration of the block. For
+    background jobs calling into code that is otherwise used by request
+    handlers. The session is removed (closed) when leaving the block.
+    """
+    _thread_state.outside_request_context = True
+    try:
+        yield
+    finally:
+        _thread_state.outside_request_context = False
+        _outside_request_session.remove()
+
+
+def _get_primary_session():
+    if getattr(_thread_state, "outside_request_context", False):
+        return _outside_request_session
+
     try:
         current_app._get_current_object()
     except RuntimeError as exc:
@@ -51,6 +97,38 @@ def _get_session():
     return app.scoped_session
 
 
+def _get_read_session():
+    """
+    Return the session bound to the read replica, or the primary session if
+    the replica is not configured or not usable (see
+    `conbench.db.read_session_maker()`).
+
+    Within an app context the decision is made once and then sticks, so that
+    all reads see the same database.
+    """
+    # Avoid circular import.
+    import conbench.db
+
+    if not has_app_context():
+        return _get_primary_session()
+
+    use_replica = g.get("_db_replica_usable")
+    if use_replica is None:
+        use_replica = conbench.db.read_session_maker() is not conbench.db.session_maker
+        g._db_replica_usable = use_replica
+
+    if not use_replica:
+        return _get_primary_session()
+
+    # See _get_primary_session() for the pytest special case.
+    app = current_app._get_current_object()
+    if not hasattr(app, "scoped_read_session"):
+        if os.environ.get("PYTEST_CURRENT_TEST"):
+            return conbench.db._replica_session
+        raise AttributeError(f"{app} has no 'scoped_read_session' attribute")
+    return app.scoped_read_session
+
+
 # LocalProxy is not a good type hint. When used, this object acts as a scoped_session.
 # This type hint allows all SQLAlchemy query results to also be type hinted.
 current_session: scoped_session = LocalProxy(_get_session)  # type: ignore[assignment]
@@ -60,6 +138,56 @@ Will raise an exception if no :data:`~flask.current_app` is available or it has
 not been initialized with a :class:`flask_scoped_session`
 """
 
+current_read_session: scoped_session = LocalProxy(_get_read_session)  # type: ignore[assignment]
+"""Like `current_session`, but bound to the read replica if one is configured
+and usable. Only use for reads that tolerate slightly stale data (i.e. not for
+read-your-writes).
+"""
+
+
+def read_from_replica(func):
+    """
+    Decorator for read-only HTTP request handlers: make `current_session`
+    resolve to `current_read_session` for the duration of the request.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Restore the previous value afterwards: UI views call API handlers
+        # in-process, sharing the app context (and therefore `g`).
+        previous = g.get("_db_read_from_replica", False)
+        g._db_read_from_replica = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            g._db_read_from_replica = previous
+
+    return wrapper
+
+
+def keep_session_choice(items: Iterable[T]) -> Iterator[T]:
+    """
+    Iterate over `items` with `current_session` resolving like it does now
+    (e.g. within a `read_from_replica` handler). For iterables consumed only
+    after the request handler has returned, e.g. while streaming a response.
+    """
+    from_replica = g.get("_db_read_from_replica", False)
+
+    def gen() -> Iterator[T]:
+        it = iter(items)
+        while True:
+            previous = g.get("_db_read_from_replica", False)
+            g._db_read_from_replica = from_replica
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                g._db_read_from_replica = previous
+            yield item
+
+    return gen()
+
 
 class flask_scoped_session(scoped_session):
     """A :class:`~sqlalchemy.orm.scoping.scoped_session` whose scope is set to
@@ -88,7 +216,13 @@ class flask_scoped_session(scoped_session):
             self.init_app(app)
 
     def init_app(self, app):
+        # Avoid circular import.
+        from conbench.db import replica_session_maker
+
         app.scoped_session = self
+        app.scoped_read_session = scoped_session(
+            replica_session_maker, scopefunc=get_cur_thread
+        )
 
         @app.teardown_appcontext
         def remove_scoped_session(*args, **kwargs):
@@ -101,3 +235,4 @@ class flask_scoped_session(scoped_session):
             # is documented here:
             # https://docs.sqlalchemy.org/en/14/orm/contextual.html#sqlalchemy.orm.scoped_session.remove
             app.scoped_session.remove()
+            app.scoped_read_session.remove()
@@ -5,7 +5,7 @@ import flask as f
 import sqlalchemy
 from sqlalchemy import distinct, select
 from sqlalchemy.dialects.postgresql import insert as postgresql_insert
-from sqlalchemy.orm import declarative_base, mapped_column
+from sqlalchemy.orm import DeclarativeBase, mapped_column
 from sqlalchemy.orm.exc import NoResultFound
 
 # Use stdlib once that's there:
@@ -14,7 +14,11 @@ from uuid_extensions import uuid7
 
 from conbench.dbsession import current_session
 
-Base = declarative_base()
+
+class Base(DeclarativeBase):
+    pass
+
+
 NotNull = functools.partial(mapped_column, nullable=False)
 Nullable = functools.partial(mapped_column, nullable=True)
 
@@ -35,6 +39,19 @@ class EntityExists(Exception):
     pass
 
 
+def commit_unless_nested() -> None:
+    """
+    Commit the session's transaction. Within a savepoint (see
+    `Session.begin_nested()`) only flush instead: then whoever opened the
+    savepoint decides about committing, e.g. to write many entities in one
+    transaction (see the NDJSON ingest endpoint).
+    """
+    if current_session().in_nested_transaction():
+        current_session.flush()
+    else:
+        current_session.commit()
+
+
 def genprimkey():
     """
     Return a UUID type 7 as a 32-character lowercase hexadecimal string.
@@ -144,7 +161,7 @@ class EntityMixin(Generic[T]):
     @classmethod
     def delete_all(cls):
         current_session.query(cls).delete()
-        current_session.commit()
+        commit_unless_nested()
 
     @classmethod
     def create(cls, data):
@@ -157,12 +174,12 @@ class EntityMixin(Generic[T]):
         """Try to insert rows. If there is a conflict on any row, ignore that row."""
         statement = postgresql_insert(cls).values(row_list).on_conflict_do_nothing()
         current_session.execute(statement)
-        current_session.commit()
+        commit_unless_nested()
 
     @classmethod
     def bulk_save_objects(self, bulk):
         current_session.bulk_save_objects(bulk)
-        current_session.commit()
+        commit_unless_nested()
 
     def update(self, data):
         for field, value in data.items():
@@ -171,11 +188,11 @@ class EntityMixin(Generic[T]):
 
     def save(self):
         current_session.add(self)
-        current_session.commit()
+        commit_unless_nested()
 
     def delete(self):
         current_session.delete(self)
-        current_session.commit()
+        commit_unless_nested()
 
     @classmethod
     def get_or_create(cls: Type[T], props: Dict) -> T:
@@ -196,18 +213,21 @@ class EntityMixin(Generic[T]):
             return result
 
         obj = cls(**props)
-        current_session.add(obj)
         try:
-            current_session.commit()
-            return obj
+            # Use a savepoint so that a conflict does not roll back the
+            # caller's (potentially larger) transaction.
+            with current_session.begin_nested():
+                current_session.add(obj)
         except sqlalchemy.exc.IntegrityError as exc:
             if "violates unique constraint" not in str(exc):
                 raise
+        else:
+            commit_unless_nested()
+            return obj
 
         # When we end up here it means that a unique key constraint was
         # violated. We did hit a narrow race condition: query failed, creation
         # failed. Query again.
-        current_session.rollback()
         result = _fetch_first()
         assert result is not None
         return result
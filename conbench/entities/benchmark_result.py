@@ -1,23 +1,42 @@
 import functools
 import hashlib
+import itertools
 import logging
 import math
+import re
 import statistics
 import time
+from collections import defaultdict
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Tuple, Union, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Container,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 from urllib.parse import urlparse
 
 import flask as f
 import marshmallow
 import numpy as np
+import orjson
 import sigfig
 import sqlalchemy as s
 from sqlalchemy import CheckConstraint as check
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Mapped, relationship
 
+import conbench.invalidation
+import conbench.partitions
 import conbench.units
 import conbench.util
 from conbench.config import Config
@@ -32,6 +51,7 @@ from ..entities._entity import (
     EntitySerializer,
     NotNull,
     Nullable,
+    commit_unless_nested,
     genprimkey,
     to_float,
 )
@@ -53,6 +73,7 @@ from ..entities.hardware import (
     MachineSchema,
 )
 from ..entities.info import Info
+from ..entities.run import Run
 
 log = logging.getLogger(__name__)
 
@@ -61,8 +82,56 @@ class BenchmarkResultValidationError(Exception):
     pass
 
 
+# The keys of the JSON object representing a benchmark result in the HTTP API
+# (without the keys that require joins, see to_dict_for_json_api()), in
+# output order.
+_JSON_API_FIELDS: Dict[str, Callable[["BenchmarkResult"], Any]] = {
+    "id": lambda r: r.id,
+    "run_id": lambda r: r.run_id,
+    "run_tags": lambda r: r.run_tags,
+    "run_reason": lambda r: r.run_reason,
+    "commit_repo_url": lambda r: r.commit_repo_url,
+    "batch_id": lambda r: r.batch_id,
+    "history_fingerprint": lambda r: r.history_fingerprint,
+    "timestamp": lambda r: conbench.util.tznaive_dt_to_aware_iso8601_for_api(
+        r.timestamp
+    ),
+    "optional_benchmark_info": lambda r: r.optional_benchmark_info,
+    "validation": lambda r: r.validation,
+    "change_annotations": lambda r: r.change_annotations or {},
+    # Built from _JSON_API_STATS_FIELDS.
+    "stats": lambda r: None,
+    "error": lambda r: r.error,
+}
+
+_JSON_API_STATS_FIELDS: Dict[str, Callable[["BenchmarkResult"], Any]] = {
+    "data": lambda r: [to_float(x) for x in r.data or []],
+    "times": lambda r: [to_float(x) for x in r.times or []],
+    "unit": lambda r: r.unit,
+    "time_unit": lambda r: r.time_unit,
+    "iterations": lambda r: r.iterations,
+    "min": lambda r: to_float(r.min),
+    "max": lambda r: to_float(r.max),
+    "mean": lambda r: to_float(r.mean),
+    "median": lambda r: to_float(r.median),
+    "stdev": lambda r: to_float(r.stdev),
+    "q1": lambda r: to_float(r.q1),
+    "q3": lambda r: to_float(r.q3),
+    "iqr": lambda r: to_float(r.iqr),
+}
+
+# Public, for validating sparse fieldset requests (see conbench/api/_fields.py).
+JSON_API_KEYS = tuple(_JSON_API_FIELDS)
+JSON_API_STATS_KEYS = tuple(_JSON_API_STATS_FIELDS)
+
+
 class BenchmarkResult(Base, EntityMixin):
     __tablename__ = "benchmark_result"
+    # Range-partitioned by timestamp, see conbench/partitions.py. The table's
+    # primary key must include the partition key: it is (id, timestamp). For
+    # the ORM, `id` alone identifies a result (a lookup by `id` alone probes
+    # every partition, see the notes in conbench/partitions.py).
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
     id: Mapped[str] = NotNull(s.String(50), primary_key=True, default=genprimkey)
     case_id: Mapped[str] = NotNull(s.String(50), s.ForeignKey("case.id"))
     info_id: Mapped[str] = NotNull(s.String(50), s.ForeignKey("info.id"))
@@ -139,7 +208,7 @@ class BenchmarkResult(Base, EntityMixin):
     # not store timezone information in this DB column. Instead, follow
     # timezone convention: the application code must make sure that what we
     # store is the user-given timestamp properly translated to UTC.
-    timestamp: Mapped[datetime] = NotNull(s.DateTime(timezone=False))
+    timestamp: Mapped[datetime] = NotNull(s.DateTime(timezone=False), primary_key=True)
     iterations: Mapped[Optional[int]] = Nullable(s.Integer)
 
     # Mean can only be None for errored BenchmarkResults. Is guaranteed to have
@@ -161,6 +230,17 @@ class BenchmarkResult(Base, EntityMixin):
     validation: Mapped[Optional[dict]] = Nullable(postgresql.JSONB)
     change_annotations: Mapped[Optional[dict]] = Nullable(postgresql.JSONB)
 
+    __mapper_args__ = {"primary_key": [id]}
+
+    if TYPE_CHECKING:
+        # Not stored in the database. Set in-place on some instances before
+        # serialization, by set_z_scores(), set_display_benchmark_name() and
+        # set_display_case_permutation().
+        # TODO: replace with actual properties.
+        display_bmname: str
+        display_case_perm: str
+        z_score: Optional[float]
+
     @staticmethod
     # We should work towards having a precise type annotation for `data`. It's
     # the result of a (marshmallow) schema-validated JSON deserialization, and
@@ -170,7 +250,7 @@ class BenchmarkResult(Base, EntityMixin):
     # pydantic -- I believe when defining a schema with pydantic, the
     # corresponding type information can be used for mypy automatically.
     # Also see https://stackoverflow.com/q/75662696/145400.
-    def create(userres) -> "BenchmarkResult":
+    def create(userres, save: bool = True) -> "BenchmarkResult":
         """
         `userres`: user-given Benchmark Result object, after JSON
         deserialization.
@@ -188,6 +268,11 @@ class BenchmarkResult(Base, EntityMixin):
 
         Raises BenchmarkResultValidationError, exc message is expected to be
         emitted to the HTTP client in a Bad Request response.
+
+        If `save` is False then the new BenchmarkResult object is returned
+        without being added to the session. The caller is then responsible for
+        adding it and for committing (this allows for inserting many results
+        in one transaction, see the NDJSON ingest endpoint).
         """
 
         validate_and_augment_result_tags(userres)
@@ -301,7 +386,8 @@ class BenchmarkResult(Base, EntityMixin):
             repo_url=repo_url,
         )
         benchmark_result = BenchmarkResult(**result_data_for_db)
-        benchmark_result.save()
+        if save:
+            benchmark_result.save()
 
         return benchmark_result
 
@@ -322,82 +408,132 @@ class BenchmarkResult(Base, EntityMixin):
 
         super().update(data)
 
-    def to_dict_for_json_api(benchmark_result, include_joins=True):
+    def to_dict_for_json_api(
+        benchmark_result,
+        include_joins=True,
+        fields: Optional[Container[str]] = None,
+    ):
+        """
+        If `fields` is given, only build the top-level keys (and the keys of
+        `stats`) for which `"<key>" in fields` (or `"stats.<key>" in fields`)
+        holds. Attributes required only for the other keys are not accessed
+        (they may not have been loaded, see loader_options_for_json_api()).
+        """
         # `self` is just convention :-P
-        out_dict = {
-            "id": benchmark_result.id,
-            "run_id": benchmark_result.run_id,
-            "run_tags": benchmark_result.run_tags,
-            "run_reason": benchmark_result.run_reason,
-            "commit_repo_url": benchmark_result.commit_repo_url,
-            "batch_id": benchmark_result.batch_id,
-            "history_fingerprint": benchmark_result.history_fingerprint,
-            "timestamp": conbench.util.tznaive_dt_to_aware_iso8601_for_api(
-                benchmark_result.timestamp
-            ),
-            "optional_benchmark_info": benchmark_result.optional_benchmark_info,
-            "validation": benchmark_result.validation,
-            "change_annotations": benchmark_result.change_annotations or {},
-            "stats": {
-                "data": [to_float(x) for x in benchmark_result.data],
-                "times": [to_float(x) for x in benchmark_result.times],
-                "unit": benchmark_result.unit,
-                "time_unit": benchmark_result.time_unit,
-                "iterations": benchmark_result.iterations,
-                "min": to_float(benchmark_result.min),
-                "max": to_float(benchmark_result.max),
-                "mean": to_float(benchmark_result.mean),
-                "median": to_float(benchmark_result.median),
-                "stdev": to_float(benchmark_result.stdev),
-                "q1": to_float(benchmark_result.q1),
-                "q3": to_float(benchmark_result.q3),
-                "iqr": to_float(benchmark_result.iqr),
-            },
-            "error": benchmark_result.error,
-        }
+        out_dict: Dict[str, Any] = {}
+        for key, getter in _JSON_API_FIELDS.items():
+            if fields is not None and key not in fields:
+                continue
+            if key == "stats":
+                out_dict["stats"] = {
+                    k: g(benchmark_result)
+                    for k, g in _JSON_API_STATS_FIELDS.items()
+                    if fields is None or f"stats.{k}" in fields
+                }
+                continue
+            out_dict[key] = getter(benchmark_result)
 
         if include_joins:
-            case = benchmark_result.case
-            # Note(JP): this is interesting, here we put the `name` and `id` keys
-            # into tags. That is, the `tags` as returned may look different from
-            # the tags as injected.
-            tags = {"name": case.name}
-            tags.update(case.tags)
-
-            if benchmark_result.commit:
-                commit_dict = CommitSerializer().many._dump(benchmark_result.commit)
-                commit_dict.pop("links", None)
-            else:
-                commit_dict = None
-
-            hardware_dict = HardwareSerializer().one.dump(benchmark_result.hardware)
-            hardware_dict.pop("links", None)
-
-            out_dict["tags"] = tags
-            out_dict["commit"] = commit_dict
-            out_dict["hardware"] = hardware_dict
-            out_dict["links"] = {
-                "list": f.url_for("api.benchmarks", _external=True),
-                "self": f.url_for(
-                    "api.benchmark",
-                    benchmark_result_id=benchmark_result.id,
-                    _external=True,
-                ),
-                "info": f.url_for(
-                    "api.info", info_id=benchmark_result.info_id, _external=True
-                ),
-                "context": f.url_for(
-                    "api.context",
-                    context_id=benchmark_result.context_id,
-                    _external=True,
-                ),
-                "run": f.url_for(
-                    "api.run", run_id=benchmark_result.run_id, _external=True
-                ),
-            }
+            if fields is None or "tags" in fields:
+                case = benchmark_result.case
+                # Note(JP): this is interesting, here we put the `name` and `id` keys
+                # into tags. That is, the `tags` as returned may look different from
+                # the tags as injected.
+                tags = {"name": case.name}
+                tags.update(case.tags)
+                out_dict["tags"] = tags
+
+            if fields is None or "commit" in fields:
+                if benchmark_result.commit:
+                    commit_dict = CommitSerializer().many._dump(benchmark_result.commit)
+                    commit_dict.pop("links", None)
+                else:
+                    commit_dict = None
+                out_dict["commit"] = commit_dict
+
+            if fields is None or "hardware" in fields:
+                hardware_dict = HardwareSerializer().one.dump(benchmark_result.hardware)
+                hardware_dict.pop("links", None)
+                out_dict["hardware"] = hardware_dict
+
+            if fields is None or "links" in fields:
+                out_dict["links"] = {
+                    "list": f.url_for("api.benchmarks", _external=True),
+                    "self": f.url_for(
+                        "api.benchmark",
+                        benchmark_result_id=benchmark_result.id,
+                        _external=True,
+                    ),
+                    "info": f.url_for(
+                        "api.info", info_id=benchmark_result.info_id, _external=True
+                    ),
+                    "context": f.url_for(
+                        "api.context",
+                        context_id=benchmark_result.context_id,
+                        _external=True,
+                    ),
+                    "run": f.url_for(
+                        "api.run", run_id=benchmark_result.run_id, _external=True
+                    ),
+                }
 
         return out_dict
 
+    @staticmethod
+    def loader_options_for_json_api(fields: Optional[Container[str]] = None):
+        """
+        Return ORM loader options for queries whose results are serialized
+        with to_dicts_for_json_api(): load case, commit and hardware with one
+        extra (`SELECT ... WHERE id IN (...)`) query each, instead of via
+        joins repeating the same commit/hardware columns for each result row.
+        Info and context are not needed (only their IDs are).
+
+        If `fields` is given (see to_dict_for_json_api()), only load the
+        columns and related entities required for building these fields.
+        """
+        options = [
+            s.orm.lazyload(BenchmarkResult.info),
+            s.orm.lazyload(BenchmarkResult.context),
+        ]
+        for key, rel in (
+            ("tags", BenchmarkResult.case),
+            ("commit", BenchmarkResult.commit),
+            ("hardware", BenchmarkResult.hardware),
+        ):
+            if fields is None or key in fields:
+                options.append(s.orm.selectinload(rel))
+            else:
+                options.append(s.orm.lazyload(rel))
+
+        if fields is None:
+            return options
+
+        columns = BenchmarkResult.columns_for_json_api(fields)
+        options.append(
+            s.orm.load_only(*(getattr(BenchmarkResult, c) for c in sorted(columns)))
+        )
+        return options
+
+    @staticmethod
+    def columns_for_json_api(fields: Container[str]) -> Set[str]:
+        """
+        Return the names of the columns required for building `fields` with
+        to_dict_for_json_api().
+        """
+        # The JSON keys are named like the columns they are built from.
+        columns = {"id"}
+        columns.update(k for k in _JSON_API_FIELDS if k != "stats" and k in fields)
+        columns.update(k for k in _JSON_API_STATS_FIELDS if f"stats.{k}" in fields)
+        if "tags" in fields:
+            columns.add("case_id")
+        if "commit" in fields:
+            columns.add("commit_id")
+        if "hardware" in fields:
+            columns.add("hardware_id")
+        if "links" in fields:
+            columns.update(("info_id", "context_id", "run_id"))
+        return columns
+
     @functools.cached_property
     def is_failed(self):
         """
@@ -407,19 +543,7 @@ class BenchmarkResult(Base, EntityMixin):
         The criteria are conventions that we (hopefully) apply consistently
         across components.
         """
-        if self.unit is None:
-            return True
-
-        if self.data is None:
-            return True
-
-        if self.error is not None:
-            return True
-
-        if do_iteration_samples_look_like_error(self.data):
-            return True
-
-        return False
+        return _is_failed(self.unit, self.data, self.error)
 
     @property
     def svs(self) -> float:
@@ -961,61 +1085,6 @@ def validate_and_augment_result_tags(userres: Any):
             )
 
 
-def fetch_one_result_per_each_of_n_recent_runs(n: int = 250) -> List[BenchmarkResult]:
-    """
-    Uses a special "skip scan" query tailored for current implementation details
-    (PostgreSQL 14, current DB schema). It is designed to quickly and efficiently obtain
-    a handful of benchmark result rows from the results table, with each result having a
-    unique run_id set, and results overall being sorted by time (most recent first). For
-    more detail, see https://github.com/conbench/conbench/issues/1466.
-
-    We used to scan all results, not limiting by timestamp. But the format of this query
-    means it cannot take any shortcuts, and must scan the entire results table for all
-    unique runs before sorting and limiting. This does not scale well. It's fine when
-    the DB can use the shared buffer cache, but after a while this cache expires and
-    this query can take >30s again reading all the data from disk. So we now filter to
-    14 days ago. This takes advantage of the (run_id, timestamp) index, which is only a
-    partial index: hence the '2023-11-19' filter. (This probably would be better handled
-    with something like TimescaleDB.)
-
-    Since this doesn't include joins, as of the time of writing we're still having to
-    reach out to the database to get commit and hardware information: one query per
-    result, I think. That SELECT query (one per result) will sometimes refer to the same
-    commit since there can be multiple runs per commit.
-    """
-    query_text = f"""
-        WITH RECURSIVE run_results AS (
-            (
-                SELECT *
-                FROM benchmark_result
-                WHERE timestamp > now() - INTERVAL '14 days'
-                AND timestamp > '2023-11-19'
-                ORDER BY run_id
-                LIMIT 1
-            )
-            UNION ALL
-            SELECT next_run.*
-            FROM run_results
-            CROSS JOIN LATERAL (
-                SELECT *
-                FROM benchmark_result
-                WHERE run_id > run_results.run_id
-                AND timestamp > now() - INTERVAL '14 days'
-                AND timestamp > '2023-11-19'
-                ORDER BY run_id
-                LIMIT 1
-            ) next_run
-        )
-        SELECT * FROM run_results
-        ORDER BY timestamp desc
-        LIMIT {n}
-    """
-    query = s.select(BenchmarkResult).from_statement(s.text(query_text))
-    # Need to type hint this again because from_statement() overrides the type hints.
-    bmrs: List[BenchmarkResult] = list(current_session.scalars(query, {"n": n}).all())
-    return bmrs
-
-
 def commit_fetch_info_and_create_in_db_if_not_exists(
     ghcommit: TypeCommitInfoGitHub,
 ) -> Commit:
@@ -1104,7 +1173,11 @@ def commit_fetch_info_and_create_in_db_if_not_exists(
         # `_guts()` is expected to raise IntegrityError when a concurrent racer
         # did insert the Commit object by now. This can happen, also see
         # https://github.com/conbench/conbench/issues/809
-        commit, created = _guts(ghcommit)
+        # Use a savepoint so that the conflict does not roll back the
+        # caller's (potentially larger) transaction.
+        with current_session.begin_nested():
+            commit, created = _guts(ghcommit)
+        commit_unless_nested()
     except s.exc.IntegrityError as exc:
         # Expected error example:
         #  sqlalchemy.exc.IntegrityError: (psycopg2.errors.UniqueViolation) \
@@ -1112,7 +1185,6 @@ def commit_fetch_info_and_create_in_db_if_not_exists(
         log.info("Ignored IntegrityError while inserting Commit: %s", exc)
         # Look up the Commit entity again because this function must return the
         # commit ID (DB primary key).
-        current_session.rollback()
         commit = Commit.first(
             sha=ghcommit["commit_hash"], repository=ghcommit["repo_url"]
         )
@@ -1163,7 +1235,9 @@ def generate_history_fingerprint(
     return hash.hexdigest()
 
 
-s.Index("benchmark_result_run_id_index", BenchmarkResult.run_id)
+# Note: the indexes below are defined on the partitioned table; PostgreSQL
+# creates (and maintains) a corresponding index on each partition.
+
 s.Index("benchmark_result_case_id_index", BenchmarkResult.case_id)
 
 # Note(JP): we provde an API endpoint that allows for querying all benchmark
@@ -1185,29 +1259,508 @@ s.Index(
 # History queries look for specific commit_ids
 s.Index("benchmark_result_commit_id_index", BenchmarkResult.commit_id)
 
-# These indexes are important for how /api/benchmark-results/ accesses the DB for
-# pagination.
-s.Index(
-    "benchmark_result_id_idx",
-    BenchmarkResult.id,
-    postgresql_where=(BenchmarkResult.timestamp >= "2023-06-03"),
-)
+# Pagination in /api/benchmark-results/ orders by id (uses the primary key
+# index, which starts with id). This one is for filtering by run_reason.
+# These used to be partial indexes (timestamp >= '2023-06-03'); with
+# partitioning, a timestamp filter excludes the legacy partition instead.
 s.Index(
     "benchmark_result_run_reason_id_idx",
     BenchmarkResult.run_reason,
     BenchmarkResult.id,
-    postgresql_where=(BenchmarkResult.timestamp >= "2023-06-03"),
 )
 
-# This powers fetch_one_result_per_each_of_n_recent_runs().
+# This powers lookups by run_id (and per-run maintenance of the `run`
+# table).
 s.Index(
     "benchmark_result_run_id_timestamp_idx",
     BenchmarkResult.run_id,
     BenchmarkResult.timestamp,
-    postgresql_where=(BenchmarkResult.timestamp >= "2023-11-19"),
 )
 
 
+@s.event.listens_for(BenchmarkResult.__table__, "after_create")
+def _create_partitions(target, connection, **kw):
+    conbench.partitions.create_initial_partitions(connection)
+
+
+class IdempotencyKeyMismatch(Exception):
+    """
+    Raised when an idempotency key is re-used with a different request body.
+    """
+
+
+class BenchmarkResultIdempotencyKey(Base, EntityMixin):
+    """
+    A client-provided key (via the `Idempotency-Key` request header) that
+    identifies one submission of a benchmark result. This allows for cheaply
+    detecting a repeated submission, e.g. the retry of a POST request that
+    timed out on the client side after the server already committed the
+    result.
+
+    Keys are scoped per user (one user cannot look up another user's result
+    by guessing a key). `body_hash` identifies the submitted document: a key
+    re-used for a different document is an error, not a replay.
+
+    This table is not partitioned (unlike benchmark_result): the primary key
+    enforces uniqueness across all partitions.
+    """
+
+    __tablename__ = "benchmark_result_idempotency_key"
+    user_id: Mapped[str] = NotNull(
+        s.String(50), s.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    key: Mapped[str] = NotNull(s.Text, primary_key=True)
+    body_hash: Mapped[str] = NotNull(s.Text)
+    # The partition key is part of the reference, so that looking up the
+    # result does not need to probe every partition.
+    benchmark_result_id: Mapped[str] = NotNull(s.String(50))
+    benchmark_result_timestamp: Mapped[datetime] = NotNull(s.DateTime(timezone=False))
+    __table_args__ = (
+        s.ForeignKeyConstraint(
+            ["benchmark_result_id", "benchmark_result_timestamp"],
+            ["benchmark_result.id", "benchmark_result.timestamp"],
+            ondelete="CASCADE",
+        ),
+    )
+
+    @staticmethod
+    def body_hash_for(doc: Any) -> str:
+        """
+        Return a hash of the (JSON-deserialized) document `doc`, independent
+        of key order and whitespace in the submitted JSON text.
+        """
+        return hashlib.sha256(
+            orjson.dumps(doc, option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()
+
+    @classmethod
+    def lookup(
+        cls, user_id: str, key: str, body_hash: str
+    ) -> Optional[BenchmarkResult]:
+        """
+        Return the benchmark result previously submitted by this user with
+        this key, or None. Raise IdempotencyKeyMismatch if the key was used
+        for a different document.
+        """
+        row = current_session.execute(
+            s.select(cls, BenchmarkResult)
+            .join(
+                BenchmarkResult,
+                s.and_(
+                    BenchmarkResult.id == cls.benchmark_result_id,
+                    BenchmarkResult.timestamp == cls.benchmark_result_timestamp,
+                ),
+            )
+            .where(cls.user_id == user_id, cls.key == key)
+        ).first()
+        if row is None:
+            return None
+
+        ikey, benchmark_result = row
+        if ikey.body_hash != body_hash:
+            raise IdempotencyKeyMismatch(
+                "Idempotency-Key was already used for a different request body"
+            )
+        return benchmark_result
+
+    @classmethod
+    def add_for(
+        cls, user_id: str, key: str, body_hash: str, benchmark_result: BenchmarkResult
+    ) -> None:
+        """
+        Record `key` for the (flushed) `benchmark_result`, in the session's
+        current transaction. Committing raises IntegrityError if the user
+        already used the key.
+        """
+        current_session.add(
+            cls(
+                user_id=user_id,
+                key=key,
+                body_hash=body_hash,
+                benchmark_result_id=benchmark_result.id,
+                benchmark_result_timestamp=benchmark_result.timestamp,
+            )
+        )
+
+
+class HistoryFingerprintVersion(Base, EntityMixin):
+    """
+    A change counter per history fingerprint. It is incremented whenever a
+    benchmark result with that fingerprint is inserted, updated or deleted
+    through the ORM (see _bump_history_fingerprint_versions()). A missing row
+    means version 0.
+
+    This is used for building (weak) ETags for responses that depend on the
+    history of a fingerprint (history, compare), see conbench/api/_etag.py.
+    """
+
+    __tablename__ = "history_fingerprint_version"
+    history_fingerprint: Mapped[str] = NotNull(s.Text, primary_key=True)
+    version: Mapped[int] = NotNull(s.BigInteger, server_default="0")
+
+
+@s.event.listens_for(s.orm.Session, "after_flush")
+def _bump_history_fingerprint_versions(session, flush_context):
+    fingerprints = {
+        obj.history_fingerprint
+        for obj in itertools.chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, BenchmarkResult) and obj.history_fingerprint
+    }
+    if not fingerprints:
+        return
+
+    # Part of the flushing transaction. Sort for a consistent row lock order
+    # across concurrent transactions (avoid deadlocks).
+    stmt = postgresql.insert(HistoryFingerprintVersion).values(
+        [{"history_fingerprint": fp, "version": 1} for fp in sorted(fingerprints)]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[HistoryFingerprintVersion.history_fingerprint],
+        set_={"version": HistoryFingerprintVersion.version + 1},
+    )
+    session.connection().execute(stmt)
+
+
+@s.event.listens_for(s.orm.Session, "after_flush")
+def _publish_result_changes(session, flush_context):
+    """
+    Let caches (in this and other processes) know about the benchmark results
+    inserted, updated or deleted in this flush, see conbench/invalidation.py.
+    """
+    results = [
+        obj
+        for obj in itertools.chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, BenchmarkResult)
+    ]
+    if not results:
+        return
+
+    conbench.invalidation.publish(
+        session,
+        conbench.invalidation.InvalidationEvent(
+            history_fingerprints={
+                r.history_fingerprint for r in results if r.history_fingerprint
+            },
+            run_ids={r.run_id for r in results},
+            result_ids={r.id for r in results},
+        ),
+    )
+
+
+def _is_failed(unit, data, error) -> bool:
+    """See BenchmarkResult.is_failed."""
+    if unit is None:
+        return True
+
+    if data is None:
+        return True
+
+    if error is not None:
+        return True
+
+    if do_iteration_samples_look_like_error(data):
+        return True
+
+    return False
+
+
+def _value_before_flush(obj: BenchmarkResult, attr: str):
+    hist = s.orm.attributes.get_history(obj, attr)
+    return hist.deleted[0] if hist.deleted else getattr(obj, attr)
+
+
+def _run_time_range_values() -> dict:
+    """
+    Values for updating the time range of a run from its (remaining)
+    results, cheap using the run_id/timestamp index. Keep the current value
+    if there are no results.
+    """
+    remaining = s.select(BenchmarkResult.timestamp).where(
+        BenchmarkResult.run_id == Run.id
+    )
+    return {
+        "first_timestamp": s.func.coalesce(
+            remaining.with_only_columns(
+                s.func.min(BenchmarkResult.timestamp)
+            ).scalar_subquery(),
+            Run.first_timestamp,
+        ),
+        "last_timestamp": s.func.coalesce(
+            remaining.with_only_columns(
+                s.func.max(BenchmarkResult.timestamp)
+            ).scalar_subquery(),
+            Run.last_timestamp,
+        ),
+    }
+
+
+# BenchmarkResult attribute -> Run column.
+_RUN_ATTRIBUTES = {
+    "run_reason": "reason",
+    "run_tags": "tags",
+    "commit_id": "commit_id",
+    "commit_repo_url": "commit_repo_url",
+    "hardware_id": "hardware_id",
+}
+
+
+@s.event.listens_for(s.orm.Session, "after_flush")
+def _update_runs(session, flush_context):
+    """
+    Maintain the `run` table (see Run) for benchmark results inserted or
+    deleted in this flush, within the flushing transaction.
+
+    When run-level attributes (e.g. the run reason) of an existing benchmark
+    result are changed, these are copied to the run. When its timestamp or
+    its failed state (see BenchmarkResult.is_failed) changes, the time range
+    or error count of the run is updated. Other updates (e.g. of change
+    annotations) do not affect the run.
+
+    The stored baseline candidates (see Run.baseline_candidates) of the
+    affected runs are dropped, and so are those of other runs whose baseline
+    search looked at the commits of the affected runs.
+    """
+    new_by_run_id = defaultdict(list)
+    for obj in session.new:
+        if isinstance(obj, BenchmarkResult):
+            new_by_run_id[obj.run_id].append(obj)
+
+    run_changes: Dict[str, dict] = {}
+    error_count_deltas: Dict[str, int] = defaultdict(int)
+    for obj in session.dirty:
+        if not isinstance(obj, BenchmarkResult):
+            continue
+
+        def changed(attr: str) -> bool:
+            # Do not load attributes that were not loaded (they did not change).
+            return s.orm.attributes.get_history(
+                obj, attr, passive=s.orm.attributes.PASSIVE_NO_INITIALIZE
+            ).has_changes()
+
+        changes = {
+            column: getattr(obj, attr)
+            for attr, column in _RUN_ATTRIBUTES.items()
+            if changed(attr)
+        }
+        if changed("timestamp"):
+            changes.update(_run_time_range_values())
+        if any(changed(attr) for attr in ("unit", "data", "error")):
+            # `is_failed` is cached.
+            obj.__dict__.pop("is_failed", None)
+            was_failed = _is_failed(
+                *(_value_before_flush(obj, a) for a in ("unit", "data", "error"))
+            )
+            error_count_deltas[obj.run_id] += int(obj.is_failed) - int(was_failed)
+        if changes:
+            run_changes.setdefault(obj.run_id, {}).update(changes)
+
+    for run_id, delta in error_count_deltas.items():
+        if delta:
+            run_changes.setdefault(run_id, {})["error_count"] = Run.error_count + delta
+
+    deleted_by_run_id = defaultdict(list)
+    for obj in session.deleted:
+        if isinstance(obj, BenchmarkResult):
+            deleted_by_run_id[obj.run_id].append(obj)
+
+    if not (new_by_run_id or run_changes or deleted_by_run_id):
+        return
+
+    conn = session.connection()
+
+    if new_by_run_id:
+        rows = []
+        # Sort for a consistent row lock order across concurrent
+        # transactions (avoid deadlocks).
+        for run_id, results in sorted(new_by_run_id.items()):
+            first = min(results, key=lambda r: r.timestamp)
+            rows.append(
+                {
+                    "id": run_id,
+                    "reason": first.run_reason,
+                    "tags": first.run_tags,
+                    "commit_id": first.commit_id,
+                    "commit_repo_url": first.commit_repo_url,
+                    "hardware_id": first.hardware_id,
+                    "first_timestamp": first.timestamp,
+                    "last_timestamp": max(r.timestamp for r in results),
+                    "result_count": len(results),
+                    "error_count": sum(1 for r in results if r.is_failed),
+                }
+            )
+        stmt = postgresql.insert(Run).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Run.id],
+            set_={
+                "result_count": Run.result_count + stmt.excluded.result_count,
+                "error_count": Run.error_count + stmt.excluded.error_count,
+                "first_timestamp": s.func.least(
+                    Run.first_timestamp, stmt.excluded.first_timestamp
+                ),
+                "last_timestamp": s.func.greatest(
+                    Run.last_timestamp, stmt.excluded.last_timestamp
+                ),
+                "baseline_candidates": None,
+                "baseline_commit_shas": None,
+            },
+        )
+        conn.execute(stmt)
+
+    for run_id, changes in sorted(run_changes.items()):
+        conn.execute(
+            s.update(Run)
+            .where(Run.id == run_id)
+            .values(**changes, baseline_candidates=None, baseline_commit_shas=None)
+        )
+
+    if deleted_by_run_id:
+        # Deleting results is rare. Determine the time range from the
+        # remaining results.
+        for run_id, results in sorted(deleted_by_run_id.items()):
+            conn.execute(
+                s.update(Run)
+                .where(Run.id == run_id)
+                .values(
+                    result_count=Run.result_count - len(results),
+                    error_count=Run.error_count
+                    - sum(1 for r in results if r.is_failed),
+                    **_run_time_range_values(),
+                )
+            )
+        conn.execute(
+            s.delete(Run).where(
+                Run.id.in_(list(deleted_by_run_id)), Run.result_count <= 0
+            )
+        )
+
+    commit_ids = {
+        r.commit_id
+        for r in itertools.chain(*new_by_run_id.values(), *deleted_by_run_id.values())
+        if r.commit_id
+    }
+    commit_ids.update(
+        c["commit_id"] for c in run_changes.values() if c.get("commit_id")
+    )
+    if commit_ids:
+        shas = (
+            s.select(s.cast(s.func.array_agg(Commit.sha), postgresql.ARRAY(s.Text)))
+            .where(Commit.id.in_(sorted(commit_ids)))
+            .scalar_subquery()
+        )
+        # This transaction already holds the locks of its own run rows, so
+        # waiting for the locks of other runs could deadlock with concurrent
+        # ingests. Skip rows locked by others: those are written by an ingest
+        # (which drops their stored candidates itself) or by a (short) store
+        # of a search result, see _store_candidate_baseline_runs().
+        stale = (
+            s.select(Run.id)
+            .where(Run.baseline_commit_shas.overlap(shas))
+            .with_for_update(skip_locked=True)
+        )
+        conn.execute(
+            s.update(Run)
+            .where(Run.id.in_(stale))
+            .values(baseline_candidates=None, baseline_commit_shas=None)
+        )
+
+
+# Characters that url_for() never percent-encodes in a path segment.
+_URL_SAFE_PATH_SEGMENT = re.compile(r"[A-Za-z0-9_.~-]+")
+
+
+class _URLTemplate:
+    """
+    Build external URLs for `endpoint` with a single path parameter by
+    string concatenation instead of calling `url_for()` each time (which is
+    comparatively expensive: rule matching, quoting, ...). Values that would
+    need quoting are passed through url_for().
+    """
+
+    _PLACEHOLDER = "0placeholder0"
+
+    def __init__(self, endpoint: str, argname: str):
+        self._endpoint = endpoint
+        self._argname = argname
+        url = f.url_for(endpoint, _external=True, **{argname: self._PLACEHOLDER})
+        self._prefix, self._suffix = url.split(self._PLACEHOLDER)
+
+    def __call__(self, value: str) -> str:
+        if _URL_SAFE_PATH_SEGMENT.fullmatch(value):
+            return f"{self._prefix}{value}{self._suffix}"
+        return f.url_for(self._endpoint, _external=True, **{self._argname: value})
+
+
+def to_dicts_for_json_api(
+    benchmark_results: Sequence[BenchmarkResult],
+    fields: Optional[Container[str]] = None,
+) -> List[dict]:
+    """
+    Like `[r.to_dict_for_json_api(fields=fields) for r in benchmark_results]`,
+    but faster for many results: each distinct case, commit and hardware is
+    serialized only once (the resulting dicts are shared between items, do
+    not mutate them), and links are built from URL templates.
+
+    Meant to be used with BenchmarkResult.loader_options_for_json_api().
+    """
+
+    def want(key: str) -> bool:
+        return fields is None or key in fields
+
+    if want("links"):
+        list_url = f.url_for("api.benchmarks", _external=True)
+        self_url = _URLTemplate("api.benchmark", "benchmark_result_id")
+        info_url = _URLTemplate("api.info", "info_id")
+        context_url = _URLTemplate("api.context", "context_id")
+        run_url = _URLTemplate("api.run", "run_id")
+
+    tags_by_case_id: Dict[str, dict] = {}
+    commit_by_id: Dict[str, dict] = {}
+    hardware_by_id: Dict[str, dict] = {}
+    commit_serializer = CommitSerializer().many
+
+    out = []
+    for r in benchmark_results:
+        d = r.to_dict_for_json_api(include_joins=False, fields=fields)
+
+        if want("tags"):
+            tags = tags_by_case_id.get(r.case_id)
+            if tags is None:
+                tags = {"name": r.case.name}
+                tags.update(r.case.tags)
+                tags_by_case_id[r.case_id] = tags
+            d["tags"] = tags
+
+        if want("commit"):
+            commit_dict = None
+            if r.commit_id is not None:
+                commit_dict = commit_by_id.get(r.commit_id)
+                if commit_dict is None:
+                    commit_dict = commit_serializer._dump(r.commit)
+                    commit_dict.pop("links", None)
+                    commit_by_id[r.commit_id] = commit_dict
+            d["commit"] = commit_dict
+
+        if want("hardware"):
+            hardware_dict = hardware_by_id.get(r.hardware_id)
+            if hardware_dict is None:
+                hardware_dict = r.hardware.serialize()
+                hardware_dict.pop("links", None)
+                hardware_by_id[r.hardware_id] = hardware_dict
+            d["hardware"] = hardware_dict
+
+        if want("links"):
+            d["links"] = {
+                "list": list_url,
+                "self": self_url(r.id),
+                "info": info_url(r.info_id),
+                "context": context_url(r.context_id),
+                "run": run_url(r.run_id),
+            }
+        out.append(d)
+
+    return out
+
+
 class _Serializer(EntitySerializer):
     def _dump(self, benchmark_result):
         return benchmark_result.to_dict_for_json_api()
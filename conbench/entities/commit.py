@@ -318,6 +318,15 @@ s.Index(
     unique=True,
 )
 
+# The latest commit on the default branch of a repository (fork_point_sha is
+# the commit's own hash for commits on the default branch).
+s.Index(
+    "commit_default_branch_repository_timestamp_index",
+    Commit.repository,
+    Commit.timestamp,
+    postgresql_where=Commit.sha == Commit.fork_point_sha,
+)
+
 
 class _Serializer(EntitySerializer):
     def _dump(self, commit):
@@ -924,7 +933,7 @@ class GitHubHTTPApiClient:
             reqquota = int(resp.headers["x-ratelimit-remaining"])
             metrics.GAUGE_GITHUB_HTTP_API_QUOTA_REMAINING.set(reqquota)
             # Setting this to `True` stops a thread from periodically setting
-            # this to -1, see metrics.periodically_set_q_rem()
+            # this to -1, see metrics.reinforce_q_rem_initial_value()
             metrics.gauge_gh_api_rem_set["first_value_seen"] = True
 
         # In the code block below `resp` reflects an actual HTTP response.
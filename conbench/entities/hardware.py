@@ -35,6 +35,10 @@ class Hardware(Base, EntityMixin):
     def generate_hash(self):
         pass
 
+    @abc.abstractmethod
+    def serialize(self):
+        pass
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.hash = self.generate_hash()
@@ -5,18 +5,21 @@ import decimal
 import logging
 import math
 from collections import defaultdict
-from typing import Dict, List, Optional, Tuple, Union, cast
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 import numpy as np
 import pandas as pd
 import sqlalchemy as s
+from sqlalchemy.orm import InstrumentedAttribute
 
 import conbench.units
 from conbench.dbsession import current_session
 from conbench.types import TBenchmarkName, THistFingerprint
+from conbench.util import tznaive_dt_to_aware_iso8601_for_api
 
 from ..config import Config
 from ..entities.benchmark_result import BenchmarkResult
+from ..entities.case import Case
 from ..entities.commit import CantFindAncestorCommitsError, Commit
 from ..entities.hardware import Hardware
 
@@ -269,6 +272,156 @@ def get_history_for_fingerprint(
     return samples
 
 
+# Bucket types for get_history_buckets(): calendar day / week of the commit
+# timestamp, or a fixed number of consecutive commits.
+HISTORY_BUCKET_TYPES = ("day", "week", "commits")
+
+
+@dataclasses.dataclass
+class HistoryBucket:
+    """Aggregated SVS of the results of one history fingerprint in a bucket."""
+
+    # Earliest / latest commit timestamp in the bucket.
+    start: datetime.datetime
+    end: datetime.datetime
+    count: int
+    mean: float
+    min: float
+    max: float
+    p50: float
+    p90: float
+
+    def _dict_for_api_json(self) -> dict:
+        d = dataclasses.asdict(self)
+        d["start"] = tznaive_dt_to_aware_iso8601_for_api(self.start)
+        d["end"] = tznaive_dt_to_aware_iso8601_for_api(self.end)
+        return d
+
+
+@dataclasses.dataclass
+class HistoryBuckets:
+    history_fingerprint: THistFingerprint
+    benchmark_name: TBenchmarkName
+    unit: str
+    buckets: List[HistoryBucket]
+
+    def _dict_for_api_json(self) -> dict:
+        return {
+            "history_fingerprint": self.history_fingerprint,
+            "benchmark_name": self.benchmark_name,
+            "unit": self.unit,
+            "buckets": [b._dict_for_api_json() for b in self.buckets],
+        }
+
+
+def get_history_buckets(
+    bucket_type: str,
+    history_fingerprints: Optional[List[THistFingerprint]] = None,
+    benchmark_name: Optional[TBenchmarkName] = None,
+    commits_per_bucket: int = 10,
+    earliest_commit_timestamp: Optional[datetime.datetime] = None,
+    latest_commit_timestamp: Optional[datetime.datetime] = None,
+) -> List[HistoryBuckets]:
+    """
+    Return the history (same set of results as get_history_for_fingerprint():
+    non-errored, on the default branch) of the given history fingerprints, or
+    of all history fingerprints of the given benchmark name, aggregated into
+    buckets along the commit timestamp axis. Per bucket, return count, mean,
+    min, max, median and 90th percentile of the single value summary.
+
+    The aggregation is done in the database; only one row per bucket is
+    transferred. Buckets are sorted by time (old -> new).
+    """
+    assert bucket_type in HISTORY_BUCKET_TYPES
+    assert history_fingerprints or benchmark_name
+
+    filters = [
+        BenchmarkResult.error.is_(None),
+        BenchmarkResult.mean.is_not(None),
+        BenchmarkResult.unit.is_not(None),
+        Commit.sha == Commit.fork_point_sha,
+        Commit.timestamp.is_not(None),
+    ]
+    if history_fingerprints:
+        filters.append(BenchmarkResult.history_fingerprint.in_(history_fingerprints))
+    if benchmark_name:
+        filters.append(Case.name == benchmark_name)
+    if earliest_commit_timestamp is not None:
+        filters.append(Commit.timestamp >= earliest_commit_timestamp)
+    if latest_commit_timestamp is not None:
+        filters.append(Commit.timestamp <= latest_commit_timestamp)
+
+    if bucket_type == "commits":
+        # 0-based index of the commit within the history, integer-divided.
+        bucket_col = (
+            s.func.dense_rank().over(
+                partition_by=BenchmarkResult.history_fingerprint,
+                order_by=(Commit.timestamp, Commit.id),
+            )
+            - 1
+        ) // commits_per_bucket
+    else:
+        bucket_col = s.func.date_trunc(bucket_type, Commit.timestamp)
+
+    samples = (
+        s.select(
+            BenchmarkResult.history_fingerprint.label("history_fingerprint"),
+            Case.name.label("benchmark_name"),
+            BenchmarkResult.unit.label("unit"),
+            Commit.timestamp.label("commit_timestamp"),
+            s.cast(_svs_column(), s.Float).label("svs"),
+            bucket_col.label("bucket"),
+        )
+        .join(Commit, Commit.id == BenchmarkResult.commit_id)
+        .join(Case, Case.id == BenchmarkResult.case_id)
+        .where(*filters)
+        .subquery()
+    )
+    svs = samples.c.svs
+    query = (
+        s.select(
+            samples.c.history_fingerprint,
+            s.func.min(samples.c.benchmark_name).label("benchmark_name"),
+            s.func.min(samples.c.unit).label("unit"),
+            s.func.min(samples.c.commit_timestamp).label("start"),
+            s.func.max(samples.c.commit_timestamp).label("end"),
+            s.func.count().label("count"),
+            s.func.avg(svs).label("mean"),
+            s.func.min(svs).label("min"),
+            s.func.max(svs).label("max"),
+            s.func.percentile_cont(0.5).within_group(svs).label("p50"),
+            s.func.percentile_cont(0.9).within_group(svs).label("p90"),
+        )
+        .group_by(samples.c.history_fingerprint, samples.c.bucket)
+        .order_by(samples.c.history_fingerprint, "start")
+    )
+
+    series: Dict[THistFingerprint, HistoryBuckets] = {}
+    for row in current_session.execute(query):
+        if row.history_fingerprint not in series:
+            series[row.history_fingerprint] = HistoryBuckets(
+                history_fingerprint=row.history_fingerprint,
+                benchmark_name=row.benchmark_name,
+                unit=row.unit,
+                buckets=[],
+            )
+        series[row.history_fingerprint].buckets.append(
+            HistoryBucket(
+                start=row.start,
+                end=row.end,
+                # `row.count` is the tuple method.
+                count=row._mapping["count"],
+                mean=row.mean,
+                min=row.min,
+                max=row.max,
+                p50=row.p50,
+                p90=row.p90,
+            )
+        )
+
+    return list(series.values())
+
+
 def set_z_scores(
     contender_benchmark_results: List[BenchmarkResult],
     baseline_commit: Commit,
@@ -309,39 +462,11 @@ def set_z_scores(
         )
 
 
-def _query_and_calculate_distribution_stats(
-    baseline_commit: Commit, history_fingerprints: List[THistFingerprint]
-) -> Dict[THistFingerprint, Tuple[Optional[float], Optional[float]]]:
-    """Query and calculate rolling stats of the distribution of all BenchmarkResults
-    that:
-
-    - are associated with any of the last DISTRIBUTION_COMMITS commits in the
-      baseline_commit's git ancestry (inclusive)
-    - have no errors
-
-    The calculations are grouped by history fingerprint, returning a dict that looks
-    like:
-
-    ``{history_fingerprint: (dist_mean, dist_stddev)}``
-
-    Only do the calculation for the given history_fingerprints.
-
-    For further detail on the stats columns, see the docs of
-    ``_add_rolling_stats_columns_to_df()``.
+def _svs_column() -> Union[s.ColumnElement[Any], InstrumentedAttribute[Any]]:
+    """
+    Return a SQL expression for the single value summary (SVS) of a benchmark
+    result, see BenchmarkResult.svs. Only meaningful for non-errored results.
     """
-    try:
-        commit_ancestry_query = baseline_commit.commit_ancestry_query.order_by(
-            s.desc("commit_order")
-        ).limit(Config.DISTRIBUTION_COMMITS)
-    except CantFindAncestorCommitsError as e:
-        log.debug(f"Couldn't _query_and_calculate_distribution_stats() because {e}")
-        return {}
-
-    commit_ancestry_info = commit_ancestry_query.all()
-    commit_timestamps_by_id = {
-        row.ancestor_id: row.ancestor_timestamp for row in commit_ancestry_info
-    }
-
     # Note[austin]: Okay. Pros and cons here. This is not DRY, so we have to maintain
     # this logic in addition to the SVS logic in benchmark_result.py. Also, the SVS is
     # not exactly equivalent to the mean/min/max in all cases because of "errored
@@ -379,6 +504,44 @@ def _query_and_calculate_distribution_stats(
     else:
         raise ValueError("server is not configured properly")
 
+    return svs_col
+
+
+def _query_and_calculate_distribution_stats(
+    baseline_commit: Commit, history_fingerprints: List[THistFingerprint]
+) -> Dict[THistFingerprint, Tuple[Optional[float], Optional[float]]]:
+    """Query and calculate rolling stats of the distribution of all BenchmarkResults
+    that:
+
+    - are associated with any of the last DISTRIBUTION_COMMITS commits in the
+      baseline_commit's git ancestry (inclusive)
+    - have no errors
+
+    The calculations are grouped by history fingerprint, returning a dict that looks
+    like:
+
+    ``{history_fingerprint: (dist_mean, dist_stddev)}``
+
+    Only do the calculation for the given history_fingerprints.
+
+    For further detail on the stats columns, see the docs of
+    ``_add_rolling_stats_columns_to_df()``.
+    """
+    try:
+        commit_ancestry_query = baseline_commit.commit_ancestry_query.order_by(
+            s.desc("commit_order")
+        ).limit(Config.DISTRIBUTION_COMMITS)
+    except CantFindAncestorCommitsError as e:
+        log.debug(f"Couldn't _query_and_calculate_distribution_stats() because {e}")
+        return {}
+
+    commit_ancestry_info = commit_ancestry_query.all()
+    commit_timestamps_by_id = {
+        row.ancestor_id: row.ancestor_timestamp for row in commit_ancestry_info
+    }
+
+    svs_col = _svs_column()
+
     # Find all historic results in the distribution to analyze.
     history = s.select(
         BenchmarkResult.commit_id,
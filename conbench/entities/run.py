@@ -0,0 +1,105 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import sqlalchemy as s
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Mapped, relationship
+
+from conbench.dbsession import current_session
+
+from ..entities._entity import Base, EntityMixin, NotNull, Nullable
+from ..entities.commit import Commit
+from ..entities.hardware import Hardware
+
+
+class Run(Base, EntityMixin["Run"]):
+    """
+    Aggregated information about a run: the benchmark results sharing a
+    `run_id`.
+
+    Rows are maintained when benchmark results are inserted or deleted
+    through the ORM (see `_update_runs()` in benchmark_result.py), in the
+    same transaction. Runs do not have to be created explicitly.
+
+    Reason, tags, commit and hardware are taken from the first benchmark
+    result inserted for the run (these are expected to be the same for all
+    results of a run), and updated when changed on any of its results.
+    """
+
+    __tablename__ = "run"
+    # The run_id of the benchmark results.
+    id: Mapped[str] = NotNull(s.Text, primary_key=True)
+    reason: Mapped[Optional[str]] = Nullable(s.Text)
+    tags: Mapped[Dict[str, str]] = NotNull(postgresql.JSONB)
+
+    commit_id: Mapped[Optional[str]] = Nullable(s.ForeignKey("commit.id"))
+    commit: Mapped[Optional[Commit]] = relationship("Commit", lazy="joined")
+    commit_repo_url: Mapped[str] = NotNull(s.Text)
+
+    hardware_id: Mapped[str] = NotNull(s.String(50), s.ForeignKey("hardware.id"))
+    hardware: Mapped[Hardware] = relationship("Hardware", lazy="joined")
+
+    # Earliest and latest benchmark result timestamp.
+    first_timestamp: Mapped[datetime] = NotNull(s.DateTime(timezone=False))
+    last_timestamp: Mapped[datetime] = NotNull(s.DateTime(timezone=False))
+
+    result_count: Mapped[int] = NotNull(s.Integer)
+    # The number of results considered failed, see BenchmarkResult.is_failed.
+    error_count: Mapped[int] = NotNull(s.Integer)
+
+    # The candidate baseline runs (see get_candidate_baseline_runs() in
+    # conbench/api/runs.py) as stored after the last search, and the commit
+    # hashes that search looked at (it needs to be repeated when runs on any
+    # of these commits change). Both are NULL if there is no up-to-date
+    # search result; see _update_runs() in benchmark_result.py.
+    baseline_candidates: Mapped[Optional[dict]] = Nullable(postgresql.JSONB)
+    baseline_commit_shas: Mapped[Optional[List[str]]] = Nullable(
+        postgresql.ARRAY(s.Text)
+    )
+
+    @property
+    def has_errors(self) -> bool:
+        return self.error_count > 0
+
+
+# Listing recent runs (keyset pagination on (first_timestamp, id)), also
+# filtered by repository, hardware or reason.
+s.Index("run_first_timestamp_id_index", Run.first_timestamp, Run.id)
+s.Index(
+    "run_commit_repo_url_first_timestamp_id_index",
+    Run.commit_repo_url,
+    Run.first_timestamp,
+    Run.id,
+)
+s.Index(
+    "run_hardware_id_first_timestamp_id_index",
+    Run.hardware_id,
+    Run.first_timestamp,
+    Run.id,
+)
+s.Index("run_reason_first_timestamp_id_index", Run.reason, Run.first_timestamp, Run.id)
+
+# Runs for a commit (listing, baseline run search).
+s.Index("run_commit_id_index", Run.commit_id)
+
+# Invalidating stored baseline candidates when runs on a commit change.
+s.Index(
+    "run_baseline_commit_shas_index",
+    Run.baseline_commit_shas,
+    postgresql_using="gin",
+)
+# Finding recent runs without (up-to-date) baseline candidates.
+s.Index(
+    "run_baseline_candidates_missing_index",
+    Run.last_timestamp,
+    postgresql_where=Run.baseline_candidates.is_(None),
+)
+
+
+def fetch_recent_runs(n: int = 250) -> List[Run]:
+    """
+    Return the `n` most recent runs (most recent first), with their commit
+    and hardware loaded.
+    """
+    query = s.select(Run).order_by(Run.first_timestamp.desc()).limit(n)
+    return list(current_session.scalars(query).all())
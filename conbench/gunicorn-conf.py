@@ -59,7 +59,9 @@ worker_connections = 400
 def post_worker_init(worker):
     # Starting the BMRT cache job machinery in this hook means that it is not
     # automatically started as a side-effect by creating / importing the
-    # WSGI/Flask application object.
+    # WSGI/Flask application object. With CONBENCH_JOBS_IN_WORKER=true the
+    # heavy jobs are left to a separate `conbench worker` process (see
+    # conbench/job.py).
     import conbench
 
     worker.log.info("gunicorn post_worker_init hook: conbench.job.start_jobs()")
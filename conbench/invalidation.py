@@ -0,0 +1,208 @@
+"""
+Cross-process cache invalidation via PostgreSQL LISTEN/NOTIFY.
+
+Writes of benchmark results through the ORM publish an `InvalidationEvent`
+(the affected history fingerprints, run IDs and result IDs; see
+`_publish_result_changes()` in benchmark_result.py). The event is sent with
+`pg_notify()` as part of the writing transaction: Postgres delivers it to
+listeners only if and when that transaction commits.
+
+Caches subscribe with a handler (see subscribe()). Handlers are called
+
+- in the writing process, right after the commit (after_commit hook), and
+- in every other process running the listener job (see listen()), shortly
+  after the commit.
+
+Handlers are called from arbitrary threads and must be quick (e.g. drop
+cache items, set a flag). When details may have been lost (the payload
+exceeded the NOTIFY size limit, or the listener (re)connected and may have
+missed events) handlers get an event with `everything` set.
+"""
+
+import dataclasses
+import json
+import logging
+import os
+import select
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import sqlalchemy as s
+import sqlalchemy.orm
+
+log = logging.getLogger(__name__)
+
+CHANNEL = "conbench_invalidation"
+
+# Postgres' limit is 8000 bytes (in the default configuration).
+_MAX_PAYLOAD_BYTES = 7800
+
+_SESSION_INFO_KEY = "conbench_invalidation_event"
+
+
+@dataclasses.dataclass
+class InvalidationEvent:
+    history_fingerprints: Set[str] = dataclasses.field(default_factory=set)
+    run_ids: Set[str] = dataclasses.field(default_factory=set)
+    result_ids: Set[str] = dataclasses.field(default_factory=set)
+    # If set: anything may have changed.
+    everything: bool = False
+    # The sending process (for events received from the listener).
+    origin: Optional[str] = None
+
+    def merge(self, other: "InvalidationEvent") -> None:
+        self.history_fingerprints |= other.history_fingerprints
+        self.run_ids |= other.run_ids
+        self.result_ids |= other.result_ids
+        self.everything = self.everything or other.everything
+
+    def to_payload(self, origin: str) -> str:
+        """
+        Serialize for pg_notify(). Drop all detail (set `everything`) if the
+        payload would exceed the size limit, e.g. for large bulk inserts.
+        """
+        everything = json.dumps({"o": origin, "all": True})
+        if self.everything:
+            return everything
+
+        doc: Dict[str, Any] = {
+            "o": origin,
+            "f": sorted(self.history_fingerprints),
+            "r": sorted(self.run_ids),
+            "b": sorted(self.result_ids),
+        }
+        payload = json.dumps(doc, separators=(",", ":"))
+        if len(payload.encode()) > _MAX_PAYLOAD_BYTES:
+            return everything
+        return payload
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "InvalidationEvent":
+        doc = json.loads(payload)
+        return cls(
+            history_fingerprints=set(doc.get("f", [])),
+            run_ids=set(doc.get("r", [])),
+            result_ids=set(doc.get("b", [])),
+            everything=bool(doc.get("all", False)),
+            origin=doc.get("o"),
+        )
+
+
+_handlers: List[Callable[[InvalidationEvent], None]] = []
+
+
+def subscribe(handler: Callable[[InvalidationEvent], None]) -> None:
+    """
+    Register `handler` to be called for every invalidation event (in this
+    process). Typically called at module import time.
+    """
+    _handlers.append(handler)
+
+
+def dispatch(event: InvalidationEvent) -> None:
+    """Call all handlers (in this process) with `event`."""
+    for handler in _handlers:
+        try:
+            handler(event)
+        except Exception as exc:
+            log.exception("invalidation handler %s failed: %s", handler, exc)
+
+
+def _origin() -> str:
+    # Evaluated on use (not at import time): processes may be forked after
+    # import.
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def publish(session: sqlalchemy.orm.Session, event: InvalidationEvent) -> None:
+    """
+    Publish `event` as part of the session's current transaction: other
+    processes receive it when the transaction commits, handlers in this
+    process are called right after the commit. Meant to be called from an
+    after_flush hook.
+    """
+    session.connection().execute(
+        s.select(s.func.pg_notify(CHANNEL, event.to_payload(_origin())))
+    )
+    pending = session.info.get(_SESSION_INFO_KEY)
+    if pending is None:
+        session.info[_SESSION_INFO_KEY] = event
+    else:
+        pending.merge(event)
+
+
+@s.event.listens_for(sqlalchemy.orm.Session, "after_commit")
+def _dispatch_after_commit(session):
+    event = session.info.pop(_SESSION_INFO_KEY, None)
+    if event is not None:
+        dispatch(event)
+
+
+@s.event.listens_for(sqlalchemy.orm.Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop(_SESSION_INFO_KEY, None)
+
+
+_LISTENING = threading.Event()
+
+
+def is_listening() -> bool:
+    """
+    True if this process currently receives events from other processes
+    (the listener job is connected).
+    """
+    return _LISTENING.is_set()
+
+
+def listen(ctx) -> None:
+    """
+    Job function (see conbench.job): LISTEN for events from other processes
+    and dispatch them, until cancelled. Uses a dedicated DB connection
+    (outside of the pool). Raises on connection errors; the scheduler then
+    restarts this job.
+    """
+    # Avoid circular import.
+    import conbench.db
+
+    assert conbench.db.engine is not None
+    conn = conbench.db.engine.raw_connection()
+    # Do not occupy a pool slot for the lifetime of the process; close (not
+    # return) the connection when done.
+    conn.detach()
+    try:
+        dbapi_conn = conn.dbapi_connection
+        assert dbapi_conn is not None
+        dbapi_conn.autocommit = True
+        with dbapi_conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+        _LISTENING.set()
+        log.info("invalidation: listening on channel %s", CHANNEL)
+        # Events may have been missed while not listening.
+        dispatch(InvalidationEvent(everything=True))
+
+        origin = _origin()
+        while not ctx.cancelled:
+            if select.select([dbapi_conn], [], [], 1.0) == ([], [], []):
+                continue
+            dbapi_conn.poll()
+            while dbapi_conn.notifies:
+                _handle_notification(dbapi_conn.notifies.pop(0).payload, origin)
+    finally:
+        _LISTENING.clear()
+        conn.close()
+
+
+def _handle_notification(payload: str, origin: Optional[str] = None) -> None:
+    try:
+        event = InvalidationEvent.from_payload(payload)
+    except (ValueError, AttributeError) as exc:
+        log.warning("invalidation: ignore malformed payload %r: %s", payload, exc)
+        return
+
+    if origin is not None and event.origin == origin:
+        # Sent by this process, handlers were called after commit.
+        return
+
+    dispatch(event)
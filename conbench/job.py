@@ -1,19 +1,52 @@
 """
-Pragmatic job management. A job runs in a thread (which is not an HTTP-handling
-thread).
+Pragmatic job management: a small scheduler for periodic jobs. Each job runs
+in its own thread (which is not an HTTP-handling thread).
 
-Currently managed jobs:
+A job is a function taking a `JobContext`, registered with a `Scheduler` via
+a `Job` description: a fixed interval or a cron-like schedule (evaluated in
+UTC), optional jitter, a maximum runtime and optional mutual exclusion across
+processes (a Postgres advisory lock). A job never overlaps with itself within
+a scheduler: the next run is scheduled only after the previous one returned.
 
-- long-running thread for periodic BMRT cache population/refresh
-- long-running thread for periodic prometheus gauge re-init/set()
+Cancellation is cooperative: long-running jobs are expected to check
+`ctx.cancelled` (or call `ctx.check_cancelled()` / use `ctx.sleep()`) every
+now and then. A job run is cancelled when the scheduler shuts down or when the
+run exceeds its maximum runtime.
+
+Per-job Prometheus metrics: last duration, last success time, failure count
+(see conbench/metrics.py).
+
+Currently managed jobs (see web_jobs() and worker_jobs()):
+
+- periodic BMRT cache population/refresh
+- listening for cache invalidation events (conbench/invalidation.py)
+- periodic prometheus gauge re-init/set()
+- creating future benchmark_result partitions
+- searching for (and storing) the candidate baseline runs of recent runs
+
+By default, all jobs run in each web application process (started from a
+gunicorn hook). With Config.JOBS_IN_WORKER the heavy jobs run in a separate
+`conbench worker` process instead (see run_worker()), and the web application
+processes only load the BMRT cache snapshot written by the worker.
 """
 
+import contextlib
+import dataclasses
+import datetime
 import logging
+import random
 import signal
+import threading
+import time
+import zlib
+from typing import Callable, Iterator, List, Optional, Set
+
+import sqlalchemy as s
 
 import conbench.bmrt
+import conbench.invalidation
 import conbench.metrics
-import conbench.util
+import conbench.partitions
 from conbench.config import Config
 
 original_sigint_handler = signal.getsignal(signal.SIGINT)
@@ -22,28 +55,476 @@ original_sigquit_handler = signal.getsignal(signal.SIGQUIT)
 log = logging.getLogger(__name__)
 
 
-SHUTDOWN = False
-_STARTED = False
-_THREADS = []
+class JobCancelled(Exception):
+    """Raised by JobContext.check_cancelled()."""
 
 
-def start_jobs():
+class JobContext:
+    """
+    Passed to the job function for each run.
+    """
+
+    def __init__(self, job_name: str):
+        self.job_name = job_name
+        self._cancel_event = threading.Event()
+        self.unscheduled = False
+        self.failed = False
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        True if the run should stop as soon as possible (scheduler shutdown,
+        maximum runtime exceeded).
+        """
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        """Raise JobCancelled if the run was cancelled."""
+        if self.cancelled:
+            raise JobCancelled(self.job_name)
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        Sleep for `seconds`, or return early when the run gets cancelled.
+        Return True if the full time was slept.
+        """
+        return not self._cancel_event.wait(seconds)
+
+    def unschedule(self) -> None:
+        """Do not run this job again (in this scheduler)."""
+        self.unscheduled = True
+
+
+class CronSpec:
+    """
+    A cron-like schedule: five space-separated fields (minute, hour, day of
+    month, month, day of week with 0 being Sunday). Each field is `*`, a number,
+    a range `a-b`, a list `a,b`, optionally with a step (`*/15`, `0-30/10`).
+
+    Like cron: if both day of month and day of week are restricted (do not
+    start with `*`) then a day matches if either matches.
+    """
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, spec: str):
+        fields = spec.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron spec must have five fields: {spec!r}")
+        self.spec = spec
+        (
+            self.minutes,
+            self.hours,
+            self.days,
+            self.months,
+            self.weekdays,
+        ) = (self._parse(f, lo, hi) for f, (lo, hi) in zip(fields, self._RANGES))
+        # Like cron: a field starting with `*` (e.g. `*/2`) is not restricted.
+        self._days_restricted = not fields[2].startswith("*")
+        self._weekdays_restricted = not fields[4].startswith("*")
+
+    @staticmethod
+    def _parse(field: str, lo: int, hi: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in field.split(","):
+            rng, _, step_str = part.partition("/")
+            step = int(step_str) if step_str else 1
+            if rng == "*":
+                start, end = lo, hi
+            elif "-" in rng:
+                start_str, end_str = rng.split("-", 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = end = int(rng)
+            if not (lo <= start <= end <= hi) or step < 1:
+                raise ValueError(f"invalid cron field: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt: datetime.datetime) -> bool:
+        day_ok = dt.day in self.days
+        # isoweekday(): Monday is 1, Sunday is 7.
+        weekday_ok = dt.isoweekday() % 7 in self.weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, dt: datetime.datetime) -> datetime.datetime:
+        """
+        Return the first matching point in time (at minute resolution) after
+        the tz-naive UTC datetime `dt`.
+        """
+        t = dt.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        # At most ~4 years of days (Feb 29); skip non-matching days and hours
+        # as a whole.
+        for _ in range(4 * 366 * 24 * 60):
+            if t.month not in self.months or not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + datetime.timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += datetime.timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"cron spec never matches: {self.spec!r}")
+
+
+@dataclasses.dataclass
+class Job:
+    """
+    Description of a periodic job. Set either `interval` or `cron`.
+    """
+
+    name: str
+    func: Callable[[JobContext], object]
+    # Seconds between the end of a run and the start of the next run.
+    interval: Optional[float] = None
+    # A cron-like spec (see CronSpec), evaluated in UTC.
+    cron: Optional[str] = None
+    # Seconds to wait before the first run (interval jobs only).
+    first_delay: float = 0
+    # Add a random delay between 0 and `jitter` seconds before each run (to
+    # spread load, e.g. across many processes).
+    jitter: float = 0
+    # Cancel a run (cooperatively) after this many seconds.
+    max_runtime: Optional[float] = None
+    # Wait at least this many times the duration of the last run before
+    # starting the next run (interval jobs only). Bounds the fraction of time
+    # spent on this job when runs take longer than expected.
+    runtime_interval_factor: float = 0
+    # Seconds to wait after a failed run instead of the regular delay.
+    retry_interval: Optional[float] = None
+    # If set, at most one process (of all processes using the same database)
+    # runs this job at a time. Runs in other processes are skipped.
+    exclusive: bool = False
+
+    def __post_init__(self) -> None:
+        if (self.interval is None) == (self.cron is None):
+            raise ValueError(f"job {self.name}: set exactly one of interval, cron")
+        self._cronspec = CronSpec(self.cron) if self.cron else None
+
+    def next_delay(self, last_duration: Optional[float], failed: bool) -> float:
+        """
+        Return the number of seconds to wait before the next run. The
+        `last_duration` of None means: no run yet.
+        """
+        if last_duration is None and self._cronspec is None:
+            delay = self.first_delay
+        elif failed and self.retry_interval is not None:
+            delay = self.retry_interval
+        elif self._cronspec is not None:
+            now = datetime.datetime.utcnow()
+            delay = (self._cronspec.next_after(now) - now).total_seconds()
+        else:
+            assert self.interval is not None
+            delay = max(
+                self.interval, self.runtime_interval_factor * (last_duration or 0)
+            )
+
+        if self.jitter:
+            delay += random.uniform(0, self.jitter)
+        return delay
+
+
+class Scheduler:
+    """
+    Runs registered jobs, each in its own thread. Usable from the web
+    application processes as well as from a separate (worker) process.
+    """
+
+    def __init__(self) -> None:
+        self._jobs: List[Job] = []
+        self._threads: List[threading.Thread] = []
+        self._shutdown = threading.Event()
+        self._started = False
+        # Contexts of the runs currently in progress, to cancel them on
+        # shutdown.
+        self._active: Set[JobContext] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def jobs(self) -> List[Job]:
+        return list(self._jobs)
+
+    def register(self, job: Job) -> None:
+        if self._started:
+            raise RuntimeError("cannot register jobs after start()")
+        if any(j.name == job.name for j in self._jobs):
+            raise ValueError(f"job already registered: {job.name}")
+        self._jobs.append(job)
+
+    def start(self) -> None:
+        self._started = True
+        for job in self._jobs:
+            log.info("start job: %s", job.name)
+            t = threading.Thread(
+                target=self._run_forever, args=(job,), name=f"job-{job.name}"
+            )
+            t.start()
+            self._threads.append(t)
+
+    def shutdown(self) -> None:
+        """
+        Signal all jobs to stop: cancel runs in progress, do not start new
+        runs. Does not wait for that. Safe to call from a signal handler.
+        """
+        self._shutdown.set()
+        # Do not block (on the lock) in a signal handler: a run that is being
+        # registered right now sees the shutdown flag in _run().
+        for ctx in list(self._active):
+            ctx.cancel()
+
+    @property
+    def is_shut_down(self) -> bool:
+        return self._shutdown.is_set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Signal all jobs to stop and wait for their threads to terminate."""
+        self.shutdown()
+        for t in self._threads:
+            log.info("join %s", t)
+            t.join(timeout)
+
+    def wait(self) -> None:
+        """Block until shutdown() was called and all job threads terminated."""
+        # Wait with a timeout so that signal handlers get to run (in the main
+        # thread).
+        while not self._shutdown.wait(1):
+            pass
+        self.stop()
+
+    def _run_forever(self, job: Job) -> None:
+        last_duration: Optional[float] = None
+        failed = False
+
+        while True:
+            delay = job.next_delay(last_duration, failed)
+            log.debug("job %s: next run in %.3f s", job.name, delay)
+            if self._shutdown.wait(delay):
+                log.debug("job %s: shut down", job.name)
+                return
+
+            t0 = time.monotonic()
+            ctx = self.run_once(job)
+            if ctx is None:
+                # Skipped: another process runs this job right now.
+                last_duration, failed = 0, False
+                continue
+            last_duration, failed = time.monotonic() - t0, ctx.failed
+
+            if ctx.unscheduled:
+                log.info("job %s: unscheduled, terminate thread", job.name)
+                return
+
+    def run_once(self, job: Job) -> Optional[JobContext]:
+        """
+        Run `job` once, in the calling thread. Return the context of the run
+        (see `JobContext.failed`), or None if the run was skipped because the
+        (exclusive) job is running in another process.
+        """
+        if not job.exclusive:
+            return self._run(job)
+
+        with _advisory_lock(job.name) as acquired:
+            if not acquired:
+                log.info("job %s: running elsewhere, skip", job.name)
+                return None
+            return self._run(job)
+
+    def _run(self, job: Job) -> JobContext:
+        ctx = JobContext(job.name)
+        timer = None
+        if job.max_runtime is not None:
+
+            def _timeout() -> None:
+                log.warning(
+                    "job %s: exceeded max runtime (%s s), cancel",
+                    job.name,
+                    job.max_runtime,
+                )
+                ctx.cancel()
+
+            timer = threading.Timer(job.max_runtime, _timeout)
+            timer.daemon = True
+            timer.start()
+
+        with self._lock:
+            self._active.add(ctx)
+        if self._shutdown.is_set():
+            ctx.cancel()
+
+        t0 = time.monotonic()
+        try:
+            job.func(ctx)
+        except JobCancelled:
+            log.info("job %s: cancelled", job.name)
+        except Exception as exc:
+            log.exception("job %s: failed: %s", job.name, exc)
+            ctx.failed = True
+        finally:
+            duration = time.monotonic() - t0
+            if timer is not None:
+                timer.cancel()
+            with self._lock:
+                self._active.discard(ctx)
+            if ctx.cancelled and not self._shutdown.is_set():
+                # Max runtime exceeded (even if the job noticed and returned
+                # normally). Cancellation because of shutdown is not a
+                # failure.
+                ctx.failed = True
+
+        conbench.metrics.GAUGE_JOB_LAST_DURATION_SECONDS.labels(job=job.name).set(
+            duration
+        )
+        if ctx.failed:
+            conbench.metrics.COUNTER_JOB_FAILURES.labels(job=job.name).inc()
+        else:
+            conbench.metrics.GAUGE_JOB_LAST_SUCCESS_TIMESTAMP_SECONDS.labels(
+                job=job.name
+            ).set_to_current_time()
+            log.debug("job %s: done (took %.3f s)", job.name, duration)
+        return ctx
+
+
+@contextlib.contextmanager
+def _advisory_lock(job_name: str) -> Iterator[bool]:
+    """
+    Try to take a session-level Postgres advisory lock for `job_name`, hold it
+    for the duration of the `with` block. Yield False if the lock is held
+    elsewhere.
+    """
+    # Avoid circular import.
+    import conbench.db
+
+    key = zlib.crc32(f"conbench-job-{job_name}".encode())
+    assert conbench.db.engine is not None
+    with conbench.db.engine.connect() as conn:
+        acquired = conn.execute(s.select(s.func.pg_try_advisory_lock(key))).scalar_one()
+        # Do not hold a transaction open for the duration of the job.
+        conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                # Explicitly unlock: closing the connection just returns it to
+                # the pool, the DB session (and its locks) lives on.
+                conn.execute(s.select(s.func.pg_advisory_unlock(key)))
+                conn.commit()
+
+
+def _bmrt_cache_refresh_job(func: Callable[[JobContext], object]) -> Job:
+    return Job(
+        name="bmrt-cache-refresh",
+        func=func,
+        first_delay=0 if Config.TESTING else 3,
+        interval=20 if Config.TESTING else 120,
+        # Goal: spend the majority of the time _not_ doing this thing here. So,
+        # if the last iteration lasted for e.g. ~60 seconds, then keep waiting
+        # for ~five minutes until triggering the next run.
+        runtime_interval_factor=5,
+    )
+
+
+def _partition_maintenance_job() -> Job:
+    return Job(
+        name="partition-maintenance",
+        func=conbench.partitions.ensure_partitions_job,
+        first_delay=0 if Config.TESTING else 5,
+        interval=24 * 3600,
+        # Try again soon-ish, e.g. after a lock timeout.
+        retry_interval=600,
+        exclusive=True,
+    )
+
+
+def _baseline_candidates_job() -> Job:
+    # Avoid circular import.
+    import conbench.api.runs
+
+    return Job(
+        name="baseline-candidates",
+        func=conbench.api.runs.precompute_candidate_baseline_runs,
+        first_delay=0 if Config.TESTING else 10,
+        interval=60,
+        exclusive=True,
+    )
+
+
+def _invalidation_listener_job() -> Job:
+    return Job(
+        name="cache-invalidation-listener",
+        func=conbench.invalidation.listen,
+        # Runs until cancelled, i.e. this is the delay before reconnecting
+        # after e.g. a connection error.
+        interval=5,
+    )
+
+
+def web_jobs() -> List[Job]:
+    """
+    The jobs run in each web application process.
+    """
+    jobs = []
+
     if not Config.CREATE_ALL_TABLES:
         # This needs to be done more cleanly -- when running the DB migration,
         # the app should not even initialize so far.
         log.info(
             "BMRT cache: CREATE_ALL_TABLES is false, assume migration; do not start job"
         )
+    elif Config.JOBS_IN_WORKER:
+        jobs.append(_invalidation_listener_job())
+        # The worker process does the heavy lifting; only pick up its results.
+        jobs.append(
+            Job(
+                name="bmrt-snapshot-load",
+                func=conbench.bmrt.load_bmrt_snapshot,
+                interval=5,
+            )
+        )
     else:
-        log.info("start job: periodic BMRT cache population")
-        _THREADS.append(conbench.bmrt.periodically_fetch_last_n_benchmark_results())
+        jobs.append(_invalidation_listener_job())
+        jobs.append(_bmrt_cache_refresh_job(conbench.bmrt.refresh_bmrt_cache))
+        jobs.append(_partition_maintenance_job())
+        jobs.append(_baseline_candidates_job())
 
-    log.info("start job: metrics.periodically_set_q_rem()")
-    _THREADS.append(conbench.metrics.periodically_set_q_rem())
+    jobs.append(
+        Job(
+            name="metrics-gauge-set",
+            func=conbench.metrics.reinforce_q_rem_initial_value,
+            first_delay=3,
+            interval=3,
+        )
+    )
+    return jobs
 
-    # This state-keeping var is so far only used for logging.
-    global _STARTED
-    _STARTED = True
+
+def worker_jobs(listen: bool = True) -> List[Job]:
+    """
+    The jobs run in the `conbench worker` process (see Config.JOBS_IN_WORKER).
+    """
+    jobs = [
+        _bmrt_cache_refresh_job(conbench.bmrt.refresh_bmrt_cache_and_write_snapshot),
+        _partition_maintenance_job(),
+        _baseline_candidates_job(),
+    ]
+    if listen:
+        jobs.insert(0, _invalidation_listener_job())
+    return jobs
+
+
+_SCHEDULER: Optional[Scheduler] = None
+
+
+def start_jobs():
+    global _SCHEDULER
+    _SCHEDULER = Scheduler()
+    for job in web_jobs():
+        _SCHEDULER.register(job)
+    _SCHEDULER.start()
 
 
 def stop_jobs_join():
@@ -54,22 +535,56 @@ def stop_jobs_join():
     start/stop cycles. This is not really great because this mode of operation
     deviates from "prod".
     """
-    log.info("stop_jobs_join(): set shutdown flag")
-    global SHUTDOWN
-    SHUTDOWN = True
-    for t in _THREADS:
-        log.info("join %s", t)
-        t.join()
-
+    log.info("stop_jobs_join(): shut down scheduler")
+    if _SCHEDULER is not None:
+        _SCHEDULER.stop()
     log.info("all threads joined")
 
 
+def run_worker(once: bool = False) -> bool:
+    """
+    Run worker_jobs() in this process until a shutdown signal is received.
+
+    With `once`, run each job once (in order) and return; return False if any
+    of the runs failed.
+    """
+    # Avoid circular import.
+    import conbench.db
+
+    conbench.db.configure_engine(Config.SQLALCHEMY_DATABASE_URI)
+    conbench.db.configure_replica_engine(Config.SQLALCHEMY_REPLICA_DATABASE_URI)
+
+    global _SCHEDULER
+    _SCHEDULER = Scheduler()
+    # The listener job runs until cancelled, there is nothing to listen for
+    # in a single pass.
+    for job in worker_jobs(listen=not once):
+        _SCHEDULER.register(job)
+
+    if once:
+        ok = True
+        for job in _SCHEDULER.jobs:
+            ctx = _SCHEDULER.run_once(job)
+            ok = ok and (ctx is None or not ctx.failed)
+        return ok
+
+    _SCHEDULER.start()
+    try:
+        _SCHEDULER.wait()
+    except KeyboardInterrupt:
+        # SIGINT: shutdown_handler() already initiated shutdown.
+        _SCHEDULER.stop()
+    return True
+
+
 def shutdown_handler(sig, frame):
     log.info(
-        "BMRT cache job (started: %s): saw signal %s, set shutdown flag", _STARTED, sig
+        "job scheduler (started: %s): saw signal %s, shut down",
+        _SCHEDULER is not None,
+        sig,
     )
-    global SHUTDOWN
-    SHUTDOWN = True
+    if _SCHEDULER is not None:
+        _SCHEDULER.shutdown()
     if sig == signal.SIGINT:
         original_sigint_handler(sig, frame)
 
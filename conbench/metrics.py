@@ -15,10 +15,10 @@ as prometheus_flask_exporter metrics ("just works!"):
 https://github.com/rycus86/prometheus_flask_exporter/issues/147
 """
 
+import functools
 import logging
 import os
-import threading
-import time
+import re
 
 import flask
 import prometheus_client
@@ -66,6 +66,32 @@ GAUGE_BMRT_CACHE_LAST_UPDATE_SECONDS = prometheus_client.Gauge(
 )
 
 
+# Periodic jobs, see conbench/job.py. The `job` label is the job name.
+GAUGE_JOB_LAST_DURATION_SECONDS = prometheus_client.Gauge(
+    "conbench_job_last_duration_seconds",
+    "The time the last run of a periodic job took (successful or not)",
+    labelnames=["job"],
+)
+
+
+GAUGE_JOB_LAST_SUCCESS_TIMESTAMP_SECONDS = prometheus_client.Gauge(
+    "conbench_job_last_success_timestamp_seconds",
+    "The (Unix) time at which the last successful run of a periodic job ended",
+    labelnames=["job"],
+    # In multiprocess mode report the most recent success across processes
+    # (instead of one time series per process).
+    multiprocess_mode="max",
+)
+
+
+COUNTER_JOB_FAILURES = prometheus_client.Counter(
+    "conbench_job_failures_total",
+    "The total number of failed (raised an exception, cancelled, exceeded "
+    "the maximum runtime) runs of a periodic job",
+    labelnames=["job"],
+)
+
+
 # The topic of Gauge initiatlization in the Prometheus ecosystem is confusing.
 # The spec says "Gauges MUST start at 0"
 # (https://prometheus.io/docs/instrumenting/writing_clientlibs/). There are
@@ -92,6 +118,114 @@ COUNTER_BENCHMARK_RESULTS_INGESTED = prometheus_client.Counter(
 )
 
 
+# Database metrics. These are populated via SQLAlchemy engine and pool events,
+# see conbench.db.instrument_engine(). The `pool` label is either "primary" or
+# "replica" (see DB_REPLICA_HOST).
+HISTOGRAM_DB_QUERY_DURATION_SECONDS = prometheus_client.Histogram(
+    "conbench_db_query_duration_seconds",
+    "Duration of individual database queries (from the point of view of the "
+    "DB client, i.e. including network round trip time)",
+    # `statement` is a coarse fingerprint of the SQL statement (e.g. "SELECT
+    # benchmark_result"), see statement_fingerprint(). Together with the
+    # endpoint that is a bounded (if not small) number of label combinations.
+    labelnames=["statement", "http_handler_name"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 20.0, 120.0),
+)
+
+
+HISTOGRAM_DB_QUERIES_PER_REQUEST = prometheus_client.Histogram(
+    "conbench_db_queries_per_request",
+    "The number of database queries emitted while processing an individual "
+    "HTTP request. A large number typically hints at an N+1 query pattern.",
+    labelnames=["http_handler_name"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+
+GAUGE_DB_POOL_CHECKED_OUT = prometheus_client.Gauge(
+    "conbench_db_pool_checked_out",
+    "The number of DB connections currently checked out from the pool",
+    labelnames=["pool"],
+)
+
+
+GAUGE_DB_POOL_OVERFLOW = prometheus_client.Gauge(
+    "conbench_db_pool_overflow",
+    "The number of DB connections currently open beyond the pool size "
+    "(negative: pool not yet filled up)",
+    labelnames=["pool"],
+)
+
+
+HISTOGRAM_DB_POOL_CHECKOUT_WAIT_SECONDS = prometheus_client.Histogram(
+    "conbench_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a DB connection to become available in the pool "
+    "(includes establishing a new connection, if required)",
+    labelnames=["pool"],
+    buckets=(0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+)
+
+
+_RE_SQL_COMMENT = re.compile(r"/\*.*?\*/|--[^\n]*", re.DOTALL)
+_RE_SQL_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|TABLE)\s+"?(\w+)"?', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=4096)
+def statement_fingerprint(statement: str) -> str:
+    """
+    Return a coarse, low-cardinality fingerprint for an SQL statement: the
+    statement type followed by the first table name mentioned in it, e.g.
+
+        - "SELECT benchmark_result"
+        - "INSERT commit"
+        - "BEGIN"
+
+    Literal values do not matter here (SQLAlchemy emits parameterized
+    statements). The set of distinct statement strings emitted by the
+    application is bounded, so is the size of this cache.
+    """
+    stmt = _RE_SQL_COMMENT.sub(" ", statement).strip()
+    if not stmt:
+        return "none"
+
+    verb = stmt.split(None, 1)[0].upper()
+    m = _RE_SQL_TABLE.search(stmt)
+    if m is None:
+        return verb
+
+    return f"{verb} {m.group(1).lower()}"
+
+
+def current_http_handler_name() -> str:
+    """
+    Like http_handler_name(), but usable from anywhere: return "none" when
+    not in the context of processing an HTTP request (e.g. in a background
+    thread).
+    """
+    if not flask.has_request_context():
+        return "none"
+
+    return http_handler_name(flask.request)
+
+
+def count_db_query() -> None:
+    """
+    Count a DB query towards the HTTP request currently being processed (if
+    any). See observe_db_queries_per_request().
+    """
+    if flask.has_request_context():
+        flask.g._db_query_count = flask.g.get("_db_query_count", 0) + 1
+
+
+def observe_db_queries_per_request(exc) -> None:
+    if not flask.has_request_context():
+        return
+
+    HISTOGRAM_DB_QUERIES_PER_REQUEST.labels(
+        http_handler_name=current_http_handler_name()
+    ).observe(flask.g.get("_db_query_count", 0))
+
+
 def decorate_flask_app_with_metrics(app) -> None:
     """
     Add flask-prometheus-exporter magic to `app`.
@@ -130,6 +264,8 @@ def decorate_flask_app_with_metrics(app) -> None:
         defaults_prefix=NO_PREFIX,  # Remove the default "flask" prefix
     )
 
+    app.teardown_request(observe_db_queries_per_request)
+
 
 def http_handler_name(r: flask.Request) -> str:
     """
@@ -171,13 +307,13 @@ def http_handler_name(r: flask.Request) -> str:
 
 # This is a dictionary which can be mutated (from the outside, it's part of the
 # interface of this module) by other threads, to indicate when a meaningful
-# gauge value was set (see impl of _periodically_set_q_rem()).
+# gauge value was set (see reinforce_q_rem_initial_value()).
 gauge_gh_api_rem_set = {"first_value_seen": False}
 
 
-def periodically_set_q_rem() -> threading.Thread:
+def reinforce_q_rem_initial_value(ctx) -> None:
     """
-    This function immediately returns after having spawned a thread.
+    Job function (see conbench.job), run every couple of seconds.
 
     GAUGE_GITHUB_HTTP_API_QUOTA_REMAINING is a thread-safe data structure.
 
@@ -188,35 +324,11 @@ def periodically_set_q_rem() -> threading.Thread:
     respect to their initialization state. For us, 0 is a special, allowed
     value and explicitly _not_ the initialization value.)
     """
-    # conbench.job ultimately depends on conbench.entities.commit, which imports this
-    # metrics module. Avoid circular import.
-    from conbench import job
-
-    def func():
-        log.info("periodically_set_q_rem(): initiate")
-        while True:
-            # Delay for a bit until setting the gauge next time. But don't just
-            # sleep, do a busy sleep (responsive sleep loop that inspects
-            # SHUTDOWN often_.
-            deadline = time.monotonic() + 3
-            while time.monotonic() < deadline:
-                if job.SHUTDOWN:
-                    # We got told that we have to shut down our activities. OK.
-                    log.debug("periodically_set_q_rem(): shut down")
-                    return
-
-                time.sleep(0.05)
-
-            if gauge_gh_api_rem_set["first_value_seen"]:
-                # This process set an actual, meaningful value. Stop
-                # reinforcing the initial state.
-                log.info("periodically_set_q_rem(): terminate thread")
-                return
-
-            GAUGE_GITHUB_HTTP_API_QUOTA_REMAINING.set(-1)
-
-    # Create a threaddy zombie, no need to join it. It likely terminates
-    # itself. If it doesn't that's OK, too.
-    t = threading.Thread(target=func, name="metrics-gauge-set")
-    t.start()
-    return t
+    if gauge_gh_api_rem_set["first_value_seen"]:
+        # This process set an actual, meaningful value. Stop reinforcing the
+        # initial state.
+        log.info("reinforce_q_rem_initial_value(): unschedule")
+        ctx.unschedule()
+        return
+
+    GAUGE_GITHUB_HTTP_API_QUOTA_REMAINING.set(-1)
@@ -0,0 +1,224 @@
+"""
+Time-range partitioning of the `benchmark_result` table.
+
+The table is declared with `PARTITION BY RANGE (timestamp)` and is made up of
+
+- `benchmark_result_legacy`: all results with a timestamp before
+  PARTITIONS_START. All Conbench instances used a non-UUID7 primary key before
+  that date; most queries ignore these results anyway.
+- one partition per calendar month starting at PARTITIONS_START, named
+  `benchmark_result_pYYYY_MM`.
+- `benchmark_result_default`: everything else, i.e. results with a timestamp
+  beyond the last monthly partition (e.g. a user-given timestamp far in the
+  future).
+
+Queries that filter on `timestamp` (the BMRT cache population, the landing
+page, `/api/benchmark-results/` pagination, ...) only touch the partitions
+covering the requested time range (partition pruning), independent of how
+large the table as a whole has grown.
+
+Monthly partitions are created ahead of time (see MONTHS_AHEAD) by a periodic
+job, so that new results do not end up in the default partition. If the
+default partition does contain rows for a month that is about to get its own
+partition then these rows are moved.
+
+Note that a primary key (or unique index) on a partitioned table must include
+the partition key. The primary key of the table is therefore (id, timestamp)
+(the ORM still uses `id` alone as identity, see BenchmarkResult). Two
+consequences:
+
+- The database does not enforce uniqueness of `id` alone. IDs are generated
+  by Conbench (UUID7), never user-given, so this is not a practical concern.
+  Client-provided idempotency keys live in a separate, non-partitioned table
+  (benchmark_result_idempotency_key) to keep them globally unique.
+- A lookup by `id` alone (e.g. GET /api/benchmark-results/<id>/) cannot be
+  pruned: it probes the primary key index of every partition, i.e. costs one
+  index probe per month of data instead of one overall. Where the timestamp
+  is known, filter on it, too.
+
+A foreign key (from benchmark_result_idempotency_key) references the table:
+to remove a partition, DETACH it before dropping it. Moving rows out of the
+default partition deletes them there, which cascades to their idempotency
+keys; these are saved before and restored after the move.
+"""
+
+import datetime
+import logging
+from typing import Iterator, Optional, Tuple
+
+import sqlalchemy as s
+from sqlalchemy.engine import Connection
+
+log = logging.getLogger(__name__)
+
+
+TABLE = "benchmark_result"
+LEGACY_PARTITION = f"{TABLE}_legacy"
+DEFAULT_PARTITION = f"{TABLE}_default"
+IDEMPOTENCY_KEY_TABLE = f"{TABLE}_idempotency_key"
+PARTITIONS_START = datetime.date(2023, 6, 1)
+MONTHS_AHEAD = 3
+
+# Arbitrary, but fixed: serializes partition maintenance across processes.
+_ADVISORY_LOCK_KEY = 4711_2023_06
+
+
+def _month_start(d: datetime.date) -> datetime.date:
+    return datetime.date(d.year, d.month, 1)
+
+
+def _add_months(d: datetime.date, n: int) -> datetime.date:
+    months = d.year * 12 + (d.month - 1) + n
+    return datetime.date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"{TABLE}_p{month.year:04d}_{month.month:02d}"
+
+
+def monthly_partitions(
+    first: datetime.date, last: datetime.date
+) -> Iterator[Tuple[str, datetime.date, datetime.date]]:
+    """
+    Yield (name, lower bound, upper bound) for each month from the month
+    containing `first` up to and including the month containing `last`.
+    """
+    month = _month_start(first)
+    while month <= last:
+        nxt = _add_months(month, 1)
+        yield partition_name(month), month, nxt
+        month = nxt
+
+
+def _horizon(today: Optional[datetime.date] = None) -> datetime.date:
+    return _add_months(_month_start(today or datetime.date.today()), MONTHS_AHEAD)
+
+
+def _exists(conn: Connection, name: str) -> bool:
+    return (
+        conn.execute(s.text("SELECT to_regclass(:n)"), {"n": name}).scalar() is not None
+    )
+
+
+def create_initial_partitions(conn: Connection) -> None:
+    """
+    Create the legacy, monthly and default partitions for a freshly created
+    (empty) `benchmark_result` table.
+    """
+    conn.execute(
+        s.text(
+            f"CREATE TABLE IF NOT EXISTS {LEGACY_PARTITION} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM (MINVALUE) TO ('{PARTITIONS_START}')"
+        )
+    )
+    for name, lo, hi in monthly_partitions(PARTITIONS_START, _horizon()):
+        conn.execute(
+            s.text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{lo}') TO ('{hi}')"
+            )
+        )
+    conn.execute(
+        s.text(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"
+        )
+    )
+
+
+def ensure_partitions(
+    conn: Connection,
+    first: Optional[datetime.date] = None,
+    last: Optional[datetime.date] = None,
+) -> int:
+    """
+    Make sure that there is a monthly partition for each month from the month
+    containing `first` (default: today) up to and including the month
+    containing `last` (default: MONTHS_AHEAD months from now).
+
+    Rows in the default partition that fall into a newly created partition
+    are moved there (keeping their idempotency keys). Return the number of created partitions.
+
+    Expected to be called within a transaction (e.g. `engine.begin()`).
+    Concurrent callers are serialized via an advisory lock.
+    """
+    conn.execute(s.text("SELECT pg_advisory_xact_lock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+    # Do not queue up behind long-running queries for too long (this is
+    # retried periodically anyway).
+    conn.execute(s.text("SET LOCAL lock_timeout = '10s'"))
+
+    created = 0
+    for name, lo, hi in monthly_partitions(
+        first or datetime.date.today(), last or _horizon()
+    ):
+        if _exists(conn, name):
+            continue
+
+        # Create detached, move matching rows out of the default partition,
+        # then attach. ATTACH PARTITION does not need an ACCESS EXCLUSIVE lock
+        # on the parent table (CREATE TABLE ... PARTITION OF does).
+        log.info("create partition %s for [%s, %s)", name, lo, hi)
+        conn.execute(
+            s.text(
+                f"CREATE TABLE {name} "
+                f"(LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        # Deleting the rows from the default partition (below) cascades to
+        # their idempotency keys. All rows in this time range are in the
+        # default partition.
+        keys = [
+            dict(row)
+            for row in conn.execute(
+                s.text(
+                    f"SELECT * FROM {IDEMPOTENCY_KEY_TABLE} "
+                    "WHERE benchmark_result_timestamp >= :lo "
+                    "AND benchmark_result_timestamp < :hi"
+                ),
+                {"lo": lo, "hi": hi},
+            ).mappings()
+        ]
+        moved = conn.execute(
+            s.text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE timestamp >= :lo AND timestamp < :hi RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ),
+            {"lo": lo, "hi": hi},
+        ).rowcount
+        if moved:
+            log.info("moved %s row(s) from %s to %s", moved, DEFAULT_PARTITION, name)
+        conn.execute(
+            s.text(
+                f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{lo}') TO ('{hi}')"
+            )
+        )
+        if keys:
+            conn.execute(
+                s.text(
+                    f"INSERT INTO {IDEMPOTENCY_KEY_TABLE} (user_id, key, body_hash, "
+                    "benchmark_result_id, benchmark_result_timestamp) VALUES "
+                    "(:user_id, :key, :body_hash, :benchmark_result_id, "
+                    ":benchmark_result_timestamp)"
+                ),
+                keys,
+            )
+            log.info("restored %s idempotency key(s)", len(keys))
+        created += 1
+
+    return created
+
+
+def ensure_partitions_job(ctx) -> None:
+    """
+    Job function (see conbench.job): call ensure_partitions() in its own
+    transaction.
+    """
+    # Avoid circular import (conbench.db imports entities, which import this
+    # module).
+    import conbench.db
+
+    assert conbench.db.engine is not None
+    with conbench.db.engine.begin() as conn:
+        n = ensure_partitions(conn)
+    log.info("partition maintenance: created %s partition(s)", n)
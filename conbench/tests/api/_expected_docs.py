@@ -43,6 +43,23 @@
                 },
                 "description": "Not Found",
             },
+            "422": {
+                "content": {
+                    "application/json": {
+                        "example": {
+                            "code": 422,
+                            "description": {
+                                "_errors": [
+                                    "Idempotency-Key was already used for a different request body"
+                                ]
+                            },
+                            "name": "Unprocessable Entity",
+                        },
+                        "schema": {"$ref": "#/components/schemas/ErrorBadRequest"},
+                    }
+                },
+                "description": "Unprocessable Entity",
+            },
             "BenchmarkEntity": {
                 "content": {
                     "application/json": {
@@ -1023,6 +1040,35 @@
                 },
                 "description": "OK",
             },
+            "HistoryAggregate": {
+                "content": {
+                    "application/json": {
+                        "example": {
+                            "data": [
+                                {
+                                    "benchmark_name": "file-write",
+                                    "buckets": [
+                                        {
+                                            "count": 12,
+                                            "end": "2021-02-25T01:02:51Z",
+                                            "max": 0.071134,
+                                            "mean": 0.036369,
+                                            "min": 0.004733,
+                                            "p50": 0.035121,
+                                            "p90": 0.061512,
+                                            "start": "2021-02-22T09:13:02Z",
+                                        }
+                                    ],
+                                    "history_fingerprint": "some-hexdigest",
+                                    "unit": "s",
+                                }
+                            ],
+                            "metadata": {"bucket": "week", "svs_type": "best"},
+                        }
+                    }
+                },
+                "description": "OK",
+            },
             "HistoryList": {
                 "content": {
                     "application/json": {
@@ -1727,6 +1773,89 @@
                 "tags": ["Index"],
             }
         },
+        "/api/benchmark-results/export/": {
+            "get": {
+                "description": "Export benchmark results in bulk, in a columnar format: as an Arrow\nIPC stream (default) or as a Parquet file.\n\nThe response body is streamed while results are read from the\ndatabase, in record batches (Parquet row groups) of 10000 results,\nordered by benchmark result timestamp. This is meant for exporting\nlarge numbers of results for offline analysis; use filters to\nlimit the export.\n\nProperties of the benchmark case, context, hardware and commit are\nincluded as dictionary-encoded columns. JSON objects (e.g. the case\npermutation, context, or error) are exported as JSON text.\n",
+                "parameters": [
+                    {
+                        "description": "The output format. Default `arrow`.",
+                        "in": "query",
+                        "name": "format",
+                        "schema": {"enum": ["arrow", "parquet"], "type": "string"},
+                    },
+                    {
+                        "description": "The earliest (least recent) benchmark result timestamp to export.",
+                        "in": "query",
+                        "name": "earliest_timestamp",
+                        "schema": {"format": "date-time", "type": "string"},
+                    },
+                    {
+                        "description": "The latest (most recent) benchmark result timestamp to export.",
+                        "in": "query",
+                        "name": "latest_timestamp",
+                        "schema": {"format": "date-time", "type": "string"},
+                    },
+                    {
+                        "description": "Only export results with this `run_reason`.",
+                        "in": "query",
+                        "name": "run_reason",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "description": "Only export results with one of these history fingerprints\n(comma-separated).\n",
+                        "in": "query",
+                        "name": "history_fingerprint",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "description": "Only export results for this benchmark name.",
+                        "in": "query",
+                        "name": "benchmark_name",
+                        "schema": {"type": "string"},
+                    },
+                ],
+                "responses": {
+                    "200": {"$ref": "#/components/responses/200"},
+                    "400": {"$ref": "#/components/responses/400"},
+                    "401": {"$ref": "#/components/responses/401"},
+                },
+                "tags": ["Benchmarks"],
+            }
+        },
+        "/api/benchmark-results/ndjson/": {
+            "post": {
+                "description": 'Submit many benchmark results in a single request, as\nnewline-delimited JSON (one `BenchmarkResultCreate` object per\nline).\n\nThe request body is consumed incrementally; it does not need to\nfit into memory on either side. Lines are validated one by one and\nvalid results are written to the database in transactions of\n`chunk_size` results each.\n\nThe response body is newline-delimited JSON as well, and is\nstreamed back while the request body is being processed: one status\nobject per non-empty input line (in input order, emitted after the\ncorresponding chunk was committed), for example\n`{"line": 1, "status": 201, "id": "..."}` or\n`{"line": 2, "status": 400, "error": {...}}`. The last line is a\nsummary object: `{"summary": {"lines": ..., "created": ...,\n"failed": ...}}`.\n\nA malformed line does not abort processing of the remaining lines.\nIf the connection breaks mid-stream, chunks that were already\ncommitted are kept, the chunk in progress is discarded.\n\nIf the `Idempotency-Key` request header is set then each line gets\nthe idempotency key `<key>:<line number>`. When the same stream is\nsubmitted again with the same key (e.g. after a broken\nconnection), lines that were already committed are not inserted\nagain. Their status object refers to the existing result and has\n`"replayed": true` set. Keys are scoped per user. A line that\nre-uses a key for a different document gets a 422 status object.\n',
+                "parameters": [
+                    {
+                        "description": "Optional. A client-generated unique string identifying this\nstream. See above.\n",
+                        "in": "header",
+                        "name": "Idempotency-Key",
+                        "schema": {"maxLength": 200, "type": "string"},
+                    },
+                    {
+                        "description": "The number of benchmark results to insert per database\ntransaction. Default 100. Max 1000.\n",
+                        "in": "query",
+                        "name": "chunk_size",
+                        "schema": {"maximum": 1000, "minimum": 1, "type": "integer"},
+                    },
+                ],
+                "requestBody": {
+                    "content": {
+                        "application/x-ndjson": {
+                            "schema": {
+                                "$ref": "#/components/schemas/BenchmarkResultCreate"
+                            }
+                        }
+                    }
+                },
+                "responses": {
+                    "200": {"$ref": "#/components/responses/200"},
+                    "400": {"$ref": "#/components/responses/400"},
+                    "401": {"$ref": "#/components/responses/401"},
+                },
+                "tags": ["Benchmarks"],
+            }
+        },
         "/api/benchmarks/": {
             "get": {
                 "description": 'Return benchmark results.\n\nNote that this endpoint does not provide on-the-fly change detection\nanalysis (lookback z-score method) since the "baseline" is ill-defined.\n\nThis endpoint implements pagination; see the `cursor` and `page_size` query\nparameters for how it works.\n\nFor legacy reasons, this endpoint will not return results from before\n`2023-06-03 UTC`, unless the `run_id` query parameter is used to filter\nbenchmark results.\n',
@@ -1767,6 +1896,12 @@
                         "name": "latest_timestamp",
                         "schema": {"format": "date-time", "type": "string"},
                     },
+                    {
+                        "description": "A comma-separated list of the fields to return for each benchmark\nresult, e.g. `id,history_fingerprint,stats.mean,timestamp`. Use dot\nnotation for nested fields. By default, all fields are returned.\nRequesting only the fields you need makes the response smaller and\nfaster to generate.\n",
+                        "in": "query",
+                        "name": "fields",
+                        "schema": {"type": "string"},
+                    },
                 ],
                 "responses": {
                     "200": {"$ref": "#/components/responses/BenchmarkList"},
@@ -1775,7 +1910,15 @@
                 "tags": ["Benchmarks"],
             },
             "post": {
-                "description": "Submit a BenchmarkResult within a specific Run.\nIf the Run (as defined by its Run ID) is not known yet in the database it gets implicitly created, using details provided in this request. If the Run ID matches an existing run, then the rest of the fields describing the Run (such as name, hardware info, ...} are silently ignored.",
+                "description": "Submit a BenchmarkResult within a specific Run.\nIf the Run (as defined by its Run ID) is not known yet in the database it gets implicitly created, using details provided in this request. If the Run ID matches an existing run, then the rest of the fields describing the Run (such as name, hardware info, ...} are silently ignored.\nIf the `Idempotency-Key` request header is set and a benchmark result was previously submitted by the same user with the same key, then that result is returned (without processing the request body any further) and the response carries the `Idempotent-Replayed` header (value `true`). If the key was used before for a different request body, a 422 response is emitted.",
+                "parameters": [
+                    {
+                        "description": "Optional. A client-generated unique string (e.g. a random UUID)\nidentifying this submission. Use the same key when retrying\nthe same submission to prevent the creation of a duplicate\nbenchmark result.\n",
+                        "in": "header",
+                        "name": "Idempotency-Key",
+                        "schema": {"maxLength": 200, "type": "string"},
+                    }
+                ],
                 "requestBody": {
                     "content": {
                         "application/json": {
@@ -1789,6 +1932,7 @@
                     "201": {"$ref": "#/components/responses/BenchmarkResultCreated"},
                     "400": {"$ref": "#/components/responses/400"},
                     "401": {"$ref": "#/components/responses/401"},
+                    "422": {"$ref": "#/components/responses/422"},
                 },
                 "tags": ["Benchmarks"],
             },
@@ -1901,6 +2045,12 @@
                         "name": "threshold_z",
                         "schema": {"type": "number"},
                     },
+                    {
+                        "description": "A comma-separated list of the fields to return, e.g.\n`baseline.single_value_summary,contender.result.stats.mean,analysis`.\nUse dot notation for nested fields. By default, all fields are\nreturned. The lookback z-score analysis is only computed if requested.\n",
+                        "in": "query",
+                        "name": "fields",
+                        "schema": {"type": "string"},
+                    },
                 ],
                 "responses": {
                     "200": {"$ref": "#/components/responses/CompareEntity"},
@@ -1947,6 +2097,12 @@
                         "name": "page_size",
                         "schema": {"maximum": 1000, "minimum": 1, "type": "integer"},
                     },
+                    {
+                        "description": "A comma-separated list of the fields to return for each comparison\nobject, e.g. `history_fingerprint,contender.single_value_summary`. Use\ndot notation for nested fields. By default, all fields are returned.\nThe lookback z-score analysis is only computed if requested, and only\nthe requested parts of `baseline.result` and `contender.result` are\nloaded from the database.\n",
+                        "in": "query",
+                        "name": "fields",
+                        "schema": {"type": "string"},
+                    },
                 ],
                 "responses": {
                     "200": {"$ref": "#/components/responses/CompareList"},
@@ -2032,6 +2188,58 @@
                 "tags": ["Hardware"],
             }
         },
+        "/api/history/aggregate/": {
+            "get": {
+                "description": "Get the history of one or more benchmark series aggregated into\ntime buckets, for drawing long-range trends without transferring\nevery single benchmark result.\n\nThe series are selected either by history fingerprint, or by\nbenchmark name (then all history fingerprints of that benchmark\nare included). As for the history endpoint, only error-free\nbenchmark results on the default branch are considered.\n\nResults are bucketed by the timestamp of their commit: per calendar\nday or week (UTC), or per `commits_per_bucket` consecutive commits.\nFor each bucket, the number of results and the mean, min, max,\nmedian (`p50`) and 90th percentile (`p90`) of the results' single\nvalue summaries are returned, along with the first and last commit\ntimestamp in the bucket. Buckets are sorted by time.\n",
+                "parameters": [
+                    {
+                        "description": "A history fingerprint or a comma-separated list of history\nfingerprints. Either this or `benchmark_name` is required.\n",
+                        "in": "query",
+                        "name": "history_fingerprint",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "description": "Aggregate all series of this benchmark.",
+                        "in": "query",
+                        "name": "benchmark_name",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "description": "The bucket type. Default `week`.",
+                        "in": "query",
+                        "name": "bucket",
+                        "schema": {
+                            "enum": ["day", "week", "commits"],
+                            "type": "string",
+                        },
+                    },
+                    {
+                        "description": "The number of commits per bucket for `bucket=commits`. Default 10.",
+                        "in": "query",
+                        "name": "commits_per_bucket",
+                        "schema": {"minimum": 1, "type": "integer"},
+                    },
+                    {
+                        "description": "Only consider results with a commit timestamp at or after this time.",
+                        "in": "query",
+                        "name": "earliest_timestamp",
+                        "schema": {"format": "date-time", "type": "string"},
+                    },
+                    {
+                        "description": "Only consider results with a commit timestamp at or before this time.",
+                        "in": "query",
+                        "name": "latest_timestamp",
+                        "schema": {"format": "date-time", "type": "string"},
+                    },
+                ],
+                "responses": {
+                    "200": {"$ref": "#/components/responses/HistoryAggregate"},
+                    "400": {"$ref": "#/components/responses/400"},
+                    "401": {"$ref": "#/components/responses/401"},
+                },
+                "tags": ["History"],
+            }
+        },
         "/api/history/download/{benchmark_result_id}/": {
             "get": {
                 "description": "Download time series",
@@ -2150,16 +2358,46 @@
         },
         "/api/runs/": {
             "get": {
-                "description": "Get a list of runs associated with a commit hash or hashes.\n\nThis endpoint implements pagination; see the `cursor` and `page_size` query\nparameters for how it works.\n",
+                "description": "Get a list of runs, either associated with a commit hash or hashes\n(`commit_hash`), or the most recent runs first.\n\nRuns can be filtered by repository, hardware, run reason and time\nrange (the run timestamp is the timestamp of its earliest benchmark\nresult).\n\nThis endpoint implements pagination; see the `cursor` and `page_size` query\nparameters for how it works.\n",
                 "parameters": [
                     {
-                        "description": "Required. A commit hash or a comma-separated list of commit hashes.\n",
+                        "description": "A commit hash or a comma-separated list of commit hashes. If given,\nruns are returned in alphabetical order by `run_id`. Otherwise, runs\nare returned most recent first (by timestamp, then by `run_id`).\n",
                         "in": "query",
                         "name": "commit_hash",
                         "schema": {"type": "string"},
                     },
                     {
-                        "description": "A cursor for pagination through matching runs in alphabetical order by\n`run_id`.\n\nTo get the first page of runs, leave out this query parameter or submit\n`null`. The response's `metadata` key will contain a `next_page_cursor`\nkey, which will contain the cursor to provide to this query parameter in\norder to get the next page. (If there is expected to be no data in the\nnext page, the `next_page_cursor` will be `null`.)\n\nThe first page will contain the `page_size` runs associated with the\ngiven commit hash(es) that are first alphabetically by `run_id`. Each\nsubsequent page will have up to `page_size` runs, continuing\nalphabetically, until there are no more matching runs.\n\nImplementation detail: currently, the next page's cursor value is equal\nto the latest `run_id` alphabetically in the current page. A page of\nruns is therefore defined as the `page_size` matching runs with an ID\nalphabetically later than the given cursor value.\n\nNote that this means that if a run is created DURING a client's request\nloop with an ID that is alphabetically earlier than the cursor value, it\nwill not be included in the next page. This is a known limitation of the\ncurrent implementation, and it is not expected to be a problem in\npractice. This is because the number of runs per commit hash is expected\nto be much less than the page size, and runs are added quite\ninfrequently.\n",
+                        "description": "Only return runs for this repository URL.",
+                        "in": "query",
+                        "name": "repository",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "description": "Only return runs on hardware with this hash.",
+                        "in": "query",
+                        "name": "hardware_hash",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "description": "Only return runs with this run reason.",
+                        "in": "query",
+                        "name": "reason",
+                        "schema": {"type": "string"},
+                    },
+                    {
+                        "description": "Only return runs with a timestamp at or after this time.",
+                        "in": "query",
+                        "name": "earliest_timestamp",
+                        "schema": {"format": "date-time", "type": "string"},
+                    },
+                    {
+                        "description": "Only return runs with a timestamp at or before this time.",
+                        "in": "query",
+                        "name": "latest_timestamp",
+                        "schema": {"format": "date-time", "type": "string"},
+                    },
+                    {
+                        "description": "A cursor for pagination through matching runs.\n\nTo get the first page of runs, leave out this query parameter or submit\n`null`. The response's `metadata` key will contain a `next_page_cursor`\nkey, which will contain the cursor to provide to this query parameter in\norder to get the next page. (If there is expected to be no data in the\nnext page, the `next_page_cursor` will be `null`.)\n\nWithout `commit_hash`, the cursor is the timestamp and ID of the last\nrun of the current page (keyset pagination): each page costs the same\nregardless of how far back it is, and runs created during a client's\nrequest loop do not shift subsequent pages.\n\nWith `commit_hash`, the first page will contain the `page_size` runs\nassociated with the given commit hash(es) that are first alphabetically\nby `run_id`. Each subsequent page will have up to `page_size` runs,\ncontinuing alphabetically, until there are no more matching runs.\nImplementation detail: currently, the next page's cursor value is equal\nto the latest `run_id` alphabetically in the current page. Note that\nthis means that if a run is created DURING a client's request loop with\nan ID that is alphabetically earlier than the cursor value, it will not\nbe included in the next page. This is not expected to be a problem in\npractice, because the number of runs per commit hash is expected to be\nmuch less than the page size.\n",
                         "in": "query",
                         "name": "cursor",
                         "schema": {"nullable": True, "type": "string"},
@@ -2170,9 +2408,16 @@
                         "name": "page_size",
                         "schema": {"maximum": 1000, "minimum": 1, "type": "integer"},
                     },
+                    {
+                        "description": "A comma-separated list of the fields to return for each run, e.g.\n`id,timestamp,commit.sha`. Use dot notation for nested fields. By\ndefault, all fields are returned.\n",
+                        "in": "query",
+                        "name": "fields",
+                        "schema": {"type": "string"},
+                    },
                 ],
                 "responses": {
                     "200": {"$ref": "#/components/responses/RunList"},
+                    "400": {"$ref": "#/components/responses/400"},
                     "401": {"$ref": "#/components/responses/401"},
                 },
                 "tags": ["Runs"],
@@ -1,9 +1,14 @@
+import gzip
 from typing import List, Optional, Set, Tuple
 
+import orjson
 import pytest
 
+from ...api import _resp
+from ...api import compare as compare_module
 from ...api._examples import _api_compare_entity, _api_compare_list
-from ...api.compare import CompareRunsAPI
+from ...api.compare import CompareRunsAPI, compare_benchmark_results
+from ...entities._entity import NotFound
 from ...tests.api import _asserts, _fixtures
 from ...tests.helpers import _uuid
 
@@ -331,6 +336,19 @@ class TestCompareBenchmarkResultsGet(_asserts.GetEnforcer):
         response = client.get("/api/compare/benchmark-results/foo...bar/")
         self.assert_404_not_found(response)
 
+    def test_compare_benchmark_results_matches_api(self, client, application):
+        self.authenticate(client)
+        (baseline, contender), compare = self._create(_uuid(), verbose=True)
+        response = client.get(f"/api/compare/benchmark-results/{compare.id}/")
+        assert response.status_code == 200, response.text
+
+        with application.test_request_context():
+            comparison = compare_benchmark_results(baseline.id, contender.id)
+            assert orjson.loads(orjson.dumps(comparison)) == response.json
+
+            with pytest.raises(NotFound, match="no benchmark result found"):
+                compare_benchmark_results(baseline.id, "foo")
+
     @pytest.mark.parametrize(
         ["baseline_result_id", "expected_z_score"],
         [
@@ -464,6 +482,102 @@ class TestCompareRunsGet(_asserts.GetEnforcer):
             },
         )
 
+    def test_compare_fields(self, client):
+        self.authenticate(client)
+        run_id = _uuid()
+        new_entities, compare = self._create(verbose=True, run_id=run_id)
+
+        full = client.get(f"/api/compare/runs/{compare.id}/").json["data"]
+        response = client.get(
+            f"/api/compare/runs/{compare.id}/",
+            query_string={
+                "fields": "history_fingerprint,contender.single_value_summary,"
+                "baseline.result.stats.mean,analysis.pairwise"
+            },
+        )
+        self.assert_200_ok(response)
+        assert response.json["data"] == [
+            {
+                "history_fingerprint": c["history_fingerprint"],
+                "baseline": {
+                    "result": {
+                        "stats": {"mean": c["baseline"]["result"]["stats"]["mean"]}
+                    }
+                },
+                "contender": {
+                    "single_value_summary": c["contender"]["single_value_summary"]
+                },
+                "analysis": {"pairwise": c["analysis"]["pairwise"]},
+            }
+            for c in full
+        ]
+
+    def test_compare_in_batches(self, client, monkeypatch):
+        self.authenticate(client)
+        new_entities, compare = self._create(verbose=True, run_id=_uuid())
+        url = f"/api/compare/runs/{compare.id}/"
+
+        full = client.get(url).json
+        assert len(full["data"]) > 1
+        monkeypatch.setattr(compare_module, "COMPARE_RUNS_BATCH_FINGERPRINTS", 1)
+        response = client.get(url)
+        self.assert_200_ok(response, full)
+
+    def test_compare_error_while_streaming(self, client, monkeypatch):
+        self.authenticate(client)
+        new_entities, compare = self._create(verbose=True, run_id=_uuid())
+        url = f"/api/compare/runs/{compare.id}/"
+
+        def fail(_):
+            raise RuntimeError("boom")
+
+        with monkeypatch.context() as m:
+            m.setattr(compare_module, "set_display_case_permutation", fail)
+            response = client.get(url)
+
+        # The status code was sent before the error happened.
+        assert response.status_code == 200, response.status_code
+        assert response.json["data"] == []
+        assert response.json["error"]["code"] == 500
+        assert "metadata" not in response.json
+
+        # The semaphore protecting compare work was released.
+        self.assert_200_ok(client.get(url))
+
+    @pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+    def test_compare_compressed(self, client, encoding):
+        if encoding == "zstd" and _resp.zstd is None:
+            pytest.skip("no zstd module available")
+        self.authenticate(client)
+        compare = self._create()
+        url = f"/api/compare/runs/{compare.id}/"
+
+        plain = client.get(url)
+        self.assert_200_ok(plain)
+        assert "Content-Encoding" not in plain.headers
+
+        response = client.get(
+            url, headers={"Accept-Encoding": f"{encoding}, identity;q=0.5"}
+        )
+        assert response.status_code == 200, response.status_code
+        assert response.headers["Content-Encoding"] == encoding
+        assert "Accept-Encoding" in response.headers["Vary"]
+        if encoding == "gzip":
+            body = gzip.decompress(response.data)
+        else:
+            body = _resp.zstd.decompress(response.data)
+        assert orjson.loads(body) == plain.json
+
+    def test_compare_bad_fields(self, client):
+        self.authenticate(client)
+        compare = self._create()
+        response = client.get(
+            f"/api/compare/runs/{compare.id}/", query_string={"fields": "baseline.x"}
+        )
+        self.assert_400_bad_request(
+            response, {"_errors": ["unknown field(s) in `fields`: baseline.x"]}
+        )
+
     def test_compare_with_error(self, client):
         self.authenticate(client)
         run_id, batch_id = _uuid(), _uuid()
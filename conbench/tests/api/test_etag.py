@@ -0,0 +1,132 @@
+import pytest
+import sqlalchemy as s
+
+from ...dbsession import current_session
+from ...tests.api import _asserts, _fixtures
+
+
+def _get_200(client, url, **kwargs):
+    resp = client.get(url, **kwargs)
+    assert resp.status_code == 200, resp.text
+    # Consume the body: some of these responses are streamed, and an
+    # abandoned stream_with_context() generator is closed later outside of
+    # its request context.
+    assert resp.data
+    resp.close()
+    return resp
+
+
+def _get_304(client, url):
+    etag = _get_200(client, url).headers["ETag"]
+
+    resp2 = client.get(url, headers={"If-None-Match": etag})
+    assert resp2.status_code == 304, resp2.text
+    assert resp2.headers["ETag"] == etag
+    assert resp2.data == b""
+    return etag
+
+
+@pytest.mark.parametrize(
+    "url, attr",
+    [
+        ("/api/benchmark-results/{}/", "id"),
+        ("/api/hardware/{}/", "hardware_id"),
+        ("/api/contexts/{}/", "context_id"),
+        ("/api/info/{}/", "info_id"),
+        ("/api/commits/{}/", "commit_id"),
+    ],
+)
+def test_strong_etag(client, url, attr):
+    result = _fixtures.benchmark_result()
+    url = url.format(getattr(result, attr))
+
+    etag = _get_304(client, url)
+    assert not etag.startswith("W/")
+
+    # Not matching: full response.
+    resp = _get_200(client, url, headers={"If-None-Match": '"other"'})
+    assert resp.headers["ETag"] == etag
+
+
+def test_no_etag_for_404(client):
+    resp = client.get("/api/benchmark-results/unknown/", headers={"If-None-Match": "*"})
+    assert resp.status_code == 404, resp.text
+    assert "ETag" not in resp.headers
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/runs/{run_id}/",
+        "/api/history/{id}/",
+        "/api/compare/runs/{run_id}...{run_id}/",
+        "/api/compare/benchmark-results/{id}...{id}/",
+    ],
+)
+def test_weak_etag_changes_with_new_history_result(client, url):
+    result = _fixtures.benchmark_result()
+    url = url.format(id=result.id, run_id=result.run_id)
+
+    etag = _get_304(client, url)
+    assert etag.startswith("W/")
+
+    # A new result with the same history fingerprint (in another run) may
+    # change e.g. the history, or the baseline candidates of a run.
+    _fixtures.benchmark_result(name=result.case.name)
+    resp = _get_200(client, url, headers={"If-None-Match": etag})
+    assert resp.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize(
+    "url, query",
+    [
+        ("/api/benchmark-results/{id}/", "fields=id"),
+        ("/api/runs/{run_id}/", "fields=id"),
+        ("/api/compare/runs/{run_id}...{run_id}/", "threshold_z=1"),
+        ("/api/compare/benchmark-results/{id}...{id}/", "threshold=1"),
+    ],
+)
+def test_etag_depends_on_query(client, url, query):
+    result = _fixtures.benchmark_result()
+    url = url.format(id=result.id, run_id=result.run_id)
+
+    etag = _get_304(client, url)
+    etag_query = _get_304(client, f"{url}?{query}")
+    assert etag_query != etag
+
+    _get_200(client, f"{url}?{query}", headers={"If-None-Match": etag})
+    _get_200(client, url, headers={"If-None-Match": etag, "Accept": "text/plain"})
+
+
+class TestETagAfterUpdate(_asserts.ApiEndpointTest):
+    def test_etag_changes_after_update(self, client):
+        self.authenticate(client)
+        result = _fixtures.benchmark_result()
+        url = f"/api/benchmarks/{result.id}/"
+
+        etag = _get_304(client, url)
+        resp = client.put(url, json={"change_annotations": {"a": True}})
+        assert resp.status_code == 200, resp.text
+
+        resp = client.get(url, headers={"If-None-Match": etag})
+        assert resp.status_code == 200, resp.text
+        assert resp.json["change_annotations"] == {"a": True}
+        assert resp.headers["ETag"] != etag
+
+
+def test_history_fingerprint_version_counter(client):
+    def version(fingerprint):
+        return current_session.execute(
+            s.text(
+                "SELECT version FROM history_fingerprint_version "
+                "WHERE history_fingerprint = :f"
+            ),
+            {"f": fingerprint},
+        ).scalar()
+
+    result = _fixtures.benchmark_result()
+    v1 = version(result.history_fingerprint)
+    assert v1 is not None
+
+    _fixtures.benchmark_result(name=result.case.name)
+    assert version(result.history_fingerprint) == v1 + 1
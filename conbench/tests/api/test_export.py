@@ -0,0 +1,106 @@
+import io
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+import sqlalchemy as s
+
+import conbench.db
+
+from ...api import export
+from ...tests.api import _asserts, _fixtures
+from ...tests.helpers import _uuid
+
+URL = "/api/benchmark-results/export/"
+
+
+def _read_arrow(resp) -> pa.Table:
+    assert resp.status_code == 200, resp.text
+    assert resp.mimetype == "application/vnd.apache.arrow.stream"
+    return pa.ipc.open_stream(resp.data).read_all()
+
+
+class TestBenchmarkResultExport(_asserts.ApiEndpointTest):
+    def test_arrow(self, client):
+        run_id = _uuid()
+        results = [
+            _fixtures.benchmark_result(name=name, run_id=run_id, results=[1, 2, 3])
+            for name in ("read", "write")
+        ]
+
+        table = _read_arrow(client.get(URL))
+        assert table.schema == export.EXPORT_SCHEMA
+        assert sorted(table["id"].to_pylist()) == sorted(r.id for r in results)
+
+        row = next(r for r in table.to_pylist() if r["id"] == results[0].id)
+        assert row["run_id"] == run_id
+        assert row["benchmark_name"] == "read"
+        assert json.loads(row["case_permutation"]) == results[0].case.tags
+        assert json.loads(row["context"]) == results[0].context.tags
+        assert row["hardware_name"] == results[0].hardware.name
+        assert row["commit_sha"] == results[0].commit.sha
+        assert row["data"] == [1.0, 2.0, 3.0]
+        assert row["mean"] == 2.0
+        assert row["timestamp"].replace(tzinfo=None) == results[0].timestamp
+
+    def test_parquet(self, client):
+        result = _fixtures.benchmark_result()
+        resp = client.get(URL, query_string={"format": "parquet"})
+        assert resp.status_code == 200, resp.text
+        assert resp.mimetype == "application/vnd.apache.parquet"
+
+        table = pq.read_table(io.BytesIO(resp.data))
+        assert table.column_names == export.EXPORT_SCHEMA.names
+        assert table["id"].to_pylist() == [result.id]
+        assert pa.types.is_dictionary(table.schema.field("benchmark_name").type)
+
+    def test_batches(self, client, monkeypatch):
+        monkeypatch.setattr(export, "EXPORT_BATCH_ROWS", 2)
+        results = [_fixtures.benchmark_result() for _ in range(5)]
+
+        cursor_names = []
+
+        def _record(conn, cursor, statement, *args):
+            if "FROM benchmark_result" in statement:
+                cursor_names.append(cursor.name)
+
+        s.event.listen(conbench.db.engine, "before_cursor_execute", _record)
+        try:
+            table = _read_arrow(client.get(URL))
+        finally:
+            s.event.remove(conbench.db.engine, "before_cursor_execute", _record)
+
+        # Rows are fetched through a server-side (named) cursor.
+        assert len(cursor_names) == 1 and cursor_names[0]
+        assert [b.num_rows for b in table.to_batches()] == [2, 2, 1]
+        # Ordered by timestamp.
+        assert table["timestamp"].to_pylist() == sorted(table["timestamp"].to_pylist())
+        assert set(table["id"].to_pylist()) == {r.id for r in results}
+
+    def test_filters(self, client):
+        a = _fixtures.benchmark_result(name="read", reason="nightly")
+        b = _fixtures.benchmark_result(name="write")
+        c = _fixtures.benchmark_result(name="write", timestamp="2023-07-01T12:00:00Z")
+
+        def ids(**params):
+            return set(
+                _read_arrow(client.get(URL, query_string=params))["id"].to_pylist()
+            )
+
+        assert ids(run_reason="nightly") == {a.id}
+        assert ids(benchmark_name="write") == {b.id, c.id}
+        assert ids(history_fingerprint=f"{a.history_fingerprint}") == {a.id}
+        assert ids(latest_timestamp="2023-07-02T00:00:00+00:00") == {c.id}
+        assert ids(earliest_timestamp="2023-07-02", benchmark_name="write") == {b.id}
+
+    @pytest.mark.parametrize(
+        "params, message",
+        [
+            ({"format": "csv"}, "format must be one of: arrow, parquet"),
+            ({"earliest_timestamp": "foo"}, "earliest_timestamp: invalid timestamp"),
+        ],
+    )
+    def test_bad_args(self, client, params, message):
+        resp = client.get(URL, query_string=params)
+        self.assert_400_bad_request(resp, {"_errors": [message]})
@@ -0,0 +1,48 @@
+import pytest
+
+from ...api._fields import ANY, FieldsArgError, FieldSelection
+
+SCHEMA = {"id": None, "stats": {"mean": None, "data": None}, "commit": ANY}
+
+
+def test_parse_and_prune():
+    sel = FieldSelection.parse("id, stats.mean,commit.sha", SCHEMA)
+    assert "id" in sel
+    assert "stats" in sel
+    assert "stats.mean" in sel
+    assert "stats.data" not in sel
+    assert "commit.sha" in sel
+    assert "commit.branch" not in sel
+
+    obj = {
+        "id": "1",
+        "stats": {"mean": 1.0, "data": [1.0]},
+        "commit": {"sha": "abc", "branch": "main"},
+        "error": None,
+    }
+    assert sel.prune(obj) == {
+        "id": "1",
+        "stats": {"mean": 1.0},
+        "commit": {"sha": "abc"},
+    }
+
+
+def test_parent_path_selects_all():
+    for arg in ("stats,stats.mean", "stats.mean,stats"):
+        sel = FieldSelection.parse(arg, SCHEMA)
+        assert "stats.data" in sel
+        assert sel.subselection("stats") is None
+
+
+def test_subselection():
+    sel = FieldSelection.parse("stats.mean", SCHEMA)
+    sub = sel.subselection("stats")
+    assert sub is not None
+    assert "mean" in sub
+    assert "data" not in sub
+
+
+@pytest.mark.parametrize("arg", ["", ",", "nope", "id.x", "stats.nope"])
+def test_invalid(arg):
+    with pytest.raises(FieldsArgError):
+        FieldSelection.parse(arg, SCHEMA)
@@ -1,9 +1,12 @@
 from io import StringIO
 from typing import List
 
+import orjson
 import pandas as pd
+import pytest
 from pandas import DatetimeIndex
 
+from ...api import _resp
 from ...api._examples import _api_history_entity
 from ...tests.api import _asserts, _fixtures
 
@@ -38,6 +41,23 @@ class TestHistoryGet(_asserts.GetEnforcer):
         }
         assert hist_endpont_resp_deser == expected_resp_deser
 
+    def test_get_history_streamed_in_chunks(self, client, monkeypatch):
+        monkeypatch.setattr(_resp, "STREAM_CHUNK_BYTES", 1)
+        self.authenticate(client)
+        benchmark_result = self._create()
+        _fixtures.benchmark_result(name=benchmark_result.case.name)
+
+        response = client.get(f"/api/history/{benchmark_result.id}/", buffered=False)
+        assert response.status_code == 200
+        assert response.is_streamed
+        chunks = list(response.response)
+        response.close()
+        # One chunk per history sample, plus the closing one.
+        assert len(chunks) == 3
+        body = orjson.loads(b"".join(chunks))
+        assert len(body["data"]) == 2
+        assert body["metadata"] == {"next_page_cursor": None}
+
     def test_csv_download(self, client):
         self.authenticate(client)
         benchmark_result = self._create()
@@ -54,3 +74,86 @@ class TestHistoryGet(_asserts.GetEnforcer):
         )
         assert "svs" in df
         assert isinstance(df.index, DatetimeIndex)
+
+
+class TestHistoryAggregate(_asserts.ApiEndpointTest):
+    url = "/api/history/aggregate/"
+
+    def _history_and_buckets(self, client, **params):
+        _, benchmark_results = _fixtures.gen_fake_data()
+        fingerprint = benchmark_results[0].history_fingerprint
+        history = client.get(f"/api/history/{benchmark_results[0].id}/").json["data"]
+        res = client.get(
+            self.url, query_string={"history_fingerprint": fingerprint, **params}
+        )
+        self.assert_200_ok(res)
+        return history, res.json
+
+    def test_day_buckets(self, client):
+        history, body = self._history_and_buckets(client, bucket="day")
+        assert body["metadata"]["bucket"] == "day"
+        [series] = body["data"]
+        assert series["unit"] == "s"
+
+        df = pd.DataFrame(history)
+        df["day"] = pd.to_datetime(df["commit_timestamp"]).dt.floor("D")
+        expected = df.groupby("day")["single_value_summary"]
+        assert [b["count"] for b in series["buckets"]] == list(expected.count())
+        for bucket, (_, svs) in zip(series["buckets"], expected):
+            assert bucket["mean"] == pytest.approx(svs.mean())
+            assert bucket["min"] == pytest.approx(svs.min())
+            assert bucket["max"] == pytest.approx(svs.max())
+            assert bucket["p50"] == pytest.approx(svs.quantile(0.5))
+            assert bucket["p90"] == pytest.approx(svs.quantile(0.9))
+        # Sorted by time.
+        starts = [b["start"] for b in series["buckets"]]
+        assert starts == sorted(starts)
+
+    def test_commit_buckets(self, client):
+        history, body = self._history_and_buckets(
+            client, bucket="commits", commits_per_bucket=2
+        )
+        [series] = body["data"]
+
+        commits = sorted({h["commit_timestamp"] for h in history})
+        bucket_of_commit = {c: i // 2 for i, c in enumerate(commits)}
+        counts = [0] * len(set(bucket_of_commit.values()))
+        for h in history:
+            counts[bucket_of_commit[h["commit_timestamp"]]] += 1
+        assert [b["count"] for b in series["buckets"]] == counts
+        assert sum(counts) == len(history)
+
+    def test_benchmark_name(self, client):
+        _, benchmark_results = _fixtures.gen_fake_data()
+        res = client.get(
+            self.url, query_string={"benchmark_name": benchmark_results[0].case.name}
+        )
+        self.assert_200_ok(res)
+        assert benchmark_results[0].history_fingerprint in {
+            sr["history_fingerprint"] for sr in res.json["data"]
+        }
+        assert {sr["benchmark_name"] for sr in res.json["data"]} == {
+            benchmark_results[0].case.name
+        }
+
+    @pytest.mark.parametrize(
+        "params, message",
+        [
+            ({}, "history_fingerprint or benchmark_name is required"),
+            (
+                {"benchmark_name": "x", "bucket": "month"},
+                "bucket must be one of: day, week, commits",
+            ),
+            (
+                {"benchmark_name": "x", "bucket": "commits", "commits_per_bucket": 0},
+                "commits_per_bucket must be a positive integer",
+            ),
+            (
+                {"benchmark_name": "x", "bucket": "commits", "commits_per_bucket": "a"},
+                "commits_per_bucket must be a positive integer",
+            ),
+        ],
+    )
+    def test_bad_args(self, client, params, message):
+        res = client.get(self.url, query_string=params)
+        self.assert_400_bad_request(res, {"_errors": [message]})
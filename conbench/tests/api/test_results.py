@@ -1,12 +1,21 @@
 import copy
 import datetime
+import gzip
+import re
 from typing import Tuple
 
+import orjson
 import pytest
+import sqlalchemy as s
+
+import conbench.db
+from conbench.dbsession import flask_scoped_session
 
 from ...api._examples import _api_benchmark_entity
+from ...config import Config
 from ...entities._entity import NotFound
 from ...entities.benchmark_result import BenchmarkResult
+from ...entities.case import Case
 from ...tests.api import _asserts, _fixtures
 from ...tests.helpers import _uuid
 
@@ -424,6 +433,92 @@ class TestBenchmarkList(_asserts.ListEnforcer):
         assert len(benchmark_results) == expected_num_results
         assert pages_hit == 1
 
+    def test_benchmark_list_matches_entity_serialization(self, client, application):
+        self.authenticate(client)
+        benchmark_results, _ = self._request_all(client, run_id="1", page_size=1000)
+        assert len(benchmark_results) == 4
+
+        with application.test_request_context():
+            for item in benchmark_results:
+                expected = BenchmarkResult.one(id=item["id"]).to_dict_for_json_api()
+                assert item == orjson.loads(orjson.dumps(expected))
+
+    def test_benchmark_list_query_count_independent_of_page_size(self, client):
+        self.authenticate(client)
+
+        statements = []
+
+        def _record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        counts = []
+        s.event.listen(conbench.db.engine, "before_cursor_execute", _record)
+        try:
+            for page_size in (1, 1000):
+                statements.clear()
+                res = self._make_request(client, page_size=page_size)
+                assert len(res["data"]) == min(page_size, 6)
+                counts.append(len(statements))
+        finally:
+            s.event.remove(conbench.db.engine, "before_cursor_execute", _record)
+
+        assert counts[0] == counts[1]
+
+    def test_benchmark_list_fields(self, client):
+        self.authenticate(client)
+
+        statements = []
+
+        def _record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        s.event.listen(conbench.db.engine, "before_cursor_execute", _record)
+        try:
+            res = self._make_request(
+                client, fields="id,history_fingerprint,stats.mean,timestamp"
+            )
+        finally:
+            s.event.remove(conbench.db.engine, "before_cursor_execute", _record)
+
+        assert len(res["data"]) == 6
+        for item in res["data"]:
+            assert set(item) == {"id", "history_fingerprint", "stats", "timestamp"}
+            assert set(item["stats"]) == {"mean"}
+
+        # Neither the arrays nor related entities were loaded.
+        sql = "\n".join(statements)
+        assert not re.search(r"benchmark_result\.(data|times)\b", sql)
+        assert "hardware" not in sql
+        assert "commit" not in sql
+
+        full = self._make_request(client)["data"]
+        assert [i["id"] for i in res["data"]] == [i["id"] for i in full]
+        assert [i["stats"]["mean"] for i in res["data"]] == [
+            i["stats"]["mean"] for i in full
+        ]
+
+    def test_benchmark_list_nested_fields(self, client):
+        self.authenticate(client)
+        res = self._make_request(client, fields="commit.sha,tags.name,links.self")
+        item = res["data"][0]
+        assert set(item) == {"commit", "tags", "links"}
+        assert set(item["commit"]) == {"sha"}
+        assert set(item["tags"]) == {"name"}
+        assert set(item["links"]) == {"self"}
+
+    @pytest.mark.parametrize(
+        "fields, error",
+        [
+            ("nope", "unknown field(s) in `fields`: nope"),
+            ("id,stats.nope,id.x", "unknown field(s) in `fields`: stats.nope, id.x"),
+            (",", "`fields` must name at least one field"),
+        ],
+    )
+    def test_benchmark_list_bad_fields(self, client, fields, error):
+        self.authenticate(client)
+        res = client.get(f"{self.url}?fields={fields}")
+        self.assert_400_bad_request(res, {"_errors": [error]})
+
     @pytest.mark.parametrize("page_size", ["0", "1001", "-1", "asd"])
     def test_bad_page_size(self, client, page_size):
         self.authenticate(client)
@@ -473,6 +568,18 @@ class TestBenchmarkResultPost(_asserts.PostEnforcer):
                     benchmark_result.hardware, attr
                 ) == int(value)
 
+    def test_create_benchmark_gzip_request_body(self, client):
+        self.authenticate(client)
+        response = client.post(
+            "/api/benchmarks/",
+            data=gzip.compress(orjson.dumps(self.valid_payload)),
+            content_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert response.status_code == 201, response.text
+        benchmark_result = BenchmarkResult.one(id=response.json["id"])
+        assert benchmark_result.run_id == self.valid_payload["run_id"]
+
     def test_create_benchmark_after_run_was_created(self, client):
         for hardware_type, run_payload, benchmark_results_payload in [
             ("machine", _fixtures.VALID_RUN_PAYLOAD, self.valid_payload),
@@ -1107,6 +1214,81 @@ class TestBenchmarkResultPost(_asserts.PostEnforcer):
         assert resp.status_code == 400, resp.text
         assert "invalid unit string `kg`" in resp.text
 
+    def test_idempotency_key_returns_original(self, client):
+        self.authenticate(client)
+        result = copy.deepcopy(_fixtures.VALID_RESULT_PAYLOAD)
+        result["run_id"] = _uuid()
+        headers = {"Idempotency-Key": _uuid()}
+
+        resp1 = client.post("/api/benchmark-results/", json=result, headers=headers)
+        assert resp1.status_code == 201, resp1.text
+        assert "Idempotent-Replayed" not in resp1.headers
+
+        # The same document (JSON key order does not matter).
+        resp2 = client.post(
+            "/api/benchmark-results/",
+            json=dict(reversed(list(result.items()))),
+            headers=headers,
+        )
+        assert resp2.status_code == 201, resp2.text
+        assert resp2.headers["Idempotent-Replayed"] == "true"
+        assert resp2.json == resp1.json
+        assert resp2.location == resp1.location
+
+        resp = client.get(f"/api/benchmark-results/?run_id={result['run_id']}")
+        assert len(resp.json["data"]) == 1
+
+        # The same key for a different document.
+        resp = client.post(
+            "/api/benchmark-results/",
+            json={**result, "batch_id": _uuid()},
+            headers=headers,
+        )
+        assert resp.status_code == 422, resp.text
+        assert "different request body" in resp.text
+
+        # A different key creates a new result.
+        resp3 = client.post(
+            "/api/benchmark-results/",
+            json=result,
+            headers={"Idempotency-Key": _uuid()},
+        )
+        assert resp3.status_code == 201, resp3.text
+        assert resp3.json["id"] != resp1.json["id"]
+
+    def test_idempotency_key_scoped_per_user(self, client):
+        self.authenticate(client)
+        result = copy.deepcopy(_fixtures.VALID_RESULT_PAYLOAD)
+        result["run_id"] = _uuid()
+        headers = {"Idempotency-Key": _uuid()}
+
+        resp1 = client.post("/api/benchmark-results/", json=result, headers=headers)
+        assert resp1.status_code == 201, resp1.text
+
+        other = self.create_random_user()
+        self.login(client, other.email, other.email.split("@")[0])
+        resp2 = client.post("/api/benchmark-results/", json=result, headers=headers)
+        assert resp2.status_code == 201, resp2.text
+        assert "Idempotent-Replayed" not in resp2.headers
+        assert resp2.json["id"] != resp1.json["id"]
+
+    def test_idempotency_key_bad_value(self, client):
+        self.authenticate(client)
+        resp = client.post(
+            "/api/benchmark-results/",
+            json=_fixtures.VALID_RESULT_PAYLOAD,
+            headers={"Idempotency-Key": "x" * 201},
+        )
+        self.assert_400_bad_request(
+            resp,
+            {
+                "_errors": [
+                    "Idempotency-Key header must be a non-empty string of at "
+                    "most 200 characters"
+                ]
+            },
+        )
+
     def test_special_unit_b_s(self, client):
         self.authenticate(client)
         result = _fixtures.VALID_RESULT_PAYLOAD.copy()
@@ -1119,3 +1301,219 @@ class TestBenchmarkResultPost(_asserts.PostEnforcer):
         resp = client.post("/api/benchmark-results/", json=result)
         assert resp.status_code == 201, resp.text
         assert resp.json["stats"]["unit"] == "B/s", resp.json
+
+
+class TestBenchmarkResultNDJSONPost(_asserts.ApiEndpointTest):
+    url = "/api/benchmark-results/ndjson/"
+
+    def _post(self, client, lines, chunk_size=None, headers=None):
+        url = self.url
+        if chunk_size is not None:
+            url += f"?chunk_size={chunk_size}"
+        body = b"\n".join(orjson.dumps(line) for line in lines) + b"\n"
+        return client.post(
+            url, data=body, content_type="application/x-ndjson", headers=headers
+        )
+
+    def _payload(self, run_id):
+        payload = copy.deepcopy(_fixtures.VALID_RESULT_PAYLOAD)
+        payload["run_id"] = run_id
+        payload["tags"]["name"] = _uuid()
+        return payload
+
+    def test_unauthenticated(self, client):
+        resp = self._post(client, [self._payload(_uuid())])
+        self.assert_401_unauthorized(resp)
+
+    def test_wrong_content_type(self, client):
+        self.authenticate(client)
+        resp = client.post(self.url, json=self._payload(_uuid()))
+        self.assert_400_bad_request(
+            resp, {"_errors": ["Content-Type must be application/x-ndjson"]}
+        )
+
+    def test_bad_chunk_size(self, client):
+        self.authenticate(client)
+        resp = self._post(client, [self._payload(_uuid())], chunk_size=0)
+        self.assert_400_bad_request(
+            resp,
+            {"_errors": ["chunk_size must be a positive integer no greater than 1000"]},
+        )
+
+    def test_ingest_with_invalid_lines(self, client):
+        self.authenticate(client)
+        run_id = _uuid()
+
+        invalid = self._payload(run_id)
+        del invalid["batch_id"]
+        lines = [self._payload(run_id) for _ in range(5)]
+        lines.insert(2, invalid)
+        lines.insert(4, [1, 2])
+
+        resp = self._post(client, lines, chunk_size=2)
+        assert resp.status_code == 200, resp.text
+        assert resp.mimetype == "application/x-ndjson"
+
+        statuses = [orjson.loads(line) for line in resp.data.splitlines()]
+        assert statuses[-1] == {
+            "summary": {"lines": 7, "created": 5, "replayed": 0, "failed": 2}
+        }
+        statuses = statuses[:-1]
+
+        assert [s["line"] for s in statuses] == list(range(1, 8))
+        assert [s["status"] for s in statuses] == [201, 201, 400, 201, 400, 201, 201]
+        assert "batch_id" in statuses[2]["error"]
+
+        created_ids = {s["id"] for s in statuses if s["status"] == 201}
+        resp = client.get(f"/api/benchmark-results/?run_id={run_id}")
+        assert {r["id"] for r in resp.json["data"]} == created_ids
+
+    def test_blank_lines_are_skipped(self, client):
+        self.authenticate(client)
+        run_id = _uuid()
+        body = b"\n\n" + orjson.dumps(self._payload(run_id)) + b"\n  \n"
+        resp = client.post(self.url, data=body, content_type="application/x-ndjson")
+        statuses = [orjson.loads(line) for line in resp.data.splitlines()]
+        assert statuses[0]["line"] == 3
+        assert statuses[0]["status"] == 201
+        assert statuses[-1] == {
+            "summary": {"lines": 1, "created": 1, "replayed": 0, "failed": 0}
+        }
+
+    def test_committed_chunks_survive_disconnect(self, client):
+        self.authenticate(client)
+        run_id = _uuid()
+        lines = [self._payload(run_id) for _ in range(5)]
+
+        resp = self._post(client, lines, chunk_size=2)
+        # Consume only the first chunk's worth of output, then close the
+        # response -- this is what happens when the HTTP client goes away.
+        it = resp.response
+        first = next(iter(it))
+        resp.close()
+
+        committed = [orjson.loads(line)["id"] for line in first.splitlines()]
+        assert len(committed) == 2
+
+        resp = client.get(f"/api/benchmark-results/?run_id={run_id}")
+        assert {r["id"] for r in resp.json["data"]} == set(committed)
+
+    def test_chunk_is_one_transaction(self, client, monkeypatch):
+        self.authenticate(client)
+        lines = [self._payload(_uuid()) for _ in range(2)]
+
+        def _commit_fails(self):
+            raise s.exc.OperationalError("COMMIT", {}, Exception("boom"))
+
+        # The session used in request context.
+        monkeypatch.setattr(flask_scoped_session, "commit", _commit_fails)
+        resp = self._post(client, lines)
+        statuses = [orjson.loads(line) for line in resp.data.splitlines()]
+        monkeypatch.undo()
+
+        assert [s["status"] for s in statuses[:-1]] == [500, 500]
+        assert statuses[0]["error"] == "commit failed: OperationalError"
+        # The related entities created for the chunk were rolled back, too.
+        for line in lines:
+            assert Case.first(name=line["tags"]["name"]) is None
+
+    def test_idempotency_key_resubmit_stream(self, client):
+        self.authenticate(client)
+        run_id = _uuid()
+        lines = [self._payload(run_id) for _ in range(4)]
+        headers = {"Idempotency-Key": _uuid()}
+
+        # Simulate a broken connection after the first chunk was committed.
+        resp = self._post(client, lines, chunk_size=2, headers=headers)
+        first = next(iter(resp.response))
+        resp.close()
+        committed = [orjson.loads(line)["id"] for line in first.splitlines()]
+
+        resp = self._post(client, lines, chunk_size=2, headers=headers)
+        statuses = [orjson.loads(line) for line in resp.data.splitlines()]
+        assert statuses[-1] == {
+            "summary": {"lines": 4, "created": 2, "replayed": 2, "failed": 0}
+        }
+        assert [s["id"] for s in statuses[:2]] == committed
+        assert all(s["replayed"] for s in statuses[:2])
+        assert "replayed" not in statuses[2]
+
+        resp = client.get(f"/api/benchmark-results/?run_id={run_id}")
+        assert len(resp.json["data"]) == 4
+
+        # Same key, but the second line changed.
+        lines[1]["batch_id"] = _uuid()
+        resp = self._post(client, lines, chunk_size=2, headers=headers)
+        statuses = [orjson.loads(line) for line in resp.data.splitlines()]
+        assert [s["status"] for s in statuses[:-1]] == [201, 422, 201, 201]
+        assert "different request body" in statuses[1]["error"]
+
+    def test_gzip_request_body(self, client):
+        self.authenticate(client)
+        run_id = _uuid()
+        lines = [self._payload(run_id) for _ in range(3)]
+        body = b"\n".join(orjson.dumps(line) for line in lines) + b"\n"
+
+        resp = client.post(
+            self.url,
+            data=gzip.compress(body),
+            content_type="application/x-ndjson",
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert resp.status_code == 200, resp.text
+        statuses = [orjson.loads(line) for line in resp.data.splitlines()]
+        assert statuses[-1] == {
+            "summary": {"lines": 3, "created": 3, "replayed": 0, "failed": 0}
+        }
+
+    def test_bad_gzip_request_body(self, client):
+        self.authenticate(client)
+        resp = client.post(
+            "/api/benchmark-results/",
+            data=gzip.compress(orjson.dumps(self._payload(_uuid())))[:-20],
+            content_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert resp.status_code == 400, resp.text
+
+    def test_gzip_request_body_too_large(self, client, monkeypatch):
+        monkeypatch.setattr(Config, "MAX_DECOMPRESSED_REQUEST_BYTES", 1000)
+        self.authenticate(client)
+        body = orjson.dumps(self._payload(_uuid()))
+        assert len(body) > 1000
+        resp = client.post(
+            "/api/benchmarks/",
+            data=gzip.compress(body),
+            content_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert resp.status_code == 413, resp.text
+
+    def test_gzip_request_body_unauthenticated(self, client):
+        resp = client.post(
+            self.url,
+            data=gzip.compress(orjson.dumps(self._payload(_uuid()))),
+            content_type="application/x-ndjson",
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert resp.status_code == 401, resp.text
+
+    def test_gzip_request_body_other_endpoint(self, client):
+        self.authenticate(client)
+        resp = client.post(
+            "/api/runs/",
+            data=gzip.compress(orjson.dumps(_fixtures.VALID_RUN_PAYLOAD)),
+            content_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert resp.status_code == 415, resp.text
+
+    def test_unsupported_content_encoding(self, client):
+        self.authenticate(client)
+        resp = client.post(
+            "/api/benchmark-results/",
+            data=orjson.dumps(self._payload(_uuid())),
+            content_type="application/json",
+            headers={"Content-Encoding": "br"},
+        )
+        assert resp.status_code == 415, resp.text
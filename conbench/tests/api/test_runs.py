@@ -3,11 +3,16 @@ from datetime import datetime, timedelta
 
 import pytest
 
+import conbench.api.runs
+from conbench.job import JobContext
 from conbench.util import tznaive_dt_to_aware_iso8601_for_api
 
 from ...api._examples import _api_run_entity
 from ...api.runs import get_candidate_baseline_runs
+from ...dbsession import current_session
 from ...entities.benchmark_result import BenchmarkResult
+from ...entities.commit import Commit
+from ...entities.run import Run
 from ...tests.api import _asserts, _fixtures
 from ...tests.helpers import _uuid
 
@@ -442,8 +447,50 @@ class TestRunList(_asserts.ListEnforcer):
 
     def test_run_list_no_commit_hash(self, client):
         self.authenticate(client)
+        older = _fixtures.benchmark_result(timestamp="2023-07-01T12:00:00Z")
+        newer = _fixtures.benchmark_result(timestamp="2023-07-02T12:00:00Z")
         response = client.get("/api/runs/")
-        self.assert_400_bad_request(response, {"_errors": ["commit_hash is required"]})
+        self.assert_200_ok(response)
+        # Most recent first.
+        assert [r["id"] for r in response.json["data"]][:2] == [
+            newer.run_id,
+            older.run_id,
+        ]
+
+    def test_run_list_filters(self, client):
+        self.authenticate(client)
+        a = _fixtures.benchmark_result(
+            reason="nightly", hardware_name=_uuid(), timestamp="2023-07-01T12:00:00Z"
+        )
+        b = _fixtures.benchmark_result(
+            repo_without_commit="https://github.com/org/other",
+            timestamp="2023-07-03T12:00:00Z",
+        )
+
+        def run_ids(**params):
+            res = client.get("/api/runs/", query_string=params)
+            self.assert_200_ok(res)
+            return {r["id"] for r in res.json["data"]}
+
+        assert run_ids(reason="nightly") == {a.run_id}
+        assert run_ids(hardware_hash=a.hardware.hash) == {a.run_id}
+        assert run_ids(repository="https://github.com/org/other") == {b.run_id}
+        assert run_ids(
+            earliest_timestamp="2023-07-01T00:00:00Z",
+            latest_timestamp="2023-07-02T00:00:00+00:00",
+        ) == {a.run_id}
+
+    @pytest.mark.parametrize(
+        "params, message",
+        [
+            ("cursor=foo", "cursor: invalid value"),
+            ("earliest_timestamp=foo", "earliest_timestamp: invalid timestamp"),
+        ],
+    )
+    def test_run_list_bad_args(self, client, params, message):
+        self.authenticate(client)
+        res = client.get(f"/api/runs/?{params}")
+        self.assert_400_bad_request(res, {"_errors": [message]})
 
     @pytest.mark.parametrize("page_size", ["0", "1001", "-1", "asd"])
     def test_bad_page_size(self, client, page_size):
@@ -454,6 +501,27 @@ class TestRunList(_asserts.ListEnforcer):
             {"_errors": ["page_size must be a positive integer no greater than 1000"]},
         )
 
+    def test_run_list_fields(self, client):
+        self.authenticate(client)
+        result = _fixtures.benchmark_result()
+        response = client.get(
+            f"/api/runs/?commit_hash={_fixtures.CHILD}&fields=id,timestamp,commit.sha"
+        )
+        self.assert_200_ok(response)
+        expected = _expected_entity(result)
+        assert {
+            "id": expected["id"],
+            "timestamp": expected["timestamp"],
+            "commit": {"sha": expected["commit"]["sha"]},
+        } in response.json["data"]
+
+    def test_run_list_bad_fields(self, client):
+        self.authenticate(client)
+        res = client.get(f"{self.url}&fields=id,nope")
+        self.assert_400_bad_request(
+            res, {"_errors": ["unknown field(s) in `fields`: nope"]}
+        )
+
     def test_pagination(self, client):
         self.authenticate(client)
         timestamp = datetime(2023, 10, 1)
@@ -477,6 +545,31 @@ class TestRunList(_asserts.ListEnforcer):
         assert {r["id"] for r in res.json["data"]} == {"3"}
         assert res.json["metadata"]["next_page_cursor"] is None
 
+    def test_keyset_pagination(self, client):
+        self.authenticate(client)
+        run_ids = [_uuid() for _ in range(5)]
+        # Two runs with the same timestamp; ties are broken by run ID.
+        for run_id, day in zip(run_ids, [1, 2, 2, 3, 4]):
+            _fixtures.benchmark_result(
+                run_id=run_id, timestamp=f"2023-10-0{day}T12:00:00Z"
+            )
+
+        expected = [run_ids[4], run_ids[3], *sorted(run_ids[1:3], reverse=True)]
+        expected.append(run_ids[0])
+
+        seen = []
+        url = "/api/runs/?page_size=2&latest_timestamp=2023-10-05"
+        cursor = None
+        for _ in range(4):
+            res = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+            self.assert_200_ok(res)
+            seen.extend(r["id"] for r in res.json["data"])
+            cursor = res.json["metadata"]["next_page_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == expected
+
 
 def test_get_candidate_baseline_runs():
     commits, benchmark_results = _fixtures.gen_fake_data()
@@ -739,7 +832,7 @@ def test_get_candidate_baseline_runs():
     for ix, (result, expected_baseline_run_dict) in enumerate(
         zip(benchmark_results, expected_baseline_run_dicts)
     ):
-        actual_baseline_run_dict = get_candidate_baseline_runs(result)
+        actual_baseline_run_dict = get_candidate_baseline_runs(Run.get(result.run_id))
         if actual_baseline_run_dict != expected_baseline_run_dict:
             failures.append(ix)
             log.info(
@@ -758,7 +851,9 @@ def test_get_candidate_baseline_runs():
         reason="nightly",
         commit=commits["44444"],
     )
-    actual_baseline_run_dict = get_candidate_baseline_runs(benchmark_results[-1])
+    actual_baseline_run_dict = get_candidate_baseline_runs(
+        Run.get(benchmark_results[-1].run_id)
+    )
     assert actual_baseline_run_dict == {
         "parent": {
             "error": None,
@@ -781,7 +876,7 @@ def test_get_candidate_baseline_runs():
     )
     assert benchmark_result_missing_commit.commit is None
     actual_baseline_run_dict = get_candidate_baseline_runs(
-        benchmark_result_missing_commit
+        Run.get(benchmark_result_missing_commit.run_id)
     )
     assert actual_baseline_run_dict == {
         "parent": {
@@ -810,7 +905,7 @@ def test_get_candidate_baseline_runs():
     )
     assert benchmark_result_different_repo.commit is None
     actual_baseline_run_dict = get_candidate_baseline_runs(
-        benchmark_result_different_repo
+        Run.get(benchmark_result_different_repo.run_id)
     )
     assert actual_baseline_run_dict == {
         "parent": {
@@ -829,3 +924,106 @@ def test_get_candidate_baseline_runs():
             "commits_skipped": None,
         },
     }
+
+
+def test_candidate_baseline_runs_stored(monkeypatch):
+    commits, benchmark_results = _fixtures.gen_fake_data()
+    contender = benchmark_results[-1]
+    expected = get_candidate_baseline_runs(Run.get(contender.run_id), store=True)
+
+    # Stored with the run, reused without searching again.
+    def search(*args):
+        raise AssertionError("unexpected search")
+
+    with monkeypatch.context() as m:
+        m.setattr(conbench.api.runs, "_search_for_candidate_baseline_runs", search)
+        current_session.expire_all()
+        run = Run.get(contender.run_id)
+        assert run.baseline_candidates is not None
+        assert "44444" in run.baseline_commit_shas
+        assert get_candidate_baseline_runs(run) == expected
+
+    # A new run on an ancestor commit drops the stored candidates.
+    new_result = _fixtures.benchmark_result(
+        name=contender.case.name,
+        results=[1, 2, 3],
+        reason="nightly",
+        commit=commits["44444"],
+    )
+    current_session.expire_all()
+    assert Run.get(contender.run_id).baseline_candidates is None
+    assert (
+        get_candidate_baseline_runs(Run.get(contender.run_id))["parent"][
+            "baseline_run_id"
+        ]
+        == new_result.run_id
+    )
+
+    # Searching without `store` (as for read requests) does not store.
+    current_session.expire_all()
+    assert Run.get(contender.run_id).baseline_candidates is None
+    get_candidate_baseline_runs(Run.get(contender.run_id), store=True)
+
+    # Runs on unrelated commits do not.
+    _fixtures.benchmark_result(
+        name=contender.case.name, results=[1, 2, 3], commit=commits["aaaaa"]
+    )
+    current_session.expire_all()
+    assert Run.get(contender.run_id).baseline_candidates is not None
+
+
+def test_precompute_candidate_baseline_runs():
+    recent = datetime.utcnow() - timedelta(minutes=10)
+    result = _fixtures.benchmark_result(timestamp=recent.isoformat() + "Z")
+    current_session.expire_all()
+    assert Run.get(result.run_id).baseline_candidates is None
+
+    assert conbench.api.runs.precompute_candidate_baseline_runs(JobContext("test"))
+
+    current_session.expire_all()
+    run = Run.get(result.run_id)
+    assert run.baseline_candidates is not None
+    assert run.baseline_candidates["candidates"] == get_candidate_baseline_runs(run)
+
+
+def test_precompute_candidate_baseline_runs_after_new_default_commit():
+    commits, _ = _fixtures.gen_fake_data()
+    recent = datetime.utcnow() - timedelta(minutes=10)
+    result = _fixtures.benchmark_result(
+        timestamp=recent.isoformat() + "Z", commit=commits["55555"]
+    )
+    conbench.api.runs.precompute_candidate_baseline_runs(JobContext("test"))
+    current_session.expire_all()
+    stored = Run.get(result.run_id).baseline_candidates
+    assert stored["latest_default_commit_id"] == commits["66666"].id
+
+    # A run on a new default-branch commit. The stored candidates of the
+    # earlier run did not look at that commit, they are kept.
+    commits["77777"] = Commit.create(
+        {
+            "sha": "77777",
+            "branch": "default",
+            "fork_point_sha": "77777",
+            "parent": "66666",
+            "repository": _fixtures.REPO,
+            "message": "message",
+            "author_name": "author_name",
+            "timestamp": datetime(2022, 1, 7),
+        }
+    )
+    new_result = _fixtures.benchmark_result(
+        name=result.case.name,
+        results=[1, 2, 3],
+        timestamp=recent.isoformat() + "Z",
+        commit=commits["77777"],
+    )
+    current_session.expire_all()
+    assert Run.get(result.run_id).baseline_candidates == stored
+
+    # The job refreshes them.
+    conbench.api.runs.precompute_candidate_baseline_runs(JobContext("test"))
+    current_session.expire_all()
+    run = Run.get(result.run_id)
+    assert run.baseline_candidates["latest_default_commit_id"] == commits["77777"].id
+    latest_default = run.baseline_candidates["candidates"]["latest_default"]
+    assert latest_default["baseline_run_id"] == new_result.run_id
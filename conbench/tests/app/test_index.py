@@ -1,5 +1,8 @@
+from ...app.index import _get_recent_runs
+from ...config import Config
 from ...tests.api import _fixtures
 from ...tests.app import _asserts
+from ...tests.helpers import _uuid
 
 
 class TestIndex(_asserts.ListEnforcer):
@@ -25,3 +28,20 @@ class TestIndex(_asserts.ListEnforcer):
         response = client.get("/index/")
         self.assert_index_page(response)
         assert run_id.encode() in response.data
+
+    def test_recent_runs_cache_cleared_on_ingest(self, client, monkeypatch):
+        # Do not clear the cache per request, as done during testing.
+        monkeypatch.setattr(Config, "TESTING", False)
+        _get_recent_runs.cache_clear()
+        self.authenticate(client)
+
+        self.assert_index_page(client.get("/"))
+
+        run_id = _uuid()
+        _fixtures.benchmark_result(run_id=run_id)
+        _fixtures.benchmark_result(run_id=run_id, error={"stack": "oops"})
+
+        response = client.get("/")
+        self.assert_index_page(response)
+        assert run_id in response.text
+        assert "(1 failed)" in response.text
@@ -0,0 +1,84 @@
+import dataclasses
+import datetime
+import math
+
+from ...app._plots import downsample_history, lttb_indices
+from ...entities.history import HistorySample, HistorySampleZscoreStats
+
+
+def test_lttb_indices():
+    x = list(range(100))
+    y = [math.sin(i / 5) for i in x]
+    # A spike the downsampled series must contain.
+    y[50] = 10
+
+    indices = lttb_indices(x, y, 20)
+    assert len(indices) == 20
+    assert indices == sorted(set(indices))
+    assert indices[0] == 0 and indices[-1] == 99
+    assert 50 in indices
+
+
+def test_lttb_indices_nothing_to_do():
+    assert lttb_indices([1, 2, 3], [1, 2, 3], 5) == [0, 1, 2]
+    assert lttb_indices([1, 2, 3, 4], [1, 2, 3, 4], 2) == [0, 1, 2, 3]
+
+
+def _samples(n):
+    start = datetime.datetime(2023, 1, 1)
+    zscorestats = HistorySampleZscoreStats(
+        begins_distribution_change=False,
+        segment_id="1",
+        rolling_mean_excluding_this_commit=None,
+        rolling_mean=1.0,
+        residual=0.0,
+        rolling_stddev=0.1,
+        is_outlier=False,
+    )
+    return [
+        HistorySample(
+            benchmark_result_id=str(i),
+            benchmark_name="bench",
+            history_fingerprint="fp",
+            case_text_id="case",
+            case_id="case",
+            context_id="context",
+            mean=1.0,
+            svs=1.0 + (i % 7) / 10,
+            svs_type="min",
+            data=[1.0],
+            times=[],
+            unit="s",
+            hardware_hash="hw",
+            repository="repo",
+            commit_hash=f"{i:040d}",
+            commit_msg="msg",
+            commit_timestamp=start + datetime.timedelta(hours=i),
+            result_timestamp=start + datetime.timedelta(hours=i),
+            run_name="run",
+            run_tags={},
+            zscorestats=dataclasses.replace(zscorestats),
+        )
+        for i in range(n)
+    ]
+
+
+def test_downsample_history_keeps_special_results():
+    samples = _samples(1000)
+    samples[10].zscorestats.is_outlier = True
+    samples[20].zscorestats.begins_distribution_change = True
+
+    # Input order does not matter.
+    downsampled = downsample_history(samples[::-1], 100, keep_ids={"30", "999"})
+
+    assert len(downsampled) <= 100
+    ids = [s.benchmark_result_id for s in downsampled]
+    assert {"10", "20", "30", "999", "0"}.issubset(ids)
+    # Sorted by commit time.
+    timestamps = [s.commit_timestamp for s in downsampled]
+    assert timestamps == sorted(timestamps)
+
+
+def test_downsample_history_short_history_unchanged():
+    samples = _samples(10)
+    assert downsample_history(samples, 100, keep_ids=set()) is samples
@@ -1,8 +1,10 @@
 import copy
 import re
 
+import flask
 import pytest
 
+from ...app import _plots
 from ...tests.api import _fixtures
 from ...tests.app import _asserts
 
@@ -77,6 +79,79 @@ class TestBenchmarkResultGet(_asserts.GetEnforcer):
         resp = client.get(f"benchmark-results/{bmr_id}/")
         assert resp.status_code == 200, resp.text
 
+    def test_no_virtual_api_requests(self, client, monkeypatch):
+        self.authenticate(client)
+        _, bmresults = _fixtures.gen_fake_data()
+        baseline, contender = bmresults[0], bmresults[1]
+
+        # Views read data directly, not via requests dispatched through the app.
+        def _test_client(*args, **kwargs):
+            raise AssertionError("unexpected test_client() call")
+
+        monkeypatch.setattr(flask.Flask, "test_client", _test_client)
+
+        for url in [
+            f"/benchmark-results/{baseline.id}/",
+            f"/runs/{baseline.run_id}/",
+            f"/compare/benchmark-results/{baseline.id}...{contender.id}/",
+            f"/compare/runs/{baseline.run_id}...{contender.run_id}/",
+            "/benchmark-results/",
+            f"/hardware/{baseline.hardware_id}/",
+            "/hardware/",
+            "/users/",
+        ]:
+            resp = client.get(url)
+            assert resp.status_code == 200, (url, resp.text)
+
+    def test_history_plot_cached(self, client, monkeypatch):
+        self.authenticate(client)
+        _, bmresults = _fixtures.gen_fake_data()
+        bmr_id = bmresults[0].id
+
+        calls = []
+        time_series_plot = _plots.time_series_plot
+
+        def _counting_time_series_plot(*args, **kwargs):
+            calls.append(1)
+            return time_series_plot(*args, **kwargs)
+
+        monkeypatch.setattr(_plots, "time_series_plot", _counting_time_series_plot)
+
+        for _ in range(2):
+            resp = client.get(f"benchmark-results/{bmr_id}/")
+            assert resp.status_code == 200, resp.text
+        assert len(calls) == 1
+
+        # Changing the history (here: an annotation) invalidates the plot.
+        resp = client.put(
+            f"/api/benchmark-results/{bmr_id}/",
+            json={"change_annotations": {"begins_distribution_change": True}},
+        )
+        assert resp.status_code == 200, resp.text
+        resp = client.get(f"benchmark-results/{bmr_id}/")
+        assert resp.status_code == 200, resp.text
+        assert len(calls) == 2
+
+    def test_history_plot_downsampled(self, client, monkeypatch):
+        monkeypatch.setattr(_plots, "HISTORY_PLOT_MAX_POINTS", 3)
+        self.authenticate(client)
+        _, bmresults = _fixtures.gen_fake_data()
+        bmr_id = bmresults[0].id
+
+        resp = client.get(f"benchmark-results/{bmr_id}/")
+        assert resp.status_code == 200, resp.text
+        assert "results not shown" in resp.text
+        assert "full-history=true" in resp.text
+
+        resp = client.get(f"benchmark-results/{bmr_id}/?full-history=true")
+        assert resp.status_code == 200, resp.text
+        assert "results not shown" not in resp.text
+
+        # A query argument named like a URL path argument is ignored.
+        resp = client.get(f"benchmark-results/{bmr_id}/?benchmark_result_id=x")
+        assert resp.status_code == 200, resp.text
+        assert f"benchmark-results/{bmr_id}/?" in resp.text
+
     def test_get_result_without_commit(self, client):
         self.authenticate(client)
 
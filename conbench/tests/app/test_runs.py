@@ -1,13 +1,17 @@
 import copy
 from typing import Optional
 
-from ...app.runs import _default_hyperlink_text
+import conbench.api.runs
+
+from ...app.runs import HISTORY_PLOTS_MAX_IDS, _default_hyperlink_text
 from ...tests.api import _fixtures
 from ...tests.app import _asserts
 
 
 class TestRunGet(_asserts.GetEnforcer):
     url = "/runs/{}/"
+    comparisons_url = "/runs/{}/comparisons/"
+    history_plots_url = "/runs/{}/history-plots/"
     title = "Run"
     redirect_on_unknown = False
 
@@ -58,6 +62,9 @@ class TestRunGet(_asserts.GetEnforcer):
         self._assert_view(client, payload["run_id"])
 
         # Ensure there are no baseline run links
+        response = client.get(self.comparisons_url.format(payload["run_id"]))
+        assert response.status_code == 200, response.text
+        assert "No baseline run found" in response.text
         self._assert_baseline_link(response.text, "parent", None, None)
         self._assert_baseline_link(response.text, "fork_point", None, None)
         self._assert_baseline_link(response.text, "latest_default", None, None)
@@ -71,7 +78,7 @@ class TestRunGet(_asserts.GetEnforcer):
             self._assert_view(client, benchmark_result.run_id)
 
         # 0 (first in history) should only have the latest_default link
-        response = client.get(self.url.format(benchmark_results[0].run_id))
+        response = client.get(self.comparisons_url.format(benchmark_results[0].run_id))
         self._assert_baseline_link(response.text, "parent", None, None)
         self._assert_baseline_link(response.text, "fork_point", None, None)
         self._assert_baseline_link(
@@ -83,7 +90,7 @@ class TestRunGet(_asserts.GetEnforcer):
         )
 
         # 1 (also on default branch) should link to 0 for parent
-        response = client.get(self.url.format(benchmark_results[1].run_id))
+        response = client.get(self.comparisons_url.format(benchmark_results[1].run_id))
         self._assert_baseline_link(
             response.text,
             "parent",
@@ -101,7 +108,7 @@ class TestRunGet(_asserts.GetEnforcer):
         )
 
         # 3 is a PR run forked from 1
-        response = client.get(self.url.format(benchmark_results[3].run_id))
+        response = client.get(self.comparisons_url.format(benchmark_results[3].run_id))
         self._assert_baseline_link(
             response.text,
             "parent",
@@ -122,3 +129,42 @@ class TestRunGet(_asserts.GetEnforcer):
             benchmark_results[15].run_id,
             benchmark_results[3].run_id,
         )
+
+    def test_run_page_defers_baseline_search(self, client, monkeypatch):
+        _, benchmark_results = _fixtures.gen_fake_data()
+        self.authenticate(client)
+        run_id = benchmark_results[3].run_id
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("baseline runs searched while rendering the page")
+
+        monkeypatch.setattr(conbench.api.runs, "get_candidate_baseline_runs", _fail)
+        response = client.get(self.url.format(run_id))
+        assert response.status_code == 200, response.text
+        assert f"/runs/{run_id}/comparisons/" in response.text
+        assert f"/runs/{run_id}/history-plots/" in response.text
+        assert f'data-result-id="{benchmark_results[3].id}"' in response.text
+
+    def test_history_plots(self, client):
+        _, benchmark_results = _fixtures.gen_fake_data()
+        self.authenticate(client)
+        result = benchmark_results[-1]
+        run_results = [r for r in benchmark_results if r.run_id == result.run_id]
+
+        ids = ",".join([r.id for r in run_results] + [benchmark_results[0].id])
+        response = client.get(
+            self.history_plots_url.format(result.run_id), query_string={"ids": ids}
+        )
+        assert response.status_code == 200, response.text
+        # Results of other runs are not included.
+        assert set(response.json) == {r.id for r in run_results}
+        plot = response.json[result.id]
+        assert plot["jsondoc"] or plot["reason_why_no_plot"]
+
+    def test_history_plots_too_many_ids(self, client):
+        self.authenticate(client)
+        ids = ",".join(str(i) for i in range(HISTORY_PLOTS_MAX_IDS + 1))
+        response = client.get(
+            self.history_plots_url.format("some-run"), query_string={"ids": ids}
+        )
+        assert response.status_code == 400
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from ...entities.run import Run, fetch_recent_runs
+from ...tests.api import _fixtures
+from ...tests.helpers import _uuid
+
+
+def test_run_maintained_on_insert():
+    run_id = _uuid()
+    first = _fixtures.benchmark_result(
+        run_id=run_id, reason="nightly", timestamp="2023-07-01T12:00:00Z"
+    )
+    _fixtures.benchmark_result(
+        run_id=run_id, error={"stack": "oops"}, timestamp="2023-07-01T12:05:00Z"
+    )
+    _fixtures.benchmark_result(run_id=run_id, timestamp="2023-07-01T11:55:00Z")
+
+    run = Run.get(run_id)
+    assert run.result_count == 3
+    assert run.error_count == 1
+    assert run.has_errors
+    assert run.first_timestamp == datetime(2023, 7, 1, 11, 55)
+    assert run.last_timestamp == datetime(2023, 7, 1, 12, 5)
+    # Run-level attributes are taken from the first inserted result.
+    assert run.reason == "nightly"
+    assert run.tags == first.run_tags
+    assert run.commit_id == first.commit_id
+    assert run.hardware_id == first.hardware_id
+    assert run.commit_repo_url == first.commit_repo_url
+
+
+def test_run_maintained_on_delete():
+    run_id = _uuid()
+    results = [
+        _fixtures.benchmark_result(run_id=run_id, timestamp="2023-07-01T12:00:00Z"),
+        _fixtures.benchmark_result(
+            run_id=run_id, error={"stack": "oops"}, timestamp="2023-07-01T12:05:00Z"
+        ),
+    ]
+
+    results[1].delete()
+    run = Run.get(run_id)
+    assert run.result_count == 1
+    assert run.error_count == 0
+    assert run.last_timestamp == datetime(2023, 7, 1, 12, 0)
+
+    results[0].delete()
+    assert Run.get(run_id) is None
+
+
+def test_run_maintained_on_update():
+    run_id = _uuid()
+    results = [
+        _fixtures.benchmark_result(run_id=run_id, timestamp="2023-07-01T12:00:00Z"),
+        _fixtures.benchmark_result(run_id=run_id, timestamp="2023-07-01T12:05:00Z"),
+    ]
+
+    results[1].update({"error": {"stack": "oops"}})
+    run = Run.get(run_id)
+    assert run.error_count == 1
+
+    results[1].update({"error": None, "timestamp": datetime(2023, 7, 1, 11, 0)})
+    run = Run.get(run_id)
+    assert run.error_count == 0
+    assert run.first_timestamp == datetime(2023, 7, 1, 11, 0)
+    assert run.last_timestamp == datetime(2023, 7, 1, 12, 0)
+    assert run.result_count == 2
+
+
+def test_fetch_recent_runs():
+    older = _fixtures.benchmark_result(timestamp="2023-07-01T12:00:00Z")
+    newer = _fixtures.benchmark_result(timestamp="2023-07-02T12:00:00Z")
+
+    run_ids = [run.id for run in fetch_recent_runs()]
+    assert run_ids.index(newer.run_id) < run_ids.index(older.run_id)
+    assert [run.id for run in fetch_recent_runs(n=1)] == [run_ids[0]]
@@ -0,0 +1,135 @@
+import threading
+
+import pytest
+import sqlalchemy as s
+
+import conbench.bmrt
+import conbench.db
+import conbench.invalidation
+from conbench.app import _plots
+from conbench.invalidation import InvalidationEvent
+from conbench.job import Job, JobContext, Scheduler
+from conbench.tests.api import _fixtures
+
+
+@pytest.fixture
+def events(monkeypatch):
+    received = []
+    monkeypatch.setattr(conbench.invalidation, "_handlers", [received.append])
+    return received
+
+
+def test_payload_roundtrip():
+    event = InvalidationEvent(
+        history_fingerprints={"f1", "f2"}, run_ids={"r1"}, result_ids={"b1"}
+    )
+    payload = event.to_payload("host-1")
+    assert InvalidationEvent.from_payload(payload) == InvalidationEvent(
+        history_fingerprints={"f1", "f2"},
+        run_ids={"r1"},
+        result_ids={"b1"},
+        origin="host-1",
+    )
+
+
+def test_payload_too_large():
+    event = InvalidationEvent(result_ids={f"result-{i:05d}" for i in range(2000)})
+    payload = event.to_payload("host-1")
+    assert len(payload) < 100
+    assert InvalidationEvent.from_payload(payload).everything
+
+
+def test_published_on_commit(client, events):
+    result = _fixtures.benchmark_result()
+
+    assert len(events) >= 1
+    event = events[-1]
+    assert result.id in event.result_ids
+    assert result.run_id in event.run_ids
+    assert result.history_fingerprint in event.history_fingerprints
+    assert not event.everything
+
+
+def test_not_published_on_rollback(client, events):
+    result = _fixtures.benchmark_result()
+    events.clear()
+
+    result.run_reason = "changed"
+    conbench.db._session.flush()
+    conbench.db._session.rollback()
+    assert events == []
+
+
+def _notify(payload: str) -> None:
+    with conbench.db.engine.begin() as conn:
+        conn.execute(s.select(s.func.pg_notify(conbench.invalidation.CHANNEL, payload)))
+
+
+def test_listener_dispatches_events_from_other_processes(client, events):
+    received = threading.Event()
+    events_from_other = []
+
+    def handler(event):
+        if event.origin == "other-process":
+            events_from_other.append(event)
+            received.set()
+
+    conbench.invalidation._handlers.append(handler)
+
+    sched = Scheduler()
+    sched.register(
+        Job(name="test-listener", func=conbench.invalidation.listen, interval=1)
+    )
+    sched.start()
+    try:
+        for _ in range(100):
+            if conbench.invalidation.is_listening():
+                break
+            threading.Event().wait(0.05)
+        assert conbench.invalidation.is_listening()
+        # Listening started: events may have been missed.
+        assert any(e.everything for e in events)
+
+        # Events sent by this very process are skipped (handlers were called
+        # after commit already).
+        _notify(
+            InvalidationEvent(run_ids={"mine"}).to_payload(
+                conbench.invalidation._origin()
+            )
+        )
+        _notify(InvalidationEvent(run_ids={"r1"}).to_payload("other-process"))
+        assert received.wait(5)
+    finally:
+        sched.stop()
+
+    assert not conbench.invalidation.is_listening()
+    assert events_from_other[0].run_ids == {"r1"}
+    # Notifications are delivered in order: the first one was skipped.
+    assert not any(e.run_ids == {"mine"} for e in events)
+
+
+def test_history_plot_cache_eviction():
+    _plots._history_plot_cache.clear()
+    _plots._history_plot_cache.set((("fp-a", 1, "r1", 0, None, None), False), "a")
+    _plots._history_plot_cache.set((("fp-b", 1, "r2", 0, None, None), False), "b")
+
+    _plots._evict_history_plots(InvalidationEvent(history_fingerprints={"fp-a"}))
+    assert len(_plots._history_plot_cache) == 1
+    assert _plots._history_plot_cache.get((("fp-b", 1, "r2", 0, None, None), False))
+
+    _plots._evict_history_plots(InvalidationEvent(everything=True))
+    assert len(_plots._history_plot_cache) == 0
+
+
+def test_bmrt_refresh_skipped_without_changes(client, monkeypatch):
+    monkeypatch.setattr(conbench.invalidation, "is_listening", lambda: True)
+    ctx = JobContext("test")
+
+    conbench.bmrt._RESULTS_CHANGED.set()
+    assert conbench.bmrt.refresh_bmrt_cache(ctx)
+    assert not conbench.bmrt.refresh_bmrt_cache(ctx)
+
+    result = _fixtures.benchmark_result()
+    assert conbench.bmrt.refresh_bmrt_cache(ctx)
+    assert result.id in conbench.bmrt.bmrt_cache["by_id"]
+    conbench.bmrt.reinit()
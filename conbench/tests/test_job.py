@@ -0,0 +1,249 @@
+import datetime
+import os
+import threading
+import time
+
+import prometheus_client
+import pytest
+from click.testing import CliRunner
+
+import conbench.bmrt
+import conbench.db
+from conbench import cli
+from conbench.config import Config
+from conbench.job import (
+    CronSpec,
+    Job,
+    JobCancelled,
+    JobContext,
+    Scheduler,
+    _advisory_lock,
+    web_jobs,
+)
+from conbench.tests.api import _fixtures
+
+
+def _sample(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.parametrize(
+    "spec, after, expected",
+    [
+        ("*/15 * * * *", "2023-07-01 12:07:30", "2023-07-01 12:15:00"),
+        ("0 3 * * *", "2023-07-01 03:00:00", "2023-07-02 03:00:00"),
+        ("30 1-2 * * *", "2023-07-01 01:45:00", "2023-07-01 02:30:00"),
+        ("0 0 1 * *", "2023-12-15 00:00:00", "2024-01-01 00:00:00"),
+        # 2023-07-01 is a Saturday.
+        ("0 12 * * 1,3", "2023-07-01 00:00:00", "2023-07-03 12:00:00"),
+        # Day of month or day of week (Sunday).
+        ("0 0 15 * 0", "2023-07-01 00:00:00", "2023-07-02 00:00:00"),
+        # A stepped `*` is not a restriction: every second day and Monday.
+        ("0 0 */2 * 1", "2023-07-03 00:00:00", "2023-07-17 00:00:00"),
+        ("0 0 29 2 *", "2023-03-01 00:00:00", "2024-02-29 00:00:00"),
+    ],
+)
+def test_cron_next_after(spec, after, expected):
+    t = CronSpec(spec).next_after(datetime.datetime.fromisoformat(after))
+    assert t == datetime.datetime.fromisoformat(expected)
+
+
+@pytest.mark.parametrize(
+    "spec", ["* * * *", "60 * * * *", "*/0 * * * *", "5-1 * * * *", "a * * * *"]
+)
+def test_cron_invalid(spec):
+    with pytest.raises(ValueError):
+        CronSpec(spec)
+
+
+def test_cron_never_matches():
+    with pytest.raises(ValueError, match="never matches"):
+        CronSpec("0 0 30 2 *").next_after(datetime.datetime(2023, 1, 1))
+
+
+def test_job_needs_one_schedule():
+    with pytest.raises(ValueError):
+        Job(name="j", func=lambda ctx: None)
+    with pytest.raises(ValueError):
+        Job(name="j", func=lambda ctx: None, interval=1, cron="* * * * *")
+
+
+def test_job_next_delay():
+    job = Job(
+        name="j",
+        func=lambda ctx: None,
+        first_delay=3,
+        interval=10,
+        runtime_interval_factor=5,
+        retry_interval=60,
+    )
+    assert job.next_delay(None, False) == 3
+    assert job.next_delay(1, False) == 10
+    assert job.next_delay(4, False) == 20
+    assert job.next_delay(1, True) == 60
+
+    job = Job(name="j", func=lambda ctx: None, interval=10, jitter=2)
+    for _ in range(50):
+        assert 10 <= job.next_delay(1, False) <= 12
+
+    job = Job(name="j", func=lambda ctx: None, cron="* * * * *")
+    assert 0 < job.next_delay(None, False) <= 60
+
+
+def test_scheduler_runs_interval_job_until_stopped():
+    runs = []
+    three_runs = threading.Event()
+
+    def func(ctx):
+        runs.append(ctx.job_name)
+        if len(runs) == 3:
+            three_runs.set()
+
+    sched = Scheduler()
+    sched.register(Job(name="test-interval", func=func, interval=0.01))
+    with pytest.raises(ValueError):
+        sched.register(Job(name="test-interval", func=func, interval=1))
+
+    sched.start()
+    assert three_runs.wait(5)
+    sched.stop()
+    n_runs = len(runs)
+    time.sleep(0.05)
+    assert len(runs) == n_runs
+    assert _sample(
+        "conbench_job_last_success_timestamp_seconds", job="test-interval"
+    ) == pytest.approx(time.time(), abs=10)
+
+
+def test_scheduler_unschedule():
+    runs = []
+    sched = Scheduler()
+    sched.register(
+        Job(
+            name="test-unschedule",
+            func=lambda ctx: runs.append(1) or ctx.unschedule(),
+            interval=0.01,
+        )
+    )
+    sched.start()
+    sched._threads[0].join(5)
+    assert not sched._threads[0].is_alive()
+    assert runs == [1]
+    sched.stop()
+
+
+def test_scheduler_failure_counted():
+    def func(ctx):
+        raise Exception("oops")
+
+    failures_before = _sample("conbench_job_failures_total", job="test-failure")
+    ctx = Scheduler().run_once(Job(name="test-failure", func=func, interval=1))
+    assert ctx is not None and ctx.failed
+    assert (
+        _sample("conbench_job_failures_total", job="test-failure")
+        == failures_before + 1
+    )
+
+
+def test_scheduler_max_runtime_cancels():
+    def func(ctx):
+        while True:
+            ctx.check_cancelled()
+            time.sleep(0.01)
+
+    t0 = time.monotonic()
+    ctx = Scheduler().run_once(
+        Job(name="test-max-runtime", func=func, interval=1, max_runtime=0.1)
+    )
+    assert time.monotonic() - t0 < 5
+    assert ctx is not None and ctx.cancelled and ctx.failed
+
+
+def test_scheduler_shutdown_cancels_running_job():
+    started = threading.Event()
+    cancelled = []
+
+    def func(ctx):
+        started.set()
+        # Sleep "forever" unless cancelled.
+        cancelled.append(not ctx.sleep(60))
+        ctx.check_cancelled()
+
+    sched = Scheduler()
+    sched.register(Job(name="test-shutdown", func=func, interval=1))
+    sched.start()
+    assert started.wait(5)
+    t0 = time.monotonic()
+    sched.stop()
+    assert time.monotonic() - t0 < 5
+    assert cancelled == [True]
+
+
+def test_exclusive_job_skipped_while_locked_elsewhere(client):
+    runs = []
+    job = Job(
+        name="test-exclusive",
+        func=lambda ctx: runs.append(1),
+        interval=1,
+        exclusive=True,
+    )
+
+    with _advisory_lock(job.name) as acquired:
+        assert acquired
+        assert Scheduler().run_once(job) is None
+        assert runs == []
+
+    ctx = Scheduler().run_once(job)
+    assert ctx is not None and not ctx.failed
+    assert runs == [1]
+
+
+def test_check_cancelled_raises():
+    ctx = JobContext("j")
+    ctx.check_cancelled()
+    ctx.cancel()
+    with pytest.raises(JobCancelled):
+        ctx.check_cancelled()
+
+
+def test_web_jobs_with_jobs_in_worker(monkeypatch):
+    names = [j.name for j in web_jobs()]
+    assert "bmrt-cache-refresh" in names and "bmrt-snapshot-load" not in names
+
+    monkeypatch.setattr(Config, "JOBS_IN_WORKER", True)
+    names = [j.name for j in web_jobs()]
+    assert "bmrt-cache-refresh" not in names
+    assert "partition-maintenance" not in names
+    assert "bmrt-snapshot-load" in names
+
+
+def test_worker_publishes_bmrt_snapshot(client, monkeypatch, tmp_path):
+    snapshot_path = tmp_path / "snap.json"
+    monkeypatch.setattr(Config, "BMRT_SNAPSHOT_PATH", str(snapshot_path))
+    # The worker runs in this process: keep the test suite's DB engines.
+    monkeypatch.setattr(conbench.db, "configure_engine", lambda url: None)
+    monkeypatch.setattr(conbench.db, "configure_replica_engine", lambda url: None)
+    result = _fixtures.benchmark_result()
+
+    # The worker process: populate the cache, write the snapshot.
+    result_cli = CliRunner().invoke(cli.conbench, ["worker", "--once"])
+    assert result_cli.exit_code == 0, result_cli.output
+    assert snapshot_path.stat().st_mode & 0o777 == 0o600
+    cached = conbench.bmrt.bmrt_cache["by_id"][result.id]
+
+    # A web application process: load the snapshot, once.
+    conbench.bmrt.reinit()
+    assert result.id not in conbench.bmrt.bmrt_cache["by_id"]
+    assert conbench.bmrt.load_bmrt_snapshot_if_changed(Config.BMRT_SNAPSHOT_PATH)
+    assert conbench.bmrt.bmrt_cache["by_id"][result.id] == cached
+    assert conbench.bmrt.bmrt_cache["meta"].n_results >= 1
+    assert conbench.bmrt.bmrt_cache["by_4t_df"]
+    assert not conbench.bmrt.load_bmrt_snapshot_if_changed(Config.BMRT_SNAPSHOT_PATH)
+    conbench.bmrt.reinit()
+
+
+def test_bmrt_snapshot_not_loaded_if_accessible_to_others(tmp_path):
+    path = str(tmp_path / "snap.json")
+    conbench.bmrt.write_bmrt_snapshot(path)
+    os.chmod(path, 0o644)
+    assert not conbench.bmrt.load_bmrt_snapshot_if_changed(path)
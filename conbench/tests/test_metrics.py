@@ -0,0 +1,83 @@
+import prometheus_client
+import pytest
+
+import conbench.db
+from conbench.metrics import statement_fingerprint
+from conbench.tests.api import _fixtures
+
+
+def _sample(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [
+        (
+            "SELECT benchmark_result.id, benchmark_result.run_id \n"
+            "FROM benchmark_result JOIN commit ON commit.id = benchmark_result.commit_id",
+            "SELECT benchmark_result",
+        ),
+        ('INSERT INTO "case" (id, name) VALUES (%(id)s, %(name)s)', "INSERT case"),
+        ("UPDATE run SET has_errors=%(has_errors)s", "UPDATE run"),
+        ("DELETE FROM info", "DELETE info"),
+        ("/* comment FROM x */ select 1", "SELECT"),
+        ("BEGIN", "BEGIN"),
+        ("", "none"),
+    ],
+)
+def test_statement_fingerprint(statement, expected):
+    assert statement_fingerprint(statement) == expected
+
+
+def test_db_query_metrics_per_endpoint(client):
+    result = _fixtures.benchmark_result()
+
+    handler = "api.benchmark"
+    count_before = _sample(
+        "conbench_db_queries_per_request_count", http_handler_name=handler
+    )
+    queries_before = _sample(
+        "conbench_db_queries_per_request_sum", http_handler_name=handler
+    )
+    duration_before = _sample(
+        "conbench_db_query_duration_seconds_count",
+        statement="SELECT benchmark_result",
+        http_handler_name=handler,
+    )
+
+    resp = client.get(f"/api/benchmark-results/{result.id}/")
+    assert resp.status_code == 200, resp.text
+
+    assert (
+        _sample("conbench_db_queries_per_request_count", http_handler_name=handler)
+        == count_before + 1
+    )
+    assert (
+        _sample("conbench_db_queries_per_request_sum", http_handler_name=handler)
+        > queries_before
+    )
+    assert (
+        _sample(
+            "conbench_db_query_duration_seconds_count",
+            statement="SELECT benchmark_result",
+            http_handler_name=handler,
+        )
+        > duration_before
+    )
+
+
+def test_db_pool_metrics(client):
+    assert _sample("conbench_db_pool_checked_out", pool="primary") == float(
+        conbench.db.engine.pool.checkedout()
+    )
+
+    wait_before = _sample(
+        "conbench_db_pool_checkout_wait_seconds_count", pool="primary"
+    )
+    with conbench.db.engine.connect():
+        assert _sample("conbench_db_pool_checked_out", pool="primary") >= 1
+    assert (
+        _sample("conbench_db_pool_checkout_wait_seconds_count", pool="primary")
+        == wait_before + 1
+    )
@@ -0,0 +1,104 @@
+import copy
+import datetime
+
+import sqlalchemy as s
+
+import conbench.db
+import conbench.partitions
+from conbench.tests.api import _fixtures
+from conbench.tests.api._asserts import ApiEndpointTest
+from conbench.tests.helpers import _uuid
+
+
+def _partition_of(result_id: str) -> str:
+    with conbench.db.engine.connect() as conn:
+        return conn.execute(
+            s.text("SELECT tableoid::regclass::text FROM benchmark_result WHERE id=:i"),
+            {"i": result_id},
+        ).scalar_one()
+
+
+def test_initial_partitions_exist():
+    with conbench.db.engine.connect() as conn:
+        names = set(
+            conn.execute(
+                s.text(
+                    "SELECT inhrelid::regclass::text FROM pg_inherits "
+                    "WHERE inhparent = 'benchmark_result'::regclass"
+                )
+            ).scalars()
+        )
+
+    assert conbench.partitions.LEGACY_PARTITION in names
+    assert conbench.partitions.DEFAULT_PARTITION in names
+    assert conbench.partitions.partition_name(datetime.date.today()) in names
+
+
+def test_new_result_lands_in_monthly_partition(client):
+    result = _fixtures.benchmark_result()
+    assert _partition_of(result.id) == conbench.partitions.partition_name(
+        result.timestamp.date()
+    )
+
+
+def test_time_filter_prunes_partitions():
+    with conbench.db.engine.connect() as conn:
+        plan = "\n".join(
+            conn.execute(
+                s.text(
+                    "EXPLAIN SELECT id FROM benchmark_result "
+                    "WHERE timestamp >= '2023-06-03' ORDER BY id DESC LIMIT 10"
+                )
+            ).scalars()
+        )
+    assert conbench.partitions.LEGACY_PARTITION not in plan
+    assert conbench.partitions.partition_name(datetime.date.today()) in plan
+
+
+def test_ensure_partitions_moves_rows_out_of_default(client):
+    month = datetime.date(2099, 1, 1)
+    name = conbench.partitions.partition_name(month)
+
+    result_id = _fixtures.benchmark_result(timestamp="2099-01-15T12:00:00Z").id
+
+    # A result submitted with an idempotency key.
+    ApiEndpointTest().authenticate(client)
+    payload = copy.deepcopy(_fixtures.VALID_RESULT_PAYLOAD)
+    payload["run_id"] = _uuid()
+    payload["timestamp"] = "2099-01-16T12:00:00Z"
+    headers = {"Idempotency-Key": _uuid()}
+    resp = client.post("/api/benchmark-results/", json=payload, headers=headers)
+    assert resp.status_code == 201, resp.text
+    keyed_result_id = resp.json["id"]
+
+    # End the ORM session's transaction, it would block ATTACH PARTITION.
+    conbench.db._session.commit()
+    assert _partition_of(result_id) == conbench.partitions.DEFAULT_PARTITION
+    assert _partition_of(keyed_result_id) == conbench.partitions.DEFAULT_PARTITION
+
+    try:
+        with conbench.db.engine.begin() as conn:
+            assert conbench.partitions.ensure_partitions(conn, month, month) == 1
+        assert _partition_of(result_id) == name
+        assert _partition_of(keyed_result_id) == name
+
+        # The idempotency key survived the move.
+        resp = client.post("/api/benchmark-results/", json=payload, headers=headers)
+        assert resp.status_code == 201, resp.text
+        assert resp.headers["Idempotent-Replayed"] == "true"
+        assert resp.json["id"] == keyed_result_id
+        conbench.db._session.commit()
+
+        # Idempotent.
+        with conbench.db.engine.begin() as conn:
+            assert conbench.partitions.ensure_partitions(conn, month, month) == 0
+    finally:
+        conbench.db.empty_db_tables()
+        with conbench.db.engine.begin() as conn:
+            # Detach first: the foreign key referencing benchmark_result
+            # (from benchmark_result_idempotency_key) depends on each
+            # partition.
+            conn.execute(
+                s.text(f"ALTER TABLE benchmark_result DETACH PARTITION {name}")
+            )
+            conn.execute(s.text(f"DROP TABLE {name}"))
@@ -0,0 +1,103 @@
+"""
+These tests require a second PostgreSQL instance that is a streaming
+replication standby of the test database, e.g. set up with
+
+    pg_basebackup -h localhost -p 5432 -U postgres -D <datadir> -R -X stream
+    pg_ctl -D <datadir> -o '-p 5433' start
+
+and CONBENCH_TEST_REPLICA_DB_URI set to its URL. They are skipped otherwise.
+"""
+
+import os
+import time
+
+import pytest
+import sqlalchemy as s
+
+import conbench.db
+from conbench.config import Config
+from conbench.dbsession import current_read_session, current_session
+from conbench.tests.api import _fixtures
+
+REPLICA_URI = os.environ.get("CONBENCH_TEST_REPLICA_DB_URI")
+
+pytestmark = pytest.mark.skipif(
+    REPLICA_URI is None, reason="CONBENCH_TEST_REPLICA_DB_URI not set"
+)
+
+
+@pytest.fixture
+def replica(application):
+    conbench.db.configure_replica_engine(REPLICA_URI)
+    yield conbench.db.replica_engine
+    conbench.db.configure_replica_engine(None)
+
+
+def _in_recovery(session) -> bool:
+    return session.execute(s.text("SELECT pg_is_in_recovery()")).scalar()
+
+
+def _wait_for_replica_to_catch_up(timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        conbench.db.replica_lag_seconds.cache_clear()
+        if conbench.db.replica_lag_seconds() == 0:
+            return
+        time.sleep(0.05)
+    raise TimeoutError("replica did not catch up")
+
+
+def test_read_session_uses_replica(application, replica):
+    with application.test_request_context():
+        assert _in_recovery(current_read_session)
+        assert not _in_recovery(current_session)
+
+
+def test_no_replica_configured(application):
+    assert conbench.db.replica_engine is None
+    with application.test_request_context():
+        assert not _in_recovery(current_read_session)
+
+
+def test_fallback_when_lagging(application, replica, monkeypatch):
+    monkeypatch.setattr(Config, "DB_REPLICA_MAX_LAG_SECONDS", -1.0)
+    with application.test_request_context():
+        assert not _in_recovery(current_read_session)
+
+
+def test_fallback_when_unreachable(application):
+    url = s.engine.make_url(REPLICA_URI).set(host="127.0.0.1", port=1)
+    conbench.db.configure_replica_engine(url.render_as_string(hide_password=False))
+    try:
+        assert conbench.db.replica_lag_seconds() is None
+        with application.test_request_context():
+            assert not _in_recovery(current_read_session)
+    finally:
+        conbench.db.configure_replica_engine(None)
+
+
+def test_history_and_compare_read_from_replica(client, replica):
+    statements = []
+
+    @s.event.listens_for(replica, "before_cursor_execute")
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    result = _fixtures.benchmark_result()
+    _wait_for_replica_to_catch_up()
+
+    resp = client.get(f"/api/history/{result.id}/")
+    assert resp.status_code == 200, resp.text
+    assert len(resp.json["data"]) == 1
+    assert any("benchmark_result" in st for st in statements)
+
+    statements.clear()
+    resp = client.get(f"/api/compare/runs/{result.run_id}...{result.run_id}/")
+    assert resp.status_code == 200, resp.text
+    assert any("benchmark_result" in st for st in statements)
+
+    # Writes (and reads outside of decorated handlers) stay on the primary.
+    statements.clear()
+    resp = client.get(f"/api/benchmark-results/{result.id}/")
+    assert resp.status_code == 200, resp.text
+    assert statements == []
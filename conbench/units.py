@@ -66,7 +66,7 @@ KNOWN_UNITS: Dict[TUnit, TUnitDef] = {
     },
 }
 # Note: if you add a new unit where less_is_better isn't identical to
-# "symbol doesn't end with '/s'" then modify _query_and_calculate_distribution_stats()
+# "symbol doesn't end with '/s'" then modify _svs_column()
 # in conbench/entities/history.py.
 
 
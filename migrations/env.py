@@ -14,6 +14,7 @@ from conbench.entities import (  # noqa  # isort:skip
     info,
     hardware,
     benchmark_result,
+    run,
     user,
 )
 
@@ -0,0 +1,43 @@
+"""run listing indexes
+
+Revision ID: 0d4b7a92c6e1
+Revises: c3f0d8e6a214
+Create Date: 2026-10-19 16:21:07.845210
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0d4b7a92c6e1"
+down_revision = "c3f0d8e6a214"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_index("run_first_timestamp_index", table_name="run")
+    op.create_index("run_first_timestamp_id_index", "run", ["first_timestamp", "id"])
+    op.create_index(
+        "run_commit_repo_url_first_timestamp_id_index",
+        "run",
+        ["commit_repo_url", "first_timestamp", "id"],
+    )
+    op.create_index(
+        "run_hardware_id_first_timestamp_id_index",
+        "run",
+        ["hardware_id", "first_timestamp", "id"],
+    )
+    op.create_index(
+        "run_reason_first_timestamp_id_index",
+        "run",
+        ["reason", "first_timestamp", "id"],
+    )
+
+
+def downgrade():
+    op.drop_index("run_reason_first_timestamp_id_index", table_name="run")
+    op.drop_index("run_hardware_id_first_timestamp_id_index", table_name="run")
+    op.drop_index("run_commit_repo_url_first_timestamp_id_index", table_name="run")
+    op.drop_index("run_first_timestamp_id_index", table_name="run")
+    op.create_index("run_first_timestamp_index", "run", ["first_timestamp"])
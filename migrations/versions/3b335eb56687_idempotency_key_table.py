@@ -0,0 +1,52 @@
+"""idempotency key table
+
+Revision ID: 3b335eb56687
+Revises: 5e8a1c3f9b27
+Create Date: 2026-10-19 21:10:31.902114
+
+Move idempotency keys out of benchmark_result into their own table, scoped
+per user and with a hash of the submitted document. Existing keys are not
+carried over: the submitting user is not known for them. Keys only matter
+for retries within a short time window after submission.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3b335eb56687"
+down_revision = "5e8a1c3f9b27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "benchmark_result_idempotency_key",
+        sa.Column("user_id", sa.String(length=50), nullable=False),
+        sa.Column("key", sa.Text(), nullable=False),
+        sa.Column("body_hash", sa.Text(), nullable=False),
+        sa.Column("benchmark_result_id", sa.String(length=50), nullable=False),
+        sa.Column("benchmark_result_timestamp", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["benchmark_result_id", "benchmark_result_timestamp"],
+            ["benchmark_result.id", "benchmark_result.timestamp"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("user_id", "key"),
+    )
+    op.drop_index("benchmark_result_idempotency_key_idx", table_name="benchmark_result")
+    op.drop_column("benchmark_result", "idempotency_key")
+
+
+def downgrade():
+    op.add_column(
+        "benchmark_result", sa.Column("idempotency_key", sa.Text(), nullable=True)
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX benchmark_result_idempotency_key_idx "
+        "ON benchmark_result (idempotency_key, timestamp) "
+        "WHERE idempotency_key IS NOT NULL"
+    )
+    op.drop_table("benchmark_result_idempotency_key")
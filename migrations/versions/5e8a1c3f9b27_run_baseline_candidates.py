@@ -0,0 +1,60 @@
+"""run baseline candidates
+
+Revision ID: 5e8a1c3f9b27
+Revises: 0d4b7a92c6e1
+Create Date: 2026-10-19 18:02:44.513960
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "5e8a1c3f9b27"
+down_revision = "0d4b7a92c6e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "run",
+        sa.Column(
+            "baseline_candidates",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+        ),
+    )
+    op.add_column(
+        "run",
+        sa.Column("baseline_commit_shas", postgresql.ARRAY(sa.Text()), nullable=True),
+    )
+    op.create_index(
+        "run_baseline_commit_shas_index",
+        "run",
+        ["baseline_commit_shas"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "run_baseline_candidates_missing_index",
+        "run",
+        ["last_timestamp"],
+        postgresql_where=sa.text("baseline_candidates IS NULL"),
+    )
+    op.create_index(
+        "commit_default_branch_repository_timestamp_index",
+        "commit",
+        ["repository", "timestamp"],
+        postgresql_where=sa.text("sha = fork_point_sha"),
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "commit_default_branch_repository_timestamp_index", table_name="commit"
+    )
+    op.drop_index("run_baseline_candidates_missing_index", table_name="run")
+    op.drop_index("run_baseline_commit_shas_index", table_name="run")
+    op.drop_column("run", "baseline_commit_shas")
+    op.drop_column("run", "baseline_candidates")
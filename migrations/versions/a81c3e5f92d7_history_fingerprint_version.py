@@ -0,0 +1,30 @@
+"""history_fingerprint_version
+
+Revision ID: a81c3e5f92d7
+Revises: e5b7d2a40c19
+Create Date: 2026-10-19 11:48:20.904113
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a81c3e5f92d7"
+down_revision = "e5b7d2a40c19"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # No backfill needed: a missing row means version 0.
+    op.create_table(
+        "history_fingerprint_version",
+        sa.Column("history_fingerprint", sa.Text(), nullable=False),
+        sa.Column("version", sa.BigInteger(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("history_fingerprint"),
+    )
+
+
+def downgrade():
+    op.drop_table("history_fingerprint_version")
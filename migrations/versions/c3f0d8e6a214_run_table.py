@@ -0,0 +1,83 @@
+"""run table
+
+Revision ID: c3f0d8e6a214
+Revises: a81c3e5f92d7
+Create Date: 2026-10-19 15:02:41.318527
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "c3f0d8e6a214"
+down_revision = "a81c3e5f92d7"
+branch_labels = None
+depends_on = None
+
+
+# Backfill from existing results. Run-level attributes are taken from the
+# earliest result of each run. The error condition mirrors
+# BenchmarkResult.is_failed.
+_BACKFILL_SQL = """
+INSERT INTO run (
+    id, reason, tags, commit_id, commit_repo_url, hardware_id,
+    first_timestamp, last_timestamp, result_count, error_count
+)
+SELECT
+    f.run_id, f.run_reason, f.run_tags, f.commit_id, f.commit_repo_url,
+    f.hardware_id, a.first_timestamp, a.last_timestamp, a.result_count,
+    a.error_count
+FROM (
+    SELECT DISTINCT ON (run_id)
+        run_id, run_reason, run_tags, commit_id, commit_repo_url, hardware_id
+    FROM benchmark_result
+    ORDER BY run_id, timestamp
+) f
+JOIN (
+    SELECT
+        run_id,
+        min(timestamp) AS first_timestamp,
+        max(timestamp) AS last_timestamp,
+        count(*) AS result_count,
+        count(*) FILTER (
+            WHERE unit IS NULL
+            OR data IS NULL
+            OR (error IS NOT NULL AND error != 'null'::jsonb)
+            OR cardinality(data) = 0
+            OR array_position(data, NULL) IS NOT NULL
+        ) AS error_count
+    FROM benchmark_result
+    GROUP BY run_id
+) a ON a.run_id = f.run_id
+"""
+
+
+def upgrade():
+    op.create_table(
+        "run",
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("reason", sa.Text(), nullable=True),
+        sa.Column("tags", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("commit_id", sa.String(length=50), nullable=True),
+        sa.Column("commit_repo_url", sa.Text(), nullable=False),
+        sa.Column("hardware_id", sa.String(length=50), nullable=False),
+        sa.Column("first_timestamp", sa.DateTime(timezone=False), nullable=False),
+        sa.Column("last_timestamp", sa.DateTime(timezone=False), nullable=False),
+        sa.Column("result_count", sa.Integer(), nullable=False),
+        sa.Column("error_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["commit_id"], ["commit.id"]),
+        sa.ForeignKeyConstraint(["hardware_id"], ["hardware.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("run_first_timestamp_index", "run", ["first_timestamp"])
+    op.create_index("run_commit_id_index", "run", ["commit_id"])
+
+    op.execute(_BACKFILL_SQL)
+
+
+def downgrade():
+    op.drop_index("run_commit_id_index", table_name="run")
+    op.drop_index("run_first_timestamp_index", table_name="run")
+    op.drop_table("run")
@@ -0,0 +1,38 @@
+"""add_idempotency_key
+
+Revision ID: c4f1a9e27b3d
+Revises: 99895af5dae2
+Create Date: 2026-10-19 09:15:04.118391
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4f1a9e27b3d"
+down_revision = "99895af5dae2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "benchmark_result", sa.Column("idempotency_key", sa.Text(), nullable=True)
+    )
+    op.create_index(
+        "benchmark_result_idempotency_key_idx",
+        "benchmark_result",
+        ["idempotency_key"],
+        unique=True,
+        postgresql_where=sa.text("idempotency_key IS NOT NULL"),
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "benchmark_result_idempotency_key_idx",
+        table_name="benchmark_result",
+        postgresql_where=sa.text("idempotency_key IS NOT NULL"),
+    )
+    op.drop_column("benchmark_result", "idempotency_key")
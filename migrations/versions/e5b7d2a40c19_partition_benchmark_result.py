@@ -0,0 +1,238 @@
+"""partition_benchmark_result
+
+Revision ID: e5b7d2a40c19
+Revises: c4f1a9e27b3d
+Create Date: 2026-10-19 10:02:41.530172
+
+Convert `benchmark_result` into a table partitioned by RANGE (timestamp), see
+conbench/partitions.py for the partition layout. Rows are copied over in
+batches, one transaction per batch (this can take a while for large tables;
+stop Conbench while this migration runs). If the migration is interrupted
+while copying, running it again resumes copying.
+
+The partial indexes with hard-coded dates are replaced by plain indexes, and
+the primary key becomes (id, timestamp) (required: a unique constraint on a
+partitioned table must include the partition key).
+"""
+
+import datetime
+import logging
+
+import sqlalchemy as sa
+from alembic import op
+
+log = logging.getLogger(__name__)
+
+# revision identifiers, used by Alembic.
+revision = "e5b7d2a40c19"
+down_revision = "c4f1a9e27b3d"
+branch_labels = None
+depends_on = None
+
+
+PARTITIONS_START = datetime.date(2023, 6, 1)
+MONTHS_AHEAD = 3
+
+# Rows copied per transaction.
+COPY_BATCH_ROWS = 50000
+
+OLD_INDEXES = [
+    "benchmark_result_batch_id_index",
+    "benchmark_result_case_id_index",
+    "benchmark_result_commit_id_index",
+    "benchmark_result_context_id_index",
+    "benchmark_result_history_fingerprint_index",
+    "benchmark_result_id_idx",
+    "benchmark_result_idempotency_key_idx",
+    "benchmark_result_info_id_index",
+    "benchmark_result_run_id_index",
+    "benchmark_result_run_id_timestamp_idx",
+    "benchmark_result_run_reason_id_idx",
+    "benchmark_result_timestamp_index",
+]
+
+FOREIGN_KEYS = [
+    ("case_id", '"case"'),
+    ("info_id", "info"),
+    ("context_id", "context"),
+    ("commit_id", "commit"),
+    ("hardware_id", "hardware"),
+]
+
+
+def _add_months(d, n):
+    months = d.year * 12 + (d.month - 1) + n
+    return datetime.date(months // 12, months % 12 + 1, 1)
+
+
+def _monthly_partitions():
+    today = datetime.date.today()
+    horizon = _add_months(datetime.date(today.year, today.month, 1), MONTHS_AHEAD)
+    month = PARTITIONS_START
+    while month <= horizon:
+        nxt = _add_months(month, 1)
+        yield f"benchmark_result_p{month.year:04d}_{month.month:02d}", month, nxt
+        month = nxt
+
+
+def _create_indexes(table):
+    op.execute(f"CREATE INDEX benchmark_result_case_id_index ON {table} (case_id)")
+    op.execute(f"CREATE INDEX benchmark_result_batch_id_index ON {table} (batch_id)")
+    op.execute(f"CREATE INDEX benchmark_result_info_id_index ON {table} (info_id)")
+    op.execute(
+        f"CREATE INDEX benchmark_result_context_id_index ON {table} (context_id)"
+    )
+    op.execute(f"CREATE INDEX benchmark_result_timestamp_index ON {table} (timestamp)")
+    op.execute(
+        "CREATE INDEX benchmark_result_history_fingerprint_index "
+        f"ON {table} (history_fingerprint)"
+    )
+    op.execute(f"CREATE INDEX benchmark_result_commit_id_index ON {table} (commit_id)")
+    op.execute(
+        f"CREATE INDEX benchmark_result_run_reason_id_idx ON {table} (run_reason, id)"
+    )
+    op.execute(
+        "CREATE INDEX benchmark_result_run_id_timestamp_idx "
+        f"ON {table} (run_id, timestamp)"
+    )
+
+
+def _copy_rows_in_batches(src, dst):
+    """
+    Copy all rows from `src` to `dst`, in batches of COPY_BATCH_ROWS rows
+    (keyset-paginated by id), committing after each batch. Rows already in
+    `dst` are assumed to be the ones with the smallest ids (resume after an
+    interruption).
+    """
+    conn = op.get_bind()
+    last_id = conn.execute(sa.text(f"SELECT max(id) FROM {dst}")).scalar() or ""
+    n_total = 0
+    with op.get_context().autocommit_block():
+        while True:
+            last_id_in_batch, n = conn.execute(
+                sa.text(
+                    f"WITH batch AS (SELECT * FROM {src} WHERE id > :last_id "
+                    "ORDER BY id LIMIT :limit), "
+                    f"ins AS (INSERT INTO {dst} SELECT * FROM batch) "
+                    "SELECT max(id), count(*) FROM batch"
+                ),
+                {"last_id": last_id, "limit": COPY_BATCH_ROWS},
+            ).one()
+            if n == 0:
+                break
+            last_id = last_id_in_batch
+            n_total += n
+            log.info("copied %s rows from %s to %s", n_total, src, dst)
+
+
+def upgrade():
+    conn = op.get_bind()
+    resuming = (
+        conn.execute(
+            sa.text("SELECT to_regclass('benchmark_result_unpartitioned')")
+        ).scalar()
+        is not None
+    )
+    if not resuming:
+        _create_partitioned_table()
+
+    _copy_rows_in_batches("benchmark_result_unpartitioned", "benchmark_result")
+    op.execute("DROP TABLE benchmark_result_unpartitioned")
+
+    # Build indexes after having copied the data (faster).
+    _create_indexes("benchmark_result")
+    op.execute(
+        "CREATE UNIQUE INDEX benchmark_result_idempotency_key_idx "
+        "ON benchmark_result (idempotency_key, timestamp) "
+        "WHERE idempotency_key IS NOT NULL"
+    )
+    op.execute("ANALYZE benchmark_result")
+
+
+def _create_partitioned_table():
+    op.execute("ALTER TABLE benchmark_result RENAME TO benchmark_result_unpartitioned")
+    op.execute(
+        "ALTER TABLE benchmark_result_unpartitioned "
+        "RENAME CONSTRAINT benchmark_result_pkey TO benchmark_result_unpartitioned_pkey"
+    )
+    for name in OLD_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    # Same columns (same order) and CHECK constraints as before.
+    op.execute(
+        "CREATE TABLE benchmark_result (LIKE benchmark_result_unpartitioned "
+        "INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (timestamp)"
+    )
+    op.execute(
+        "ALTER TABLE benchmark_result "
+        "ADD CONSTRAINT benchmark_result_pkey PRIMARY KEY (id, timestamp)"
+    )
+    for column, reftable in FOREIGN_KEYS:
+        op.execute(
+            f"ALTER TABLE benchmark_result ADD CONSTRAINT benchmark_result_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES {reftable}(id)"
+        )
+
+    op.execute(
+        "CREATE TABLE benchmark_result_legacy PARTITION OF benchmark_result "
+        f"FOR VALUES FROM (MINVALUE) TO ('{PARTITIONS_START}')"
+    )
+    for name, lo, hi in _monthly_partitions():
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF benchmark_result "
+            f"FOR VALUES FROM ('{lo}') TO ('{hi}')"
+        )
+    op.execute(
+        "CREATE TABLE benchmark_result_default PARTITION OF benchmark_result DEFAULT"
+    )
+
+
+def downgrade():
+    op.execute("ALTER TABLE benchmark_result RENAME TO benchmark_result_partitioned")
+    op.execute(
+        "ALTER TABLE benchmark_result_partitioned "
+        "RENAME CONSTRAINT benchmark_result_pkey TO benchmark_result_partitioned_pkey"
+    )
+    for name in OLD_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.execute(
+        "CREATE TABLE benchmark_result (LIKE benchmark_result_partitioned "
+        "INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    _copy_rows_in_batches("benchmark_result_partitioned", "benchmark_result")
+    # Dropping the partitioned table drops all partitions.
+    op.execute("DROP TABLE benchmark_result_partitioned")
+
+    op.execute(
+        "ALTER TABLE benchmark_result "
+        "ADD CONSTRAINT benchmark_result_pkey PRIMARY KEY (id)"
+    )
+    for column, reftable in FOREIGN_KEYS:
+        op.execute(
+            f"ALTER TABLE benchmark_result ADD CONSTRAINT benchmark_result_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES {reftable}(id)"
+        )
+
+    _create_indexes("benchmark_result")
+    op.execute(
+        "CREATE INDEX benchmark_result_run_id_index ON benchmark_result (run_id)"
+    )
+    op.execute(
+        "CREATE INDEX benchmark_result_id_idx ON benchmark_result (id) "
+        "WHERE timestamp >= '2023-06-03'"
+    )
+    op.execute("DROP INDEX benchmark_result_run_reason_id_idx")
+    op.execute(
+        "CREATE INDEX benchmark_result_run_reason_id_idx ON benchmark_result "
+        "(run_reason, id) WHERE timestamp >= '2023-06-03'"
+    )
+    op.execute("DROP INDEX benchmark_result_run_id_timestamp_idx")
+    op.execute(
+        "CREATE INDEX benchmark_result_run_id_timestamp_idx ON benchmark_result "
+        "(run_id, timestamp) WHERE timestamp >= '2023-11-19'"
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX benchmark_result_idempotency_key_idx "
+        "ON benchmark_result (idempotency_key) WHERE idempotency_key IS NOT NULL"
+    )